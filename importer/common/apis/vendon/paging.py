@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+
+    Concurrent paging of Vendon API.
+
+    First page is fetched alone, total number of records and page size are read from its "paging" block
+    ({"total": 1200, "limit": 500}), offsets of remaining pages are fetched concurrently. Requests are rate limited
+    (requests per second shared by all fetch threads) and pages are returned in offset order, only a few pages
+    are fetched ahead of consumer, so pages are processed while they are downloaded and are not collected in memory.
+
+"""
+
+
+class RateLimiter(object):
+    """
+    Thread safe limit of calls per second, calls are spread evenly (one call every 1 / rate seconds).
+    """
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.next_call = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = self.clock()
+            wait = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if wait > 0:
+            self.sleep(wait)
+
+
+def page_offsets(paging, offset=0):
+    """
+
+    :param paging: "paging" block of page on offset ({"total": number of records, "limit": page size})
+    :param offset: offset of page
+    :return: offsets of following pages
+    """
+    return list(range(offset + paging['limit'], paging['total'], paging['limit']))
+
+
+def fetch_pages(fetch_page, offset=0, workers=1, rate_limiter=None):
+    """
+
+    :param fetch_page: function offset -> page response ({"result": [...], "paging": {...}})
+    :param offset: offset of first page (resume of interrupted fetch)
+    :param workers: number of concurrent requests
+    :param rate_limiter: RateLimiter of requests
+    :return: generator of (offset of next page, list of page records) in offset order
+    """
+    def fetch(page_offset):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return fetch_page(page_offset)
+
+    first_page = fetch(offset)
+    offsets = page_offsets(first_page['paging'], offset)
+    next_offsets = offsets[1:] + [first_page['paging']['total']]
+    yield (offsets[0] if offsets else first_page['paging']['total']), first_page['result']
+    if not offsets:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(offsets)))) as executor:
+        # Pages fetched ahead of consumer are limited, executor.map would fetch all pages at once
+        ahead = 2 * max(1, workers)
+        pending = [executor.submit(fetch, page_offset) for page_offset in offsets[:ahead]]
+        submitted = len(pending)
+        for next_offset in next_offsets:
+            page = pending.pop(0).result()
+            if submitted < len(offsets):
+                pending.append(executor.submit(fetch, offsets[submitted]))
+                submitted += 1
+            yield next_offset, page['result']
@@ -1,12 +1,14 @@
+import json
 import sys
 
 import requests
 import time
-import copy
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 from common.logging.setup import logger
 
+from common.apis.vendon.paging import RateLimiter, fetch_pages
 from common.mixin.vends_mixin import (MainVendProcessLogger, create_elastic_hash)
 from database.cloud_database.core.query import CustomUserQueryOnCloud
 from database.company_database.core.company_parameters import CompanyParameters
@@ -33,8 +35,9 @@ vend_queue = Queue(
     routing_key="{}".format(ValidationEnum.VEND_VALIDATION_API_Q_KEY.value)
 )
 
-vend_queue.maybe_bind(conn)
-vend_queue.declare()
+
+# Checkpoint of interrupted scheduled vends fetch (company parameter)
+VENDS_CHECKPOINT_KEY = 'vendon_fetch_checkpoint_vends'
 
 
 class VendonApiException(Exception):
@@ -52,41 +55,45 @@ class VendonApiHandler(object):
 
         self.url = CompanyParameters.get_parameter(self.company_id, 'vendon_base_url') + "/" + str.lstrip(endpoint)
         self.api_key = CompanyParameters.get_parameter(self.company_id,'vendon_api_key')
+        self.workers = int(CompanyParameters.get_parameter(self.company_id, 'vendon_fetch_workers', 4))
+        self.rate_limiter = RateLimiter(
+            float(CompanyParameters.get_parameter(self.company_id, 'vendon_requests_per_second', 4)))
 
-    def fetch_data(self, query_params=None):
+        # Keep-alive connections are reused by all pages (and fetch threads) of handler
+        self.session = requests.Session()
+        self.session.mount(self.url, HTTPAdapter(pool_connections=1, pool_maxsize=self.workers))
+        self.session.headers['Authorization'] = 'Token ' + self.api_key
 
-        result_set = []
-        fetch_complete = False
-        records_fetched = 0
-        offset = 0
-        headers = {'Authorization': 'Token ' + self.api_key}
-
-        while fetch_complete is False:
-
-            try:
-                response = requests.get(self.url, params=query_params, headers=headers, timeout=60)
-            except Exception as e:
-                raise VendonApiException("Network error:" + str(e))
+    def fetch_page(self, query_params, offset):
+        params = dict(query_params or {})
+        if offset:
+            params['offset'] = offset
 
-            if response.status_code != 200:
-                raise VendonApiException("Vendon API communication error:" + response.text)
+        try:
+            response = self.session.get(self.url, params=params, timeout=60)
+        except Exception as e:
+            raise VendonApiException("Network error:" + str(e))
 
-            results = response.json()
+        if response.status_code != 200:
+            raise VendonApiException("Vendon API communication error:" + response.text)
 
-            result_set.extend(results["result"])
+        return response.json()
 
-            paging_info = results['paging']
-            total_records = paging_info['total']
-            limit = paging_info['limit']
+    def fetch_pages(self, query_params=None, offset=0):
+        """
 
-            if total_records - offset > limit:
-                offset += limit
-                query_params["offset"] = offset
-                records_fetched += offset
-            else:
-                fetch_complete = True
-                records_fetched += total_records - offset
+        :param query_params: query parameters of API endpoint
+        :param offset: offset of first page (resume of interrupted fetch)
+        :return: generator of (offset of next page, list of page records) in offset order
+        """
+        return fetch_pages(
+            lambda page_offset: self.fetch_page(query_params, page_offset), offset, self.workers, self.rate_limiter
+        )
 
+    def fetch_data(self, query_params=None):
+        result_set = []
+        for _, results in self.fetch_pages(query_params):
+            result_set.extend(results)
         return result_set
 
 
@@ -96,6 +103,11 @@ class VendonVendsFetcher(VendonApiHandler):
         super().__init__(company_id=company_id, endpoint='stats/vends')
         self.interval_seconds = int(CompanyParameters.get_parameter(self.company_id, 'vendon_interval_minutes_vends'))*60
         self.delay = int(CompanyParameters.get_parameter(self.company_id, 'vendon_delay_minutes_vends', 15))*60
+        self.max_interval_seconds = int(CompanyParameters.get_parameter(
+            self.company_id, 'vendon_max_window_minutes_vends', min(1440, 10 * self.interval_seconds // 60)))*60
+        # Vends of job are published in one message unless batch size is set
+        publish_batch_vends = CompanyParameters.get_parameter(self.company_id, 'vendon_publish_batch_vends')
+        self.publish_batch_vends = int(publish_batch_vends) if publish_batch_vends else None
 
 
 class VendonMachinesFetcher(VendonApiHandler):
@@ -126,8 +138,15 @@ class VendonApiJob:
         """
         :return: created main elastic process
         """
-        self.elastic_hash = create_elastic_hash(company_id=self.company_id, import_type=self.import_type,
-                                                import_request_type=self.request_type)
+        return self.use_elastic_process(create_elastic_hash(
+            company_id=self.company_id, import_type=self.import_type, import_request_type=self.request_type))
+
+    def use_elastic_process(self, elastic_hash):
+        """
+        :param elastic_hash: main elastic process of job (new or process of interrupted job)
+        :return: True if process is set
+        """
+        self.elastic_hash = elastic_hash
         if not self.elastic_hash:
             return False
 
@@ -194,7 +213,44 @@ class VendonVendsApiJob(VendonApiJob):
         self.skipped_vends = 0
         self.vends_fetcher = VendonVendsFetcher(self.company_id)
 
+    def get_checkpoint(self):
+        """
+
+        :return: checkpoint of interrupted scheduled fetch ({"from_timestamp", "to_timestamp", "offset",
+        "elastic_hash", "published_batches", "last_published"}) or None
+        """
+        checkpoint = CompanyParameters.get_parameter(self.company_id, VENDS_CHECKPOINT_KEY)
+        if not checkpoint:
+            return None
+        try:
+            return json.loads(checkpoint)
+        except ValueError:
+            logger.error("Invalid Vendon fetch checkpoint of company {}: {}".format(self.company_id, checkpoint))
+            return None
+
+    def save_checkpoint(self, start_time, end_time, offset, elastic_hash=None, published_batches=0,
+                        last_published=False):
+        """
+
+        :param offset: offset of next page
+        :param elastic_hash: main elastic process of job, resumed fetch continues it (None if job has failed)
+        :param published_batches: number of published batches of job
+        :param last_published: last batch (is_last) of job is published
+        """
+        CompanyParameters.set_parameter(self.company_id, VENDS_CHECKPOINT_KEY, json.dumps({
+            "from_timestamp": start_time, "to_timestamp": end_time, "offset": offset, "elastic_hash": elastic_hash,
+            "published_batches": published_batches, "last_published": last_published
+        }))
+
+    def clear_checkpoint(self):
+        CompanyParameters.delete_parameter(self.company_id, VENDS_CHECKPOINT_KEY)
+
     def get_scheduled_timestamps(self):
+        checkpoint = self.get_checkpoint()
+        if checkpoint is not None:
+            # Resume interrupted fetch of same window
+            return int(checkpoint["from_timestamp"]), int(checkpoint["to_timestamp"])
+
         end_time = int(time.time()) - self.vends_fetcher.delay
         last_timestamp = CompanyParameters.get_parameter(self.company_id, "vendon_last_fetched_timestamp_vends")
 
@@ -202,18 +258,46 @@ class VendonVendsApiJob(VendonApiJob):
             start_time = end_time - self.vends_fetcher.interval_seconds
         else:
             start_time = int(last_timestamp) + 1
-            max_interval = min(86400, 10 * self.vends_fetcher.interval_seconds)
+            max_interval = self.vends_fetcher.max_interval_seconds
             if (end_time - start_time) > max_interval:
                 # API rate control
                 end_time = start_time + max_interval
         return start_time, end_time
 
-    def fetch_vends(self, start_time, end_time, machine_id=None, cli_output=False):
-        hash_success = self.generate_elastic_process()
+    def fetch_vends(self, start_time, end_time, machine_id=None, cli_output=False, resumable=False):
+        """
+        Pages of vends are transformed while they are fetched and transformed vends are published in one message
+        or in batches of vendon_publish_batch_vends (if it's set). Every message has batch_no (from 1) and is_last,
+        job is finished by validator of last batch. With resumable fetch, checkpoint (offset of next page, elastic
+        process and number of published batches) is saved after every published batch and interrupted fetch of same
+        window continues from it in same elastic process, so process is finished by its last batch. Process of
+        failed job isn't continued, next fetch continues from offset with new elastic process.
+        """
+        checkpoint = self.get_checkpoint() if resumable else None
+        if checkpoint is not None and (int(checkpoint["from_timestamp"]), int(checkpoint["to_timestamp"])) \
+                != (int(start_time), int(end_time)):
+            checkpoint = None
+
+        offset = 0
+        published_batches = 0
+        if checkpoint is not None:
+            if checkpoint.get("last_published"):
+                # Interrupted after last batch, job is finished by validator
+                return True
+            offset = int(checkpoint["offset"])
+
+        if checkpoint is not None and checkpoint.get("elastic_hash"):
+            hash_success = self.use_elastic_process(checkpoint["elastic_hash"])
+            published_batches = int(checkpoint.get("published_batches", 0))
+        else:
+            hash_success = self.generate_elastic_process()
 
         if not hash_success:
             return False
 
+        if resumable:
+            self.save_checkpoint(start_time, end_time, offset, self.elastic_hash, published_batches)
+
         try:
             self.transformation_errors.clear()
 
@@ -233,28 +317,51 @@ class VendonVendsApiJob(VendonApiJob):
                 elastic_hash=self.elastic_hash
             )
 
-            vends = self.vends_fetcher.fetch_data(query_params)
+            fetched_vends = 0
+            published_vends = 0
+            transformed_vends = []
+
+            try:
+                for next_offset, vends in self.vends_fetcher.fetch_pages(query_params, offset):
+                    fetched_vends += len(vends)
+                    transformed_vends.extend(self._transform_vends(vends))
+
+                    if self.vends_fetcher.publish_batch_vends and \
+                            len(transformed_vends) >= self.vends_fetcher.publish_batch_vends:
+                        self._send_data_for_queue(transformed_vends, published_batches + 1, False)
+                        published_vends += len(transformed_vends)
+                        published_batches += 1
+                        transformed_vends = []
+                        # Skipped vends are reported with batch in which they were skipped
+                        self.skipped_vends = 0
+                        offset = next_offset
+                        if resumable:
+                            self.save_checkpoint(start_time, end_time, offset, self.elastic_hash, published_batches)
+            except VendonApiFatalTransformException as e:
+                self._fail_job(EnumValidationMessage.VENDON_TRANSFORM_ERROR_FATAL, e)
+                self._fail_checkpoint(start_time, end_time, offset, resumable)
+                return False
 
             self.general_process_logger.update_general_process_flow(
-                len(vends),
+                fetched_vends,
                 status=EnumErrorType.IN_PROGRESS.name,
                 key_enum=EnumValidationMessage.VENDON_VENDS_END_REQUEST.value,
                 elastic_hash=self.elastic_hash
             )
+            self._log_transformation_errors()
 
-            try:
-                transformed_vends = self._transform_vends(vends)
-            except VendonApiFatalTransformException as e:
-                self._fail_job(EnumValidationMessage.VENDON_TRANSFORM_ERROR_FATAL, e)
-                return False
-
-            self._send_data_for_queue(transformed_vends)
+            # Last batch is published even if it's empty, it finishes job (also job resumed after last full batch)
+            self._send_data_for_queue(transformed_vends, published_batches + 1, True)
+            published_vends += len(transformed_vends)
+            if resumable:
+                self.save_checkpoint(start_time, end_time, offset, self.elastic_hash, published_batches + 1, True)
 
             if cli_output:
-                print("Vends fetched -> {}".format(len(transformed_vends)))
+                print("Vends fetched -> {}".format(published_vends))
 
         except VendonApiException as e:
             self._fail_job(EnumValidationMessage.VENDON_API_ERROR, e)
+            self._fail_checkpoint(start_time, end_time, offset, resumable)
             return False
         except Exception as e:
 
@@ -262,10 +369,19 @@ class VendonVendsApiJob(VendonApiJob):
                                                                key_enum=EnumValidationMessage.VENDON_UNKNOWN_ERROR_DETAILED.value,
                                                                logs_level=EnumErrorType.ERROR.name)
             self._fail_job(EnumValidationMessage.VENDON_UNKNOWN_ERROR, "")
+            self._fail_checkpoint(start_time, end_time, offset, resumable)
             return False
 
         return True
 
+    def _fail_checkpoint(self, start_time, end_time, offset, resumable):
+        """
+        Elastic process of failed job is finished with error, next fetch of window continues from offset of next
+        page with new process.
+        """
+        if resumable:
+            self.save_checkpoint(start_time, end_time, offset)
+
     transformation_errors = {}
 
     def _update_dict_count(self, key):
@@ -273,7 +389,12 @@ class VendonVendsApiJob(VendonApiJob):
             self.transformation_errors[key] = 1
         self.transformation_errors[key] += 1
 
-    def _send_data_for_queue(self, transformed_vends):
+    def _send_data_for_queue(self, transformed_vends, batch_no=1, is_last=True):
+        """
+
+        :param batch_no: number of batch in job (from 1)
+        :param is_last: last batch of job
+        """
         vend_api_message = {"company_id": self.company_id,
                             "language": self.language,
                             "token": self.token,
@@ -281,7 +402,9 @@ class VendonVendsApiJob(VendonApiJob):
                             "import_type": self.import_type,
                             'data': transformed_vends,
                             'skipped_vends': self.skipped_vends,
-                            'email': self.email
+                            'email': self.email,
+                            'batch_no': batch_no,
+                            'is_last': is_last
                             }
         try:
             vend_producer.publish(vend_api_message, retry=True)
@@ -345,6 +468,9 @@ class VendonVendsApiJob(VendonApiJob):
 
             transformed_list.append(transformed_vend)
 
+        return transformed_list
+
+    def _log_transformation_errors(self):
         if len(self.transformation_errors):
             self.general_process_logger.update_general_process_flow(
                 self.transformation_errors,
@@ -353,8 +479,6 @@ class VendonVendsApiJob(VendonApiJob):
                 elastic_hash=self.elastic_hash
             )
 
-        return transformed_list
-
     def _fetch_machines(self):
         self.machines = {}
         machines_fetcher = VendonMachinesFetcher(self.company_id)
@@ -4,12 +4,15 @@ from datetime import datetime
 from time import sleep
 from apscheduler.schedulers.blocking import BlockingScheduler as Scheduler
 from common.mixin.validation_const import ImportType
+from core.bootstrap import bootstrap
 
 from database.cloud_database.core.company_query import CloudLocalDatabaseSync
 from database.company_database.core.query_export import ExportEmailHistory
 
 from common.mixin.mixin import generate_hash_for_json
 from common.validators.csv.csv_validator import CsvFileValidatorRemote
+from common.mixin.ftp import remote_file_pool
+from common.mixin.handle_file import ImportProcessHandler
 from common.logging.setup import logger
 from common.email.send_email import send_email_on_general_error
 from common.email.csv_error_email_list import get_list_of_emails_in_case_of_csv_error
@@ -29,6 +32,11 @@ def sync_importer_with_cloud():
     CloudLocalDatabaseSync.update_main_importer_status_on_cloud()
 
 
+def dispatch_parked_imports():
+    # Parked imports of companies whose running import process expired without finish
+    ImportProcessHandler.dispatch_parked_import_processes()
+
+
 def export_emails():
     logger.info('<<< Cron export query started.')
     cron_export = CloudLocalDatabaseSync.setup_cron_job()
@@ -228,12 +236,18 @@ def scheduler_cloud_jobs(sched):
 
 
 def main():
+    bootstrap()
+
+    # FTP/SFTP sessions stay open between jobs of same company
+    remote_file_pool.enable_reuse()
+
     # Start the scheduler
     scheduler = Scheduler()
 
     # Schedules job_function to be run once each second
     scheduler.add_job(run_sync_with_cloud, 'interval', seconds=5)
     scheduler.add_job(sync_importer_with_cloud, 'interval', seconds=120)
+    scheduler.add_job(dispatch_parked_imports, 'interval', seconds=60)
     scheduler.add_job(scheduler_cloud_jobs, 'interval', seconds=5, args=[scheduler])
 
     scheduler.start()
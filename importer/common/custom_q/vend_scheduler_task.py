@@ -3,8 +3,10 @@ from common.mixin.validation_const import ImportType, return_import_type_name
 from database.cloud_database.core.company_query import CloudLocalDatabaseSync
 from database.company_database.core.company_parameters import CompanyParameters
 from common.mixin.mixin import generate_hash_for_json
+from core.bootstrap import bootstrap
 from common.logging.setup import logger
 from common.validators.vend_importer_validator.cpi_vend_processing import GetRemoteVendData
+from common.mixin.ftp import remote_file_pool
 from common.apis.vendon.vendon_api_handler import VendonVendsApiJob
 
 
@@ -176,9 +178,10 @@ def execute_vendon_api(company_id, data):
     try:
         vends_fetcher_job = VendonVendsApiJob(company_id, data['vendon_user_id'])
         start_time, end_time = vends_fetcher_job.get_scheduled_timestamps()
-        job_successful = vends_fetcher_job.fetch_vends(start_time, end_time)
+        job_successful = vends_fetcher_job.fetch_vends(start_time, end_time, resumable=True)
         if job_successful:
             CompanyParameters.set_parameter(company_id, "vendon_last_fetched_timestamp_vends", end_time)
+            vends_fetcher_job.clear_checkpoint()
 
         return job_successful
     except Exception as e:
@@ -237,6 +240,11 @@ def scheduler_api_jobs(sched):
 
 
 def main():
+    bootstrap()
+
+    # FTP/SFTP sessions stay open between jobs of same company
+    remote_file_pool.enable_reuse()
+
     # Start the scheduler
     scheduler = Scheduler()
 
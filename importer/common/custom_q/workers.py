@@ -27,17 +27,27 @@ queue = Queue(
     routing_key="{}".format(ValidationEnum.CUSTOM_Q_PUBLISHER.value)
 )
 
-queue.maybe_bind(conn)
-queue.declare()
+channel_conn = None
 
-pika_connection = pika.BlockingConnection(pika.ConnectionParameters(
-            host='localhost',
-            port=5672,
-            credentials=pika.credentials.PlainCredentials('guest', 'guest'),
-        ))
 
-channel_conn = pika_connection.channel()
-channel_conn.basic_qos(prefetch_size=0, prefetch_count=1, global_qos=False, callback=None)
+def get_channel_conn():
+    """
+    Queue is declared and pika channel is opened on first use, not on import.
+    """
+    global channel_conn
+    if channel_conn is None:
+        queue.maybe_bind(conn)
+        queue.declare()
+
+        pika_connection = pika.BlockingConnection(pika.ConnectionParameters(
+                    host='localhost',
+                    port=5672,
+                    credentials=pika.credentials.PlainCredentials('guest', 'guest'),
+                ))
+
+        channel_conn = pika_connection.channel()
+        channel_conn.basic_qos(prefetch_size=0, prefetch_count=1, global_qos=False, callback=None)
+    return channel_conn
 
 
 class FillRabbitMQWithCloudProcess(object):
@@ -53,7 +63,7 @@ class FillRabbitMQWithCloudProcess(object):
 
     def run_message(self):
 
-        total_msg = channel_conn\
+        total_msg = get_channel_conn()\
             .queue_declare(queue="{}".format(ValidationEnum.CUSTOM_PUBLISHER.value),
             durable=True, exclusive=False,
             auto_delete=False).method.message_count
@@ -82,19 +92,13 @@ class FillRabbitMQWithCloudProcess(object):
         tr = r.read()
         output_data = json.loads(tr.decode())
 
-        def check_json(input_base):
-            for x in output_data:
-                make_hash_loop = generate_hash_for_json(json.loads(x['payload']))
-                if make_hash_loop == input_base:
-                    return True
-                else:
-                    return False
+        # Hashes of queued cron jobs are computed once, not for every cron job
+        queued_hashes = {generate_hash_for_json(json.loads(x['payload'])) for x in output_data}
 
         query_data = CloudLocalDatabaseSync.setup_cron_job()
         if query_data:
             for cron_job in query_data:
-                what_to_do = check_json(generate_hash_for_json(cron_job))
-                if not what_to_do:
+                if generate_hash_for_json(cron_job) not in queued_hashes:
                     producer.publish(
                         cron_job, retry=True, headers={
                             "x-message-ttl": int(cron_job['cron_time'])*10
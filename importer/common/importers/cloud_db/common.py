@@ -1,8 +1,11 @@
-from io import StringIO
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from common.importers.cloud_db.entity_index import CloudEntityIndex
 from common.mixin.validation_const import ImportAction
 from common.mixin.enum_errors import EnumValidationMessage as Const
-from database.cloud_database.common.common import get_cloud_connection_safe
+from database.cloud_database.common.common import (cloud_unit_of_work, export_unit_of_work_snapshot,
+                                                   get_cloud_connection_safe)
 from database.cloud_database.connection.connection import cloud_database_engine
 
 
@@ -16,6 +19,15 @@ select * from import.create_staging_table(
     p_dry_run := false
     );"""
 
+COPY_TO_TABLE = """
+COPY {} ({}) FROM STDIN WITH (FORMAT csv, DELIMITER ';', NULL '{}')
+"""
+
+# Field value written as NULL in COPY
+COPY_NULL = '/N'
+# Bytes of COPY data sent to database at once
+COPY_CHUNK_SIZE = 64 * 1024
+
 CREATE_INDICES = """
 select * from import.generate_seq_vals(
     p_sequence_schema := '{}',
@@ -76,6 +88,86 @@ def get_upsert_if_needed(action, entity_id, alive_ids):
     return action, action.value
 
 
+def timed_query(query, *args):
+    start = time.perf_counter()
+    result = query(*args)
+    return result, time.perf_counter() - start
+
+
+def prefetch_cloud_data(queries):
+    """
+    Run independent cloud queries concurrently, every query runs on own cloud connection from engine pool. In
+    cloud_unit_of_work snapshot of unit of work is exported and every query connection imports it, so all queries
+    see same data as unit of work.
+    :param queries: dict of query name -> (query method, query args)
+    :return: dict of query results by name & dict of query duration in seconds by name
+    """
+    snapshot_id = export_unit_of_work_snapshot()
+
+    def snapshot_query(query, *args):
+        if snapshot_id is None:
+            return timed_query(query, *args)
+        with cloud_unit_of_work(snapshot_id=snapshot_id):
+            return timed_query(query, *args)
+
+    results = {}
+    timings = {}
+    with ThreadPoolExecutor(max_workers=len(queries) or 1) as executor:
+        futures = {name: executor.submit(snapshot_query, query, *args) for name, (query, args) in queries.items()}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+    return results, timings
+
+
+def get_ref_obj_dict(fields, ref_objects):
+    """
+    :param fields: names of referenced fields
+    :param ref_objects: ImportObjects
+    :return: dict of tuple of field values -> ImportObject (last object with values)
+    """
+    ref_dict = {}
+    for obj in ref_objects:
+        value_tuple = tuple(obj.fields[fname].value for fname in fields)
+        ref_dict[value_tuple] = obj
+    return ref_dict
+
+
+def copy_csv_value(value):
+    """
+    :param value: field value
+    :return: value as quoted csv field, COPY_NULL unquoted (NULL in database)
+    """
+    value = str(value)
+    if value == COPY_NULL:
+        return value
+    return '"{}"'.format(value.replace('"', '""'))
+
+
+class CopyRowStream(object):
+    """
+        File-like COPY source, rows are formatted and encoded when database reads next chunk.
+
+        Only chunk of rows is in memory, not whole COPY data.
+    """
+
+    def __init__(self, objects, columns):
+        self.lines = (obj.get_copy_line(columns) for obj in objects)
+        self.buffer = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self.buffer.extend(line)
+
+        if size < 0:
+            size = len(self.buffer)
+        chunk = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return chunk
+
+
 class Field(object):
     def __init__(self, mandatory=False, default=None, value=None, original_value=None):
         if all(is_none(val) for val in (default, value, original_value)):
@@ -172,6 +264,14 @@ class BaseImportObject(object):
 
         return ";".join([str(self.fields[fl]) for fl in field_names])
 
+    def get_copy_line(self, field_names):
+        """
+        :param field_names: COPY columns
+        :return: encoded csv line of COPY data
+        """
+        line = ";".join([copy_csv_value(self.fields[fl]) for fl in field_names])
+        return (line + "\n").encode("utf-8")
+
 
 class BaseImportHandler(object):
     """
@@ -192,6 +292,11 @@ class BaseImportHandler(object):
 
         ImportHandler can't be imported until all ReferenceFields and IdFields have
         populated values.
+
+        Database objects are indexed once per handler (self.db_index, CloudEntityIndex by DB_ID),
+        subclasses use get_db_object and get_missing_db_objects instead of scanning self.db_objects.
+        Rows to insert are indexed by referenced fields on first populate_ref_fields call of the
+        referencing handler (get_insert_index).
     """
 
     DB_TABLE = None
@@ -211,6 +316,8 @@ class BaseImportHandler(object):
         self.validation_database_errors_message = []
         self.external_ids = external_ids
         self.db_objects = self.get_all_objs_from_database(company_id, external_ids)
+        self.db_index = CloudEntityIndex(self.db_objects, id_field=self.DB_ID)
+        self.insert_indexes = {}
 
         action_50 = int(data[0][self.ACTION]) == 50
         if action_50:
@@ -221,10 +328,15 @@ class BaseImportHandler(object):
                 raise InvalidImportData(self.DB_TABLE, errors)
 
     def get_db_object(self, id):
-        for obj in self.db_objects:
-            if obj.get(self.DB_ID) == id and obj.get("alive"):
-                return obj
-        return None
+        return self.db_index.get_alive(id)
+
+    def get_missing_db_objects(self, data):
+        """
+        :param data: import data
+        :return: alive database objects which are not in import data (deleted by action 50 import)
+        """
+        import_ids = set(obj[self.IMPORT_ID] for obj in data)
+        return [db_obj for db_obj in self.db_index.alive if db_obj[self.DB_ID] not in import_ids]
 
     def fill_objects(self, data):
         errors = []
@@ -263,11 +375,9 @@ class BaseImportHandler(object):
             else:
                 self.objs_to_insert.append(row)
 
-        import_ids = [i[self.IMPORT_ID] for i in data]
-        for db_obj in self.db_objects:
-            if db_obj[self.DB_ID] not in import_ids and db_obj['alive']:
-                row = self.IMPORT_TYPE(None, self.company_id, False, db_obj=db_obj)
-                self.objs_to_delete.append(row)
+        for db_obj in self.get_missing_db_objects(data):
+            row = self.IMPORT_TYPE(None, self.company_id, False, db_obj=db_obj)
+            self.objs_to_delete.append(row)
 
     def get_import_operations(self):
         operations = []
@@ -281,7 +391,8 @@ class BaseImportHandler(object):
     def get_available_ids(self):
         num_of_inserts = len(self.objs_to_insert)
 
-        with get_cloud_connection_safe() as conn_cloud:
+        # Reserving ids (sequence) is write, it can't run in read only unit of work
+        with get_cloud_connection_safe(read_only=False) as conn_cloud:
             query = CREATE_INDICES.format("public", self.SEQ_NAME, num_of_inserts)
             ids = conn_cloud.execute(query).fetchall()
         for id in ids:
@@ -298,13 +409,27 @@ class BaseImportHandler(object):
         for obj, id in zip(self.objs_to_insert, all_ids):
             obj.fields["id"].set_id(id)
 
+    def get_insert_index(self, fields):
+        """
+            Index of rows to insert by tuple of field values, built once per fields.
+
+            Call it after all rows to insert are filled (handler __init__), rows added
+            to objs_to_insert later are not indexed.
+        """
+        fields = tuple(fields)
+        if fields not in self.insert_indexes:
+            self.insert_indexes[fields] = get_ref_obj_dict(fields, self.objs_to_insert)
+        return self.insert_indexes[fields]
+
     def populate_ref_fields(self, ref_type, ref_objects):
         """
             Populates values of ReferencedFields
 
             To populate field of IMPORT_TYPE call the function with the ref_type to
             populate and the corresponding ref_objects.
-            ref_objects is a list of ImportObjects of a type you want to reference.
+            ref_objects is a list of ImportObjects of a type you want to reference, or
+            ImportHandler whose rows to insert are referenced (its index of rows is reused
+            by all handlers referencing it).
             ref_objects have to have the ref_field already populated for this to work,
             usually by calling populate_insert_objs_ids on them first.
         """
@@ -313,19 +438,15 @@ class BaseImportHandler(object):
                 if type(field) == ReferenceField and field.ref_type == ref_type:
                     return name, [f[0] for f in field.ref_data]
 
-        def get_ref_obj_dict(fields, ref_objects):
-            ref_dict = {}
-            for obj in ref_objects:
-                value_tuple = tuple(obj.fields[fname].value for fname in fields)
-                ref_dict[value_tuple] = obj
-            return ref_dict
-
         if not self.objs_to_insert:
             return
         ref_field, original_fields = get_ref_field_data(
             ref_type, self.objs_to_insert[0]
         )
-        ref_obj_dict = get_ref_obj_dict(original_fields, ref_objects)
+        if isinstance(ref_objects, BaseImportHandler):
+            ref_obj_dict = ref_objects.get_insert_index(original_fields)
+        else:
+            ref_obj_dict = get_ref_obj_dict(original_fields, ref_objects)
 
         for obj in self.objs_to_insert:
             if obj.fields[ref_field].value is not None:
@@ -378,14 +499,18 @@ class BaseImporter(object):
 
     def save(self):
         session_cloud = cloud_database_engine.connect()
-        conn = session_cloud.connection.connection
-        cursor = conn.cursor()
+        try:
+            conn = session_cloud.connection.connection
+            cursor = conn.cursor()
 
-        for import_handler in self.all_import_handlers:
-            import_stats = self.save_import_data(import_handler, cursor)
-            self.stats[import_handler.DB_TABLE] = import_stats
+            for import_handler in self.all_import_handlers:
+                import_stats = self.save_import_data(import_handler, cursor)
+                self.stats[import_handler.DB_TABLE] = import_stats
 
-        conn.commit()
+            conn.commit()
+        finally:
+            # Not committed data is rolled back when connection is returned to pool
+            session_cloud.close()
 
         return self.get_stats()
 
@@ -398,9 +523,11 @@ class BaseImporter(object):
             return
 
         insert_table_name = """{}.\"{}\"""".format(table[0][0], table[0][1])
+        query = COPY_TO_TABLE.format(
+            insert_table_name, ", ".join(['"%s"' % c for c in columns]), COPY_NULL
+        )
 
-        f = StringIO("\n".join([r.get_str(columns) for r in objects_to_copy]))
-        cursor.copy_from(f, insert_table_name, sep=";", null="/N", columns=columns)
+        cursor.copy_expert(query, CopyRowStream(objects_to_copy, columns), size=COPY_CHUNK_SIZE)
 
     @staticmethod
     def save_import_data(handler, cursor):
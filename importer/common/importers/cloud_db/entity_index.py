@@ -0,0 +1,167 @@
+from collections import Counter, defaultdict
+
+
+class CloudEntityIndex(object):
+    """
+        Hash index over entities fetched from cloud database.
+
+        Build it once per cloud entity fetch and use it for membership checks inside row
+        loops, instead of scanning entity lists for every imported row.
+        Entities are indexed by external id, name and alive flag. Columns (field values) and
+        indexes by other fields are built on first use and reuse entity dicts, entities are not copied.
+    """
+
+    def __init__(self, entities, id_field='ext_id', name_field='name'):
+        self.entities = entities
+        self.id_field = id_field
+        self.name_field = name_field
+        self.alive = []
+        self.alive_ids = set()
+        self.dead_ids = set()
+        self.alive_names = set()
+        self.alive_by_id = {}
+        self.columns = {}
+        self.indexes = {}
+
+        for entity in entities:
+            ext_id = entity.get(id_field)
+            if entity.get('alive'):
+                self.alive.append(entity)
+                self.alive_ids.add(ext_id)
+                self.alive_by_id.setdefault(ext_id, entity)
+                if name_field in entity:
+                    self.alive_names.add(entity[name_field])
+            else:
+                self.dead_ids.add(ext_id)
+
+        # entity with alive and dead rows in database is alive
+        self.dead_ids -= self.alive_ids
+
+    def __len__(self):
+        return len(self.entities)
+
+    def get_alive(self, ext_id):
+        """
+        :return: first alive entity with external id, None if not exists
+        """
+        return self.alive_by_id.get(ext_id)
+
+    def get_alive_and_dead(self, external_ids):
+        """
+        :param external_ids: external ids from import data
+        :return: sets of alive and dead external ids which exist in cloud database
+        """
+        external_ids = set(external_ids)
+        return self.alive_ids & external_ids, self.dead_ids & external_ids
+
+    def column(self, field, alive=True):
+        """
+        :param field: entity field
+        :param alive: only alive entities
+        :return: list of field values in cloud database order
+        """
+        key = (field, alive)
+        if key not in self.columns:
+            entities = self.alive if alive else self.entities
+            self.columns[key] = [entity.get(field) for entity in entities]
+        return self.columns[key]
+
+    def index_by(self, *fields, alive=True):
+        """
+        :param fields: entity fields, key of index is tuple of field values if there is more than one field
+        :param alive: only alive entities
+        :return: dict of key -> list of entities in cloud database order
+        """
+        key = (fields, alive)
+        if key not in self.indexes:
+            index = defaultdict(list)
+            for entity in (self.alive if alive else self.entities):
+                if len(fields) == 1:
+                    index[entity.get(fields[0])].append(entity)
+                else:
+                    index[tuple(entity.get(field) for field in fields)].append(entity)
+            self.indexes[key] = dict(index)
+        return self.indexes[key]
+
+
+class FieldValueIndex(object):
+    """
+        Index of one field values from cloud database, used for field uniqueness checks.
+
+        :param pairs: list of [ext_id, value] pairs
+    """
+
+    def __init__(self, pairs):
+        self.value_count = Counter()
+        self.pair_count = Counter()
+        self.first_ext_id = {}
+
+        for ext_id, value in pairs:
+            self.value_count[value] += 1
+            self.pair_count[(ext_id, value)] += 1
+            self.first_ext_id.setdefault(value, ext_id)
+
+    def exists(self, value, exclude_ext_id=None):
+        """
+        :param value: field value
+        :param exclude_ext_id: don't count value of this entity (entity is updated)
+        :return: True if value is used on other entity in cloud database
+        """
+        count = self.value_count.get(value, 0)
+        if exclude_ext_id is not None and self.pair_count.get((exclude_ext_id, value)):
+            count -= 1
+        return count > 0
+
+    def get_ext_id(self, value):
+        """
+        :return: external id of first entity with field value, None if not exists
+        """
+        return self.first_ext_id.get(value)
+
+
+def check_field_uniqueness(data_from_file, data_from_db):
+    """
+    Check field values for uniqueness
+    1) if creating, must be unique
+    2) if updating must be different than others
+    3) check against data from file, too
+
+    Keyword arguments:
+    data_from_file -- list of lists [[product_id, field_to_check, product_action], ...]
+    data_from_db -- list of lists [[product_id, field_to_check], ...] or FieldValueIndex
+    """
+    if not isinstance(data_from_db, FieldValueIndex):
+        data_from_db = FieldValueIndex(data_from_db)
+    data_from_file_list = [b[1] for b in data_from_file]
+
+    # check uniqueness with data from file
+    not_unique_in_file = []
+    occurrences_in_file = Counter(data_from_file_list)
+    for i in occurrences_in_file:
+        if i not in (None, '', '<null>') and occurrences_in_file[i] > 1:
+            not_unique_in_file.append(i)
+
+    # check uniqueness with data from db
+    not_unique_with_db = []
+    not_unique_with_db_check = set()
+    for j in data_from_file:
+        product_id = j[0]
+        value = j[1]
+        action = int(j[2])
+
+        if value in (None, '', '<null>') or value in not_unique_with_db_check:
+            continue
+
+        # create product action
+        if action == 0:
+            value_exists = data_from_db.exists(value)
+        elif action == 1: # update action, don't check against value of updated product
+            value_exists = data_from_db.exists(value, exclude_ext_id=product_id)
+        else:
+            value_exists = False
+
+        if value_exists:
+            not_unique_with_db.append(value)
+            not_unique_with_db_check.add(value)
+
+    return not_unique_in_file, not_unique_with_db
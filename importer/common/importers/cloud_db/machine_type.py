@@ -71,16 +71,16 @@ class MachineTypeImportHandler(BaseImportHandler):
             else:
                 self.objs_to_insert.append(row)
 
-        import_ids = [i[self.IMPORT_ID] for i in data]
-        for db_obj in self.db_objects:
-            if db_obj[self.DB_ID] not in import_ids and db_obj['alive']:
-                row = self.IMPORT_TYPE(None, self.company_id, False, db_obj=db_obj)
-                if db_obj['name'] not in self.external_ids or db_obj['ext_id'] not in self.external_ids:
-                    if not db_obj['is_default']:
-                        self.objs_to_delete.append(row)
-                else:
-                    self.validation_database_errors_count += 1
-                    self.validation_database_errors_message.append((Const.MACHINE_TYPE_IS_USED, db_obj['name']))
+        # external ids and names of machine types used on machines
+        used_machine_types = set(self.external_ids or [])
+        for db_obj in self.get_missing_db_objects(data):
+            row = self.IMPORT_TYPE(None, self.company_id, False, db_obj=db_obj)
+            if db_obj['name'] not in used_machine_types or db_obj['ext_id'] not in used_machine_types:
+                if not db_obj['is_default']:
+                    self.objs_to_delete.append(row)
+            else:
+                self.validation_database_errors_count += 1
+                self.validation_database_errors_message.append((Const.MACHINE_TYPE_IS_USED, db_obj['name']))
 
 
 class MachineTypeImporter(BaseImporter):
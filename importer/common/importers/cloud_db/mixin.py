@@ -82,23 +82,21 @@ def handle_multi_price_on_planogram(column, index, import_item):
     return column
 
 
-def handle_specific_case_planogram_entity_action(columns, components, planogram_name):
+def handle_specific_case_planogram_entity_action(columns, components, planogram_names):
     """
     This method handle import action for layout_columns & layout_components import entity!
     :param columns: layout_columns (list of dicts)
     :param components: layout_components (list of dicts)
-    :param planogram_name: import planogram name (str)
+    :param planogram_names: import planogram names for delete (set of str)
     :return: layout_columns & layout_components (list of dicts)
     """
-    search_planogram_column = list(filter(lambda c: c['caption'] == planogram_name, columns))
+    for x in columns:
+        if x['caption'] in planogram_names:
+            x['column_action'] = ImportAction.DELETE.value
 
-    search_planogram_component = list(filter(lambda c: c['caption'] == planogram_name, components))
-
-    for x in search_planogram_column:
-        x['column_action'] = ImportAction.DELETE.value
-
-    for x in search_planogram_component:
-        x['component_action'] = ImportAction.DELETE.value
+    for x in components:
+        if x['caption'] in planogram_names:
+            x['component_action'] = ImportAction.DELETE.value
 
     return columns, components
 
@@ -166,6 +164,22 @@ def handle_specific_planogram_fields(product_warning_percentage, component_warni
     return data
 
 
+def planogram_column_key(column):
+    """
+    :param column: layout_column dict
+    :return: unique key of layout_column (caption, index, external_id)
+    """
+    return str(column['caption']), str(column['index']), str(column['external_id'])
+
+
+def planogram_component_key(component):
+    """
+    :param component: layout_component dict
+    :return: unique key of layout_component (component_id, external_id, product_component_id)
+    """
+    return str(component['component_id']), str(component['external_id']), str(component['product_component_id'])
+
+
 def prepare_planogram_data(working_data):
     """
     This method handle final import action for product_templates, layout_columns & layout_components & build final
@@ -186,30 +200,31 @@ def prepare_planogram_data(working_data):
     component_for_update = working_data['component_for_update']
     component_for_import = working_data['component_for_import']
 
-    # column & component working list
+    # column & component working sets (planogram_column_key & planogram_component_key)
     column_check = working_data['column_check']
     component_check = working_data['check_component']
 
     for x in column_for_update:
-        test_column = str(x['caption'])+str(x['index'])+str(x['external_id'])
+        test_column = planogram_column_key(x)
         if test_column not in column_check:
-            column_check.append(test_column)
+            column_check.add(test_column)
             column_for_import.append(x)
 
     for x in component_for_update:
-        test_component = str(x['component_id']) + str(x['external_id']) + str(x['product_component_id'])
+        test_component = planogram_component_key(x)
         if test_component not in component_check:
-            component_check.append(test_component)
+            component_check.add(test_component)
             component_for_import.append(x)
 
+    planogram_for_delete = set(planogram_for_delete)
     for x in planogram_for_import:
         if x['caption'] in planogram_for_delete:
             x['import_action'] = ImportAction.DELETE.value
 
     # planogram delete action, all column and component for this planogram must be deleted!
-    for planogram_name in planogram_for_delete:
+    if planogram_for_delete:
         column_for_import, component_for_import = handle_specific_case_planogram_entity_action(
-            column_for_import, component_for_import, planogram_name)
+            column_for_import, component_for_import, planogram_for_delete)
 
     return planogram_for_import, column_for_import, component_for_import
 
@@ -1,9 +1,9 @@
 import psycopg2
 from collections import OrderedDict
-import pandas as pd
 from common.logging.setup import logger
-from common.importers.cloud_db.common import get_alive_and_dead, get_values_from_dict_arr, get_upsert_if_needed, \
-    BaseImportHandler, BaseImportObject, BaseImporter, ReferenceField, IdField, Field
+from common.importers.cloud_db.common import get_upsert_if_needed, BaseImportHandler, BaseImportObject, BaseImporter, \
+    ReferenceField, IdField, Field, prefetch_cloud_data
+from common.importers.cloud_db.entity_index import CloudEntityIndex
 from common.importers.cloud_db.planogram_helpers import PlanogramHandler, PlanogramValidation, planogram_processor
 from common.mixin.enum_errors import enum_message_on_specific_language
 from common.mixin.validation_const import ImportType, ImportAction
@@ -274,7 +274,7 @@ class PlanogramImporter(BaseImporter):
             column_import_objects = LayoutColumnImportHandler(column_for_import, self.company_id, database_columns)
             self.all_import_handlers.append(column_import_objects)
             column_import_objects.populate_insert_objs_ids()
-            column_import_objects.populate_ref_fields('layout', import_objects.objs_to_insert)
+            column_import_objects.populate_ref_fields('layout', import_objects)
 
             # populate tags
             if tags_for_import:
@@ -287,8 +287,8 @@ class PlanogramImporter(BaseImporter):
                     column_for_import, self.company_id, database_layout_columns_tags)
                 self.all_import_handlers.append(layout_columns_tags_import_objects)
                 layout_columns_tags_import_objects.populate_insert_objs_ids()
-                layout_columns_tags_import_objects.populate_ref_fields('tags', tags_import_objects.objs_to_insert)
-                layout_columns_tags_import_objects.populate_ref_fields('layoutcolumn', column_import_objects.objs_to_insert)
+                layout_columns_tags_import_objects.populate_ref_fields('tags', tags_import_objects)
+                layout_columns_tags_import_objects.populate_ref_fields('layoutcolumn', column_import_objects)
 
         # populate component
         if component_for_import:
@@ -296,7 +296,7 @@ class PlanogramImporter(BaseImporter):
                 component_for_import, self.company_id, database_layout_component)
             self.all_import_handlers.append(component_import_objects)
             component_import_objects.populate_insert_objs_ids()
-            component_import_objects.populate_ref_fields('layout', import_objects.objs_to_insert)
+            component_import_objects.populate_ref_fields('layout', import_objects)
 
     def get_stats(self):
         return self.stats['product_templates']
@@ -312,6 +312,7 @@ class PlanogramValidator(BaseValidator):
         self.warnings = []
         self.errors = []
         self.removed_import_row = []
+        self.prefetch_timings = {}
 
     def append_error(self, record_part, message_part):
         self.errors.append({
@@ -334,13 +335,27 @@ class PlanogramValidator(BaseValidator):
                                             'combo_recipe_data', 'layout_columns_tags', 'recipe_data',
                                             'rotation_groups', 'company_prices'))
 
-        planograms = PlanogramQueryOnCloud.get_planogram_for_company(self.company_id)
-        products = ProductQueryOnCloud.get_products_for_company(self.company_id)
-        combo_recipes = PlanogramQueryOnCloud.get_combo_recipe(self.company_id)
-        layout_columns_tags = PlanogramQueryOnCloud.get_layout_column_tags()
-        recipes = PlanogramQueryOnCloud.get_recipe(self.company_id)
-        rotation_groups = ProductRotationGroupQueryOnCloud.get_product_rotation_groups_for_company(self.company_id)
-        company_prices = PlanogramQueryOnCloud.company_price_definition(self.company_id)
+        # independent company queries run concurrently in snapshot of validation unit of work, with timing per query
+        results, self.prefetch_timings = prefetch_cloud_data({
+            'product_templates': (PlanogramQueryOnCloud.get_planogram_for_company, (self.company_id,)),
+            'products': (ProductQueryOnCloud.get_products_for_company, (self.company_id,)),
+            'combo_recipe_data': (PlanogramQueryOnCloud.get_combo_recipe, (self.company_id,)),
+            'layout_columns_tags': (PlanogramQueryOnCloud.get_layout_column_tags, (self.company_id,)),
+            'recipe_data': (PlanogramQueryOnCloud.get_recipe, (self.company_id,)),
+            'rotation_groups': (
+                ProductRotationGroupQueryOnCloud.get_product_rotation_groups_for_company, (self.company_id,)),
+            'company_prices': (PlanogramQueryOnCloud.company_price_definition, (self.company_id,)),
+        })
+        for query_name, duration in self.prefetch_timings.items():
+            logger.info(self.message_translator(Const.PLANOGRAM_DATA_QUERY_TIME, query_name, duration))
+
+        planograms = results['product_templates']
+        products = results['products']
+        combo_recipes = results['combo_recipe_data']
+        layout_columns_tags = results['layout_columns_tags']
+        recipes = results['recipe_data']
+        rotation_groups = results['rotation_groups']
+        company_prices = results['company_prices']
         if not company_prices:
             company_prices = ['price_1']
 
@@ -408,38 +423,23 @@ class PlanogramValidator(BaseValidator):
 
         # planogram data
         logger.info(self.message_translator(Const.PLANOGRAM_MAIN_FILTER))
-        planogram_name_and_ext_id = []
-        all_alive_cloud_planograms = []
-        all_alive_cloud_planogram_ids = []
-        if cloud_planograms_all:
-            pl_data_frame = pd.DataFrame(cloud_planograms_all)
-            pl_data_frame = pl_data_frame.loc[pl_data_frame['alive']]
-            planogram_name_and_ext_id = pl_data_frame[['name', 'ext_id']].iloc[:, 0].tolist()
-            all_alive_cloud_planograms = [p for p in cloud_planograms_all if p['alive'] is True]
-            all_alive_cloud_planogram_ids = get_values_from_dict_arr(all_alive_cloud_planograms, 'ext_id')
+        planograms_index = CloudEntityIndex(cloud_planograms_all)
+        planogram_name_and_ext_id = planograms_index.alive_names
+        all_alive_cloud_planograms = planograms_index.alive
+        all_alive_cloud_planogram_ids = planograms_index.column('ext_id')
 
         external_ids = set([item[id_fld] for item in self.working_data])
-        alive_ids, dead_ids = get_alive_and_dead(external_ids, cloud_planograms_all)
+        alive_ids, dead_ids = planograms_index.get_alive_and_dead(external_ids)
 
         # product rotation groups data
-        pr_rotation_all_alive = []
-        pr_rotation_group_data_frame_records = []
-        if pr_rotation_groups:
-            pr_rotation_group_data_frame = pd.DataFrame(pr_rotation_groups)
-            pr_rotation_group_data_frame = pr_rotation_group_data_frame.loc[pr_rotation_group_data_frame['alive']]
-            pr_rotation_all_alive = pr_rotation_group_data_frame['ext_id'].tolist()
-            pr_rotation_group_data_frame_records = pr_rotation_group_data_frame.to_dict('records')
+        pr_rotation_groups_index = CloudEntityIndex(pr_rotation_groups)
+        pr_rotation_all_alive = pr_rotation_groups_index.alive_ids
+        pr_rotation_group_data_frame_records = pr_rotation_groups_index.alive
 
         # product data
-        all_cloud_company_product_ext_id = []
-        products_specific_field_data_frame = []
-        alive_products = []
-        if all_company_product:
-            products_data_frame = pd.DataFrame(all_company_product)
-            alive_company_products_data_frame = products_data_frame.loc[products_data_frame['alive']]
-            alive_products = alive_company_products_data_frame.to_dict('records')
-            all_cloud_company_product_ext_id = alive_company_products_data_frame['ext_id'].tolist()
-            products_specific_field_data_frame = products_data_frame[['ext_id', 'is_composite', 'is_combo']]
+        products_index = CloudEntityIndex(all_company_product)
+        alive_products = products_index.alive
+        all_cloud_company_product_ext_id = products_index.alive_ids
 
         # recipe data
         recipe_data_code = []
@@ -453,7 +453,7 @@ class PlanogramValidator(BaseValidator):
             all_company_planograms=all_alive_cloud_planograms, all_company_product=alive_products,
             planogram_name_and_external_id=planogram_name_and_ext_id, language=self.language,
             all_cloud_company_product_ext_id=all_cloud_company_product_ext_id,
-            products_data_frame_object=products_specific_field_data_frame)
+            products_index=products_index)
 
         # init data validation
         logger.info(self.message_translator(Const.INIT_PLANOGRAM_VALIDATION_START))
@@ -577,16 +577,15 @@ class PlanogramValidator(BaseValidator):
 
             column_check = False
             result = []
-            if action == ImportAction.CREATE and planogram_ext_id in all_alive_cloud_planogram_ids:
-                result = list(filter(lambda planogram: str(planogram['ext_id']) == planogram_ext_id and str(
-                    planogram['name']) == planogram_name, all_alive_cloud_planograms))
+            if action == ImportAction.CREATE and planogram_ext_id in planograms_index.alive_ids:
+                result = planogram_handler.get_planograms(planogram_name, planogram_ext_id)
                 if result:
                     planogram_id = result[0]['id']
                     planogram_columns = PlanogramQueryOnCloud.get_columns_for_planogram(planogram_id)
                     column_check = PlanogramHandler.check_product_column_on_planogram(column, planogram_columns)
 
             import_action_errors = planogram_validator.validate_planogram_import_action(
-                action, alive_ids, all_alive_cloud_planogram_ids, column_check, result, import_item['planogram_id'])
+                action, alive_ids, planograms_index.alive_ids, column_check, result, import_item['planogram_id'])
 
             if import_action_errors:
                 self.errors = self.errors + import_action_errors
@@ -1,7 +1,8 @@
-import pandas as pd
+from collections import Counter, defaultdict
 
+from common.importers.cloud_db.entity_index import CloudEntityIndex
 from common.importers.cloud_db.mixin import handle_multi_price_on_planogram, prepare_planogram_data, \
-    handle_planogram_column, handle_specific_planogram_fields
+    handle_planogram_column, handle_specific_planogram_fields, planogram_column_key, planogram_component_key
 from common.mixin.enum_errors import EnumValidationMessage as Const, PlanogramEnum
 from common.mixin.validation_const import ImportAction
 from common.mixin.enum_errors import enum_message_on_specific_language
@@ -11,15 +12,18 @@ empty_header_value = PlanogramEnum.EMPTY_HEADER_VALUE.value
 
 class PlanogramHandler(object):
     def __init__(self, all_company_planograms, all_company_product, planogram_name_and_external_id,
-                 all_cloud_company_product_ext_id, products_data_frame_object, language):
+                 all_cloud_company_product_ext_id, products_index, language):
 
         self.all_company_planograms = all_company_planograms
         self.all_company_product = all_company_product
         self.planogram_name_and_external_id = planogram_name_and_external_id
         self.all_cloud_company_product_ext_id = all_cloud_company_product_ext_id
-        self.products_data_frame_object = products_data_frame_object
+        self.products_index = products_index
         self.language = language
         self.warnings = []
+        self.planograms_by_name_and_ext_id = defaultdict(list)
+        for planogram in all_company_planograms:
+            self.planograms_by_name_and_ext_id[(str(planogram['name']), str(planogram['ext_id']))].append(planogram)
 
     def append_warning(self, record_part, message_part):
         self.warnings.append({
@@ -30,6 +34,12 @@ class PlanogramHandler(object):
     def message_translator(self, const, *args):
         return enum_message_on_specific_language(const.value, self.language, *args)
 
+    def get_planograms(self, planogram_name, planogram_external_id):
+        """
+        :return: list of company planograms with planogram name & external id
+        """
+        return self.planograms_by_name_and_ext_id.get((str(planogram_name), str(planogram_external_id)), [])
+
     def check_exists_planogram_in_company(self, planogram_name, planogram_external_id):
         planogram_external_id_exists = False
         planogram_name_exists = False
@@ -49,7 +59,7 @@ class PlanogramHandler(object):
         if str(planogram_name) in self.planogram_name_and_external_id:
             planogram_name_exists = True
 
-        search_results = list(filter(lambda x: x['name'] == planogram_name and x['ext_id'] == planogram_external_id, self.all_company_planograms))
+        search_results = self.get_planograms(planogram_name, planogram_external_id)
         validation_check_status = {
             "search_results": search_results,
             "planogram_external_id_exists": planogram_external_id_exists,
@@ -67,8 +77,7 @@ class PlanogramHandler(object):
         composite_product = False
         combo_product = False
         if product_ext_id in self.all_cloud_company_product_ext_id:
-            result = self.products_data_frame_object.loc[
-                self.products_data_frame_object['ext_id'] == str(product_ext_id)].to_dict('records')
+            result = self.products_index.index_by('ext_id', alive=False).get(str(product_ext_id), [])
             for item in result:
                 if item['is_composite']:
                     composite_product = True
@@ -91,11 +100,29 @@ class PlanogramHandler(object):
         :param planogram_import_data:
         :return: planogram_name & column_number repeat status
         """
-        data_frame_object = pd.DataFrame(planogram_import_data, columns=['column_number', 'planogram_name',
-                                                                         'planogram_id'])
-        duplicate_column = data_frame_object[data_frame_object.duplicated()].to_dict('records')
+        duplicate_column = []
+        used_columns = set()
+        for item in planogram_import_data:
+            column = (item['column_number'], item['planogram_name'], item['planogram_id'])
+            if column in used_columns:
+                duplicate_column.append({
+                    'column_number': column[0], 'planogram_name': column[1], 'planogram_id': column[2]})
+            used_columns.add(column)
         return duplicate_column
 
+    @staticmethod
+    def group_unique_values(planogram_import_data, group_field, value_field):
+        """
+        :return: dict of group_field value -> list of unique value_field values
+        """
+        unique_values = defaultdict(set)
+        for item in planogram_import_data:
+            # Rows without group value are not grouped (same as pandas groupby)
+            if item[group_field] is None:
+                continue
+            unique_values[item[group_field]].add(item[value_field])
+        return {group: list(values) for group, values in unique_values.items()}
+
     @staticmethod
     def check_planogram_name_per_external_id(planogram_import_data):
         """
@@ -107,11 +134,10 @@ class PlanogramHandler(object):
         used_external_ids = set()
         used_planogram_name = []
 
-        data_frame_object = pd.DataFrame(planogram_import_data, columns=['planogram_name', 'planogram_id'])
-        data_frame_object = data_frame_object.groupby(['planogram_id'])['planogram_name'].agg(
-            lambda grp: list(set(list(grp)))).to_dict()
+        names_per_external_id = PlanogramHandler.group_unique_values(
+            planogram_import_data, 'planogram_id', 'planogram_name')
 
-        for name, unique_ids_per_name in sorted(data_frame_object.items()):
+        for name, unique_ids_per_name in sorted(names_per_external_id.items()):
             if len(unique_ids_per_name) != 1:
                 errors_names[name] = list(unique_ids_per_name)
                 used_planogram_name.append(name)
@@ -133,11 +159,10 @@ class PlanogramHandler(object):
         used_external_ids = set()
         used_planogram_name = []
 
-        data_frame_object = pd.DataFrame(planogram_import_data, columns=['planogram_name', 'planogram_id'])
-        data_frame_object = data_frame_object.groupby(['planogram_name'])['planogram_id'].agg(
-            lambda grp: list(set(list(grp)))).to_dict()
+        external_ids_per_name = PlanogramHandler.group_unique_values(
+            planogram_import_data, 'planogram_name', 'planogram_id')
 
-        for name, unique_ids_per_name in sorted(data_frame_object.items()):
+        for name, unique_ids_per_name in sorted(external_ids_per_name.items()):
             if len(unique_ids_per_name) != 1:
                 errors_names[name] = list(unique_ids_per_name)
                 used_planogram_name.append(name)
@@ -206,6 +231,10 @@ class PlanogramValidation(object):
         self.recipe_data = recipe_data
         self.pr_rotation_group_data_frame = pr_rotation_group_data_frame
         self.max_column = PlanogramEnum.MAX_COLUMNS.value
+        self.alive_products_index = CloudEntityIndex(alive_products)
+        self.recipe_index = CloudEntityIndex(recipe_data, id_field='code')
+        self.pr_rotation_group_index = CloudEntityIndex(pr_rotation_group_data_frame)
+        self.recipe_code_indexes = {}
 
     @staticmethod
     def message_structure(record_part, message_part):
@@ -219,6 +248,24 @@ class PlanogramValidation(object):
     def message_translator(self, const, *args):
         return enum_message_on_specific_language(const.value, self.language, *args)
 
+    def get_recipe_code_index(self, recipe_data_code, code_field):
+        """
+        Recipe codes are indexed once per cloud recipe fetch, not on every validated row.
+        :param recipe_data_code: list of recipe code dicts
+        :param code_field: recipe_code or combo_recipe_code
+        :return: CloudEntityIndex of recipe codes, dict of (recipe code as string, product_ext_id) -> alive recipe codes
+        """
+        recipe_codes, recipe_code_index, recipe_product_index = self.recipe_code_indexes.get(
+            code_field, (None, None, None))
+        if recipe_codes is not recipe_data_code:
+            recipe_code_index = CloudEntityIndex(recipe_data_code, id_field=code_field)
+            # Import recipe code is string, cloud recipe code is compared as string
+            recipe_product_index = defaultdict(list)
+            for recipe in recipe_code_index.alive:
+                recipe_product_index[(str(recipe[code_field]), recipe['product_ext_id'])].append(recipe)
+            self.recipe_code_indexes[code_field] = (recipe_data_code, recipe_code_index, recipe_product_index)
+        return recipe_code_index, recipe_product_index
+
     def validate_planogram_multi_price(self, company_prices, multi_price, import_item):
 
         check_price = []
@@ -332,7 +379,7 @@ class PlanogramValidation(object):
                 removed_import_row.append(import_item)
                 return errors, warnings, removed_import_row, prg_id, import_item
 
-            product_match = list(filter(lambda item: item['ext_id'] == product_ext_id and item['alive'], self.alive_products))
+            product_match = self.alive_products_index.index_by('ext_id').get(product_ext_id, [])
 
             if len(product_match) > 1:
                 warnings.append(self.message_structure(planogram_ext_id, self.message_translator(
@@ -340,7 +387,7 @@ class PlanogramValidation(object):
                 removed_import_row.append(import_item)
                 return errors, warnings, removed_import_row, prg_id, import_item
 
-            recipe_match = list(filter(lambda item: item['code'] == recipe_ext_id and item['product_ext_id'] == product_ext_id and item['alive'], self.recipe_data))
+            recipe_match = self.recipe_index.index_by('code', 'product_ext_id').get((recipe_ext_id, product_ext_id), [])
 
             if recipe_match:
                 if len(recipe_match) > 1:
@@ -363,8 +410,9 @@ class PlanogramValidation(object):
             if composite_product:
                 import_item['is_composite'] = True
                 import_item['is_combo'] = False
-                recipe_ext_ids = [x['recipe_code'] for x in recipe_data_code]
-                recipe_product_ext_ids = list(filter(lambda recipe: str(recipe['recipe_code']) == recipe_ext_id and recipe['product_ext_id'] == product_ext_id and recipe['alive'], recipe_data_code))
+                recipe_code_index, recipe_product_index = self.get_recipe_code_index(recipe_data_code, 'recipe_code')
+                recipe_ext_ids = recipe_code_index.index_by('recipe_code', alive=False)
+                recipe_product_ext_ids = recipe_product_index.get((recipe_ext_id, product_ext_id), [])
                 recipe_product_ext_ids = [x['product_ext_id'] for x in recipe_product_ext_ids]
 
                 if not len(recipe_data_code):
@@ -394,8 +442,10 @@ class PlanogramValidation(object):
             elif combo_product:
                 import_item['is_composite'] = False
                 import_item['is_combo'] = True
-                combo_recipe_ext_ids = [x['combo_recipe_code'] for x in combo_recipe_data_code]
-                combo_recipe_product_ext_ids = list(filter(lambda recipe: str(recipe['combo_recipe_code']) == recipe_ext_id and recipe['product_ext_id'] == product_ext_id and recipe['alive'], combo_recipe_data_code))
+                combo_recipe_code_index, combo_recipe_product_index = self.get_recipe_code_index(
+                    combo_recipe_data_code, 'combo_recipe_code')
+                combo_recipe_ext_ids = combo_recipe_code_index.index_by('combo_recipe_code', alive=False)
+                combo_recipe_product_ext_ids = combo_recipe_product_index.get((recipe_ext_id, product_ext_id), [])
 
                 if len(combo_recipe_product_ext_ids) > 1:
                     warnings.append(self.message_structure(planogram_ext_id, self.message_translator(
@@ -443,9 +493,8 @@ class PlanogramValidation(object):
                             recipe_ext_id, import_item['column_number'])))
 
         elif product_rotation_group_ext_id and product_rotation_group_ext_id != self.empty_header:
-            product_rotation_with_assigned_product = list(filter(
-                lambda planogram: planogram['ext_id'] == product_rotation_group_ext_id,
-                self.pr_rotation_group_data_frame))
+            product_rotation_with_assigned_product = self.pr_rotation_group_index.index_by(
+                'ext_id', alive=False).get(product_rotation_group_ext_id, [])
 
             if product_rotation_group_ext_id not in pr_rotation_all_alive:
                 warnings.append(self.message_structure(planogram_ext_id, self.message_translator(
@@ -583,6 +632,84 @@ class PlanogramValidation(object):
         return removed_import_row, warnings
 
 
+class PlanogramEntityIndex(object):
+    """
+        Hash indexes over planogram entities fetched from cloud database.
+
+        Built once per planogram import, so entity builder doesn't scan cloud lists for every import row.
+        Only alive entities are indexed, lists keep order from cloud database.
+    """
+
+    def __init__(self, planograms_columns, product_components, layout_components, layout_columns_tags):
+        self.columns_by_external_id = defaultdict(list)
+        self.columns_by_caption = defaultdict(list)
+        self.column_tags_by_column_id = {}
+        self.layout_components_by_layout_id = defaultdict(list)
+        self.product_components_by_recipe_id = defaultdict(list)
+
+        for position, column in enumerate(planograms_columns):
+            if column['alive']:
+                self.columns_by_external_id[column['external_id']].append((position, column))
+                self.columns_by_caption[column['caption']].append((position, column))
+
+        for tags in layout_columns_tags:
+            if tags['alive']:
+                self.column_tags_by_column_id.setdefault(tags['column_id'], tags)
+
+        for component in layout_components:
+            if component['alive']:
+                self.layout_components_by_layout_id[component['layout_id']].append(component)
+
+        for component in product_components:
+            if component['product_component_alive']:
+                self.product_components_by_recipe_id[component['product_component_recipe_id']].append(component)
+
+    def get_planogram_columns(self, planogram_ext_id, planogram_name):
+        """
+        :return: alive planogram columns with planogram external_id or caption (in cloud database order)
+        """
+        match_data = dict(self.columns_by_external_id.get(planogram_ext_id, []))
+        match_data.update(self.columns_by_caption.get(planogram_name, []))
+        return [match_data[position] for position in sorted(match_data)]
+
+    def get_column_tags(self, column_id):
+        return self.column_tags_by_column_id.get(column_id)
+
+    def get_layout_components(self, planogram_id):
+        return self.layout_components_by_layout_id.get(planogram_id, [])
+
+    def get_product_components(self, recipe_id):
+        return self.product_components_by_recipe_id.get(recipe_id, [])
+
+
+class PlanogramColumnUpdate(object):
+    """
+        Planogram columns for update (unique by caption, index & external_id) with index by column number.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self.column_check = set()
+        self.columns_by_index_and_caption = {}
+        self.alive_indexes = set()
+
+    def add(self, column):
+        column_key = planogram_column_key(column)
+        if column_key in self.column_check:
+            return
+        self.column_check.add(column_key)
+        self.columns.append(column)
+        self.columns_by_index_and_caption.setdefault((column['index'], column['caption']), column)
+        if column['alive']:
+            self.alive_indexes.add(column['index'])
+
+    def get(self, index, caption):
+        return self.columns_by_index_and_caption.get((index, caption))
+
+    def has_alive_column(self, index):
+        return index in self.alive_indexes
+
+
 class PlanogramEntityDataBuilder(object):
     def __init__(self, import_data, planogram_name_delete):
         self.planogram_id = import_data['planogram_id']
@@ -610,28 +737,26 @@ class PlanogramEntityDataBuilder(object):
         self.import_item = import_data
         self.minimum_route_pickup = import_data.get('minimum_route_pickup', 0)
 
-    def layout_component_builder_for_update(self, layout_components, filtered_planogram_id):
+    def layout_component_builder_for_update(self, entity_index, filtered_planogram_id):
         """
         This method build component for update on specific planogram column!
-        :param layout_components: list of planogram components
+        :param entity_index: PlanogramEntityIndex of cloud planogram entities
         :param filtered_planogram_id: already exist planogram_id status
         :return: list of planogram components for update
         """
         component_for_update = []
-        component_check = []
+        component_check = set()
 
         if filtered_planogram_id:
             # Filter old layout_component on planogram
-            old_component_match_data = list(
-                filter(lambda c: c['layout_id'] == filtered_planogram_id and c['alive'], layout_components)
-            )
+            old_component_match_data = entity_index.get_layout_components(filtered_planogram_id)
 
             if old_component_match_data:
                 for y in old_component_match_data:
                     component_id = y['id']
                     component_test_string = str(component_id) + str(self.planogram_ext_id)
                     if component_test_string not in component_check:
-                        component_check.append(component_test_string)
+                        component_check.add(component_test_string)
                         y['component_action'] = ImportAction.DELETE.value
                         y['external_id'] = self.planogram_ext_id
                         y['component_id'] = component_id
@@ -643,29 +768,30 @@ class PlanogramEntityDataBuilder(object):
                         component_for_update.append(y)
         return component_for_update
 
-    def layout_component_builder_for_insert(self, component_for_update, product_components, filtered_planogram_id):
+    def layout_component_builder_for_insert(self, component_for_update, entity_index, filtered_planogram_id):
         """
         This method build component for insert on specific planogram column!
         :param component_for_update: list of already match component for specific planogram column
-        :param product_components: list of product components for specific company
+        :param entity_index: PlanogramEntityIndex of cloud planogram entities (product components for company)
         :return: list of planogram components for insert
         """
         component_for_insert = []
-        components = list(filter(lambda c: c['product_component_recipe_id'] == int(self.recipe_id)
-                                           and c['product_component_alive'], product_components))
+        components = entity_index.get_product_components(int(self.recipe_id))
 
         if self.planogram_name not in self.planogram_name_delete:
             component_action = 0
+            planogram_components = {}
+            if filtered_planogram_id and components:
+                for c in component_for_update:
+                    planogram_components.setdefault((c['external_id'], c['product_component_id']), c)
+
             for x in components:
                 product_component_id = x['product_component_id']
                 component_id = None
-                if filtered_planogram_id:
-                    planogram_component = list(filter(
-                        lambda c: c['external_id'] == self.planogram_ext_id and
-                                  c['product_component_id'] == product_component_id, component_for_update))
-                    if planogram_component:
-                        component_action = 1
-                        component_id = planogram_component[0]['component_id']
+                planogram_component = planogram_components.get((self.planogram_ext_id, product_component_id))
+                if planogram_component:
+                    component_action = 1
+                    component_id = planogram_component['component_id']
 
                 component_data_structure = {
                     'component_id': component_id,
@@ -686,14 +812,14 @@ class PlanogramEntityDataBuilder(object):
                 component_for_insert.append(component_data_structure)
         return component_for_insert
 
-    def column_builder_for_update(self, repeat_planogram, layout_columns_tags, planogram_match_data):
+    def column_builder_for_update(self, repeat_planogram, entity_index, planogram_match_data):
         """
         This method build columns for update on specific planogram!
         :param repeat_planogram: (status if sent planogram with more than one columns) boolean
-        :param layout_columns_tags: layout_columns_tags for specific planogram
+        :param entity_index: PlanogramEntityIndex of cloud planogram entities (layout_columns_tags)
         :return: list of planogram columns for insert
         """
-        column_update_test_list = []
+        column_update_test_list = set()
         column_update = []
         for pl_data in planogram_match_data:
             column_action = 1
@@ -707,26 +833,29 @@ class PlanogramEntityDataBuilder(object):
             pl_data['product_rotation_group_id'] = self.product_rotation_group_id
             pl_data['product_id'] = self.product_id
             pl_data['combo_recipe_id'] = self.combo_recipe_id
-            column_tags_match_data = list(
-                filter(lambda c: c['column_id'] == pl_data['column_id'] and c['alive'], layout_columns_tags))
-            if column_tags_match_data:
-                tags_data = column_tags_match_data[0]
+            tags_data = entity_index.get_column_tags(pl_data['column_id'])
+            if tags_data:
                 pl_data['tags_id'] = tags_data['id']
                 pl_data['tags_action'] = tags_action
                 pl_data['columns_tags_id'] = tags_data['columns_tags_id']
                 pl_data['column_id'] = tags_data['column_id']
                 pl_data['tags_caption'] = tags_data['caption']
 
-            column_test_string = str(pl_data['caption']) + str(pl_data['index']) + str(pl_data['external_id'])
+            column_test_string = planogram_column_key(pl_data)
             if column_test_string not in column_update_test_list:
-                column_update_test_list.append(column_test_string)
+                column_update_test_list.add(column_test_string)
                 column_update.append(pl_data)
 
         return column_update
 
     def column_builder_for_insert(self, column_update, filtered_planogram_id):
-
-        result = list(filter(lambda p: p['index'] == self.index and p['caption'] == self.planogram_name, column_update))
+        """
+        This method build planogram, column & tags for insert on specific planogram column!
+        :param column_update: PlanogramColumnUpdate (already match columns for update)
+        :param filtered_planogram_id: already exist planogram_id status
+        :return: planogram, column & tags for insert
+        """
+        column_data_match = column_update.get(self.index, self.planogram_name)
         tags_id = None
         column_id = None
         columns_tags_id = None
@@ -734,10 +863,9 @@ class PlanogramEntityDataBuilder(object):
         column_action = 0
         tags_for_insert = {}
 
-        if result:
+        if column_data_match:
             column_action = 1
             tags_action = 1
-            column_data_match = result[0]
             column_id = column_data_match['column_id']
             tags_id = column_data_match.get('tags_id', '')
             columns_tags_id = column_data_match.get('columns_tags_id', '')
@@ -798,37 +926,35 @@ class PlanogramEntityDataBuilder(object):
             planogram_for_insert, self.index, self.import_item)
 
         if self.import_action == ImportAction.DELETE.value:
-            search_planogram_column = list(filter(lambda c: c['index'] == self.index and c['alive'], column_update))
-            if not search_planogram_column:
+            if not column_update.has_alive_column(self.index):
                 column_for_insert = {}
 
         return planogram_for_insert, column_for_insert, tags_for_insert
 
 
 def planogram_processor(data, planograms_columns, product_components, layout_components, layout_columns_tags):
-    validated_pl_name = list(map(lambda y: y['planogram_name'], data))
-    validated_pl_ext_id = list(map(lambda y: y['planogram_id'], data))
-    repeat_name_status = set(list(pd.Series(validated_pl_name)[pd.Series(validated_pl_name).duplicated()].values))
-    repeat_external_id_status = set(
-        list(pd.Series(validated_pl_ext_id)[pd.Series(validated_pl_ext_id).duplicated()].values))
+    validated_pl_name = Counter(y['planogram_name'] for y in data)
+    validated_pl_ext_id = Counter(y['planogram_id'] for y in data)
+    repeat_name_status = set(name for name, count in validated_pl_name.items() if count > 1)
+    repeat_external_id_status = set(ext_id for ext_id, count in validated_pl_ext_id.items() if count > 1)
 
-    column_update = []
+    entity_index = PlanogramEntityIndex(planograms_columns, product_components, layout_components, layout_columns_tags)
+    column_update = PlanogramColumnUpdate()
     component_update = []
 
-    column_check = []
-    planogram_check = []
-    component_check = []
+    column_check = set()
+    component_check = set()
+    # cloud planogram_id per specific planogram (planogram_name & planogram_ext_id)
+    planogram_check = {}
 
     planogram_for_database = []
     column_for_database = []
     component_for_database = []
     tags_for_database = []
 
-    column_update_test_list = []
     planogram_name_delete = []
-    planogram_working_data = []
-
-    planogram_id = None
+    planogram_name_delete_check = set()
+    planogram_working_data = set()
 
     for import_item in data:
         repeat_planogram = False
@@ -841,7 +967,8 @@ def planogram_processor(data, planograms_columns, product_components, layout_com
             if len(repeat_name_status) >= 1 and len(repeat_external_id_status) >= 1:
                 repeat_planogram = True
 
-        if import_action == ImportAction.DELETE.value and planogram_name not in planogram_name_delete:
+        if import_action == ImportAction.DELETE.value and planogram_name not in planogram_name_delete_check:
+            planogram_name_delete_check.add(planogram_name)
             planogram_name_delete.append(planogram_name)
 
         import_field = handle_specific_planogram_fields(
@@ -859,45 +986,36 @@ def planogram_processor(data, planograms_columns, product_components, layout_com
         import_item['fill_rate'] = import_field['fill_rate']
         import_item['notify_warning'] = import_field['notify_warning']
         import_item['minimum_route_pickup'] = import_field['minimum_route_pickup']
-        specific_planogram_unique = planogram_name+str("_")+str(planogram_ext_id)
-        data_entity_builder = PlanogramEntityDataBuilder(import_item, planogram_name_delete)
+        specific_planogram_unique = (planogram_name, planogram_ext_id)
+        data_entity_builder = PlanogramEntityDataBuilder(import_item, planogram_name_delete_check)
 
         try:
 
             if specific_planogram_unique not in planogram_check:
-                planogram_check.append(specific_planogram_unique)
-                planogram_match_data = list(filter(
-                    lambda c: (c['external_id'] == planogram_ext_id or c['caption'] == planogram_name) and c['alive'],
-                    planograms_columns))
+                planogram_match_data = entity_index.get_planogram_columns(planogram_ext_id, planogram_name)
 
                 # handle planogram columns for update
                 if planogram_match_data:
-                    planogram_id = planogram_match_data[0]['planogram_id']
+                    planogram_check[specific_planogram_unique] = planogram_match_data[0]['planogram_id']
                     update_col = data_entity_builder.column_builder_for_update(
-                        repeat_planogram, layout_columns_tags, planogram_match_data)
+                        repeat_planogram, entity_index, planogram_match_data)
                     for x in update_col:
-                        column_test_string = str(x['caption']) + str(x['index']) + str(x['external_id'])
-                        if column_test_string not in column_update_test_list:
-                            column_update_test_list.append(column_test_string)
-                            column_update.append(x)
+                        column_update.add(x)
                 else:
-                    planogram_id = None
+                    planogram_check[specific_planogram_unique] = None
+            planogram_id = planogram_check[specific_planogram_unique]
 
             # handle composite product & component on planogram
             if recipe_id and is_composite:
-                update_comp = data_entity_builder.layout_component_builder_for_update(layout_components, planogram_id)
+                update_comp = data_entity_builder.layout_component_builder_for_update(entity_index, planogram_id)
                 insert_comp = data_entity_builder.layout_component_builder_for_insert(
-                    update_comp, product_components, planogram_id)
-                component_update = component_update + update_comp
+                    update_comp, entity_index, planogram_id)
+                component_update.extend(update_comp)
 
                 for x in insert_comp:
-                    component_test_string = str(
-                        x['component_id']) + str(
-                        x['external_id']) + str(
-                        x['product_component_id']
-                    )
+                    component_test_string = planogram_component_key(x)
                     if component_test_string not in component_check:
-                        component_check.append(component_test_string)
+                        component_check.add(component_test_string)
                         component_for_database.append(x)
 
             # handle planogram, planogram columns & tags for insert
@@ -908,17 +1026,13 @@ def planogram_processor(data, planograms_columns, product_components, layout_com
                 tags_for_database.append(tags_for_insert)
 
             if column_for_insert:
-                planogram_index_test_string = str(
-                    column_for_insert['caption']) + str(
-                    column_for_insert['index']) + str(
-                    column_for_insert['external_id']
-                )
+                planogram_index_test_string = planogram_column_key(column_for_insert)
                 if planogram_index_test_string not in column_check:
-                    column_check.append(planogram_index_test_string)
+                    column_check.add(planogram_index_test_string)
                     column_for_database.append(column_for_insert)
 
             if specific_planogram_unique not in planogram_working_data:
-                planogram_working_data.append(specific_planogram_unique)
+                planogram_working_data.add(specific_planogram_unique)
                 planogram_for_database.append(planogram_data)
 
         except Exception as e:
@@ -929,7 +1043,7 @@ def planogram_processor(data, planograms_columns, product_components, layout_com
 
     planogram_data_structure = {
         'column_for_import': column_for_import,
-        'column_for_update': column_update,
+        'column_for_update': column_update.columns,
         'column_check': column_check,
         'component_for_import': component_for_database,
         'component_for_update': component_update,
@@ -939,4 +1053,3 @@ def planogram_processor(data, planograms_columns, product_components, layout_com
     }
     planogram_for_import, column_for_import, component_for_import = prepare_planogram_data(planogram_data_structure)
     return planogram_for_import, column_for_import, component_for_import, tags_for_database
-
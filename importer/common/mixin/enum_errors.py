@@ -314,6 +314,13 @@ class EnumValidationMessage(Enum):
         "fr": "",
         "process_type": EnumMessageDescription.ADMIN.name
     }
+    IMPORT_PROCEDURE_PARKED_IMPORT_ERROR = {
+        "en": "Parked import process can't be started, file: {}, error: {}",
+        "de": "",
+        "it": "",
+        "fr": "",
+        "process_type": EnumMessageDescription.CLOUD_ADMIN.name
+    }
     IMPORT_PROCEDURE_NO_ACTIVE_PROCESS = {
         "en": "There is no active import process for company_id: {}, starting new import with elastic hash: {}",
         "de": "",
@@ -543,6 +550,13 @@ class EnumValidationMessage(Enum):
         "fr": "",
         "process_type": EnumMessageDescription.ADMIN.name
     }
+    VALIDATION_SYSTEM_LOG_XLSX_ERROR = {
+        "en": "Can't read xlsx file row by row, file will be converted to csv: {}",
+        "de": "",
+        "it": "",
+        "fr": "",
+        "process_type": EnumMessageDescription.ADMIN.name
+    }
     VALIDATION_SYSTEM_LOG_INFO_CONVERTED_FILE = {
         "en": "Successful convert xlsx/xls to csv, filename: {}",
         "de": "",
@@ -891,6 +905,13 @@ class EnumValidationMessage(Enum):
         "fr": "",
         "process_type": EnumMessageDescription.CLOUD.name
     }
+    PLANOGRAM_DATA_QUERY_TIME = {
+        "en": "Planogram init data query: {}, duration: {:.3f} sec",
+        "de": "",
+        "it": "",
+        "fr": "",
+        "process_type": EnumMessageDescription.CLOUD.name
+    }
     FETCH_PLANOGRAM_DATA = {
         "en": "Fetch main planogram data from db",
         "de": "",
@@ -1413,7 +1434,7 @@ class EnumValidationMessage(Enum):
     }
 
     VEND_EVA_DATA_PUBLISHED_TO_CLOUD_SYSTEM_LOG = {
-        "en": "Data publish to cloud company: {}, import type: {}, data: {}",
+        "en": "Data publish to cloud company: {}, import type: {}, vend records: {}, vends: {}, vend format: {}",
         "de": "",
         "it": "",
         "fr": "",
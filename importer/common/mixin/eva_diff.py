@@ -0,0 +1,96 @@
+from common.mixin.eva_parser import eva_field, eva_line, eva_pa_position_line
+
+"""
+
+    Diff of EVA vend counters between last imported and new EVA of device.
+
+    Old records are indexed once by key of PA position, every new record is matched with old records of same key
+    (no scan of old records), counter delta is number of vends since last import. PA7 records are keyed by product
+    number, payment type and price list (PA701 - PA703), PA1/PA2 positions (eva_pa_positions) by product number
+    (PA101).
+
+"""
+
+PA7_PAYMENT_TYPES = ('CA', 'DB', 'DC', 'DD')
+
+
+class CounterDelta(object):
+    """
+    Vend counter delta of one PA position.
+
+    :param new: new record
+    :param old: old records with same key, empty if position is new
+    :param payment_type: payment type of PA7 record, None for PA1/PA2 position
+    """
+    __slots__ = ('new', 'old', 'payment_type', 'vends', 'value_position', 'line')
+
+    def __init__(self, new, old, payment_type, counter_position, value_position, line):
+        self.new = new
+        self.old = old
+        self.payment_type = payment_type
+        self.value_position = value_position
+        self.line = line
+        self.vends = 0
+        if old:
+            self.vends = int(eva_field(new, counter_position)) - int(eva_field(old[0], counter_position))
+
+    @property
+    def product_number(self):
+        return self.new[0] if self.payment_type is None else eva_field(self.new, 1)
+
+    def value(self):
+        """
+
+        :return: value of vends since last import (in EVA decimal points)
+        """
+        return int(eva_field(self.new, self.value_position)) - int(eva_field(self.old[0], self.value_position))
+
+    def new_line(self):
+        return self.line(self.new)
+
+    def old_lines(self):
+        return [self.line(x) for x in self.old]
+
+
+def index_records(records, key):
+    """
+
+    :return: dict of key -> records with key, in EVA order
+    """
+    index = {}
+    for record in records:
+        index.setdefault(key(record), []).append(record)
+    return index
+
+
+def pa7_key(record):
+    return record[1:4]
+
+
+def diff_pa7(old_records, new_records):
+    """
+
+    :param old_records: PA7 records of last imported EVA
+    :param new_records: PA7 records of new EVA
+    :return: list of CounterDelta of new records with known payment type, grouped by payment type
+    """
+    old_index = index_records(old_records, pa7_key)
+    new_by_payment_type = index_records(new_records, lambda record: eva_field(record, 2))
+
+    deltas = []
+    for payment_type in PA7_PAYMENT_TYPES:
+        for record in new_by_payment_type.get(payment_type, []):
+            deltas.append(CounterDelta(record, old_index.get(pa7_key(record), []), payment_type, 5, 6, eva_line))
+    return deltas
+
+
+def diff_pa_positions(old_positions, new_positions):
+    """
+
+    :param old_positions: PA1/PA2 positions of last imported EVA
+    :param new_positions: PA1/PA2 positions of new EVA
+    :return: list of CounterDelta in new EVA order
+    """
+    old_index = index_records(old_positions, lambda position: position[0])
+    return [CounterDelta(position, old_index.get(position[0], []), None, 1, 2, eva_pa_position_line)
+            for position in new_positions]
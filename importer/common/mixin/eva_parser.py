@@ -0,0 +1,119 @@
+import codecs
+
+"""
+
+    Single pass EVA-DTS (DEX) parser, shared by CPI and DEX vend import.
+
+    EVA file is read line by line (not into memory with readlines) and every line is checked once, lines of used
+    blocks are grouped into eva content (lists of lines stored in local device history). Records are EVA lines split
+    once into tuple of fields, record[0] is block tag (PA1, PA2, PA7, ID4 ...), record[n] is field n of block
+    (PA101 is record[1] of PA1 record).
+
+"""
+
+EVA_FIELD_SEPARATOR = '*'
+
+# Line prefix -> key of eva content
+EVA_CONTENT_PREFIXES = {
+    'PA': 'pa_field',
+    'EA': 'ea_field',
+    'CA': 'ca_field',
+    'DA': 'da_field',
+    'ID': 'id_field',
+    'VA': 'va_field',
+    'SE': 'se_field',
+}
+EVA_LA_PREFIX = 'LA1*'
+
+
+def parse_eva_lines(lines):
+    """
+
+    :param lines: EVA file lines (file object or list)
+    :return: dict of eva content key -> list of lines without new line
+    """
+    eva_content = {'la_field': []}
+    for key in EVA_CONTENT_PREFIXES.values():
+        eva_content[key] = []
+
+    la_field = eva_content['la_field']
+    for line in lines:
+        if line.startswith(EVA_LA_PREFIX):
+            la_field.append(line.rstrip("\n"))
+            continue
+
+        key = EVA_CONTENT_PREFIXES.get(line[:2])
+        if key:
+            eva_content[key].append(line.rstrip("\n"))
+    return eva_content
+
+
+def read_eva_file(file_path):
+    """
+
+    :param file_path: path of EVA file
+    :return: eva content of file, see parse_eva_lines
+    """
+    with codecs.open(file_path, "r", encoding='utf-8', errors='ignore') as eva_file:
+        return parse_eva_lines(eva_file)
+
+
+def eva_records(lines, tags):
+    """
+
+    :param lines: EVA lines
+    :param tags: block tags of returned records
+    :return: list of records (tuple of fields) with tag in tags, in EVA file order
+    """
+    records = []
+    for line in lines:
+        if line.split(EVA_FIELD_SEPARATOR, 1)[0] in tags:
+            records.append(tuple(line.split(EVA_FIELD_SEPARATOR)))
+    return records
+
+
+def eva_field(record, position):
+    """
+
+    :return: field on position of record, None if record doesn't have it
+    """
+    if len(record) > position:
+        return record[position]
+
+
+def eva_line(record):
+    """
+
+    :return: EVA line of record
+    """
+    return EVA_FIELD_SEPARATOR.join(record)
+
+
+def eva_pa_positions(records):
+    """
+    PA1 (product) and PA2 (vends since initialization) fields are not in same line of EVA file, PA1 and PA2 records
+    are paired in file order into one position per product.
+
+    :param records: PA1 and PA2 records in EVA file order
+    :return: list of (PA101 product number, PA201 number of vends, PA202 value of vends) tuples
+    """
+    positions = []
+    pa101 = pa201 = pa202 = None
+    records = iter(records)
+    for pair in zip(records, records):
+        for record in pair:
+            if record[0] == 'PA1':
+                pa101 = eva_field(record, 1)
+            elif record[0] == 'PA2':
+                pa201 = eva_field(record, 1)
+                pa202 = eva_field(record, 2)
+        positions.append((pa101, pa201, pa202))
+    return positions
+
+
+def eva_pa_position_line(position):
+    """
+
+    :return: position as EVA line (used in wrong counter details)
+    """
+    return 'PA*{}*{}*{}'.format(*position)
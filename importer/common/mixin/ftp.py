@@ -1,32 +1,63 @@
 import re
 import os
-import ftplib
 import os.path
-import ftputil
-import paramiko
-import datetime
 import traceback
-from datetime import datetime
 from common.logging.setup import logger
 from common.mixin.enum_errors import EnumErrorType
+from common.mixin.remote_files import FTP, SFTP, RemoteFilePool, format_remote_time
+from common.mixin.vend_sweep import files_after_watermark, next_watermark, split_processed_files
 from common.mixin.validator_import import escape_list
 from common.mixin.enum_errors import EnumValidationMessage as enum_msg
 from common.mixin.validation_const import ALLOWED_EXTENSIONS
+from common.urls.urls import remote_download_config
+from database.company_database.core.company_parameters import CompanyParameters
 from database.company_database.core.query_history import OldDevicePidHistory
 
 logger_api = logger
 
+# FTP/SFTP sessions of this process, scheduler processes enable reuse of sessions between jobs
+remote_file_pool = RemoteFilePool(**remote_download_config)
 
-class MySession(ftplib.FTP):
+# Company parameters of incremental vend FTP listing (only files newer than last sweep are checked)
+VEND_INCREMENTAL_LISTING = 'vend_ftp_incremental_listing'
+VEND_LAST_SWEEP = 'vend_ftp_last_sweep_{}'
+
+
+def get_vend_sweep_watermark(company_id, import_type):
+    """
+
+    :return: modification time of last swept vend file if incremental listing is enabled for company, else None
+    """
+    if str(CompanyParameters.get_parameter(company_id, VEND_INCREMENTAL_LISTING, '')).lower() != 'true':
+        return None
+    return float(CompanyParameters.get_parameter(company_id, VEND_LAST_SWEEP.format(import_type)) or 0)
+
+
+def select_new_vend_files(remote_files, company_id, import_type, watermark):
+    """
+    Skip files older than watermark and check all other files against vend history with one query.
+
+    :param remote_files: list of RemoteEntry
+    :param watermark: modification time of last swept file or None
+    :return: files for download, files which are already processed
+    """
+    remote_files = files_after_watermark(remote_files, watermark)
+    processed_filenames = OldDevicePidHistory.get_processed_filenames(
+        company_id, import_type, [entry.name for entry in remote_files])
+    return split_processed_files(remote_files, processed_filenames)
+
+
+def update_vend_sweep_watermark(company_id, import_type, watermark, new_files, processed_files):
     """
-    Make connection on FTP, except any port if FTP listening this port (if FTP is configured on
-    that specific port)
+    Move watermark over imported files only, files downloaded in this sweep are checked again in next sweep (they
+    are skipped as processed if their import succeeded).
+
+    :param new_files: list of RemoteEntry downloaded in this sweep
+    :param processed_files: list of RemoteEntry which are in vend history
     """
-    def __init__(self, host, username, password, port):
-        """Act like ftplib.FTP's constructor but connect to another port."""
-        ftplib.FTP.__init__(self)
-        self.connect(host, port)
-        self.login(username, password)
+    new_watermark = next_watermark(watermark, new_files, processed_files)
+    if new_watermark is not None:
+        CompanyParameters.set_parameter(company_id, VEND_LAST_SWEEP.format(import_type), str(new_watermark))
 
 
 def sftp_download_file(hostname, username,port, password, path, store_dir, emails, process_logger):
@@ -46,9 +77,7 @@ def sftp_download_file(hostname, username,port, password, path, store_dir, email
     # This is only for port 22, sftp
 
     try:
-        transport = paramiko.Transport(hostname, port)
-        transport.connect(username=username, password=password)
-        sftp = paramiko.SFTPClient.from_transport(transport)
+        sftp = remote_file_pool.acquire(SFTP, hostname, port, username, password)
         logger_api.info(process_logger.update_system_log_flow(
             username, hostname, port,
             key_enum=enum_msg.FTP_CONNECTED.value)
@@ -66,7 +95,7 @@ def sftp_download_file(hostname, username,port, password, path, store_dir, email
 
         return {"success": False}
     try:
-        sftp.chdir(path=path)
+        sftp.chdir(path)
         logger_api.info(process_logger.update_system_log_flow(
             path,
             key_enum=enum_msg.FILE_RIGHT_PATH.value)
@@ -80,93 +109,97 @@ def sftp_download_file(hostname, username,port, password, path, store_dir, email
             language='en',
             key_enum=enum_msg.FTP_PATH_ERROR.value
         )
-        sftp.close()
-        transport.close()
+        remote_file_pool.release(sftp)
         return {"success": False}
 
     downloaded_files = []
 
-    file_names = sftp.listdir()
+    try:
+        # Names and modification times of all files are listed with one listdir_attr call
+        remote_files = [entry for entry in sftp.list_entries() if entry.is_file]
 
-    logger_api.info(process_logger.update_system_log_flow(
-        file_names,
-        key_enum=enum_msg.FTP_FILE_LIST.value)
-    )
+        logger_api.info(process_logger.update_system_log_flow(
+            [entry.name for entry in remote_files],
+            key_enum=enum_msg.FTP_FILE_LIST.value)
+        )
 
-    for file_name in file_names:
-        try:
-            extension = os.path.splitext(file_name)[1]
-            time_file = datetime.fromtimestamp(
-                sftp.stat(os.path.join(path, file_name)).st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-            local_path = os.path.join(store_dir, file_name)
-
-            logger_api.info(process_logger.update_system_log_flow(
-                file_name,
-                key_enum=enum_msg.FTP_START_DOWNLOAD_FILE.value)
-            )
+        download_errors = remote_file_pool.download_files(
+            sftp, [(entry.name, os.path.join(store_dir, entry.name)) for entry in remote_files])
 
-            sftp.get(file_name, local_path)
+        for entry in remote_files:
+            file_name = entry.name
+            try:
+                extension = os.path.splitext(file_name)[1]
+                time_file = format_remote_time(entry.mtime)
 
-            new_filename_without_space = os.path.join(
-                store_dir, re.sub('\s+', '_', file_name).strip())
-            os.rename(os.path.join(store_dir, file_name),
-                      new_filename_without_space)
+                logger_api.info(process_logger.update_system_log_flow(
+                    file_name,
+                    key_enum=enum_msg.FTP_START_DOWNLOAD_FILE.value)
+                )
 
-            logger_api.info(process_logger.update_system_log_flow(
-                file_name, new_filename_without_space,
-                key_enum=enum_msg.FTP_DOWNLOADED_AS.value)
-            )
+                if download_errors[file_name] is not None:
+                    raise download_errors[file_name]
 
-            try:
-                if extension not in ALLOWED_EXTENSIONS:
-                    process_logger.update_process_and_cloud_flow(
-                        file_name,
-                        error=EnumErrorType.FAIL.name,
-                        language='en',
-                        key_enum=enum_msg.FILE_WRONG_FORMAT.value,
-                    )
+                new_filename_without_space = os.path.join(
+                    store_dir, re.sub('\s+', '_', file_name).strip())
+                os.rename(os.path.join(store_dir, file_name),
+                          new_filename_without_space)
+
+                logger_api.info(process_logger.update_system_log_flow(
+                    file_name, new_filename_without_space,
+                    key_enum=enum_msg.FTP_DOWNLOADED_AS.value)
+                )
 
-                    if os.path.isfile(os.path.join(store_dir, new_filename_without_space)):
-                        os.remove(os.path.join(store_dir, new_filename_without_space))
-                else:
-                    downloaded_files.append(
-                        {
-                            'name': new_filename_without_space,
-                            'time': time_file
-                        }
-                    )
-                # In this part we except that file is success downloaded, so in this case we can delete this
-                # processed file from FTP!
                 try:
-                    sftp.remove(os.path.join(path, file_name))
-                    logger_api.info(process_logger.update_system_log_flow(
-                        file_name,
-                        key_enum=enum_msg.FTP_DELETED_FILE.value)
-                    )
+                    if extension not in ALLOWED_EXTENSIONS:
+                        process_logger.update_process_and_cloud_flow(
+                            file_name,
+                            error=EnumErrorType.FAIL.name,
+                            language='en',
+                            key_enum=enum_msg.FILE_WRONG_FORMAT.value,
+                        )
+
+                        if os.path.isfile(os.path.join(store_dir, new_filename_without_space)):
+                            os.remove(os.path.join(store_dir, new_filename_without_space))
+                    else:
+                        downloaded_files.append(
+                            {
+                                'name': new_filename_without_space,
+                                'time': time_file
+                            }
+                        )
+                    # In this part we except that file is success downloaded, so in this case we can delete this
+                    # processed file from FTP!
+                    try:
+                        sftp.remove(file_name)
+                        logger_api.info(process_logger.update_system_log_flow(
+                            file_name,
+                            key_enum=enum_msg.FTP_DELETED_FILE.value)
+                        )
+                    except Exception:
+                        logger_api.info(process_logger.update_system_log_flow(
+                            traceback.print_exc(),
+                            key_enum=enum_msg.VALIDATION_SYSTEM_LOG_ERROR_REMOVING_FTP_FILE.value)
+                        )
                 except Exception:
                     logger_api.info(process_logger.update_system_log_flow(
-                        traceback.print_exc(),
-                        key_enum=enum_msg.VALIDATION_SYSTEM_LOG_ERROR_REMOVING_FTP_FILE.value)
+                        hostname, new_filename_without_space,
+                        key_enum=enum_msg.VALIDATION_SYSTEM_LOG_WRONG_FORMAT_FTP.value)
                     )
-            except Exception:
-                logger_api.info(process_logger.update_system_log_flow(
-                    hostname, new_filename_without_space,
-                    key_enum=enum_msg.VALIDATION_SYSTEM_LOG_WRONG_FORMAT_FTP.value)
-                )
 
-                pass
+                    pass
 
-        except Exception as e:
-            logger_api.error("Error downloading {} -> {}".format(file_name, str(e)))
-            logger_api.info(process_logger.update_process_and_cloud_flow(
-                file_name,
-                error=EnumErrorType.ERROR.name,
-                language='en',
-                key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
-            ))
+            except Exception as e:
+                logger_api.error("Error downloading {} -> {}".format(file_name, str(e)))
+                logger_api.info(process_logger.update_process_and_cloud_flow(
+                    file_name,
+                    error=EnumErrorType.ERROR.name,
+                    language='en',
+                    key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
+                ))
+    finally:
+        remote_file_pool.release(sftp)
 
-    sftp.close()
-    transport.close()
     return { "success": True, "file_list": downloaded_files }
 
 
@@ -187,9 +220,7 @@ def sftp_download_and_vends_logger(hostname, username, port, password, path, sto
     """
 
     try:
-        transport = paramiko.Transport(hostname, port)
-        transport.connect(username=username, password=password)
-        sftp = paramiko.SFTPClient.from_transport(transport)
+        sftp = remote_file_pool.acquire(SFTP, hostname, port, username, password)
     except Exception as e:
         process_logger.update_general_process_flow(
             status=EnumErrorType.ERROR.name,
@@ -209,7 +240,7 @@ def sftp_download_and_vends_logger(hostname, username, port, password, path, sto
         return False
 
     try:
-        sftp.chdir(path=path)
+        sftp.chdir(path)
         process_logger.update_system_log_flow(path, key_enum=enum_msg.FILE_RIGHT_PATH.value,
                                               logs_level=EnumErrorType.IN_PROGRESS.name)
     except IOError as e:
@@ -230,38 +261,38 @@ def sftp_download_and_vends_logger(hostname, username, port, password, path, sto
             data_hash="",
             file_path="",
         )
+        remote_file_pool.release(sftp)
         return False
 
     downloaded_files = []
-    file_names = sftp.listdir()
-
-    for file_name in file_names:
-        try:
-            time_file = datetime.fromtimestamp(sftp.stat(os.path.join(path, file_name)).st_mtime).strftime(
-                '%Y-%m-%d %H:%M:%S'
-            )
-            local_path = os.path.join(store_dir, file_name)
-            already_process_file = OldDevicePidHistory.check_is_file_already_processing(
-                file_name, company_id, import_type)
-
-            if file_name != already_process_file:
-                sftp.get(file_name, local_path)
+    try:
+        watermark = get_vend_sweep_watermark(company_id, import_type)
+        remote_files, processed_files = select_new_vend_files(
+            [entry for entry in sftp.list_entries() if entry.is_file], company_id, import_type, watermark)
+
+        download_errors = remote_file_pool.download_files(
+            sftp, [(entry.name, os.path.join(store_dir, entry.name)) for entry in remote_files])
+        update_vend_sweep_watermark(company_id, import_type, watermark, remote_files, processed_files)
+
+        for entry in remote_files:
+            file_name = entry.name
+            if download_errors[file_name] is None:
+                time_file = format_remote_time(entry.mtime)
                 process_logger.update_system_log_flow(
                     file_name, key_enum=enum_msg.FTP_START_DOWNLOAD_FILE.value,
                     logs_level=EnumErrorType.IN_PROGRESS.name)
 
                 downloaded_files.append({'name': file_name, 'time': time_file})
-
-        except Exception:
-            process_logger.update_general_process_flow(
-                file_name,
-                status=EnumErrorType.ERROR.name,
-                language='en',
-                key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
-                elastic_hash=elastic_hash
-            )
-    sftp.close()
-    transport.close()
+            else:
+                process_logger.update_general_process_flow(
+                    file_name,
+                    status=EnumErrorType.ERROR.name,
+                    language='en',
+                    key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
+                    elastic_hash=elastic_hash
+                )
+    finally:
+        remote_file_pool.release(sftp)
     return downloaded_files
 
 
@@ -278,7 +309,7 @@ def ftp_download(port, host, username, password, path, general_process_logger, e
 
         # Connect to ftp server!
         try:
-            ftp_connect = ftputil.FTPHost(host, username, password, port, session_factory=MySession)
+            ftp_host = remote_file_pool.acquire(FTP, host, port, username, password)
         except Exception as e:
             general_process_logger.update_general_process_flow(
                 company_id, import_type,
@@ -299,8 +330,8 @@ def ftp_download(port, host, username, password, path, general_process_logger, e
             )
             return {"success": False}
 
-        # Change remote FTP dir!
-        with ftp_connect as ftp_host:
+        try:
+            # Change remote FTP dir!
             try:
                 ftp_host.chdir(path)
             except Exception as e:
@@ -318,53 +349,57 @@ def ftp_download(port, host, username, password, path, general_process_logger, e
                 )
                 return {"success": False}
 
-            # Download FTP file!
+            # List FTP files with modification times (one MLSD call)!
             ftp_files_for_check = []
             try:
-                ftp_files = ftp_host.listdir(ftp_host.curdir)
-                for file in ftp_files:
-                    if ftp_host.path.isfile(file) and file not in escape_list:
-                        if file not in ftp_files_for_check:
-                            ftp_files_for_check.append(file)
+                ftp_files_for_check = [
+                    entry for entry in ftp_host.list_entries() if entry.is_file and entry.name not in escape_list
+                ]
             except Exception as e:
                 general_process_logger.update_system_log_flow(
                     host, company_id, import_type, e,
                     key_enum=enum_msg.FTP_LIST_REMOTE_DIR_SYSTEM_LOG.value,
                     logs_level=EnumErrorType.ERROR.name
                 )
-            for ftp_file in ftp_files_for_check:
-                already_process_file = OldDevicePidHistory.check_is_file_already_processing(
-                    ftp_file, company_id, import_type)
-                if ftp_file != already_process_file:
-                    try:
-                        ftp_host.download(ftp_file, os.path.join(store_dir, ftp_file))
 
-                        time_file = datetime.fromtimestamp(
-                            float(ftp_host.path.getmtime(ftp_file))
-                        ).strftime('%Y-%m-%d %H:%M:%S')
+            # Check all listed files in local history with one query!
+            watermark = get_vend_sweep_watermark(company_id, import_type)
+            ftp_files_for_download, processed_files = select_new_vend_files(
+                ftp_files_for_check, company_id, import_type, watermark)
+            for entry in processed_files:
+                general_process_logger.update_system_log_flow(
+                    host, company_id, import_type, entry.name,
+                    key_enum=enum_msg.FTP_FILE_ALREADY_PROCESSED.value,
+                    logs_level=EnumErrorType.WARNING.name
+                )
 
-                        downloaded_files.append(
-                            {
-                                'name': ftp_file,
-                                'time': time_file
-                            }
-                        )
-                    except Exception as e:
-                        general_process_logger.update_general_process_flow(
-                            ftp_file,
-                            status=EnumErrorType.ERROR.name,
-                            language='en',
-                            key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
-                            elastic_hash=elastic_hash
-                        )
-                        general_process_logger.update_system_log_flow(
-                            e, key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
-                            logs_level=EnumErrorType.ERROR.name
-                        )
+            # Download FTP files!
+            download_errors = remote_file_pool.download_files(
+                ftp_host, [(entry.name, os.path.join(store_dir, entry.name)) for entry in ftp_files_for_download])
+            update_vend_sweep_watermark(
+                company_id, import_type, watermark, ftp_files_for_download, processed_files)
+
+            for entry in ftp_files_for_download:
+                if download_errors[entry.name] is None:
+                    time_file = format_remote_time(entry.mtime)
+                    downloaded_files.append(
+                        {
+                            'name': entry.name,
+                            'time': time_file
+                        }
+                    )
                 else:
+                    general_process_logger.update_general_process_flow(
+                        entry.name,
+                        status=EnumErrorType.ERROR.name,
+                        language='en',
+                        key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
+                        elastic_hash=elastic_hash
+                    )
                     general_process_logger.update_system_log_flow(
-                        host, company_id, import_type, ftp_file,
-                        key_enum=enum_msg.FTP_FILE_ALREADY_PROCESSED.value,
-                        logs_level=EnumErrorType.WARNING.name
+                        download_errors[entry.name], key_enum=enum_msg.FTP_DOWNLOAD_ERROR.value,
+                        logs_level=EnumErrorType.ERROR.name
                     )
-        return downloaded_files
+        finally:
+            remote_file_pool.release(ftp_host)
+    return downloaded_files
@@ -1,19 +1,20 @@
+import json
 import os
 import re
 import shutil
 import zipfile
-import codecs
 import traceback
-import csv
 from datetime import datetime
 from distutils.util import strtobool
 from common.logging.setup import logger
 from common.mixin.validation_const import ImportType
 from common.mixin.validator_import import (WORKING_DIR, ZIP_WORKING_DIR, VENDS_ZIP_WORKING_DIR, VENDS_WORKING_DIR,
                                            create_if_doesnt_exist, VENDS_HISTORY_SUCCESS_DIR, VENDS_FAIL_DIR)
-from common.mixin.enum_errors import EnumValidationMessage as enum_msg, EnumErrorType
+from common.mixin.enum_errors import EnumValidationMessage as enum_msg, EnumErrorType, \
+    enum_message_on_specific_language
 from common.mixin.vends_mixin import VENDS_INITIAL_INFO, MainVendProcessLogger, guid1, create_elastic_hash, \
     CleanLocalHistory
+from common.validators.csv.content_rows import read_file_content
 from common.logging.setup import vend_logger
 from common.urls.urls import import_type_redis_key_duration
 from core.flask.redis_store.redis_managment import RedisManagement
@@ -113,6 +114,80 @@ class CsvValidatorHandleFIle(object):
         else:
             return None
 
+    def read_file_content(self, file_path):
+        """
+        File content is streamed, content rows are read from file on every iteration (not kept in memory).
+
+        :param file_path: path to the file (csv or xlsx)
+        :return: header row and iterable of not empty content rows
+        """
+
+        headers, content_rows = read_file_content(file_path, self.delimiter)
+        logger_api.info(self.process_logger.update_system_log_flow(
+            headers, key_enum=enum_msg.VALIDATION_SYSTEM_LOG_INFO_HEADER_FILE.value)
+        )
+        return headers, content_rows
+
+    def serialize_row(self, headers, line, parser_json):
+        """
+
+        :param headers: header row
+        :param line: content row
+        :param parser_json: custom valid fields of parser
+        :return: row for importer (json schema validation) and row for cloud validator
+        """
+
+        values_entry = dict()
+        for i in range(len(headers)):
+            try:
+                values_entry[headers[i]] = line[i]
+            except IndexError:
+                logger_api.info(self.process_logger.update_system_log_flow(
+                    i, traceback.print_exc(),
+                    key_enum=enum_msg.VALIDATION_SYSTEM_LOG_INFO_INDEX_MESSAGE.value)
+                )
+                values_entry[headers[i]] = ''
+
+        importer_row = {}
+        cloud_row = {}
+        for key, val in values_entry.items():
+            # Find key
+            if len(key):
+                try:
+                    current_value = self.return_variable_type(val.rstrip().lstrip())
+                    check_key = parser_json.get(key, None)
+                except Exception as e:
+                    logger_api.error(self.process_logger.update_system_log_flow(
+                        key, val, e, key_enum=enum_msg.VALIDATION_SYSTEM_LOG_FIELD_ERROR.value)
+                    )
+                if check_key and check_key.__name__ in ['str', 'int', 'float']:
+                    if current_value:
+                        importer_row[key] = current_value
+                        cloud_row[key] = current_value
+                    elif check_key.__name__ == 'str':
+                        importer_row[key] = None
+                        cloud_row[key] = ''
+                    else:
+                        importer_row[key] = None
+                        cloud_row[key] = None
+        return importer_row, cloud_row
+
+    def iter_serialized_data(self, headers, content_rows, parser):
+        """
+        Generator of serialized file content, every row is type converted only once for importer and cloud.
+
+        :param headers: header row
+        :param content_rows: content rows
+        :param parser: parser type (location, machine, machine_type, regions)
+        :return: generator of (importer row, cloud row)
+        """
+
+        parser_json = parser['custom_valid_fields']
+        for line in content_rows:
+            importer_row, cloud_row = self.serialize_row(headers, line, parser_json)
+            if importer_row:
+                yield importer_row, cloud_row
+
     def serializer_data(self, file_path, parser, validator_type):
         """
 
@@ -121,65 +196,9 @@ class CsvValidatorHandleFIle(object):
         :return: main list of file content type
         """
 
-        parser_json = parser['custom_valid_fields']
-        values_data = []
-        with codecs.open(file_path, "r", encoding='utf-8', errors='ignore') as in_file:
-            csv_reader = csv.reader(in_file, delimiter=self.delimiter)
-            headers = next(csv_reader)
-            logger_api.info(self.process_logger.update_system_log_flow(
-                headers, key_enum=enum_msg.VALIDATION_SYSTEM_LOG_INFO_HEADER_FILE.value)
-            )
-            for line in csv_reader:
-                if not line:
-                    continue
-                values_entry = dict()
-                for i in range(len(headers)):
-                    try:
-                        values_entry[headers[i]] = line[i]
-                    except IndexError:
-                        logger_api.info(self.process_logger.update_system_log_flow(
-                            i, traceback.print_exc(),
-                            key_enum=enum_msg.VALIDATION_SYSTEM_LOG_INFO_INDEX_MESSAGE.value)
-                        )
-                        values_entry[headers[i]] = ''
-                values_data.append(values_entry)
-
-        serializer_out = []
-        for row in values_data:
-            out_row = {}
-            for key, val in row.items():
-                # Find key
-                if len(key):
-                    try:
-                        current_value = self.return_variable_type(val.rstrip().lstrip())
-                        check_key = parser_json.get(key, None)
-                    except Exception as e:
-                        logger_api.error(self.process_logger.update_system_log_flow(
-                            key, val, e, key_enum=enum_msg.VALIDATION_SYSTEM_LOG_FIELD_ERROR.value)
-                        )
-                    if check_key:
-                        if current_value and check_key:
-                            if check_key.__name__ == 'str':
-                                out_row[key] = current_value
-                            elif check_key.__name__ == 'int':
-                                out_row[key] = current_value
-                            elif check_key.__name__ == 'float':
-                                out_row[key] = current_value
-                        elif not current_value and check_key:
-                            if check_key.__name__ == 'str':
-                                if validator_type == 'cloud_validator':
-                                    out_row[key] = ''
-                                elif validator_type == 'csv_validator':
-                                    out_row[key] = None
-                            elif check_key.__name__ == 'int':
-                                out_row[key] = None
-                            elif check_key.__name__ == 'float':
-                                out_row[key] = None
-            if out_row:
-                serializer_out.append(out_row)
-            else:
-                continue
-        return serializer_out
+        headers, content_rows = self.read_file_content(file_path)
+        row_index = 1 if validator_type == 'cloud_validator' else 0
+        return [rows[row_index] for rows in self.iter_serialized_data(headers, content_rows, parser)]
 
     def handle_zip_file(self, zip_path):
         """
@@ -250,6 +269,25 @@ class CsvValidatorHandleFIle(object):
         return all_zip_files_path
 
 
+def content_rows_to_dict(headers, content_rows):
+    """
+    Generator of file content rows as dicts, same output as csv.DictReader.
+
+    :param headers: header row
+    :param content_rows: not empty content rows
+    :return: generator of dict rows
+    """
+
+    for line in content_rows:
+        row = dict(zip(headers, line))
+        if len(headers) < len(line):
+            row[None] = line[len(headers):]
+        elif len(headers) > len(line):
+            for key in headers[len(line):]:
+                row[key] = None
+        yield row
+
+
 def get_import_type(import_type):
 
     for imports in ImportType:
@@ -431,15 +469,20 @@ class MainVendsHelpers(object):
             vend_logger.error(e)
 
 
+IMPORT_FIFO_QUEUE = 'import_fifo_queue'
+PARKED_IMPORT_DATA = 'parked_import_data'
+
+
 class ImportProcessHandler(object):
     """
     Allowed only one import process per company, in same time!
     Explanation:
-        csv validation passed successfully -> generate redis key for this company.
-        cloud validation passed unsuccessfully -> update redis key/value with finished_process=True (next import for
-        this company can start)
+        csv validation passed successfully -> generate redis key for this company, or if other import process of this
+        company is running, park import in company redis FIFO queue.
+        cloud validation passed unsuccessfully -> update redis key/value with finished_process=True and publish next
+        parked import of this company
         cloud finish processing(cloud make final statistics response) -> update redis key/value with
-        finished_process=True (next import for this company can start)
+        finished_process=True and publish next parked import of this company
     """
     def __init__(self, company_id, elastic_hash, file_path, import_type):
         self.company_id = str(company_id)
@@ -447,6 +490,8 @@ class ImportProcessHandler(object):
         self.file_path = file_path
         self.import_type = import_type
         self.redis_key = "{}_{}".format(self.company_id, 'import_fifo_procedure')
+        self.redis_queue_key = "{}_{}".format(self.company_id, IMPORT_FIFO_QUEUE)
+        self.redis_lock_key = "{}_{}".format(self.company_id, 'import_fifo_lock')
         self.redis_value = {
             'import_type': self.import_type,
             'file_path': self.file_path,
@@ -510,7 +555,166 @@ class ImportProcessHandler(object):
 
         return run_next_import_process, elastic_hash
 
-    def finish_import_process_redis(self, finished_by, reason):
+    def park_import_data(self, pending_import, data, token):
+        """
+        Cloud validator data and token of parked import are kept in redis (parked imports are dispatched by csv
+        validator workers and importer api on other hosts), redis FIFO queue holds reference to this redis key.
+
+        :param pending_import: parked import reference
+        :return: redis key of parked import data
+        """
+        parked_key = '{}_{}_{}'.format(self.company_id, pending_import['elastic_hash'], PARKED_IMPORT_DATA)
+        RedisManagement.set_data_to_redis_permanent(parked_key, {'data': data, 'token': token})
+        return parked_key
+
+    @staticmethod
+    def load_parked_import_data(pending_import):
+        """
+
+        :param pending_import: parked import reference from redis FIFO queue
+        :return: cloud validator data and token of parked import, None if parked import data can't be read
+        """
+        try:
+            return json.loads(RedisManagement.get_data_from_redis(pending_import['parked_key']))
+        except Exception as e:
+            logger_api.error("Parked import data can't be read, company_id: {}, elastic_hash: {}, error: {}".format(
+                pending_import['company_id'], pending_import['elastic_hash'], e))
+            return None
+
+    def remove_parked_import(self, pending_import):
+        """
+        Remove first parked import from company FIFO queue (called under company lock) and its data.
+
+        :param pending_import: first parked import reference from redis FIFO queue
+        """
+        RedisManagement.pop_from_redis_list(self.redis_queue_key)
+        RedisManagement.delete_redis_key(pending_import['parked_key'])
+
+    def fail_parked_import_process(self, pending_import, error):
+        """
+        Fail elastic process of parked import which can't be started and notify user.
+
+        :param pending_import: parked import reference from redis FIFO queue
+        :param error: reason
+        """
+        from common.email.send_email import send_email_on_import_error
+        from common.mixin.elastic_login import ElasticCloudLoginFunctions
+
+        message = enum_message_on_specific_language(
+            enum_msg.IMPORT_PROCEDURE_PARKED_IMPORT_ERROR.value, pending_import['language'],
+            pending_import['filename'], error)
+        ElasticCloudLoginFunctions.create_cloud_process_flow(
+            hash=pending_import['elastic_hash'], error=EnumErrorType.FAIL.name, message=message)
+        ElasticCloudLoginFunctions.create_process_flow(
+            hash=pending_import['elastic_hash'], error=EnumErrorType.FAIL.name, message=message)
+        ElasticCloudLoginFunctions.update_main_process(
+            hash=pending_import['elastic_hash'], error=EnumErrorType.FAIL.name)
+        if pending_import['emails']:
+            try:
+                send_email_on_import_error(
+                    pending_import['emails'], pending_import['import_type'], message, self.company_id)
+            except Exception as e:
+                logger_api.error("Email of failed parked import can't be sent, elastic_hash: {}, error: {}".format(
+                    pending_import['elastic_hash'], e))
+
+    def start_or_park_import_process(self, pending_import, data, token):
+        """
+        Start import process if there is no running import process and no parked import for company, else park
+        import in company FIFO queue (it's published to cloud validator when running import process is finished).
+
+        :param pending_import: cloud validator message without data and token (publish_file_validation arguments),
+        filename for process flow and set_running_process flag (import process holds company import procedure until
+        it's finished)
+        :param data: cloud validator data
+        :param token: JWT token
+        :return: start import process now (boolean), elastic hash of running import process
+        """
+        with RedisManagement.redis_lock(self.redis_lock_key):
+            run_next_import_process, elastic_hash = self.check_run_next_import_process()
+            if run_next_import_process and not RedisManagement.redis_list_length(self.redis_queue_key):
+                if pending_import['set_running_process']:
+                    self.redis_set_running_import_process()
+                return True, elastic_hash
+
+            pending_import = dict(pending_import, parked_key=self.park_import_data(pending_import, data, token))
+            RedisManagement.push_to_redis_list(self.redis_queue_key, pending_import)
+            return False, elastic_hash
+
+    def dispatch_next_import_process(self):
+        """
+        Publish parked imports of company to cloud validator in FIFO order, until import process which holds company
+        import procedure is published. Parked import is removed from queue only after it's published, if publish
+        fails it stays first in queue (next dispatch publishes it) and company import procedure is released.
+        """
+        from common.mixin.elastic_login import ElasticCloudLoginFunctions
+        from common.rabbit_mq.validator_file_q.validator_publisher import publish_file_validation
+
+        while True:
+            with RedisManagement.redis_lock(self.redis_lock_key):
+                run_next_import_process, elastic_hash = self.check_run_next_import_process()
+                if not run_next_import_process:
+                    return
+                pending_import = RedisManagement.peek_redis_list(self.redis_queue_key)
+                if pending_import is None:
+                    return
+                parked_data = self.load_parked_import_data(pending_import)
+                if parked_data is None:
+                    self.remove_parked_import(pending_import)
+                    self.fail_parked_import_process(pending_import, 'data of parked import can\'t be read')
+                    continue
+
+                pending_import_handler = ImportProcessHandler(
+                    company_id=self.company_id, elastic_hash=pending_import['elastic_hash'],
+                    file_path=pending_import['input_file'], import_type=pending_import['import_type'])
+                if pending_import['set_running_process']:
+                    pending_import_handler.redis_set_running_import_process()
+
+                logger_api.info(enum_msg.IMPORT_PROCEDURE_RUN_NEXT_PROCESS.value['en'].format(
+                    elastic_hash, pending_import['elastic_hash'], self.company_id))
+
+                try:
+                    publish_status = publish_file_validation(
+                        pending_import['company_id'], pending_import['elastic_hash'], parked_data['data'],
+                        pending_import['type_of_process'], pending_import['emails'], parked_data['token'],
+                        pending_import['input_file'], pending_import['language']
+                    )
+                except Exception as e:
+                    logger_api.error("Parked import process can't be published, it stays in queue, company_id: {}, "
+                                     "elastic_hash: {}, error: {}".format(
+                                         self.company_id, pending_import['elastic_hash'], e))
+                    if pending_import['set_running_process']:
+                        pending_import_handler.release_import_process_redis()
+                    return
+
+                self.remove_parked_import(pending_import)
+                if not publish_status['success']:
+                    if pending_import['set_running_process']:
+                        pending_import_handler.release_import_process_redis()
+                    self.fail_parked_import_process(pending_import, publish_status['message'])
+                    continue
+
+            ElasticCloudLoginFunctions.create_process_flow(
+                hash=pending_import['elastic_hash'], error=EnumErrorType.IN_PROGRESS.name,
+                message=enum_message_on_specific_language(
+                    enum_msg.FILE_SEND_TO_rabbitMQ.value, pending_import['language'], pending_import['filename'])
+            )
+
+    @classmethod
+    def dispatch_parked_import_processes(cls):
+        """
+        Publish parked imports of all companies whose running import process is finished or expired (redis key
+        duration) without finish_import_process_redis call.
+        """
+        for redis_queue_key in RedisManagement.scan_redis_keys('*_{}'.format(IMPORT_FIFO_QUEUE)):
+            company_id = redis_queue_key[:-len(IMPORT_FIFO_QUEUE) - 1]
+            cls(company_id=company_id, elastic_hash=None, file_path='', import_type=None).dispatch_next_import_process()
+
+    def release_import_process_redis(self):
+        """
+        Release company import procedure (running import process is finished), parked imports are not dispatched.
+
+        :return: True if company import procedure was held
+        """
         exists_redis_key = RedisManagement.redis_key_exist_check(self.redis_key)
         if exists_redis_key:
             redis_value = {
@@ -521,9 +725,20 @@ class ImportProcessHandler(object):
                 'finished_process': True
             }
             RedisManagement.hmset_to_redis(self.redis_key, redis_value)
+        return exists_redis_key
+
+    def finish_import_process_redis(self, finished_by, reason):
+        if self.release_import_process_redis():
             logger_api.info(
                 "import type: {}, company_id: {}, elastic_hash: {}, finished_process: {}, filename: {},"
                 " finished_by: {}, reason: {}".format(
                     self.import_type, self.company_id, self.elastic_hash, True,  self.file_path, finished_by, reason
                 )
             )
+
+        # Next parked import of this company can start!
+        try:
+            self.dispatch_next_import_process()
+        except Exception as e:
+            logger_api.error("Dispatch of parked import process failed, company_id: {}, error: {}".format(
+                self.company_id, e))
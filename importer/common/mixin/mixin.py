@@ -24,6 +24,20 @@ def server_response(data, code, message, status):
     return Response(response=json.dumps(json_setup), status=code, content_type="application/json")
 
 
+def server_page_response(data, next_cursor, code, message, status):
+    """
+    server_response of paginated API, next_cursor is None on last page
+    """
+    json_setup = {
+        "status": status,
+        "message": message,
+        "data": data,
+        "next_cursor": next_cursor,
+        "code": code
+    }
+    return Response(response=json.dumps(json_setup), status=code, content_type="application/json")
+
+
 def server_socket(data, code, message, status):
     json_setup = {
         "status": status,
@@ -98,10 +112,10 @@ def return_something_from_list(inc, list_in):
     return list_in[inc]
 
 
-def return_errors_from_json_schema(object_input, e, parser, language, line):
+def return_errors_from_json_schema(object_input, e, parser, language, line, validator=None):
     count = line
     errors_append = []
-    v = Draft4Validator(parser)
+    v = validator or Draft4Validator(parser)
     errors = sorted(v.iter_errors(object_input), key=lambda e: e.schema_path)
     if len(e.context):
         for idx, item in enumerate(e.context):
@@ -162,6 +176,22 @@ def return_errors_from_json_schema(object_input, e, parser, language, line):
 
     return errors_append
 
+def unique_dict_list(dict_list):
+    """
+
+    :param dict_list: list of dicts with hashable values (validation errors)
+    :return: list without duplicated dicts, order of first occurrence is kept
+    """
+    seen = set()
+    unique_list = []
+    for item in dict_list:
+        item_key = frozenset(item.items())
+        if item_key not in seen:
+            seen.add(item_key)
+            unique_list.append(item)
+    return unique_list
+
+
 def generate_json(json_obj):
     return json.dumps(json_obj, sort_keys=True)
 
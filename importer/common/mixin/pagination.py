@@ -0,0 +1,144 @@
+import base64
+import json
+
+"""
+
+    Cursor pagination of history and log APIs.
+
+    Cursor is opaque url safe string with sort values of last returned row (elastic search_after values or
+    postgres keyset values), next page continues after it. Every page is query with limit, it doesn't depend on
+    number of previous pages (no offset). Fields (comma separated) select top level fields of returned rows.
+
+    Query string: ?limit=50&cursor=<next_cursor>&fields=id,status,created_at
+
+"""
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class PageRequest(object):
+    def __init__(self, limit=DEFAULT_PAGE_SIZE, after=None, fields=None):
+        """
+
+        :param limit: max number of rows on page
+        :param after: sort values of last row of previous page, None for first page
+        :param fields: set of requested row fields, None for all fields
+        """
+        self.limit = limit
+        self.after = after
+        self.fields = fields
+
+    def include_field(self, field):
+        return self.fields is None or field in self.fields
+
+    def project(self, row):
+        """
+
+        :param row: row as dict
+        :return: row with requested fields only
+        """
+        if self.fields is None:
+            return row
+        return {key: value for key, value in row.items() if key in self.fields}
+
+
+def encode_cursor(values):
+    """
+
+    :param values: sort values of last row on page (json serializable)
+    :return: cursor string
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+
+    :param cursor: cursor string from encode_cursor
+    :return: sort values list, ValueError if cursor is not valid (sort values are not list of strings and numbers)
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Cursor is not valid.')
+    if not isinstance(values, list) or not values or not all(is_sort_value(x) for x in values):
+        raise ValueError('Cursor is not valid.')
+    return values
+
+
+def is_sort_value(value):
+    """
+
+    :param value: decoded cursor value
+    :return: True if value is string or number (elastic search_after and keyset values), bool is not number
+    """
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def get_page_request(args):
+    """
+
+    :param args: request query string (flask request.args)
+    :return: PageRequest, ValueError if limit or cursor is not valid
+    """
+    limit = args.get('limit')
+    if limit is None or limit == '':
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('Limit must be number.')
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError('Limit must be from 1 to {}.'.format(MAX_PAGE_SIZE))
+
+    cursor = args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+
+    fields = args.get('fields')
+    fields = {field.strip() for field in fields.split(',') if field.strip()} if fields else None
+    return PageRequest(limit, after, fields)
+
+
+def is_page_requested(args):
+    """
+
+    :param args: request query string (flask request.args)
+    :return: True if client asked for page (limit or cursor), API without page request returns all rows
+    """
+    return 'limit' in args or 'cursor' in args
+
+
+def next_cursor(page, sort_values):
+    """
+
+    :param page: PageRequest
+    :param sort_values: sort values of returned rows
+    :return: cursor of next page, None if there are no more rows
+    """
+    if len(sort_values) < page.limit:
+        return None
+    return encode_cursor(sort_values[-1])
+
+
+def iter_filtered_rows(fetch_rows, convert_rows, sort_values, after=None, batch_size=DEFAULT_PAGE_SIZE):
+    """
+    Rows filtered after query (e.g. history rows without elastic process), fetched in keyset batches while they are
+    consumed, so page of filtered rows is full even if some fetched rows are skipped.
+
+    :param fetch_rows: function(after, limit) returning rows after sort values (None for first batch)
+    :param convert_rows: function(rows) returning converted row or None (row is skipped) for every row
+    :param sort_values: function(row) returning sort values of row
+    :param after: sort values of last row of previous page, None for first page
+    :param batch_size: rows per query
+    :return: generator of (sort values, converted row)
+    """
+    while True:
+        rows = fetch_rows(after, batch_size)
+        for row, converted_row in zip(rows, convert_rows(rows)):
+            if converted_row is not None:
+                yield sort_values(row), converted_row
+        if len(rows) < batch_size:
+            return
+        after = sort_values(rows[-1])
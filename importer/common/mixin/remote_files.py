@@ -0,0 +1,375 @@
+import calendar
+import ftplib
+import logging
+import queue
+import stat
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import ftputil
+import paramiko
+
+"""
+
+    Pooled FTP/SFTP client.
+
+    Sessions are pooled per connection (protocol, host, port, username, password) and number of open sessions
+    is capped per host, because many companies use same FTP host. Files are downloaded concurrently, every
+    download thread works with own session. Sessions are reused across jobs only if reuse is enabled
+    (scheduler processes), otherwise every session is closed when it's released.
+
+"""
+
+logger_api = logging.getLogger('application')
+
+FTP = 'ftp'
+SFTP = 'sftp'
+
+RemoteEntry = namedtuple('RemoteEntry', ['name', 'is_file', 'mtime'])
+
+
+class MySession(ftplib.FTP):
+    """
+    Make connection on FTP, except any port if FTP listening this port (if FTP is configured on
+    that specific port)
+    """
+    def __init__(self, host, username, password, port):
+        """Act like ftplib.FTP's constructor but connect to another port."""
+        ftplib.FTP.__init__(self)
+        self.connect(host, port)
+        self.login(username, password)
+
+
+def parse_mlsd_time(value):
+    """
+
+    :param value: MLSD modify fact (YYYYMMDDHHMMSS[.sss], UTC)
+    :return: timestamp
+    """
+    return calendar.timegm(datetime.strptime(value[:14], '%Y%m%d%H%M%S').timetuple())
+
+
+def local_time_to_utc(timestamp):
+    """
+
+    :param timestamp: time of LIST listing (ftputil parses listing time as local time)
+    :return: timestamp of same wall clock time in UTC (same as MLSD modify fact)
+    """
+    return float(calendar.timegm(time.localtime(timestamp)))
+
+
+def format_remote_time(timestamp):
+    """
+
+    :param timestamp: modification time of remote file (RemoteEntry.mtime, UTC)
+    :return: modification time as UTC date time string
+    """
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class FtpSession(object):
+    """
+    FTP session with one connection. ftputil is used on its main ftplib session only, files are downloaded with
+    RETR on same connection, so ftputil never opens child sessions which would not be counted in host limit.
+    """
+    def __init__(self, host, port, username, password, session_factory=MySession):
+        self.ftp = None
+
+        def make_session(*args, **kwargs):
+            if self.ftp is not None:
+                raise ftplib.error_temp('Additional FTP connections are not opened outside of host limit')
+            self.ftp = session_factory(*args, **kwargs)
+            return self.ftp
+
+        self.ftp_host = ftputil.FTPHost(host, username, password, port=port, session_factory=make_session)
+        self.home = self.ftp_host.getcwd()
+        self.path = None
+
+    def chdir(self, path):
+        self.ftp_host.chdir(self.home)
+        self.ftp_host.chdir(path)
+        self.path = path
+
+    def is_alive(self):
+        try:
+            self.ftp_host.keep_alive()
+            return True
+        except Exception:
+            return False
+
+    def list_entries(self):
+        """
+        List current directory with one MLSD call, if server doesn't support MLSD use one LIST call
+        (ftputil caches stat results of listed directory). Modification times are UTC timestamps.
+
+        :return: list of RemoteEntry
+        """
+        try:
+            return [
+                RemoteEntry(name, facts.get('type') == 'file', parse_mlsd_time(facts['modify']))
+                for name, facts in self.ftp.mlsd(facts=['type', 'modify'])
+                if facts.get('type') not in ['cdir', 'pdir']
+            ]
+        except (ftplib.error_perm, KeyError, ValueError):
+            return [
+                RemoteEntry(
+                    name, self.ftp_host.path.isfile(name), local_time_to_utc(self.ftp_host.path.getmtime(name)))
+                for name in self.ftp_host.listdir(self.ftp_host.curdir)
+            ]
+
+    def download(self, remote_name, local_path):
+        with open(local_path, 'wb') as local_file:
+            self.ftp.retrbinary('RETR {}'.format(remote_name), local_file.write)
+
+    def remove(self, remote_name):
+        self.ftp_host.remove(remote_name)
+
+    def close(self):
+        self.ftp_host.close()
+
+
+class SftpSession(object):
+    def __init__(self, host, port, username, password):
+        self.transport = paramiko.Transport(host, port)
+        try:
+            self.transport.connect(username=username, password=password)
+            self.sftp = paramiko.SFTPClient.from_transport(self.transport)
+        except Exception:
+            self.transport.close()
+            raise
+        self.home = self.sftp.normalize('.')
+        self.path = None
+
+    def chdir(self, path):
+        self.sftp.chdir(self.home)
+        self.sftp.chdir(path=path)
+        self.path = path
+
+    def is_alive(self):
+        return self.transport.is_active()
+
+    def list_entries(self):
+        """
+        List current directory with one listdir_attr call.
+
+        :return: list of RemoteEntry
+        """
+        return [
+            RemoteEntry(attr.filename, stat.S_ISREG(attr.st_mode or 0), attr.st_mtime)
+            for attr in self.sftp.listdir_attr()
+        ]
+
+    def download(self, remote_name, local_path):
+        self.sftp.get(remote_name, local_path)
+
+    def remove(self, remote_name):
+        self.sftp.remove(remote_name)
+
+    def close(self):
+        self.sftp.close()
+        self.transport.close()
+
+
+SESSION_TYPES = {
+    FTP: FtpSession,
+    SFTP: SftpSession,
+}
+
+
+class PooledSession(object):
+    """
+    Remote session with pool information (connection key and release time)
+    """
+    def __init__(self, key, session):
+        self.key = key
+        self.session = session
+        self.released_at = None
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+class RemoteFilePool(object):
+    """
+    Pool of remote sessions with per host connection cap and concurrent download.
+    """
+
+    def __init__(self, max_connections_per_host=4, download_workers=4, idle_timeout=300, session_types=None):
+        """
+
+        :param max_connections_per_host: max number of open sessions on one host (all users)
+        :param download_workers: max number of concurrent downloads in one job
+        :param idle_timeout: seconds after which idle session is closed
+        :param session_types: session class per protocol
+        """
+        self.max_connections_per_host = int(max_connections_per_host)
+        self.download_workers = int(download_workers)
+        self.idle_timeout = float(idle_timeout)
+        self.session_types = session_types or SESSION_TYPES
+        self.reuse_sessions = False
+        self.host_limits = {}
+        self.idle_sessions = {}
+        self.lock = threading.Lock()
+
+    def enable_reuse(self):
+        """
+        Keep released sessions open and reuse them in next jobs (scheduler processes).
+        """
+        self.reuse_sessions = True
+
+    def get_host_limit(self, host, port):
+        with self.lock:
+            if (host, port) not in self.host_limits:
+                self.host_limits[(host, port)] = threading.BoundedSemaphore(self.max_connections_per_host)
+            return self.host_limits[(host, port)]
+
+    def close_expired_sessions(self):
+        """
+        Close idle sessions which are not used for idle timeout and free their host slots.
+        """
+        now = time.time()
+        with self.lock:
+            expired_sessions = []
+            for key, sessions in self.idle_sessions.items():
+                expired_sessions.extend(s for s in sessions if now - s.released_at >= self.idle_timeout)
+                sessions[:] = [s for s in sessions if now - s.released_at < self.idle_timeout]
+        for pooled_session in expired_sessions:
+            self.discard(pooled_session)
+
+    def pop_idle_session(self, key):
+        """
+
+        :return: alive idle session for connection (with its host slot), dead sessions are closed
+        """
+        while True:
+            with self.lock:
+                sessions = self.idle_sessions.get(key)
+                if not sessions:
+                    return None
+                pooled_session = sessions.pop()
+            if pooled_session.is_alive():
+                return pooled_session
+            self.discard(pooled_session)
+
+    def evict_idle_session(self, host, port):
+        """
+        Close one idle session of other user on same host, its host slot goes to the caller.
+
+        :return: True if session is closed
+        """
+        with self.lock:
+            for key, sessions in self.idle_sessions.items():
+                if key[1:3] == (host, port) and sessions:
+                    pooled_session = sessions.pop()
+                    break
+            else:
+                return False
+        self.close_session(pooled_session)
+        return True
+
+    def acquire(self, protocol, host, port, username, password, blocking=True):
+        """
+        Idle sessions keep their host slot, so number of open sessions (active and idle) on host never
+        exceeds max_connections_per_host.
+
+        :param blocking: wait for free connection on host, if False return None when host limit is reached
+        :return: connected session (PooledSession), raise exception if connection fails
+        """
+        self.close_expired_sessions()
+        key = (protocol, host, port, username, password)
+        pooled_session = self.pop_idle_session(key)
+        if pooled_session is not None:
+            return pooled_session
+
+        host_limit = self.get_host_limit(host, port)
+        if not host_limit.acquire(False) and not self.evict_idle_session(host, port):
+            if not blocking:
+                return None
+            host_limit.acquire()
+
+        try:
+            return PooledSession(key, self.session_types[protocol](host, port, username, password))
+        except Exception:
+            host_limit.release()
+            raise
+
+    def release(self, pooled_session, discard=False):
+        """
+
+        :param pooled_session: session from acquire
+        :param discard: close session (session is broken)
+        """
+        if self.reuse_sessions and not discard:
+            pooled_session.released_at = time.time()
+            with self.lock:
+                self.idle_sessions.setdefault(pooled_session.key, []).append(pooled_session)
+        else:
+            self.discard(pooled_session)
+
+    def discard(self, pooled_session):
+        """
+        Close session and free its host slot.
+        """
+        self.close_session(pooled_session)
+        self.get_host_limit(*pooled_session.key[1:3]).release()
+
+    @staticmethod
+    def close_session(pooled_session):
+        try:
+            pooled_session.close()
+        except Exception as e:
+            logger_api.info('Error closing remote session {}: {}'.format(pooled_session.key[1], e))
+
+    def download_files(self, pooled_session, files):
+        """
+        Download files concurrently from directory of session. Besides given session, additional sessions
+        are opened for download threads while host limit allows it.
+
+        :param pooled_session: session (from acquire) with changed remote directory
+        :param files: list of (remote file name, local path)
+        :return: dict remote file name -> None if file is downloaded, else exception
+        """
+        if not files:
+            return {}
+
+        protocol, host, port, username, password = pooled_session.key
+        download_sessions = queue.Queue()
+        download_sessions.put(pooled_session)
+        extra_sessions = []
+        for _ in range(min(self.download_workers, len(files)) - 1):
+            try:
+                extra_session = self.acquire(protocol, host, port, username, password, blocking=False)
+            except Exception as e:
+                logger_api.info('Error opening download session on {}: {}'.format(host, e))
+                break
+            if extra_session is None:
+                break
+            extra_sessions.append(extra_session)
+            try:
+                extra_session.chdir(pooled_session.path)
+            except Exception as e:
+                logger_api.info('Error opening download session on {}: {}'.format(host, e))
+                break
+            download_sessions.put(extra_session)
+
+        def download(remote_name, local_path):
+            session = download_sessions.get()
+            try:
+                session.download(remote_name, local_path)
+                return None
+            except Exception as e:
+                return e
+            finally:
+                download_sessions.put(session)
+
+        try:
+            with ThreadPoolExecutor(max_workers=download_sessions.qsize()) as executor:
+                results = list(executor.map(lambda file: download(*file), files))
+        finally:
+            for extra_session in extra_sessions:
+                self.release(extra_session, discard=extra_session.path != pooled_session.path)
+
+        return {remote_name: result for (remote_name, local_path), result in zip(files, results)}
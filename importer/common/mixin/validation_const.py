@@ -286,44 +286,69 @@ def return_all_fields_and_mandatory(input_params):
     return all_fields, mandatory_fields
 
 
-def return_import_type_based_on_parser(import_type, data=None, api_request=True):
+def collect_planogram_lookups(data):
+    """
+    Planogram import lookups, collected in one pass over import content.
+
+    :param data: planogram import content (dict rows)
+    :return: multiple_pricelists (False if some row is without it), price_lists (number of price lists, False if
+    multiple_pricelists is not a number) and price_columns (price columns of import content)
+    """
+    multiple_pricelists = True
+    price_lists = 0
+    price_columns = []
+    for x in data:
+        multi_price = x.get('multiple_pricelists')
+        if not multi_price:
+            multiple_pricelists = False
+            multi_price = 1
+        if price_lists is not False:
+            try:
+                price_lists = max(price_lists, int(float(multi_price)))
+            except Exception:
+                price_lists = False
+        for column in x:
+            if column and (column.startswith('price_') or column.startswith('Price_')) and \
+                    column not in price_columns:
+                price_columns.append(column)
+    return {'multiple_pricelists': multiple_pricelists, 'price_lists': price_lists, 'price_columns': price_columns}
+
+
+def return_import_type_based_on_parser(import_type, data=None, api_request=True, price_lists=None):
     """
 
     :param import_type: location, machine, machine_type, regions
     :param data: import content, only for planogram import
+    :param price_lists: number of price lists of planogram import (collect_planogram_lookups), counted from data
+    if it's not set
     :return: json schema validation type
     """
     for i_type in ImportType:
         if import_type == i_type.value.get('id') or import_type == i_type.name:
             # This is new business logic request only for planogram import!
+            # Planogram definition is copied, ImportType is shared by all consumer worker threads
             if import_type == ImportType.PLANOGRAMS.name:
-                actual_import_fields = deepcopy(i_type.value['def']['custom_valid_fields'])
+                parser_def = deepcopy(i_type.value['def'])
                 overwrite_import_fields = dict(
-                    [(x, y) for x, y in actual_import_fields.items() if not x.startswith('price_')]
+                    [(x, y) for x, y in parser_def['custom_valid_fields'].items() if not x.startswith('price_')]
                 )
-                actual_all_fields = deepcopy(i_type.value['def']['all_fields'])
-                overwrite_actual_fields = [x for x in actual_all_fields if not x.startswith('price_')]
-
-                multi_price_list = []
-                try:
-                    for x in data:
-                        multi_price = x.get('multiple_pricelists')
-                        if not multi_price:
-                            multi_price_list.append(1)
-                        else:
-                            import_multi_price = int(float(multi_price))
-                            multi_price_list.append(import_multi_price)
-                except Exception as e:
+                overwrite_actual_fields = [x for x in parser_def['all_fields'] if not x.startswith('price_')]
+
+                if price_lists is None:
+                    try:
+                        price_lists = collect_planogram_lookups(data)['price_lists']
+                    except Exception:
+                        return False
+                if price_lists is False:
                     return False
-                if len(multi_price_list):
-                    for x in range(1, max(multi_price_list)+1):
-                        price = 'price_'+str(x)
-                        overwrite_actual_fields.append(price)
-                        overwrite_import_fields.update({price: float})
-                i_type.value['def']['custom_valid_fields'] = overwrite_import_fields
-                i_type.value['def']['all_fields'] = overwrite_actual_fields
-
-                return i_type.value['def']
+                for x in range(1, price_lists + 1):
+                    price = 'price_'+str(x)
+                    overwrite_actual_fields.append(price)
+                    overwrite_import_fields.update({price: float})
+                parser_def['custom_valid_fields'] = overwrite_import_fields
+                parser_def['all_fields'] = overwrite_actual_fields
+
+                return parser_def
 
             if import_type == ImportType.MACHINES.name and api_request:
                 parser_def = deepcopy(i_type.value['def'])
@@ -0,0 +1,51 @@
+"""
+
+    Vend formats of EVA vends published to cloud.
+
+    Vends are published per sold unit (default) or as aggregated batch per product and payment type (count of vends
+    in time window between last imported and new EVA) with VEND_PUBLISH envdir "vend_format": "batch".
+
+"""
+
+VEND_FORMAT_BATCH = 'batch'
+VEND_FORMAT_UNIT = 'unit'
+
+
+def get_vend_format(config):
+    """
+
+    :param config: VEND_PUBLISH config
+    :return: VEND_FORMAT_BATCH only if it's configured, VEND_FORMAT_UNIT otherwise
+    """
+    return VEND_FORMAT_BATCH if config.get('vend_format') == VEND_FORMAT_BATCH else VEND_FORMAT_UNIT
+
+
+def expand_vend_batch(batch):
+    """
+    Vends per sold unit from vend batch, transaction id of vend is transaction id prefix and vend number in batch.
+
+    :param batch: vend batch (EvaHandler.eva_counter_vends)
+    :return: list of vends in VEND_FORMAT_UNIT format
+    """
+    return [{
+        'operator_identifier': batch['operator_identifier'],
+        'seTime': batch['seTime'],
+        'product_code_in_map': batch['product_code_in_map'],
+        'seValue': batch['seValue'],
+        'payment_method_id': batch['payment_method_id'],
+        'transaction_id': u'{}-{}'.format(batch['transaction_id_prefix'], counter),
+        'device_pid': batch['device_pid'],
+        'zip_filename': batch['zip_filename'],
+    } for counter in range(1, batch['count'] + 1)]
+
+
+def count_vends(vends_array, vend_format):
+    """
+
+    :param vends_array: vends or vend batches
+    :param vend_format: format of vends_array
+    :return: number of sold units
+    """
+    if vend_format == VEND_FORMAT_BATCH:
+        return sum(batch['count'] for batch in vends_array)
+    return len(vends_array)
@@ -0,0 +1,53 @@
+"""
+
+    Incremental listing of vend files on FTP/SFTP.
+
+    Watermark is modification time of last swept vend file, files older than watermark are not checked against vend
+    history. File is behind watermark only when it's imported (in vend history), downloaded file which isn't
+    imported yet (or its import failed) holds watermark, so it's checked and downloaded again in next sweep.
+
+"""
+
+
+def files_after_watermark(remote_files, watermark):
+    """
+
+    :param remote_files: list of RemoteEntry
+    :param watermark: modification time of last swept file or None (incremental listing is disabled)
+    :return: files which are not older than watermark
+    """
+    if watermark is None:
+        return list(remote_files)
+    return [entry for entry in remote_files if entry.mtime >= watermark]
+
+
+def split_processed_files(remote_files, processed_filenames):
+    """
+
+    :param remote_files: list of RemoteEntry
+    :param processed_filenames: names of files which are in vend history
+    :return: files for download, files which are already processed
+    """
+    new_files = [entry for entry in remote_files if entry.name not in processed_filenames]
+    processed_files = [entry for entry in remote_files if entry.name in processed_filenames]
+    return new_files, processed_files
+
+
+def next_watermark(watermark, new_files, processed_files):
+    """
+    Move watermark to newest processed file, but not over oldest file which isn't processed yet.
+
+    :param watermark: current watermark or None
+    :param new_files: files downloaded in this sweep (not in vend history)
+    :param processed_files: files in vend history
+    :return: new watermark, None if watermark doesn't change
+    """
+    if watermark is None:
+        return None
+    if new_files:
+        new_watermark = min(entry.mtime for entry in new_files)
+    elif processed_files:
+        new_watermark = max(entry.mtime for entry in processed_files)
+    else:
+        return None
+    return new_watermark if new_watermark > watermark else None
@@ -1,4 +1,3 @@
-import codecs
 import re
 import os
 import uuid
@@ -6,8 +5,12 @@ import shutil
 import zipfile
 import datetime
 from common.logging.setup import vend_logger
+from common.mixin.eva_diff import diff_pa7, diff_pa_positions
+from common.mixin.eva_parser import read_eva_file, eva_records, eva_pa_positions
+from common.mixin.vend_batch import VEND_FORMAT_BATCH, count_vends, expand_vend_batch, get_vend_format
 from common.mixin.validator_import import VENDS_WORKING_DIR, create_if_doesnt_exist
 from common.rabbit_mq.database_interaction_q.vend_db_publisher import vend_publish_to_database
+from common.urls.urls import vend_publish_config
 from database.cloud_database.core.query import DeviceQueryOnCloud, CompanyQueryOnCloud
 from common.mixin.enum_errors import enum_message_on_specific_language
 from database.company_database.models.models import vend_device_history
@@ -35,6 +38,8 @@ VENDS_INITIAL_INFO = {
 
 }
 
+VEND_FORMAT = get_vend_format(vend_publish_config)
+
 
 def new_device_pid_detect_operation(data, company_id, import_type):
     """
@@ -51,28 +56,7 @@ def new_device_pid_detect_operation(data, company_id, import_type):
     eva = data['data']['import_filename']
 
     try:
-        with codecs.open(eva, "r", encoding='utf-8', errors='ignore') as new_file:
-            new_file_lines = new_file.readlines()
-            la1_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('LA1*')]
-            pa_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('PA')]
-            ea_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('EA')]
-            ca_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('CA')]
-            da_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('DA')]
-            id_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('ID')]
-            va_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('VA')]
-            se_field = [field.rstrip("\n") for field in new_file_lines if field.startswith('SE')]
-
-            eva_content = {
-                "la_field": la1_field,
-                "pa_field": pa_field,
-                "ea_field": ea_field,
-                "ca_field": ca_field,
-                "da_field": da_field,
-                "id_field": id_field,
-                "va_field": va_field,
-                "se_field": se_field
-            }
-            data["data"]["eva_content"] = eva_content
+        data["data"]["eva_content"] = read_eva_file(eva)
     except Exception as e:
         vend_logger.error(e)
         return {'status': False, 'data': eva}
@@ -105,13 +89,6 @@ def handle_insert_device_pid_local_history(new_or_newest_pid_data):
             vend_logger.error(e)
 
 
-def get_vends_data_since_initialization(eva_string, eva_field_position):
-    if eva_string:
-        eva_fields = eva_string.split('*')
-        if len(eva_fields) > eva_field_position:
-            return eva_fields[eva_field_position]
-
-
 def get_decimal_points(ird_fields):
     ird_id = 0
     for ird4 in ird_fields:
@@ -122,12 +99,6 @@ def get_decimal_points(ird_fields):
     return ird_id
 
 
-def pairwise(item):
-    item = iter(item)
-    while True:
-        yield next(item), next(item)
-
-
 class MainVendProcessLogger(object):
     def __init__(self, company_id, import_type, process_request_type, token):
         self.company_id = company_id
@@ -374,6 +345,7 @@ class EvaHandler(object):
     """
     This class is created for EVA PA1 and EVA PA2 vend calculating.
     """
+
     def __init__(self, company_id, import_type, request_type, main_elastic_hash, general_process_logger, zip_filename,
                  cpi_payment_type):
         self.company_id = company_id
@@ -384,62 +356,32 @@ class EvaHandler(object):
         self.zip_filename = zip_filename
         self.cpi_payment_type = cpi_payment_type
 
-    @classmethod
-    def eva_pa_fields_handler(cls, eva_type, pa_fields):
+    def calculate_vends(self, old_eva_content, new_eva_content, eva_file, machine_id, machine_external_id,
+                        file_timestamp, old_file_timestamp=None):
         """
-        This method make basic sorting on PA1 and PA2 EVA fields and generate new initial working EVA line, because in
-        original EVA file PA1 and PA2 fields is not in same rows, because of that this method sort and put this fields
-        into one rows!
-        :return: lists of initial sorted EVA PA fields
+        Calculate vends between last imported and new EVA of device. Two types of calculating EVA vend: a) PA7 EVA
+        fields, b) PA1 and PA2 EVA fields (if new EVA doesn't have PA7 fields).
+        :param old_eva_content: eva content of last imported EVA (local device history)
+        :param new_eva_content: eva content of new EVA
+        :param old_file_timestamp: timestamp of last imported EVA (start of vend batch time window)
+        :return: response of eva_counter_vends, None if EVA doesn't have PA1 or PA7
         """
-        eva_position = [{eva_type: []}]
-        for a, b in pairwise(pa_fields):
-            if a.startswith('PA1'):
-                pa101 = get_vends_data_since_initialization(a, 1)
-            if b.startswith('PA1'):
-                pa101 = get_vends_data_since_initialization(b, 1)
-            if a.startswith('PA2'):
-                pa201 = get_vends_data_since_initialization(a, 1)
-                pa202 = get_vends_data_since_initialization(a, 2)
-            if b.startswith('PA2'):
-                pa201 = get_vends_data_since_initialization(b, 1)
-                pa202 = get_vends_data_since_initialization(b, 2)
-
-            for archive_dict in eva_position:
-                archive_dict[eva_type].append({'pa101': pa101, 'pa201': pa201, 'pa202': pa202})
-        return eva_position
+        new_records = eva_records(new_eva_content["pa_field"], ('PA1', 'PA2', 'PA7'))
+        new_eva_decimal_points = [x for x in new_eva_content["id_field"] if x.startswith('ID4*')]
+
+        new_pa7_records = [record for record in new_records if record[0] == 'PA7']
+        if new_pa7_records:
+            deltas = diff_pa7(eva_records(old_eva_content["pa_field"], ('PA7',)), new_pa7_records)
+        elif any(record[0] == 'PA1' for record in new_records):
+            new_pa_positions = eva_pa_positions(record for record in new_records if record[0] != 'PA7')
+            old_pa_positions = eva_pa_positions(eva_records(old_eva_content["pa_field"], ('PA1', 'PA2')))
+            deltas = diff_pa_positions(old_pa_positions, new_pa_positions)
+        else:
+            return None
 
-    @classmethod
-    def group_eva_pa_fields(cls, eva_position):
-        """
-        This method make basic grouping and generate new initial working EVA rows, this is useful when we calculate EVA
-        vends, price and product column for this vends!
-        :return: grouped lists with new and old eva with new generated eva string
-        """
-        final_new_pa_fields_list = []
-        final_old_pa_fields_list = []
-
-        for eva_list in eva_position:
-            for key, value in eva_list.items():
-                if key == 'old_eva_pa':
-                    for old_eva_filed in value:
-                        get_pa101_position_old = old_eva_filed['pa101']
-                        get_pa201_position_old = old_eva_filed['pa201']
-                        get_pa202_position_old = old_eva_filed['pa202']
-
-                        final_old_pa_fields = 'PA' + str('*') + get_pa101_position_old + str('*') + str(
-                            get_pa201_position_old) + str('*') + str(get_pa202_position_old)
-                        final_old_pa_fields_list.append(final_old_pa_fields)
-                if key == 'new_eva_pa':
-                    for new_eva_field in value:
-                        get_pa101_position_new = new_eva_field['pa101']
-                        get_pa201_position_new = new_eva_field['pa201']
-                        get_pa202_position_new = new_eva_field['pa202']
-                        final_new_pa_fields = 'PA' + str('*') + get_pa101_position_new + str('*') + str(
-                            get_pa201_position_new) + str('*') + str(get_pa202_position_new)
-                        final_new_pa_fields_list.append(final_new_pa_fields)
-
-        return final_new_pa_fields_list, final_old_pa_fields_list
+        return self.eva_counter_vends(
+            deltas, eva_file, machine_id, machine_external_id, new_eva_decimal_points, file_timestamp,
+            old_file_timestamp)
 
     def vends_eva_exception_logger(self, device_pid_info, fail_path, json_hash, error):
         """
@@ -480,170 +422,91 @@ class EvaHandler(object):
             main_elastic_hash=self.main_elastic_hash
         )
 
-    def eva_pa7_fields_handler(self, old_eva_pa_fields, new_eva_pa_fields, eva_file, machine_id, machine_external_id,
-                               new_eva_decimal_points, file_timestamp):
-        pa7_new = []
-        pa7_old = []
-        wrong_counter_file = []
-        fail_processing_eva_file = []
-        file_with_wrong_counter_details = []
-        payment_type_cpi_list = ['CA', 'DB', 'DC', 'DD']
-        total_vends = 0
-        vends_array = []
-        for old_eva_pa in old_eva_pa_fields:
-            if old_eva_pa.startswith('PA7'):
-                pa7_old.append(old_eva_pa)
-
-        for new_eva_pa in new_eva_pa_fields:
-            if new_eva_pa.startswith('PA7'):
-                pa7_new.append(new_eva_pa)
-
-        for price_list in payment_type_cpi_list:
-            old_eva_fields = [x for x in pa7_old if str(
-                get_vends_data_since_initialization(x, 2)) == price_list]
-            new_eva_fields = [x for x in pa7_new if str(
-                get_vends_data_since_initialization(x, 2)) == price_list]
-            for new_eva_pa in new_eva_fields:
-                processing_new_eva_price = '*'.join(new_eva_pa.split('*')[:4])
-                final_processing = list(
-                    filter(lambda y: processing_new_eva_price in y, old_eva_fields))
-                difference = 0
-                if final_processing:
-                    difference = int(
-                        get_vends_data_since_initialization(new_eva_pa, 5)) - int(
-                        get_vends_data_since_initialization(final_processing[0], 5))
-
-                    if difference < 0:
-                        if self.zip_filename not in wrong_counter_file:
-                            wrong_counter_file.append(self.zip_filename)
-                        if eva_file not in fail_processing_eva_file:
-                            fail_processing_eva_file.append(eva_file)
-
-                        file_with_wrong_counter_details.append({
-                            'file': self.zip_filename,
-                            'device_pid': machine_id,
-                            'machine_external_id': machine_external_id,
-                            'difference': difference,
-                            'final_processing': final_processing,
-                            'eva_filename': eva_file,
-                            'new_eva_field': new_eva_pa
-                        })
-                        continue
-
-                    if difference >= 0:
-                        total_vends += difference
-                counter = 0
-                for product in range(difference):
-                    counter += 1
-                    product_number = get_vends_data_since_initialization(new_eva_pa, 1)
-                    transaction_id = u'{}-{}-{}'.format(price_list, product_number, counter)
-
-                    if product_number.isdigit():
-                        try:
-                            total_price = int(
-                                get_vends_data_since_initialization(new_eva_pa, 6)) - int(
-                                get_vends_data_since_initialization(final_processing[0], 6)
-                            )
-                            calculated_price = total_price / difference
-                            average_price = calculated_price / float(
-                                get_decimal_points(new_eva_decimal_points))
-                            vends_array.append({
-                                'operator_identifier': machine_external_id,
-                                'seTime': file_timestamp,
-                                'product_code_in_map': int(product_number),
-                                'seValue': average_price,
-                                'payment_method_id': self.cpi_payment_type.get(price_list, 0),
-                                'transaction_id': transaction_id,
-                                'device_pid': machine_id,
-                                'zip_filename': self.zip_filename})
-                        except Exception as e:
-                            fail_processing_eva_file.append(eva_file)
-                            self.general_process_logger.update_system_log_flow(
-                                self.company_id, self.import_type, machine_id, e,
-                                key_enum=MainMessage.VEND_IMPORTER_ERROR_OCCUR_DETAIL.value,
-                                logs_level=EnumErrorType.ERROR.name
-                            )
-                            # logger.error("Error description", exc_info=True)
-                            continue
-        response = {
-            'vends_array': vends_array,
-            'total_vends': total_vends,
-            'wrong_counter_file': wrong_counter_file,
-            'fail_processing_eva_file': fail_processing_eva_file,
-            'file_with_wrong_counter_details': file_with_wrong_counter_details
-        }
-        return response
-
-    def eva_pa_vend_calculation(self, new_pa_fields, old_pa_fields, eva_file, new_eva_decimal_points, file_timestamp,
-                                machine_id, machine_external_id):
+    def eva_counter_vends(self, deltas, eva_file, machine_id, machine_external_id, new_eva_decimal_points,
+                          file_timestamp, old_file_timestamp=None):
+        """
+        Vends from counter deltas of PA7 records or PA1/PA2 positions (common.mixin.eva_diff), one vend batch per
+        position or vends per sold unit (VEND_FORMAT).
+        :param deltas: list of CounterDelta
+        :return: vends, total number of vends and files with wrong (decreased) counters
+        """
         wrong_counter_file = []
         fail_processing_eva_file = []
         file_with_wrong_counter_details = []
         total_vends = 0
         vends_array = []
-
-        for new_eva_pa in new_pa_fields:
-            processing_new_eva = '*'.join(new_eva_pa.split('*')[:2])
-            final_processing = list(filter(lambda x: processing_new_eva in x, old_pa_fields))
-            difference = 0
-            if final_processing:
-                new_eva_vend_since_init = get_vends_data_since_initialization(new_eva_pa, 2)
-                old_eva_vend_since_init = get_vends_data_since_initialization(
-                    final_processing[0], 2)
-                difference = int(new_eva_vend_since_init) - int(old_eva_vend_since_init)
-                if difference < 0:
-                    if self.zip_filename not in wrong_counter_file:
-                        wrong_counter_file.append(self.zip_filename)
-                    if eva_file not in fail_processing_eva_file:
-                        fail_processing_eva_file.append(eva_file)
-
-                    file_with_wrong_counter_details.append({
-                        'file': self.zip_filename,
-                        'device_pid': machine_id,
-                        'machine_external_id': machine_external_id,
-                        'difference': difference,
-                        'final_processing': final_processing,
-                        'eva_filename': eva_file,
-                        'new_eva_field': new_eva_pa
-                    })
-                    continue
-
-                if difference >= 0:
-                    total_vends += difference
-            counter = 0
-            if difference >= 0:
-                for product in range(difference):
-                    counter += 1
-                    product_number = get_vends_data_since_initialization(new_eva_pa, 1)
-
-                    define_transaction_id = u'{}-{}-{}'.format(0, product_number, counter)
-                    if product_number.isdigit():
-                        try:
-                            total_price_new = get_vends_data_since_initialization(
-                                new_eva_pa, 3)
-                            total_price_old = get_vends_data_since_initialization(
-                                final_processing[0], 3)
-                            final_total_price = int(total_price_new) - int(total_price_old)
-                            calculated_price = final_total_price / difference
-                            average_price = calculated_price / float(
-                                get_decimal_points(new_eva_decimal_points))
-
-                            vends_array.append({
-                                'operator_identifier': machine_external_id,
-                                'seTime': file_timestamp,
-                                'product_code_in_map': int(product_number),
-                                'seValue': average_price,
-                                'payment_method_id': self.cpi_payment_type['CA'],
-                                'transaction_id': define_transaction_id,
-                                'device_pid': machine_id,
-                                'zip_filename': self.zip_filename,
-                            })
-
-                        except Exception as e:
-                            vend_logger.error("Error description: ", e)
-                            fail_processing_eva_file.append(eva_file)
-                            # logger.error("Error description", exc_info=True)
-                            continue
+        decimal_points = None
+
+        for delta in deltas:
+            difference = delta.vends
+            if difference < 0:
+                if self.zip_filename not in wrong_counter_file:
+                    wrong_counter_file.append(self.zip_filename)
+                if eva_file not in fail_processing_eva_file:
+                    fail_processing_eva_file.append(eva_file)
+
+                file_with_wrong_counter_details.append({
+                    'file': self.zip_filename,
+                    'device_pid': machine_id,
+                    'machine_external_id': machine_external_id,
+                    'difference': difference,
+                    'final_processing': delta.old_lines(),
+                    'eva_filename': eva_file,
+                    'new_eva_field': delta.new_line()
+                })
+                continue
+
+            total_vends += difference
+            if not difference:
+                continue
+
+            product_number = delta.product_number
+            if not product_number.isdigit():
+                continue
+
+            if delta.payment_type is None:
+                transaction_prefix = 0
+                payment_method_id = self.cpi_payment_type['CA']
+            else:
+                transaction_prefix = delta.payment_type
+                payment_method_id = self.cpi_payment_type.get(delta.payment_type, 0)
+
+            try:
+                if decimal_points is None:
+                    decimal_points = float(get_decimal_points(new_eva_decimal_points))
+                value = delta.value()
+                total_value = value / decimal_points
+                average_price = value / difference / decimal_points
+            except Exception as e:
+                # All vends of position fail, error is logged once per position
+                fail_processing_eva_file.append(eva_file)
+                if delta.payment_type is None:
+                    vend_logger.error("Error description: {}".format(e))
+                else:
+                    self.general_process_logger.update_system_log_flow(
+                        self.company_id, self.import_type, machine_id, e,
+                        key_enum=MainMessage.VEND_IMPORTER_ERROR_OCCUR_DETAIL.value,
+                        logs_level=EnumErrorType.ERROR.name
+                    )
+                continue
+
+            batch = {
+                'operator_identifier': machine_external_id,
+                'seTimeFrom': old_file_timestamp,
+                'seTime': file_timestamp,
+                'product_code_in_map': int(product_number),
+                'seValue': average_price,
+                'count': difference,
+                'total_value': total_value,
+                'payment_method_id': payment_method_id,
+                'transaction_id_prefix': u'{}-{}'.format(transaction_prefix, product_number),
+                'device_pid': machine_id,
+                'zip_filename': self.zip_filename,
+            }
+            if VEND_FORMAT == VEND_FORMAT_BATCH:
+                vends_array.append(batch)
+            else:
+                vends_array.extend(expand_vend_batch(batch))
 
         response = {
             'vends_array': vends_array,
@@ -779,7 +642,7 @@ class EvaAfterCloudValidationTasks(object):
         :param success_dir: success dir path (str)
         :param reimport_list: reimport info (list)
         :param reimport_filename: detected reimport eva (str)
-        :param vends_array: generated final vends (list)
+        :param vends_array: generated final vends or vend batches (list, VEND_FORMAT)
         :param machine_id: machine_id (str)
         :param all_processing_eva_file: total processed eva (list)
         :param fail_processing_eva_file: NOK processed eva (list)
@@ -832,6 +695,7 @@ class EvaAfterCloudValidationTasks(object):
 
             publish_vend_message = {
                 'vend_data': vends_array,
+                'vend_format': VEND_FORMAT,
                 'email': self.email,
                 'token': self.token,
                 'reimport': finally_reimport_list,
@@ -846,7 +710,7 @@ class EvaAfterCloudValidationTasks(object):
                 'filename_regex': filename_regex
             }
             self.general_process_logger.update_system_log_flow(
-                self.company_id, self.import_type, vends_array,
+                self.company_id, self.import_type, len(vends_array), count_vends(vends_array, VEND_FORMAT), VEND_FORMAT,
                 key_enum=MainMessage.VEND_EVA_DATA_PUBLISHED_TO_CLOUD_SYSTEM_LOG.value,
                 logs_level=EnumErrorType.IN_PROGRESS.name)
 
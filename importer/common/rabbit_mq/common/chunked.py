@@ -0,0 +1,215 @@
+import base64
+import datetime
+import decimal
+import json
+import tempfile
+import uuid
+import zlib
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+"""
+
+    Chunked publishing of large Rabbit MQ messages (vend data, database import data).
+
+    Data of message (message[data_key]) is serialized to JSON once and split into chunks of chunk_size bytes, every
+    chunk is compressed on its own (zlib, lz4 or none) and published as separate JSON message with rest of message
+    (envelope) and chunk header:
+
+    {"chunk": {"transfer_id": "...", "elastic_hash": "...", "sequence": 0, "count": 3, "compression": "zlib",
+               "size": 2621440},
+     "data_key": "data", "message": {...message without data...}, "payload": "<base64 of compressed chunk>"}
+
+    Chunks of one split message have same transfer_id (uuid generated by split_message), elastic_hash is only for
+    logging (it can be None and same for many messages). Consumer passes every received message to
+    ChunkAssembler.add, chunks of message are spooled to temporary file (not kept in memory) until last chunk is
+    received, then original message is returned. Messages without chunk
+    header are returned as they are, so consumer accepts both formats.
+
+    Configuration (envdir PUBLISH_CHUNKS), chunking is disabled without chunk_size (or with 0):
+    {"chunk_size": 1048576, "compression": "zlib"}
+
+"""
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_ZLIB = 'zlib'
+COMPRESSION_LZ4 = 'lz4'
+
+
+def json_default(o):
+    """
+    Same serialization of dates, decimals and uuids as kombu json serializer (used for not chunked messages).
+    """
+    if isinstance(o, datetime.datetime):
+        r = o.isoformat()
+        if r.endswith('+00:00'):
+            r = r[:-6] + 'Z'
+        return r
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(o).__name__))
+
+
+def compress(payload, compression):
+    if compression in (None, COMPRESSION_NONE):
+        return payload
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(payload)
+    if compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise ValueError('lz4 compression is not available, lz4 package is not installed')
+        return lz4_frame.compress(payload)
+    raise ValueError('Unknown compression: {}'.format(compression))
+
+
+def decompress(payload, compression):
+    if compression in (None, COMPRESSION_NONE):
+        return payload
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise ValueError('lz4 compression is not available, lz4 package is not installed')
+        return lz4_frame.decompress(payload)
+    raise ValueError('Unknown compression: {}'.format(compression))
+
+
+def split_message(message, data_key, elastic_hash, chunk_size, compression=COMPRESSION_ZLIB):
+    """
+
+    :param message: message dict
+    :param data_key: key of message data which is chunked ('data', 'vend_data')
+    :param elastic_hash: elastic hash of message (in chunk header for logging)
+    :param chunk_size: max size of serialized data in one chunk (bytes, before compression)
+    :param compression: compression of chunks (zlib, lz4, none)
+    :return: generator of chunk messages
+    """
+    if chunk_size <= 0:
+        raise ValueError('Chunk size must be positive: {}'.format(chunk_size))
+    # Validate compression before data is serialized
+    compress(b'', compression)
+
+    payload = json.dumps(message[data_key], default=json_default).encode('utf-8')
+    envelope = {key: value for key, value in message.items() if key != data_key}
+    count = max(1, -(-len(payload) // chunk_size))
+    view = memoryview(payload)
+    transfer_id = uuid.uuid4().hex
+
+    for sequence in range(count):
+        part = view[sequence * chunk_size:(sequence + 1) * chunk_size].tobytes()
+        yield {
+            'chunk': {
+                'transfer_id': transfer_id,
+                'elastic_hash': elastic_hash,
+                'sequence': sequence,
+                'count': count,
+                'compression': compression or COMPRESSION_NONE,
+                'size': len(payload),
+            },
+            'data_key': data_key,
+            'message': envelope,
+            'payload': base64.b64encode(compress(part, compression)).decode('ascii'),
+        }
+
+
+def publish_chunked(producer, message, data_key, elastic_hash, config, **publish_kwargs):
+    """
+    Publish message in chunks if chunking is configured, otherwise publish it as one message.
+
+    :param producer: kombu producer
+    :param config: chunk config from envdir (chunk_size, compression)
+    :param publish_kwargs: producer.publish keyword arguments
+    :return: number of published messages
+    """
+    chunk_size = config.get('chunk_size')
+    if not chunk_size:
+        producer.publish(message, **publish_kwargs)
+        return 1
+
+    published = 0
+    for chunk in split_message(message, data_key, elastic_hash, chunk_size,
+                               config.get('compression', COMPRESSION_ZLIB)):
+        producer.publish(chunk, **publish_kwargs)
+        published += 1
+    return published
+
+
+def is_chunk(body):
+    return isinstance(body, dict) and 'chunk' in body and 'payload' in body
+
+
+class ChunkAssembler(object):
+    """
+    Reassembly of chunked messages on consumer side, chunks may arrive in any order and chunks of many messages
+    may be interleaved. Received chunks are kept in temporary files, not in memory.
+    """
+
+    def __init__(self, spool_dir=None):
+        self.spool_dir = spool_dir
+        self.transfers = {}
+
+    def add(self, body):
+        """
+
+        :param body: received message
+        :return: original message if body is not chunk or it's last missing chunk of message, otherwise None
+        """
+        if not is_chunk(body):
+            return body
+
+        header = body['chunk']
+        key = header['transfer_id']
+        transfer = self.transfers.get(key)
+        if transfer is None:
+            transfer = {
+                'file': tempfile.TemporaryFile(dir=self.spool_dir),
+                'parts': {},
+                'count': header['count'],
+                'message': body['message'],
+            }
+            self.transfers[key] = transfer
+
+        if header['sequence'] in transfer['parts']:
+            # Redelivered chunk
+            return None
+
+        part = decompress(base64.b64decode(body['payload']), header['compression'])
+        spool = transfer['file']
+        spool.seek(0, 2)
+        transfer['parts'][header['sequence']] = (spool.tell(), len(part))
+        spool.write(part)
+
+        if len(transfer['parts']) < transfer['count']:
+            return None
+
+        del self.transfers[key]
+        with spool:
+            payload = bytearray()
+            for sequence in range(transfer['count']):
+                offset, length = transfer['parts'][sequence]
+                spool.seek(offset)
+                payload += spool.read(length)
+
+        message = dict(transfer['message'])
+        message[body['data_key']] = json.loads(payload.decode('utf-8'))
+        return message
+
+    def pending(self):
+        """
+
+        :return: dict of transfer_id -> (received chunks, chunk count) of incomplete messages
+        """
+        return {key: (len(transfer['parts']), transfer['count']) for key, transfer in self.transfers.items()}
+
+    def discard(self, transfer_id):
+        """
+        Drop received chunks of message (e.g. message is not completed in time).
+        """
+        transfer = self.transfers.pop(transfer_id, None)
+        if transfer is not None:
+            transfer['file'].close()
@@ -1,10 +1,12 @@
 from kombu import Exchange, Queue
-from kombu.mixins import ConsumerMixin
 
+from core.bootstrap import bootstrap
 from common.logging.setup import logger
 from common.mixin.enum_errors import EnumErrorType
 from common.rabbit_mq.common.const import ValidationEnum
 from common.rabbit_mq.connection.connection import conn
+from common.rabbit_mq.consumers.worker_pool import (PooledConsumerMixin, company_id_key, run_pooled_consumer,
+                                                   start_consumer_processes)
 from common.validators.cloud_db.cloud_validator import FileOnCloudValidator
 from common.validators.csv.csv_validator import CsvFileValidatorLocal, ProcessLogger
 from database.company_database.core.query_export import ExportHistory
@@ -28,14 +30,17 @@ queue4 = Queue(
 logger_api = logger
 
 
-class ConsumeQ(ConsumerMixin):
-    def __init__(self, connection):
-        self.connection = connection
+class ConsumeQ(PooledConsumerMixin):
+    """
+    Messages are handled in worker pool (see worker_pool.py), callbacks don't ack messages.
+    """
 
     def get_consumers(self, Consumer, channel):
         return [
-            Consumer(queue, callbacks=[self.on_message_file], accept=["json"]),
-            Consumer(queue4, callbacks=[self.on_message_export], accept=["json"])
+            Consumer(queue, callbacks=[self.handle_in_pool(self.on_message_file, company_id_key)], accept=["json"],
+                     prefetch_count=self.prefetch_count),
+            Consumer(queue4, callbacks=[self.handle_in_pool(self.on_message_export, company_id_key)],
+                     accept=["json"], prefetch_count=self.prefetch_count)
         ]
 
     def on_connection_error(self, exc, interval):
@@ -86,8 +91,6 @@ class ConsumeQ(ConsumerMixin):
         except Exception as e:
             logger_api.exception('Error in cloud validator: {}'.format(e))
 
-        message.ack()
-
     def on_message_validate_file(self, body, message):
         """
 
@@ -131,8 +134,6 @@ class ConsumeQ(ConsumerMixin):
         except Exception as e:
             logger_api.exception('CSV validator error: {}'.format(e))
 
-        message.ack()
-
     def on_message_export(self, body, message):
         """
 
@@ -144,6 +145,12 @@ class ConsumeQ(ConsumerMixin):
             ExportHistory.call_method_based_on_type(body)
         except Exception as e:
             logger_api.exception('Export Q error: {}'.format(e))
-        message.ack()
 
-ConsumeQ(conn).run()
+
+def run_consumer():
+    run_pooled_consumer(ConsumeQ, conn, 'consume')
+
+
+if __name__ == '__main__':
+    bootstrap()
+    start_consumer_processes(run_consumer, 'consume')
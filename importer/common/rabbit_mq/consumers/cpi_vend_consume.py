@@ -2,6 +2,8 @@ from kombu import Exchange, Queue
 from kombu.mixins import ConsumerMixin
 from common.logging.setup import vend_logger
 from common.rabbit_mq.connection.connection import conn
+from core.bootstrap import bootstrap
+from database.cloud_database.common.common import cloud_unit_of_work
 from common.rabbit_mq.common.const import ValidationEnum
 from common.validators.vend_cloud_validator.vend_cloud_validator import CpiCloudValidator
 
@@ -27,7 +29,8 @@ class VendConsumeQ(ConsumerMixin):
         try:
             processing = CpiCloudValidator(data)
             try:
-                processing.main_basic_cloud_cpi_validations()
+                with cloud_unit_of_work():
+                    processing.main_basic_cloud_cpi_validations()
             except Exception as e:
                 vend_logger.error(e)
         except Exception as e:
@@ -35,6 +38,6 @@ class VendConsumeQ(ConsumerMixin):
         message.ack()
 
 
-VendConsumeQ(conn).run()
-
-
+if __name__ == '__main__':
+    bootstrap()
+    VendConsumeQ(conn).run()
@@ -1,10 +1,12 @@
 from kombu import Exchange, Queue
-from kombu.mixins import ConsumerMixin
 
+from core.bootstrap import bootstrap
 from common.logging.setup import logger
 from common.mixin.enum_errors import EnumErrorType
 from common.rabbit_mq.common.const import ValidationEnum
 from common.rabbit_mq.connection.connection import conn
+from common.rabbit_mq.consumers.worker_pool import (PooledConsumerMixin, run_pooled_consumer,
+                                                   start_consumer_processes, validation_data_company_key)
 from common.validators.csv.csv_validator import CsvFileValidatorLocal, ProcessLogger
 from common.mixin.enum_errors import EnumValidationMessage as enum_msg
 
@@ -19,13 +21,17 @@ queue3 = Queue(
 logger_api = logger
 
 
-class ConsumeQ(ConsumerMixin):
-    def __init__(self, connection):
-        self.connection = connection
+class ConsumeQ(PooledConsumerMixin):
+    """
+    Messages are handled in worker pool (see worker_pool.py), callbacks don't ack messages.
+    """
 
     def get_consumers(self, Consumer, channel):
         return [
-            Consumer(queue3, callbacks=[self.on_message_validate_file], accept=["json"]),
+            Consumer(
+                queue3, callbacks=[self.handle_in_pool(self.on_message_validate_file, validation_data_company_key)],
+                accept=["json"], prefetch_count=self.prefetch_count
+            ),
         ]
 
     def on_connection_error(self, exc, interval):
@@ -77,7 +83,11 @@ class ConsumeQ(ConsumerMixin):
         except Exception as e:
             logger_api.exception('CSV validator error: {}'.format(e))
 
-        message.ack()
 
+def run_consumer():
+    run_pooled_consumer(ConsumeQ, conn, 'csv_validator_consume')
 
-ConsumeQ(conn).run()
\ No newline at end of file
+
+if __name__ == '__main__':
+    bootstrap()
+    start_consumer_processes(run_consumer, 'csv_validator_consume')
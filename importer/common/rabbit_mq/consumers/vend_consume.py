@@ -2,6 +2,8 @@ from kombu import Exchange, Queue
 from kombu.mixins import ConsumerMixin
 from common.logging.setup import vend_logger
 from common.rabbit_mq.connection.connection import conn
+from core.bootstrap import bootstrap
+from database.cloud_database.common.common import cloud_unit_of_work
 from common.rabbit_mq.common.const import ValidationEnum
 from common.validators.vend_cloud_validator.vendon_cloud_validator import VendonCloudValidator
 
@@ -30,7 +32,8 @@ class VendConsumeQ(ConsumerMixin):
             process_hash = data.get('elastic_hash')
             try:
                 vend_logger.info("Starting Vendon API cloud validation for hash {}".format(process_hash))
-                validator.validate()
+                with cloud_unit_of_work():
+                    validator.validate()
                 vend_logger.info("Finished Vendon API cloud validation for hash {}".format(process_hash))
             except Exception as e:
                 vend_logger.error(e)
@@ -39,6 +42,6 @@ class VendConsumeQ(ConsumerMixin):
         message.ack()
 
 
-VendConsumeQ(conn).run()
-
-
+if __name__ == '__main__':
+    bootstrap()
+    VendConsumeQ(conn).run()
@@ -2,6 +2,7 @@ from kombu import Exchange, Queue
 from kombu.mixins import ConsumerMixin
 from common.logging.setup import vend_logger
 from common.rabbit_mq.connection.connection import conn
+from core.bootstrap import bootstrap
 from common.rabbit_mq.common.const import ValidationEnum
 from common.validators.vend_importer_validator.cpi_vend_processing import ProcessingVendFile
 
@@ -35,6 +36,6 @@ class VendConsumeQ(ConsumerMixin):
         message.ack()
 
 
-VendConsumeQ(conn).run()
-
-
+if __name__ == '__main__':
+    bootstrap()
+    VendConsumeQ(conn).run()
@@ -0,0 +1,241 @@
+import multiprocessing
+import queue
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from kombu.mixins import ConsumerMixin
+
+from common.logging.setup import logger
+from common.urls.urls import consumer_workers_config
+from core.flask.redis_store.redis_managment import RedisManagement
+from elasticsearch_component.core.buffer import flush_process_flow_buffers
+
+"""
+
+    Worker pool runtime for RabbitMQ consumers.
+
+    Every consumer process handles messages in thread pool, prefetch_count limits number of unacked messages per
+    process. Messages of one company in one queue are handled one by one (in process by company queue, between
+    processes by redis company lock), messages of different companies in parallel. Company lock has short timeout and
+    it's extended by heartbeat while message is handled, so lock of crashed consumer expires after
+    company_lock_timeout seconds. Company of message is read by ordering key function of queue, because message shape
+    differs between queues. Messages are acked from consumer thread, because kombu channel is not thread safe. On SIGTERM/SIGINT consumer stops fetching new messages, finishes
+    and acks already fetched messages, flushes buffered elastic process flow and then closes connection (graceful
+    drain).
+
+    Configuration (envdir CONSUMER_WORKERS, per consumer name):
+    {"consume": {"processes": 2, "worker_threads": 4, "prefetch_count": 4, "company_lock_timeout": 60}}
+
+"""
+
+logger_api = logger
+
+DEFAULT_WORKER_CONFIG = {
+    'processes': 1,
+    'worker_threads': 1,
+    'prefetch_count': 1,
+    'company_lock_timeout': 60,
+}
+
+
+def company_id_key(body):
+    """
+
+    :param body: message with company_id (cloud validator, export)
+    :return: company id of message
+    """
+    return body.get('company_id') if isinstance(body, dict) else None
+
+
+def validation_data_company_key(body):
+    """
+
+    :param body: csv validator message ({"data": {"company": ...}, "elastic_hash": ..., "filename": ..., "token": ...})
+    :return: company id of message
+    """
+    try:
+        return body['data']['company']
+    except (KeyError, TypeError):
+        return None
+
+
+def extend_company_lock(lock, interval, handled):
+    """
+    Heartbeat of company lock, lock is extended every interval until message is handled.
+
+    :param lock: acquired redis lock
+    :param interval: heartbeat interval in seconds
+    :param handled: event set when message is handled
+    """
+    while not handled.wait(interval):
+        try:
+            lock.extend(interval)
+        except Exception as e:
+            logger_api.error('Company lock {} can\'t be extended: {}'.format(lock.name, e))
+            return
+
+
+@contextmanager
+def company_lock(lock_key, timeout):
+    """
+    Redis company lock with short timeout, kept while message is handled by heartbeat thread and released in finally.
+
+    :param lock_key: redis key of company lock
+    :param timeout: lock timeout in seconds (lock of crashed consumer expires after it)
+    """
+    lock = RedisManagement.redis_lock(lock_key, timeout=timeout)
+    lock.acquire()
+    handled = threading.Event()
+    heartbeat = threading.Thread(target=extend_company_lock, args=(lock, timeout / 3.0, handled), daemon=True)
+    heartbeat.start()
+    try:
+        yield
+    finally:
+        handled.set()
+        heartbeat.join()
+        try:
+            lock.release()
+        except Exception as e:
+            # Lock expired (heartbeat failed), other consumer could hold it already
+            logger_api.error('Company lock {} can\'t be released: {}'.format(lock_key, e))
+
+
+def get_worker_config(consumer_name):
+    """
+
+    :param consumer_name: name of consumer in CONSUMER_WORKERS config
+    :return: worker config of consumer, missing values are default (one process, one message at time)
+    """
+    config = dict(DEFAULT_WORKER_CONFIG)
+    config.update(consumer_workers_config.get(consumer_name, {}))
+    return config
+
+
+class PooledConsumerMixin(ConsumerMixin):
+    """
+    ConsumerMixin with thread pool, message callbacks registered with handle_in_pool must not ack message.
+    """
+
+    def __init__(self, connection, worker_threads=1, prefetch_count=1, company_lock_timeout=60, **kwargs):
+        self.connection = connection
+        self.prefetch_count = int(prefetch_count)
+        self.company_lock_timeout = int(company_lock_timeout)
+        self.executor = ThreadPoolExecutor(max_workers=int(worker_threads))
+        self.finished_messages = queue.Queue()
+        self.company_messages = {}
+        self.lock = threading.Lock()
+
+    def handle_in_pool(self, callback, ordering_key=None):
+        """
+
+        :param callback: message callback (body, message)
+        :param ordering_key: function body -> company id of message (messages with same key are handled one by
+        one), None if messages of queue are not ordered
+        :return: kombu callback which sends message to thread pool
+        """
+        def on_message(body, message):
+            self.submit_message(callback, ordering_key, body, message)
+        return on_message
+
+    def submit_message(self, callback, ordering_key, body, message):
+        company_id = ordering_key(body) if ordering_key is not None else None
+        # Messages are ordered per company and queue callback
+        message_key = (callback.__name__, company_id) if company_id is not None else id(message)
+        with self.lock:
+            if message_key in self.company_messages:
+                # Company message is in progress, this message waits for it
+                self.company_messages[message_key].append((body, message))
+                return
+            self.company_messages[message_key] = deque()
+        self.executor.submit(self.handle_company_messages, message_key, company_id, callback, body, message)
+
+    def handle_company_messages(self, message_key, company_id, callback, body, message):
+        """
+        Handle message and all messages of same company which are received in meantime.
+        """
+        while True:
+            try:
+                if company_id is not None:
+                    with company_lock('{}_{}_consumer_lock'.format(company_id, callback.__name__),
+                                      self.company_lock_timeout):
+                        callback(body, message)
+                else:
+                    callback(body, message)
+            except Exception as e:
+                logger_api.exception('Consumer worker error: {}'.format(e))
+            self.finished_messages.put(message)
+
+            with self.lock:
+                pending_messages = self.company_messages[message_key]
+                if not pending_messages:
+                    del self.company_messages[message_key]
+                    return
+                body, message = pending_messages.popleft()
+
+    def ack_finished_messages(self):
+        while True:
+            try:
+                message = self.finished_messages.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                message.ack()
+            except Exception as e:
+                # Channel of message is closed (connection lost), message is redelivered
+                logger_api.error('Consumer ack error: {}'.format(e))
+
+    def on_iteration(self):
+        self.ack_finished_messages()
+
+    def on_consume_end(self, connection, channel):
+        # Consumers are canceled, wait for fetched messages and ack them before connection is closed
+        self.executor.shutdown(wait=True)
+        self.ack_finished_messages()
+        # Buffered process flow of handled messages is written before process exits
+        flush_process_flow_buffers()
+        logger_api.info('Consumer stopped, all fetched messages are handled.')
+
+    def stop(self, signum=None, frame=None):
+        self.should_stop = True
+
+
+def run_pooled_consumer(consumer_class, connection, consumer_name):
+    """
+    Run consumer in current process until SIGTERM/SIGINT.
+    """
+    consumer = consumer_class(connection, **get_worker_config(consumer_name))
+    signal.signal(signal.SIGTERM, consumer.stop)
+    signal.signal(signal.SIGINT, consumer.stop)
+    consumer.run()
+
+
+def start_consumer_processes(target, consumer_name):
+    """
+    Start configured number of consumer processes (new interpreters, connections are not shared), SIGTERM/SIGINT is
+    forwarded to all processes and they are drained before exit.
+
+    :param target: module level function which runs one consumer
+    :param consumer_name: name of consumer in CONSUMER_WORKERS config
+    """
+    processes = int(get_worker_config(consumer_name)['processes'])
+    if processes <= 1:
+        target()
+        return
+
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=target, name='{}-{}'.format(consumer_name, i)) for i in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    def stop(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for worker in workers:
+        worker.join()
@@ -1,10 +1,12 @@
 from elasticsearch_component.core.logger import CompanyProcessLogger
 from kombu import Exchange, Producer, Queue
 
+from common.rabbit_mq.common.chunked import publish_chunked
 from common.rabbit_mq.common.const import ValidationEnum
 from common.rabbit_mq.connection.connection import conn
 from common.mixin.enum_errors import EnumErrorType as status
 from common.logging.setup import logger
+from common.urls.urls import publish_chunks_config
 
 exchange = Exchange("{}".format(ValidationEnum.DATABASE_Q.value), type="direct")
 
@@ -20,9 +22,6 @@ queue = Queue(
     routing_key="{}".format(ValidationEnum.DATABASE_Q_KEY.value)
 )
 
-queue.maybe_bind(conn)
-queue.declare()
-
 
 class PublishJsonFileToDatabaseQ(object):
 
@@ -53,9 +52,10 @@ class PublishJsonFileToDatabaseQ(object):
         }
 
         try:
-            producer.publish(message, retry=True)
-            logger.info("Process publish to Q, type_of_process: {}, company_id: {}".format(type_of_process, company_id))
-            return {'success': True, 'message': "Published to Q. Your data: {}".format(message)}
+            published = publish_chunked(producer, message, 'data', elastic_hash, publish_chunks_config, retry=True)
+            logger.info("Process publish to Q in {} message(s), type_of_process: {}, company_id: {}"
+                        .format(published, type_of_process, company_id))
+            return {'success': True, 'message': "Published to Q. Elastic hash: {}".format(elastic_hash)}
         except ValueError as e:
             logger.error("Cant publish to validation Q for file validation. Error: %s" % e)
             return {
@@ -73,9 +73,9 @@ class PublishJsonFileToDatabaseQ(object):
             data['elastic_hash'], 'Processes in Q for database insert.', status.IN_PROGRESS.name
         )
         try:
-            producer.publish(data, retry=True)
-            logger.info("Process publish to Q")
-            return {'success': True, 'message': "Published to Q. Your data: {}".format(data)}
+            published = publish_chunked(producer, data, 'data', data['elastic_hash'], publish_chunks_config, retry=True)
+            logger.info("Process publish to Q in {} message(s)".format(published))
+            return {'success': True, 'message': "Published to Q. Elastic hash: {}".format(data['elastic_hash'])}
         except ValueError as e:
             logger.error("Cant publish to validation Q for file validation. Error: %s" % e)
             return {
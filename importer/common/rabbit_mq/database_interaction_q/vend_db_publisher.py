@@ -1,6 +1,8 @@
 from kombu import Exchange, Producer, Queue
+from common.rabbit_mq.common.chunked import publish_chunked
 from common.rabbit_mq.common.const import ValidationEnum
 from common.rabbit_mq.connection.connection import conn
+from common.urls.urls import publish_chunks_config
 
 vend_database_exchange = Exchange("{}".format(ValidationEnum.VEND_DATABASE_Q.value), type="direct")
 
@@ -16,14 +18,12 @@ vend_database_queue = Queue(
     routing_key="{}".format(ValidationEnum.VEND_DATABASE_Q_KEY.value)
 )
 
-vend_database_queue.maybe_bind(conn)
-vend_database_queue.declare()
-
 
 def vend_publish_to_database(vend_data):
 
     try:
-        producer.publish(vend_data, retry=True)
+        publish_chunked(producer, vend_data, 'vend_data', vend_data.get('elastic_hash'), publish_chunks_config,
+                        retry=True)
         return {'success': True, 'message': 'Publish vends data to database Q'.format(vend_data)}
 
     except ValueError as e:
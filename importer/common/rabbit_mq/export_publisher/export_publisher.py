@@ -17,9 +17,6 @@ queue = Queue(
     routing_key="{}".format(ValidationEnum.EXPORT_Q_PUBLISHER.value)
 )
 
-queue.maybe_bind(conn)
-queue.declare()
-
 
 class PublishExportQ(object):
     @classmethod
@@ -22,9 +22,6 @@ queue = Queue(
     routing_key="{}".format(ValidationEnum.VALIDATION_Q_FILE_KEY.value)
 )
 
-queue.maybe_bind(conn)
-queue.declare()
-
 
 class PublishFileToValidationMessageQ(object):
     @classmethod
@@ -22,9 +22,6 @@ queue = Queue(
     routing_key="{}".format(ValidationEnum.VALIDATION_Q_KEY.value)
 )
 
-queue.maybe_bind(conn)
-queue.declare()
-
 def validate_publish_message(company_id, elastic_hash, data, type_of_process):
     """
 
@@ -17,9 +17,6 @@ cpi_vend_queue = Queue(
     exchange=cpi_vend_validator_exchange,
     routing_key="{}".format(ValidationEnum.VEND_VALIDATION_FILE_Q_KEY.value))
 
-cpi_vend_queue.maybe_bind(conn)
-cpi_vend_queue.declare()
-
 # This is producer and queue definition for dex vend importer
 dex_vend_validator_exchange = Exchange("{}".format(ValidationEnum.DEX_VALIDATION_FILE_Q.value), type="direct")
 dex_vend_producer = Producer(
@@ -32,9 +29,6 @@ dex_vend_queue = Queue(
     exchange=dex_vend_validator_exchange,
     routing_key="{}".format(ValidationEnum.DEX_VALIDATION_FILE_Q_KEY.value))
 
-dex_vend_queue.maybe_bind(conn)
-dex_vend_queue.declare()
-
 
 def publish_vend_file_processing(company_id, import_type, elastic_hash, data, vend_type, emails, token, cpi_processor,
                                  dex_processor, language='en'):
@@ -15,18 +15,13 @@ download_producer = Producer(
     routing_key="{}".format(ValidationEnum.VEND_DOWNLOADER_FILE_Q_KEY.value)
 )
 
-# Define queue for vend file download publisher
+# Define queue for vend file download publisher, queue and exchange are declared by core.bootstrap (publishing to a
+# non-existing exchange is forbidden)
 file_vend_download_queue = Queue(
     name="{}".format(ValidationEnum.VEND_DOWNLOADER_FILE_Q.value),
     exchange=exchange,
     routing_key="{}".format(ValidationEnum.VEND_DOWNLOADER_FILE_Q_KEY.value)
 )
-# Bind instance to channel if not already bound, a binding is a relationship between an exchange and a queue
-file_vend_download_queue.maybe_bind(conn)
-
-# Declare queue and exchange then binds queue to exchange, this step is necessary as publishing
-# to a non-existing exchange is forbidden.
-file_vend_download_queue.declare()
 
 
 def vend_file_download_publisher(company_id, process_request_type, elastic_hash, email, vend_type, token, language,
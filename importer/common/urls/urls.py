@@ -6,6 +6,11 @@ databases = json.loads(os.environ['DATABASE_CONNECTION'])
 testing = json.loads(os.environ['TEST'])
 
 cloud_database_connection = databases['cloud_database']
+# Reflected cloud schema snapshot on disk (enabled, directory, revision_query), optional
+cloud_schema_cache_config = databases.get('cloud_schema_cache', {})
+# Connection pool size, timeouts and leak timeout of database engines, optional
+importer_pool_config = databases.get('importer_pool', {})
+cloud_pool_config = databases.get('cloud_pool', {})
 if testing['active']:
     importer_database_connection = databases['importer_db_test']
 else:
@@ -20,8 +25,19 @@ flask_config = json.loads(os.environ['FLASK_CONFIG'])
 # Rabbitmq connection
 rabbit_connection = os.environ['RABBIT_MQ']
 
+# RabbitMQ consumer workers (processes, worker threads and prefetch count per consumer), optional
+consumer_workers_config = json.loads(os.environ.get('CONSUMER_WORKERS', '{}'))
+
+# Vend publishing to cloud (vend format), optional
+vend_publish_config = json.loads(os.environ.get('VEND_PUBLISH', '{}'))
+
+# Chunked (compressed) publishing of large vend and database import messages, optional
+publish_chunks_config = json.loads(os.environ.get('PUBLISH_CHUNKS', '{}'))
+
 # Redis connection
 redis_connection = json.loads(os.environ['REDIS_URI'])
+# History cache TTL, stale window and lock timeouts, optional
+history_cache_config = redis_connection.get('history_cache', {})
 
 # Cloud urls
 load_urls = json.loads(os.environ['CLOUD_API_ROUTE'])
@@ -69,6 +85,9 @@ VEND_HISTORY_SUCCESS_DIR = os.path.join(VEND_HISTORY_MAIN_DIR, load_configuratio
 VEND_HISTORY_FAIL_DIR = os.path.join(VEND_HISTORY_MAIN_DIR, load_configuration_dir['vend_fail_history'])
 VEND_DOWNLOAD_HISTORY_DIR = os.path.join(VEND_HISTORY_MAIN_DIR, load_configuration_dir['vend_downloads_dir'])
 
+# FTP/SFTP download: max open sessions per host, concurrent downloads per job, idle session timeout
+remote_download_config = load_configuration_dir.get('remote_download', {})
+
 
 # Pika connection
 pika_config = json.loads(os.environ['PIKA_CONNECTION'])
@@ -14,11 +14,13 @@ from common.mixin.mixin import generate_hash_for_json
 from common.mixin.validation_const import (
     ImportType, ImportAction, get_import_type_by_name, return_import_type_id_custom_validation)
 from common.importers.cloud_db.common import InvalidImportData
+from common.importers.cloud_db.entity_index import CloudEntityIndex, FieldValueIndex, check_field_uniqueness
 from common.synchronize.request import ParseRabbitRequests
 from common.validators.cloud_db.common_validators import MachineTypeValidator
 from common.rabbit_mq.database_interaction_q.db_publisher import PublishJsonFileToDatabaseQ
 from common.importers.cloud_db.planogram import PlanogramValidator
 from common.validators.cloud_db.user_validator import UserValidator, DuplicateRowsError, DbQueryError
+from database.cloud_database.common.common import cloud_unit_of_work
 from database.cloud_database.core.query import (
     ClientQueryOnCloud, ClientTypeQueryOnCloud,
     MachineQueryOnCloud, LocationQueryOnCloud, MachineTypeQueryOnCloud,
@@ -40,10 +42,10 @@ def get_values_from_dict_arr(in_dict, key):
 def remove_duplicated(work_on, from_data, check_names=True):
     # remove duplicated external id-s
     prefix = work_on.lower() + '_'
-    control_array = []
+    control_array = set()
     for m in from_data:
         if m[prefix + 'id'] not in control_array:
-            control_array.append(m[prefix + 'id'])
+            control_array.add(m[prefix + 'id'])
             m['to_delete'] = False
         else:
             m['to_delete'] = True
@@ -53,10 +55,10 @@ def remove_duplicated(work_on, from_data, check_names=True):
 
     if check_names:
         # remove duplicated names
-        control_array = []
+        control_array = set()
         for m in out_data:
             if m[prefix + 'name'] not in control_array:
-                control_array.append(m[prefix + 'name'])
+                control_array.add(m[prefix + 'name'])
                 m['to_delete'] = False
             else:
                 m['to_delete'] = True
@@ -70,14 +72,15 @@ def remove_duplicated(work_on, from_data, check_names=True):
 
 
 def get_alive_and_dead(external_ids, all_entities):
-    entities_with_ids = [e for e in all_entities if e['ext_id'] in external_ids]
-    entities_alive = [e for e in entities_with_ids if e['alive'] is True]
-    entities_dead = [e for e in entities_with_ids if e['alive'] is False]
-    alive_ids = get_values_from_dict_arr(entities_alive, 'ext_id')
-    dead_ids = get_values_from_dict_arr(entities_dead, 'ext_id')
-    dead_ids = [id for id in dead_ids if id not in alive_ids]
+    """
+    :param external_ids: external ids from import data
+    :param all_entities: list of cloud entities or CloudEntityIndex
+    :return: sets of alive and dead external ids
+    """
+    if not isinstance(all_entities, CloudEntityIndex):
+        all_entities = CloudEntityIndex(all_entities)
 
-    return alive_ids, dead_ids
+    return all_entities.get_alive_and_dead(external_ids)
 
 
 def tax_rate_doesnt_exist(company_id, tax_rates_from_file):
@@ -115,55 +118,6 @@ def tax_rate_duplicates(company_id):
     return duplicates_found
 
 
-def check_field_uniqueness(data_from_file, data_from_db):
-    """
-    Check field values for uniqueness
-    1) if creating, must be unique
-    2) if updating must be different than others
-    3) check against data from file, too
-
-    Keyword arguments:
-    data_from_file -- list of lists [[product_id, field_to_check, product_action], ...]
-    data_from_db -- list of lists [[product_id, field_to_check], ...]
-    """
-    data_from_db_list = [b[1] for b in data_from_db]
-    data_from_file_list = [b[1] for b in data_from_file]
-
-    # check uniqueness with data from file
-    not_unique_in_file = []
-    occurrences_in_file = Counter(data_from_file_list)
-    for i in occurrences_in_file:
-        if i not in (None, '', '<null>') and occurrences_in_file[i] > 1:
-            not_unique_in_file.append(i)
-
-    # check uniqueness with data from db
-    not_unique_with_db = []
-    for j in data_from_file:
-        product_id = j[0]
-        value = j[1]
-        action = int(j[2])
-
-        # create product action
-        if action == 0:
-            if value not in (None, '', '<null>') and value in data_from_db_list:
-                if value not in not_unique_with_db: # don't add if already added
-                    not_unique_with_db.append(value)
-
-        elif action == 1: # update action
-            # remove from data_from_db to not check against it
-            update_combination = [product_id, value]
-            data_from_db_copy = data_from_db[:]
-            if update_combination in data_from_db:
-                del data_from_db_copy[data_from_db_copy.index(update_combination)]
-                data_from_db_list = [b[1] for b in data_from_db_copy]
-
-            if value not in (None, '', '<null>') and value in data_from_db_list:
-                if value not in not_unique_with_db: # don't add if already added
-                    not_unique_with_db.append(value)
-
-    return not_unique_in_file, not_unique_with_db
-
-
 class FileOnCloudValidator(object):
     """
     Class implements functions for validations against data on televend cloud.
@@ -190,6 +144,7 @@ class FileOnCloudValidator(object):
         self.warning = []
         self.email = body['email'] if body['email'] else ''
         self.language = body['language']
+        self.field_value_indexes = {}
 
     def save_error_and_finish_main_process(self, message):
         """
@@ -263,24 +218,26 @@ class FileOnCloudValidator(object):
             self.save_error_and_finish_main_process(self.emosl(Const.DATABASE_UNKNOWN_TYPE_ERROR))
             return False
 
-        if self.import_type is ImportType.MACHINES:
-            return self.validate_machines()
-        elif self.import_type is ImportType.LOCATIONS:
-            return self.validate_locations()
-        elif self.import_type is ImportType.MACHINE_TYPES:
-            return self.validate_machine_types()
-        elif self.import_type is ImportType.REGIONS:
-            return self.validate_region()
-        elif self.import_type is ImportType.PRODUCTS:
-            return self.validate_product()
-        elif self.import_type is ImportType.CLIENTS:
-            return self.validate_client()
-        elif self.import_type is ImportType.PLANOGRAMS:
-            return self.validate_planogram()
-        elif self.import_type is ImportType.USERS:
-            return self.validate_user()
-        elif self.import_type is ImportType.PACKINGS:
-            return self.validate_packing()
+        # All cloud queries of validation use one pooled connection and see one consistent cloud snapshot
+        with cloud_unit_of_work():
+            if self.import_type is ImportType.MACHINES:
+                return self.validate_machines()
+            elif self.import_type is ImportType.LOCATIONS:
+                return self.validate_locations()
+            elif self.import_type is ImportType.MACHINE_TYPES:
+                return self.validate_machine_types()
+            elif self.import_type is ImportType.REGIONS:
+                return self.validate_region()
+            elif self.import_type is ImportType.PRODUCTS:
+                return self.validate_product()
+            elif self.import_type is ImportType.CLIENTS:
+                return self.validate_client()
+            elif self.import_type is ImportType.PLANOGRAMS:
+                return self.validate_planogram()
+            elif self.import_type is ImportType.USERS:
+                return self.validate_user()
+            elif self.import_type is ImportType.PACKINGS:
+                return self.validate_packing()
 
         self.save_error_and_finish_main_process(self.emosl(Const.DATABASE_UNKNOWN_IMPORT_ERROR, self.import_type.name))
 
@@ -513,9 +470,17 @@ class FileOnCloudValidator(object):
         Keyword arguments:
         field -- name of field, i.e. 'barcode'
         fields_from_file -- field values collected from file data
-        all_alive_cloud_products -- Product query result
+        all_alive_cloud_products -- Product query result (list or CloudEntityIndex of cloud products)
         """
-        fields_from_db = [[p['ext_id'], p[field]] for p in all_alive_cloud_products]
+        # db field values are indexed once per cloud entity fetch, not on every call
+        cloud_products, fields_from_db = self.field_value_indexes.get(field, (None, None))
+        if cloud_products is not all_alive_cloud_products:
+            if isinstance(all_alive_cloud_products, CloudEntityIndex):
+                fields_from_db = FieldValueIndex(zip(
+                    all_alive_cloud_products.column('ext_id'), all_alive_cloud_products.column(field)))
+            else:
+                fields_from_db = FieldValueIndex([p['ext_id'], p[field]] for p in all_alive_cloud_products)
+            self.field_value_indexes[field] = (all_alive_cloud_products, fields_from_db)
         fields_not_unique_in_file, fields_not_unique_with_db = check_field_uniqueness(
             fields_from_file,
             fields_from_db
@@ -542,13 +507,7 @@ class FileOnCloudValidator(object):
             field_not_unique = ', '.join(fields_not_unique_with_db)
 
             try:
-                db_product_ext_id = list(
-                    filter(lambda x: x[1] == field_not_unique, fields_from_db)
-                )
-
-                if db_product_ext_id:
-                    db_product_ext_id = db_product_ext_id[0][0]
-
+                db_product_ext_id = fields_from_db.get_ext_id(field_not_unique)
             except Exception as e:
                 logger_api.error("Error occurred on product import, barcode unique validation, error: {}".format(e))
                 db_product_ext_id = ""
@@ -675,11 +634,6 @@ class FileOnCloudValidator(object):
 
         working_data, removed_ids, removed_names = remove_duplicated(work_on, working_data)
 
-        def check_exists_machine_cluster_id(mc_id):
-            if mc_id not in [None, '']:
-                return LocationQueryOnCloud.machine_cluster_id(mc_id, self.company_id)
-            else:
-                return False
         # Do not accept files with repeated external ids and names
         if removed_ids or removed_names:
             self.write_duplicated_errors(work_on, removed_ids, removed_names)
@@ -693,12 +647,13 @@ class FileOnCloudValidator(object):
         else:
             cloud_machines_all = cloud_machines_all['results']
 
-        all_alive_cloud_machines = [m for m in cloud_machines_all if m['alive'] is True]
-        all_alive_cloud_machines_ids = get_values_from_dict_arr(all_alive_cloud_machines, 'ext_id')
+        cloud_machines_index = CloudEntityIndex(cloud_machines_all)
+        all_alive_cloud_machines = cloud_machines_index.alive
+        all_alive_cloud_machines_ids = cloud_machines_index.alive_ids
 
         external_ids = set([m[id_fld] for m in working_data])
-        alive_ids, dead_ids = get_alive_and_dead(external_ids, cloud_machines_all)
-        all_work_ids = alive_ids + dead_ids
+        alive_ids, dead_ids = cloud_machines_index.get_alive_and_dead(external_ids)
+        all_work_ids = alive_ids | dead_ids
 
         try:
             action_50 = int(self.data[0][action_fld]) == 50
@@ -713,20 +668,19 @@ class FileOnCloudValidator(object):
                 m[action_fld] = ImportAction.CREATE.value
 
             # all machine IDs which are not to be updated or inserted are to be deleted and we need to add 'em
-            for m in [m for m in all_alive_cloud_machines if m['ext_id'] not in external_ids]:
-                working_data = [{
-                    id_fld: m['ext_id'],
-                    name_fld: m['name'],
-                    action_fld: ImportAction.DELETE.value,
-                    'action50_delete': True,
-                    'cloud_id': m['id'],
-                    'cluster_id':m['cluster_id'],
-                    'machine_location_id': m['location_id'],
-                    'machine_type_id': m['type_id']
-                }] + working_data
+            working_data = [{
+                id_fld: m['ext_id'],
+                name_fld: m['name'],
+                action_fld: ImportAction.DELETE.value,
+                'action50_delete': True,
+                'cloud_id': m['id'],
+                'cluster_id':m['cluster_id'],
+                'machine_location_id': m['location_id'],
+                'machine_type_id': m['type_id']
+            } for m in reversed(all_alive_cloud_machines) if m['ext_id'] not in external_ids] + working_data
             # refresh ID's
             external_ids = set([m[id_fld] for m in working_data])
-            alive_ids, dead_ids = get_alive_and_dead(external_ids, cloud_machines_all)
+            alive_ids, dead_ids = cloud_machines_index.get_alive_and_dead(external_ids)
 
         # meke sure that this is not performed on inserted entities i.e. must have m.get('machine_location_id')
         locs_types = [(m['machine_location_id'], m['machine_type_id']) for m in working_data
@@ -754,7 +708,7 @@ class FileOnCloudValidator(object):
             return False
         else:
             machine_categories_cloud = machine_categories_cloud['results']
-        machine_categories_ids = get_values_from_dict_arr(machine_categories_cloud, 'ext_id')
+        machine_categories_ids = set(get_values_from_dict_arr(machine_categories_cloud, 'ext_id'))
 
         warehouses_cloud = WarehouseQueryOnCloud.get_warehouses_for_company(self.company_id)
         if not warehouses_cloud['status']:
@@ -763,17 +717,30 @@ class FileOnCloudValidator(object):
             return False
         else:
             warehouses_cloud = warehouses_cloud['results']
-        warehouses_ids = get_values_from_dict_arr(warehouses_cloud, 'ext_id')
+        warehouses_ids = set(get_values_from_dict_arr(warehouses_cloud, 'ext_id'))
 
         meter_type_external_ids = MachineQueryOnCloud.get_meter_type_keys(self.company_id)
 
         company_meter_readings = CompanyQueryOnCloud.get_company_meter_readings_by_id(self.company_id)['results']
+
+        def get_machine_cluster_id(row):
+            cloud_clusters = row.get('cluster_id')
+            split_clusters = cloud_clusters.split('#') if cloud_clusters else None
+            return split_clusters[0] if split_clusters else None
+
+        # check all machine clusters from file with one query, instead of one query per row
+        machine_cluster_ids = set(get_machine_cluster_id(m) for m in working_data) - {None, '', '<null>'}
+        cloud_machine_clusters = LocationQueryOnCloud.get_machine_cluster_ids(self.company_id, machine_cluster_ids)
+        if not cloud_machine_clusters['status']:
+            self.append_error(work_on, self.emosl(Const.DATABASE_QUERY_ERROR, work_on))
+            self.write_errors(error_type=EnumErrorType.ERROR.value)
+            return False
+        cloud_machine_cluster_ids = cloud_machine_clusters['results']
+
         for w_data in working_data:
             entity_id = w_data[id_fld]
             entity_name = w_data[name_fld]
-            cloud_clusters = w_data.get('cluster_id')
-            split_clusters = cloud_clusters.split('#') if cloud_clusters else None
-            machine_cluster_id = split_clusters[0] if split_clusters else None
+            machine_cluster_id = get_machine_cluster_id(w_data)
 
             machine_category_id = w_data.get('machine_category_id', None)
             if machine_category_id and machine_category_id in ['', '<null>']:
@@ -784,8 +751,7 @@ class FileOnCloudValidator(object):
                 warehouse_id = None
 
             if machine_cluster_id not in [None, '', '<null>']:
-                mc_response_from_db = check_exists_machine_cluster_id(machine_cluster_id)
-                if not mc_response_from_db:
+                if machine_cluster_id not in cloud_machine_cluster_ids:
                     self.append_warning(entity_id, self.emosl(Const.MACHINE_CLUSTER_ID, machine_cluster_id))
 
             try:
@@ -890,12 +856,13 @@ class FileOnCloudValidator(object):
         else:
             cloud_locations_all = cloud_locations_all['results']
 
-        all_alive_cloud_locations = [m for m in cloud_locations_all if m['alive'] is True]
-        all_alive_cloud_locations_ids = get_values_from_dict_arr(all_alive_cloud_locations, 'ext_id')
+        cloud_locations_index = CloudEntityIndex(cloud_locations_all)
+        all_alive_cloud_locations = cloud_locations_index.alive
+        all_alive_cloud_locations_ids = cloud_locations_index.alive_ids
 
         external_ids = set([m[id_fld] for m in working_data])
-        alive_ids, dead_ids = get_alive_and_dead(external_ids, cloud_locations_all)
-        all_work_ids = alive_ids + dead_ids
+        alive_ids, dead_ids = cloud_locations_index.get_alive_and_dead(external_ids)
+        all_work_ids = alive_ids | dead_ids
 
         try:
             action_50 = int(self.data[0][action_fld]) == 50
@@ -911,17 +878,16 @@ class FileOnCloudValidator(object):
                 m[action_fld] = ImportAction.CREATE.value
 
             # all machine IDs which are not to be updated or inserted are to be deleted and we need to add 'em
-            for m in [m for m in all_alive_cloud_locations if m['ext_id'] not in external_ids]:
-                working_data = [{
-                    id_fld: m['ext_id'],
-                    name_fld: m['name'],
-                    action_fld: ImportAction.DELETE.value,
-                    'action50_delete': True,
-                    'cloud_id': m['id']
-                }] + working_data
+            working_data = [{
+                id_fld: m['ext_id'],
+                name_fld: m['name'],
+                action_fld: ImportAction.DELETE.value,
+                'action50_delete': True,
+                'cloud_id': m['id']
+            } for m in reversed(all_alive_cloud_locations) if m['ext_id'] not in external_ids] + working_data
             # refresh ID's
             external_ids = set([m[id_fld] for m in working_data])
-            alive_ids, dead_ids = get_alive_and_dead(external_ids, cloud_locations_all)
+            alive_ids, dead_ids = cloud_locations_index.get_alive_and_dead(external_ids)
 
         regions_cloud = RegionQueryOnCloud.get_regions_for_company(self.company_id)
         if not regions_cloud['status']:
@@ -930,7 +896,7 @@ class FileOnCloudValidator(object):
             return False
         else:
             regions_cloud = regions_cloud['results']
-            region_ids = get_values_from_dict_arr(regions_cloud, 'ext_id')
+            region_ids = set(get_values_from_dict_arr(regions_cloud, 'ext_id'))
 
         for w_item in working_data:
             entity_id = w_item[id_fld]
@@ -1085,7 +1051,7 @@ class FileOnCloudValidator(object):
 
         cloud_regions_all = RegionQueryOnCloud.get_regions_for_company(self.company_id)
         cloud_locations_all = LocationQueryOnCloud.get_region_id_and_location(self.company_id)
-        all_alive_cloud_region_id_per_location = get_values_from_dict_arr(cloud_locations_all, 'region_id')
+        all_alive_cloud_region_id_per_location = set(get_values_from_dict_arr(cloud_locations_all, 'region_id'))
 
         if not cloud_regions_all['status']:
             self.append_error(work_on, self.emosl(Const.DATABASE_QUERY_ERROR, work_on))
@@ -1094,14 +1060,17 @@ class FileOnCloudValidator(object):
         else:
             cloud_regions_all = cloud_regions_all['results']
 
-        all_alive_cloud_regions = [m for m in cloud_regions_all if m['alive'] is True]
-        all_alive_cloud_regions_ids = get_values_from_dict_arr(all_alive_cloud_regions, 'ext_id')
+        cloud_regions_index = CloudEntityIndex(cloud_regions_all)
+        all_alive_cloud_regions = cloud_regions_index.alive
+        all_alive_cloud_regions_ids = cloud_regions_index.alive_ids
 
-        location_and_region_id = [{'name': x["location_name"], 'region_id': x["region_id"]}
-                                  for x in cloud_locations_all]
+        # first location name per region id
+        location_name_per_region_id = {}
+        for x in cloud_locations_all:
+            location_name_per_region_id.setdefault(x["region_id"], x["location_name"])
 
         external_ids = set([m[id_fld] for m in working_data])
-        alive_ids, _ = get_alive_and_dead(external_ids, cloud_regions_all)
+        alive_ids, _ = cloud_regions_index.get_alive_and_dead(external_ids)
 
         try:
             action_50 = int(self.data[0][action_fld]) == 50
@@ -1113,12 +1082,10 @@ class FileOnCloudValidator(object):
         if action_50:
             for item in all_alive_cloud_regions:
                 if item['ext_id'] not in ["", None]:
-                    filter_region = list(filter(lambda k: k['region_id'] == item['ext_id'], location_and_region_id))
-                    r = filter_region[0] if filter_region else None
-
-                    if item['ext_id'] in set(all_alive_cloud_region_id_per_location):
+                    if item['ext_id'] in all_alive_cloud_region_id_per_location:
                         not_delete_region_action50.append(item)
-                        self.append_warning(item['ext_id'], self.emosl(Const.ACTIVE_REGION_ON_LOCATION, work_on, r['name']))
+                        self.append_warning(item['ext_id'], self.emosl(
+                            Const.ACTIVE_REGION_ON_LOCATION, work_on, location_name_per_region_id[item['ext_id']]))
 
             for m in [m for m in working_data if m[id_fld] in alive_ids]:
                 m[action_fld] = ImportAction.UPDATE.value
@@ -1126,21 +1093,20 @@ class FileOnCloudValidator(object):
                 m[action_fld] = ImportAction.CREATE.value
 
             if not_delete_region_action50:
-                for items in not_delete_region_action50:
-                    all_alive_cloud_regions.remove(items)
-
-            for m in [m for m in all_alive_cloud_regions if m['ext_id'] not in external_ids]:
-                working_data = [{
-                    id_fld: m['ext_id'],
-                    name_fld: m['name'],
-                    action_fld: ImportAction.DELETE.value,
-                    'action50_delete': True,
-                    'cloud_id': m['id'],
-                    'parent_region_id': '',
-                }] + working_data
+                not_delete_region_ids = set(id(x) for x in not_delete_region_action50)
+                all_alive_cloud_regions = [x for x in all_alive_cloud_regions if id(x) not in not_delete_region_ids]
+
+            working_data = [{
+                id_fld: m['ext_id'],
+                name_fld: m['name'],
+                action_fld: ImportAction.DELETE.value,
+                'action50_delete': True,
+                'cloud_id': m['id'],
+                'parent_region_id': '',
+            } for m in reversed(all_alive_cloud_regions) if m['ext_id'] not in external_ids] + working_data
             # refresh ID's
             external_ids = set([m[id_fld] for m in working_data])
-            alive_ids, _ = get_alive_and_dead(external_ids, cloud_regions_all)
+            alive_ids, _ = cloud_regions_index.get_alive_and_dead(external_ids)
 
         not_deleted_region = []
 
@@ -1186,8 +1152,8 @@ class FileOnCloudValidator(object):
                     logger_api.warning(msg)
 
         if not_deleted_region:
-            for item in not_deleted_region:
-                working_data.remove(item)
+            not_deleted_region_ids = set(id(x) for x in not_deleted_region)
+            working_data = [x for x in working_data if id(x) not in not_deleted_region_ids]
         if self.warning:
             self.write_warnings()
 
@@ -1227,7 +1193,7 @@ class FileOnCloudValidator(object):
         cloud_clients_types_alive_all = ClientTypeQueryOnCloud.get_alive_clients_types_for_company(self.company_id)
 
         client_with_active_machines = ClientQueryOnCloud.get_clients_with_active_machines_for_company(self.company_id)
-        client_with_active_machines_ids = get_values_from_dict_arr(client_with_active_machines['results'], 'ext_id')
+        client_with_active_machines_ids = set(get_values_from_dict_arr(client_with_active_machines['results'], 'ext_id'))
 
         if not cloud_clients_all['status']:
             self.append_error(work_on, self.emosl(Const.DATABASE_QUERY_ERROR, work_on))
@@ -1236,12 +1202,13 @@ class FileOnCloudValidator(object):
         else:
             cloud_clients_all = cloud_clients_all['results']
 
-        all_alive_cloud_clients = [m for m in cloud_clients_all if m['alive'] is True]
-        all_alive_cloud_clients_ids = get_values_from_dict_arr(all_alive_cloud_clients, 'ext_id')
-        cloud_clients_types_alive_all_ids = get_values_from_dict_arr(cloud_clients_types_alive_all['results'], 'ext_id')
+        cloud_clients_index = CloudEntityIndex(cloud_clients_all)
+        all_alive_cloud_clients = cloud_clients_index.alive
+        all_alive_cloud_clients_ids = cloud_clients_index.alive_ids
+        cloud_clients_types_alive_all_ids = set(get_values_from_dict_arr(cloud_clients_types_alive_all['results'], 'ext_id'))
 
         external_ids = set([m[id_fld] for m in working_data])
-        alive_ids, dead_ids = get_alive_and_dead(external_ids, cloud_clients_all)
+        alive_ids, dead_ids = cloud_clients_index.get_alive_and_dead(external_ids)
 
         try:
             action_50 = int(self.data[0][action_fld]) == 50
@@ -1252,7 +1219,7 @@ class FileOnCloudValidator(object):
 
         if action_50:
             for item in all_alive_cloud_clients:
-                if item['ext_id'] in set(client_with_active_machines_ids):
+                if item['ext_id'] in client_with_active_machines_ids:
                     not_delete_client_action50.append(item)
                     self.append_warning(item['ext_id'], self.emosl(Const.ASSIGNED_MACHINE_CLIENT, item['ext_id']))
 
@@ -1262,21 +1229,20 @@ class FileOnCloudValidator(object):
                 m[action_fld] = ImportAction.CREATE.value
 
             if not_delete_client_action50:
-                for items in not_delete_client_action50:
-                    all_alive_cloud_clients.remove(items)
-
-            for m in [m for m in all_alive_cloud_clients if m['ext_id'] not in external_ids]:
-                working_data = [{
-                    id_fld: m['ext_id'],
-                    name_fld: m['name'],
-                    action_fld: ImportAction.DELETE.value,
-                    'action50_delete': True,
-                    'cloud_id': m['id'],
-                    'parent_region_id': '',
-                }] + working_data
+                not_delete_client_ids = set(id(x) for x in not_delete_client_action50)
+                all_alive_cloud_clients = [x for x in all_alive_cloud_clients if id(x) not in not_delete_client_ids]
+
+            working_data = [{
+                id_fld: m['ext_id'],
+                name_fld: m['name'],
+                action_fld: ImportAction.DELETE.value,
+                'action50_delete': True,
+                'cloud_id': m['id'],
+                'parent_region_id': '',
+            } for m in reversed(all_alive_cloud_clients) if m['ext_id'] not in external_ids] + working_data
             # refresh ID's
             external_ids = set([m[id_fld] for m in working_data])
-            alive_ids, dead_ids = get_alive_and_dead(external_ids, cloud_clients_all)
+            alive_ids, dead_ids = cloud_clients_index.get_alive_and_dead(external_ids)
 
 
         not_deleted_client = []
@@ -1321,8 +1287,8 @@ class FileOnCloudValidator(object):
                 if client_type_id and client_type_id not in cloud_clients_types_alive_all_ids:
                     self.append_error(entity_id, self.emosl(Const.DATABASE_NO_CLIENT_TYPE, client_type_id))
 
-        for item in not_deleted_client:
-            working_data.remove(item)
+        not_deleted_client_ids = set(id(x) for x in not_deleted_client)
+        working_data = [x for x in working_data if id(x) not in not_deleted_client_ids]
 
         if self.warning:
             self.write_warnings()
@@ -1406,11 +1372,12 @@ class FileOnCloudValidator(object):
 
         packing_sizes_query = PackingsQueryOnCloud.get_product_packings_for_company(self.company_id)
         products_all = ProductQueryOnCloud.get_products_for_company(self.company_id)
-        products_all_alive = [m for m in products_all['results'] if m['alive'] is True]
-        product_all_alive_ids = get_values_from_dict_arr(products_all_alive, 'ext_id')
+        products_index = CloudEntityIndex(products_all['results'])
+        products_all_alive = products_index.alive
+        product_all_alive_ids = products_index.alive_ids
         packing_names_all = PackingsQueryOnCloud.get_packing_names_for_company(self.company_id)
 
-        existing_name_ids = get_values_from_dict_arr(packing_names_all['results'], 'ext_id')
+        existing_name_ids = set(get_values_from_dict_arr(packing_names_all['results'], 'ext_id'))
 
         product_dict = {}
 
@@ -1444,10 +1411,11 @@ class FileOnCloudValidator(object):
                         singlepack_id = [m for m in packing_names_all['results'] if m['packing_name'] == p['packing_name']][0]['ext_id']
 
         all_alive_cloud_packing_sizes = [m for m in packing_sizes_all if m['alive'] is True and m['product_id'] != '']
-        all_alive_cloud_packing_sizes_ids = get_values_from_dict_arr(all_alive_cloud_packing_sizes, 'ext_id')
+        all_alive_cloud_packing_sizes_ids = set(get_values_from_dict_arr(all_alive_cloud_packing_sizes, 'ext_id'))
 
+        packing_sizes_index = CloudEntityIndex(packing_sizes_all)
         external_ids = set([m[id_fld] for m in working_data])
-        alive_ids, dead_ids = get_alive_and_dead(external_ids, packing_sizes_all)
+        alive_ids, dead_ids = packing_sizes_index.get_alive_and_dead(external_ids)
 
         external_id_products = {}
         for packing in packing_sizes_all:
@@ -1461,18 +1429,17 @@ class FileOnCloudValidator(object):
             for m in [m for m in working_data if m[id_fld] not in alive_ids]:
                 m[action_fld] = ImportAction.CREATE.value
 
-            for m in [m for m in all_alive_cloud_packing_sizes if m['ext_id'] not in external_ids]:
-                working_data = [{
-                    id_fld: m['ext_id'],
-                    name_fld: m['packing_name_id'],
-                    action_fld: ImportAction.DELETE.value,
-                    'action50_delete': True,
-                    'cloud_id': m['id'],
-                    'product_id': m['product_id']
-                }] + working_data
+            working_data = [{
+                id_fld: m['ext_id'],
+                name_fld: m['packing_name_id'],
+                action_fld: ImportAction.DELETE.value,
+                'action50_delete': True,
+                'cloud_id': m['id'],
+                'product_id': m['product_id']
+            } for m in reversed(all_alive_cloud_packing_sizes) if m['ext_id'] not in external_ids] + working_data
             # refresh ID's
             external_ids = set([m[id_fld] for m in working_data])
-            alive_ids, dead_ids = get_alive_and_dead(external_ids, packing_sizes_all)
+            alive_ids, dead_ids = packing_sizes_index.get_alive_and_dead(external_ids)
 
         barcodes_from_file = []
         removed_packings_row = []
@@ -1557,9 +1524,8 @@ class FileOnCloudValidator(object):
             barcode_validation=True
         )
 
-        for item in removed_packings_row:
-            if item in working_data:
-                working_data.remove(item)
+        removed_packings_row_ids = set(id(x) for x in removed_packings_row)
+        working_data = [x for x in working_data if id(x) not in removed_packings_row_ids]
 
         grouped_packings = {}
 
@@ -1617,14 +1583,19 @@ class FileOnCloudValidator(object):
 
         rotation_group_assigned_products = []
 
-        # get products for specific product rotation group
+        # get products for all product rotation groups with one query
+        prg_products_by_group = ProductRotationGroupQueryOnCloud.get_products_for_product_rotation_groups(
+            [prg['id'] for prg in all_alive_company_product_rotation_groups]
+        ).get('results')
         for prg in all_alive_company_product_rotation_groups:
-            prg_products = ProductRotationGroupQueryOnCloud.get_products_for_specific_product_rotation_group(
-                prg_id=prg['id']
-            )
-            prg_products = prg_products.get('results')
+            prg_products = prg_products_by_group.get(prg['id'])
             if prg_products:
-                rotation_group_assigned_products.append(prg_products)
+                # index products by external id and code, first assigned product wins as in list search
+                prg_products_index = {}
+                for prg_product in prg_products:
+                    prg_products_index.setdefault(prg_product['product_ext_id'], prg_product)
+                    prg_products_index.setdefault(prg_product['product_code'], prg_product)
+                rotation_group_assigned_products.append(prg_products_index)
 
         # don't accept files with repeated external ids and repeated names
         if removed_ids or removed_names:
@@ -1657,15 +1628,12 @@ class FileOnCloudValidator(object):
             cloud_products_all = cloud_products_all['results']
 
         # alive products
-        all_alive_cloud_products = [
-            p for p in cloud_products_all if p['alive'] is True
-        ]
-        all_alive_cloud_products_ids = get_values_from_dict_arr(
-            all_alive_cloud_products, 'ext_id'
-        )
+        cloud_products_index = CloudEntityIndex(cloud_products_all)
+        all_alive_cloud_products = cloud_products_index.alive
+        all_alive_cloud_products_ids = cloud_products_index.alive_ids
 
         external_ids = set([p[id_fld] for p in working_data])
-        alive_ids, _ = get_alive_and_dead(external_ids, cloud_products_all)
+        alive_ids, _ = cloud_products_index.get_alive_and_dead(external_ids)
 
         try:
             action_50 = int(self.data[0][action_fld]) == 50
@@ -1683,17 +1651,16 @@ class FileOnCloudValidator(object):
             # all alive products whose external id is not in csv add DELETE
             # action in a new row in data. add them another field 'action50_delete'
             # and 'cloud_id'
-            for p in [p for p in all_alive_cloud_products if p['ext_id'] not in external_ids]:
-                working_data = [{
-                    id_fld: p['ext_id'],
-                    name_fld: p['name'],
-                    action_fld: ImportAction.DELETE.value,
-                    'action50_delete': True,
-                    'cloud_id': p['id']
-                }] + working_data
+            working_data = [{
+                id_fld: p['ext_id'],
+                name_fld: p['name'],
+                action_fld: ImportAction.DELETE.value,
+                'action50_delete': True,
+                'cloud_id': p['id']
+            } for p in reversed(all_alive_cloud_products) if p['ext_id'] not in external_ids] + working_data
             # refresh ids
             external_ids = set([p[id_fld] for p in working_data])
-            alive_ids, _ = get_alive_and_dead(external_ids, cloud_products_all)
+            alive_ids, _ = cloud_products_index.get_alive_and_dead(external_ids)
 
         # validate specific non-required fields
         tax_rates_from_file = []
@@ -1704,11 +1671,11 @@ class FileOnCloudValidator(object):
         non_singlepacks = PackingsQueryOnCloud.get_used_non_singlepack_packings(self.company_id)
 
         if non_singlepacks['status']:
-            packing_barcodes = [x['barcode'] for x in non_singlepacks['results']]
-            packing_ext_id = [x['ext_id'] for x in non_singlepacks['results']]
+            packing_barcodes = set(x['barcode'] for x in non_singlepacks['results'])
+            packing_ext_id = set(x['ext_id'] for x in non_singlepacks['results'])
         else:
-            packing_barcodes = []
-            packing_ext_id = []
+            packing_barcodes = set()
+            packing_ext_id = set()
 
         discard_import_rows = []
         for row in working_data:
@@ -1736,8 +1703,8 @@ class FileOnCloudValidator(object):
 
             # product assigned on product rotation cannot be deleted
             if action in [ImportAction.DELETE, ImportAction.UNKNOWN]:
-                for prg_products in rotation_group_assigned_products:
-                    prg_product = next(filter(lambda obj: obj.get('product_ext_id') == row['product_id'] or obj.get('product_code') == row['product_id'], prg_products), None)
+                for prg_products_index in rotation_group_assigned_products:
+                    prg_product = prg_products_index.get(row['product_id'])
                     if prg_product:
                         prg_product_ext_id = prg_product['product_ext_id']
                         prg_product_name = prg_product['product_name']
@@ -1784,11 +1751,11 @@ class FileOnCloudValidator(object):
                 self.handle_field_uniqueness(
                     barcode_name,
                     barcodes_from_file,
-                    all_alive_cloud_products,
+                    cloud_products_index,
                     product_ext_id=row['product_id'],
                     barcode_validation=True
                 )
-            db_current_product = list(filter(lambda d: d['ext_id'] == row['product_id'], all_alive_cloud_products))
+            db_current_product = cloud_products_index.get_alive(row['product_id'])
             current_db_default_barcode = None
             current_db_barcode1 = None
             current_db_barcode2 = None
@@ -1796,7 +1763,6 @@ class FileOnCloudValidator(object):
             current_db_barcode4 = None
 
             if db_current_product:
-                db_current_product = db_current_product[0]
                 current_db_default_barcode = db_current_product['barcode']
                 current_db_barcode1 = db_current_product['barcode1']
                 current_db_barcode2 = db_current_product['barcode2']
@@ -1889,7 +1855,7 @@ class FileOnCloudValidator(object):
         self.handle_field_uniqueness(
             'name',
             product_names_from_file,
-            all_alive_cloud_products
+            cloud_products_index
         )
         if self.warning:
             self.write_warnings(warning_type=EnumErrorType.WARNING.value)
@@ -1953,9 +1919,8 @@ class FileOnCloudValidator(object):
             self.write_errors(error_type=EnumErrorType.ERROR.value)
             return False
 
-        for item in discard_import_rows:
-            if item in working_data:
-                working_data.remove(item)
+        discard_import_rows_ids = set(id(x) for x in discard_import_rows)
+        working_data = [x for x in working_data if id(x) not in discard_import_rows_ids]
         self.data = working_data
         self.write_history_and_publish()
         return True
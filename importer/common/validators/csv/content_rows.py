@@ -0,0 +1,84 @@
+import codecs
+import csv
+import os
+
+from common.validators.csv.xlsx_reader import XLSX_EXTENSION, iter_xlsx_rows
+
+"""
+
+    Streaming content rows of import file (csv or xlsx).
+
+    Rows are read from file on every iteration and are not kept in memory. Validation steps which need content
+    before rows are serialized (planogram price lists and price columns, location geo fields) iterate content rows
+    once more, every pass reads file row by row.
+
+"""
+
+
+def iter_csv_rows(file_path, delimiter):
+    """
+
+    :param file_path: path to the csv file
+    :param delimiter: csv delimiter
+    :return: generator of rows (list of strings)
+    """
+    with codecs.open(file_path, "r", encoding='utf-8', errors='ignore') as in_file:
+        for line in csv.reader(in_file, delimiter=delimiter):
+            yield line
+
+
+class FileContentRows(object):
+    """
+    Iterable of not empty content rows (without header row) of csv or xlsx file.
+    """
+
+    def __init__(self, file_path, delimiter):
+        self.file_path = file_path
+        self.delimiter = delimiter
+        self.is_xlsx = os.path.splitext(file_path)[1].lower() == XLSX_EXTENSION
+
+    def iter_file_rows(self):
+        if self.is_xlsx:
+            return iter_xlsx_rows(self.file_path)
+        return iter_csv_rows(self.file_path, self.delimiter)
+
+    def is_content_row(self, line):
+        # Empty xlsx row has empty cells, empty csv line has no cells
+        return any(line) if self.is_xlsx else bool(line)
+
+    def headers(self):
+        """
+
+        :return: header row, raise StopIteration for empty file
+        """
+        rows = self.iter_file_rows()
+        try:
+            return next(rows)
+        finally:
+            rows.close()
+
+    def __iter__(self):
+        rows = self.iter_file_rows()
+        try:
+            next(rows, None)
+            for line in rows:
+                if self.is_content_row(line):
+                    yield line
+        finally:
+            rows.close()
+
+    def __bool__(self):
+        for _ in self:
+            return True
+        return False
+
+
+def read_file_content(file_path, delimiter):
+    """
+
+    :param file_path: path to the file (csv or xlsx)
+    :param delimiter: csv delimiter
+    :return: header row and FileContentRows of not empty content rows
+    """
+    content_rows = FileContentRows(file_path, delimiter)
+    return content_rows.headers(), content_rows
@@ -3,24 +3,21 @@ import csv
 import json
 import traceback
 from operator import itemgetter
-import ftputil
 import os
 import shutil
 import re
 import time
-import jsonschema
-from jsonschema import validate, FormatChecker
-import pandas as pd
 from common.mixin.enum_errors import EnumValidationMessage as enum_msg
 from common.mixin.enum_errors import enum_message_on_specific_language
 from common.mixin.enum_errors import EnumErrorType
-from common.mixin.ftp import MySession, sftp_download_file
-from common.mixin.handle_file import CsvValidatorHandleFIle as handle_file, ImportProcessHandler
-from common.mixin.mixin import (generate_hash_for_json, return_errors_from_json_schema, delete_processed_file,
-                                import_file_content_to_json, mandatory_geo_location)
+from common.mixin.ftp import remote_file_pool, sftp_download_file
+from common.mixin.remote_files import FTP, format_remote_time
+from common.mixin.handle_file import CsvValidatorHandleFIle as handle_file, ImportProcessHandler, content_rows_to_dict
+from common.mixin.mixin import (return_errors_from_json_schema, delete_processed_file, mandatory_geo_location,
+                                unique_dict_list)
 from common.mixin.validation_const import (
     return_import_type_name, ALLOWED_EXTENSIONS,
-    return_import_type_based_on_parser,
+    return_import_type_based_on_parser, collect_planogram_lookups,
     return_all_fields_and_mandatory, ImportType, Enum_validation_error, return_import_type_id_custom_validation)
 from common.mixin.validator_import import (
     escape_list, WORKING_DIR, HISTORY_FAIL_DIR, STORE_DIR, HISTORY_SUCCESS_DIR)
@@ -30,6 +27,9 @@ from database.cloud_database.core.query import CustomUserQueryOnCloud
 from database.company_database.core.query_export import ExportHistory
 from database.company_database.core.query_history import CompanyFailHistory
 from common.validators.cloud_db.cloud_validator import CompanyHistory
+from common.validators.csv.import_data import ImportDataSink
+from common.validators.csv.row_validator import get_row_validator
+from common.validators.csv.xlsx_reader import check_xlsx_file
 from common.mixin.elastic_login import ElasticCloudLoginFunctions
 from common.mixin.mixin import generate_uid
 from common.logging.setup import logger
@@ -41,7 +41,8 @@ logger_api = logger
 
 class ParseFileBasedOnExtension(object):
     """
-    This class make convert xls/xlsx file to csv using pandas, and make elastic and system  logging
+    This class check xlsx file (read row by row in validation), convert xls file to csv using pandas,
+    and make elastic and system  logging
     """
 
     def __init__(self, file, file_delimiter, process_logger):
@@ -108,6 +109,7 @@ class ParseFileBasedOnExtension(object):
         """
         # converting xls/xlsx file to csv using Pandas reader
         try:
+            import pandas as pd
             new_file_path_save = new_file_path + '.csv'
             work_book = pd.read_excel(self.file_parse)
             work_book.to_csv(new_file_path_save, encoding='utf-8')
@@ -132,15 +134,20 @@ class ParseFileBasedOnExtension(object):
             file_extension, path = self.return_file_extension()
             if not file_extension:
                 return None
+            if file_extension == 'xlsx':
+                # xlsx file is read row by row in validation, without converting to csv
+                try:
+                    if check_xlsx_file(self.file_parse):
+                        return {'success': True, 'file_path': self.file_parse}
+                except Exception:
+                    logger_api.info(self.process_logger.update_system_log_flow(
+                        self.file_parse, key_enum=enum_msg.VALIDATION_SYSTEM_LOG_XLSX_ERROR.value)
+                    )
             if file_extension == 'xlsx' or file_extension == 'xls':
                 # if file was OK converted, return full file path
-                if self.open_xlsx_file_and_convert_to_csv(path)['success']:
-                    ok_file_convert = self.open_xlsx_file_and_convert_to_csv(path)['file_path']
-                    return {'success': True, 'file_path': ok_file_convert}
-                else:
-                    # if we cant convert file to csv return old/non converted file!
-                    nok_file_convert = self.open_xlsx_file_and_convert_to_csv(path)['file_path']
-                    return {'success': False, 'file_path': nok_file_convert}
+                # if we cant convert file to csv return old/non converted file!
+                convert_status = self.open_xlsx_file_and_convert_to_csv(path)
+                return {'success': convert_status['success'], 'file_path': convert_status['file_path']}
             elif file_extension == 'csv':
                 return {'success': True, 'file_path': path + '.csv'}
         except Exception as e:
@@ -346,7 +353,6 @@ class CsvFileValidatorRemote(object):
 
         :return: download file from FTP
         """
-        from datetime import datetime
         # If token is not defined, make elastic, global and cloud logging then update main process!
         if not self.user_token['status']:
             self.process_logger.create_process_and_cloud_flow_and_main(
@@ -362,9 +368,7 @@ class CsvFileValidatorRemote(object):
         # If can't connect to FTP server, make logging and update main process.
         if self.port != 22:
             try:
-                ftp_connect = ftputil.FTPHost(self.host, self.username,
-                                              self.password, port=self.port,
-                                              session_factory=MySession)
+                ftp_host = remote_file_pool.acquire(FTP, self.host, self.port, self.username, self.password)
                 logger_api.info(self.process_logger.update_system_log_flow(
                     self.username, self.host, self.port,
                     key_enum=enum_msg.FTP_CONNECTED.value)
@@ -380,10 +384,9 @@ class CsvFileValidatorRemote(object):
                 return {"success": False}
 
             # If can't change directory on remote FTP server make logging and update main process.
-            with ftp_connect as ftp_host:
+            try:
                 try:
                     ftp_host.chdir(self.path)
-                    os.chdir(STORE_DIR)
                     logger_api.info(self.process_logger.update_system_log_flow(
                         self.path,
                         key_enum=enum_msg.FILE_RIGHT_PATH.value)
@@ -399,32 +402,38 @@ class CsvFileValidatorRemote(object):
                     )
                     return {"success": False}
 
-                file_names = ftp_host.listdir(ftp_host.curdir)
+                # Names, types and modification times of all files are listed with one MLSD call.
+                remote_files = ftp_host.list_entries()
 
                 logger_api.info(self.process_logger.update_system_log_flow(
-                    file_names,
+                    [entry.name for entry in remote_files],
                     key_enum=enum_msg.FTP_FILE_LIST.value)
                 )
 
-                # Try to download file from FTP server.
-                for file_name in file_names:
+                # Download files concurrently, every download thread use own FTP session.
+                download_errors = remote_file_pool.download_files(ftp_host, [
+                    (entry.name, os.path.join(STORE_DIR, entry.name)) for entry in remote_files
+                    if entry.is_file and entry.name not in escape_list
+                ])
+
+                for entry in remote_files:
+                    file_name = entry.name
                     try:
-                        if ftp_host.path.isfile(file_name) and file_name not in escape_list:
+                        if file_name in download_errors:
                             extension = os.path.splitext(os.path.join(STORE_DIR, file_name))[1]
-                            time_file = datetime.fromtimestamp(
-                                float(ftp_host.path.getmtime(file_name))
-                            ).strftime('%Y-%m-%d %H:%M:%S')
+                            time_file = format_remote_time(entry.mtime)
 
                             logger_api.info(self.process_logger.update_system_log_flow(
                                 file_name,
                                 key_enum=enum_msg.FTP_START_DOWNLOAD_FILE.value)
                             )
 
-                            ftp_host.download(file_name, os.path.join(STORE_DIR, file_name))
+                            if download_errors[file_name] is not None:
+                                raise download_errors[file_name]
 
                             new_filename_without_space = re.sub('\s+', '_', file_name).strip()
                             os.rename(os.path.join(STORE_DIR, file_name),
-                                      new_filename_without_space)
+                                      os.path.join(STORE_DIR, new_filename_without_space))
 
                             logger_api.info(self.process_logger.update_system_log_flow(
                                 file_name, new_filename_without_space,
@@ -480,6 +489,8 @@ class CsvFileValidatorRemote(object):
                         )
 
                         pass
+            finally:
+                remote_file_pool.release(ftp_host)
         elif self.port == 22:
             downloaded_files_resultset = sftp_download_file(
                 self.host, self.username,
@@ -755,29 +766,6 @@ class FieldValidation(object):
             self.delimiter, self.token
         )
 
-    def parse_dictionary_for_cloud(self, working_file, parser):
-        """
-
-        :param working_file: file for validation
-        :param parser: parser type (location, machine, machine_type, regions)
-        :return: main list of data content type for cloud
-        """
-        cloud_data = self.helper_methods_validations.serializer_data(working_file, parser,
-                                                                     'cloud_validator')
-        return cloud_data
-
-
-    def get_output_response(self, working_file, parser):
-        """
-
-        :param working_file: file for validation
-        :param parser: parser type (location, machine, machine_type, regions)
-        :return: main list of data content type for importer and json schema validation
-        """
-        importer_data = self.helper_methods_validations.serializer_data(working_file, parser,
-                                                                        'csv_validator')
-        return importer_data
-
     @staticmethod
     def clean_meter_readings(row):
         """
@@ -838,20 +826,23 @@ class FieldValidation(object):
             working_file = os.path.join(WORKING_DIR, response_of_file)
             import_type_name = return_import_type_name(self.import_type)
 
-            csv_import_data = import_file_content_to_json(working_file=working_file, delimiter=self.delimiter)
+            # file content is streamed, every step iterates file content rows (rows are not kept in memory)
+            headers, content_rows = self.helper_methods_validations.read_file_content(working_file)
+
             if import_type_name == ImportType.PLANOGRAMS.name:
-                for import_header in csv_import_data:
-                    if not import_header.get('multiple_pricelists'):
-                        self.process_logger.create_process_and_cloud_flow_and_main(
-                            error=EnumErrorType.FAIL,
-                            file_path=self.filename_path,
-                            email=self.email,
-                            language=self.language,
-                            key_enum=enum_msg.PLANOGRAM_IMPORT_HEADER_GENERATOR_ERROR.value,
-                        )
-                        return
+                # price lists and price columns of planogram are collected in the same pass
+                planogram_lookups = collect_planogram_lookups(content_rows_to_dict(headers, content_rows))
+                if not planogram_lookups['multiple_pricelists']:
+                    self.process_logger.create_process_and_cloud_flow_and_main(
+                        error=EnumErrorType.FAIL,
+                        file_path=self.filename_path,
+                        email=self.email,
+                        language=self.language,
+                        key_enum=enum_msg.PLANOGRAM_IMPORT_HEADER_GENERATOR_ERROR.value,
+                    )
+                    return
             if import_type_name == ImportType.LOCATIONS.name:
-                for x in csv_import_data:
+                for x in content_rows_to_dict(headers, content_rows):
                     location_address_value = x.get('location_address')
                     longitude_value = x.get('longitude')
                     latitude_value = x.get('latitude')
@@ -920,7 +911,8 @@ class FieldValidation(object):
                     logger_api.info(geo_location_validation_message)
 
             if import_type_name == ImportType.PLANOGRAMS.name:
-                get_default_parser = return_import_type_based_on_parser(import_type_name, data=csv_import_data)
+                get_default_parser = return_import_type_based_on_parser(
+                    import_type_name, price_lists=planogram_lookups['price_lists'])
                 if not get_default_parser:
                     self.process_logger.create_process_and_cloud_flow_and_main(
                         error=EnumErrorType.FAIL,
@@ -933,37 +925,20 @@ class FieldValidation(object):
 
                 # Business logic only for planogram, if sent column that is not defined in multi price column
                 try:
-                    for import_item_data in csv_import_data:
-                        import_price = dict(
-                            [(x, y) for x, y in import_item_data.items() if x.startswith('price_') or x.startswith('Price_')]
-                        )
-                        allowed_price = dict(
-                            [(x, y) for x, y in get_default_parser['custom_valid_fields'].items() if x.startswith('price_')]
+                    allowed_price_list = [
+                        x for x in get_default_parser['custom_valid_fields'] if x.startswith('price_')]
+                    wrong_column_message = [
+                        x for x in planogram_lookups['price_columns'] if x not in allowed_price_list]
+                    if len(wrong_column_message):
+                        self.process_logger.create_process_and_cloud_flow_and_main(
+                            ', '.join(allowed_price_list), ', '.join(wrong_column_message),
+                            error=EnumErrorType.FAIL,
+                            file_path=self.filename_path,
+                            email=self.email,
+                            language=self.language,
+                            key_enum=enum_msg.PLANOGRAM_IMPORT_PRICE_WRONG_COLUMN.value,
                         )
-                        import_price_list = []
-                        allowed_price_list = []
-                        for k, v in import_price.items():
-                            if k not in import_price_list:
-                                import_price_list.append(k)
-
-                        for k, v in allowed_price.items():
-                            if k not in allowed_price_list:
-                                allowed_price_list.append(k)
-                        wrong_column_message = []
-                        for import_price_item in import_price_list:
-                            if import_price_item not in allowed_price_list:
-                                if import_price_item not in wrong_column_message:
-                                    wrong_column_message.append(import_price_item)
-                        if len(wrong_column_message):
-                            self.process_logger.create_process_and_cloud_flow_and_main(
-                                ', '.join(allowed_price_list), ', '.join(wrong_column_message),
-                                error=EnumErrorType.FAIL,
-                                file_path=self.filename_path,
-                                email=self.email,
-                                language=self.language,
-                                key_enum=enum_msg.PLANOGRAM_IMPORT_PRICE_WRONG_COLUMN.value,
-                            )
-                            return None
+                        return None
                 except Exception as e:
                     logger_api.error(self.process_logger.update_system_log_flow(
                         e, key_enum=enum_msg.PLANOGRAM_IMPORT_PRICE_WRONG_COLUMN_EXCEPTION.value))
@@ -976,271 +951,269 @@ class FieldValidation(object):
             missing_header = False
 
             list_missing_header = []
-            with codecs.open(working_file, 'r', encoding='utf-8', errors='ignore') as csv_file:
-                csv_reader = csv.reader(csv_file, delimiter=self.delimiter)
-                header_row = next(csv_reader)
-                self.fields_in_document = [h.lower() if h is not None else h for h in header_row]
-                for field in field_names:
-                    if field not in self.fields_in_document:
-                        missing_header = True
-                file_content = []
-                for content_rows in csv_reader:
-                    for row in content_rows:
-                        file_content.append(row)
-                if not file_content:
-                    self.process_logger.create_process_and_cloud_flow_and_main(
-                        self.import_type,
-                        error=EnumErrorType.FAIL,
-                        file_path= self.filename_path,
-                        email=self.email,
-                        language=self.language,
-                        key_enum=enum_msg.FILE_EMPTY.value
-                    )
-
-                    return {'file': working_validation_filename, "success": False}
-                real_header = [x for x in header_row if x]
-                check_header=list((filter((lambda x: re.search('\w+', x)), real_header)))
-                if not len(check_header):
-                    real_header= check_header
-                if not real_header:
-                    self.process_logger.create_process_and_cloud_flow_and_main(
-                        os.path.basename(working_file), self.import_type,
-                        error=EnumErrorType.FAIL,
-                        file_path=self.filename_path,
-                        email=self.email,
-                        language=self.language,
-                        key_enum=enum_msg.FILE_WITHOUT_HEADER.value
-                    )
-                    return
-
-                # check mandatory fields!!
-                if self.fields_in_document != field_names:
-                    # Check mandatory fields in header!
-                    for mandatory_field in mandatory_fields:
-                        if mandatory_field not in self.fields_in_document:
-                            missing_mandatory_fields = True
-                            break
-                if missing_header:
-                    for item in self.fields_in_document:
-                        real_item = ''.join(item.split())
-                        if real_item not in field_names:
-                            list_missing_header.append(real_item)
-
-            # Check if json hash exists in database.
-            output_dict_arr = self.get_output_response(response_of_file, get_default_parser)
-
-            # Call function and convert dict for cloud
-            output_values_for_cloud = self.parse_dictionary_for_cloud(response_of_file,
-                                                                      get_default_parser)
-            # if some not mandatory fields are missing, exclude them from validation
-            excluded_fields = [n for n in field_names if n not in self.fields_in_document]
-            missing_header = [x for x in list_missing_header if x]
-
-            # add missing rows
-            if excluded_fields:
-                for row in output_values_for_cloud:
-                    for field in excluded_fields:
-                        row[field] = '<null>'
-
-            if missing_header:
-                if missing_mandatory_fields and missing_header:
-                    self.process_logger.update_process_and_cloud_flow(
-                        working_validation_filename, self.import_type,
-                        error=EnumErrorType.FAIL.name,
-                        language=self.language,
-                        key_enum=enum_msg.FILE_WITHOUT_MANDATORY_FIELDS.value,
-                    )
-                    output_string = ' '.join((str(x) for x in missing_header))
-                    wrong_headers_args='<br>' + re.sub('[^a-zA-Z0-9 _]', '<br>', output_string)
-                    self.process_logger.create_process_and_cloud_flow_and_main(
-                        wrong_headers_args,
-                        error=EnumErrorType.FAIL,
-                        file_path=self.filename_path,
-                        email=self.email,
-                        language=self.language,
-                        key_enum=error_header_message,
-                    )
-                    return None
-                elif missing_header and not missing_mandatory_fields:
-                    output_string = ' '.join((str(x) for x in missing_header))
-                    missing_header_args='<br>' + re.sub('[^a-zA-Z0-9 _]', '<br>', output_string)
-                    self.process_logger.create_process_and_cloud_flow_and_main(
-                        missing_header_args, self.import_type,
-                        error=EnumErrorType.FAIL,
-                        file_path=self.filename_path,
-                        email=self.email,
-                        language=self.language,
-                        key_enum=enum_msg.FAIL_MISSING_HEADER.value,
-                    )
-
-                    return None
-
-            json_hash = generate_hash_for_json(output_values_for_cloud)
-            self.process_logger.set_data_hash(json_hash)
-            success_history, history = CompanyHistory.exists_in_history(self.company_id, json_hash)
-            fail_history = CompanyHistory.return_local_fail_history(self.company_id, json_hash)
-            if success_history:
+            self.fields_in_document = [h.lower() if h is not None else h for h in headers]
+            for field in field_names:
+                if field not in self.fields_in_document:
+                    missing_header = True
+            if not content_rows:
                 self.process_logger.create_process_and_cloud_flow_and_main(
-                    history.updated_at.strftime('%d-%m-%Y'),
+                    self.import_type,
                     error=EnumErrorType.FAIL,
-                    file_path=self.filename_path,
+                    file_path= self.filename_path,
                     email=self.email,
                     language=self.language,
-                    key_enum=enum_msg.ALREADY_SUCCESS_PROCESSED_FILE.value
+                    key_enum=enum_msg.FILE_EMPTY.value
                 )
 
                 return {'file': working_validation_filename, "success": False}
-
-            if fail_history['success']:
+            real_header = [x for x in headers if x]
+            check_header=list((filter((lambda x: re.search('\w+', x)), real_header)))
+            if not len(check_header):
+                real_header= check_header
+            if not real_header:
                 self.process_logger.create_process_and_cloud_flow_and_main(
-                    fail_history['res'].strftime('%d-%m-%Y %H:%M:%S'),
+                    os.path.basename(working_file), self.import_type,
                     error=EnumErrorType.FAIL,
                     file_path=self.filename_path,
                     email=self.email,
                     language=self.language,
-                    key_enum=enum_msg.ALREADY_FAIL_PROCESSED_FILE.value
+                    key_enum=enum_msg.FILE_WITHOUT_HEADER.value
                 )
+                return
 
-                return {'file': working_validation_filename, "success": False}
+            # check mandatory fields!!
+            if self.fields_in_document != field_names:
+                # Check mandatory fields in header!
+                for mandatory_field in mandatory_fields:
+                    if mandatory_field not in self.fields_in_document:
+                        missing_mandatory_fields = True
+                        break
+            if missing_header:
+                for item in self.fields_in_document:
+                    real_item = ''.join(item.split())
+                    if real_item not in field_names:
+                        list_missing_header.append(real_item)
+
+            # if some not mandatory fields are missing, exclude them from validation
+            excluded_fields = [n for n in field_names if n not in self.fields_in_document]
+            missing_header = [x for x in list_missing_header if x]
 
+            # Serialize data for importer and cloud and make json schema validation in one pass over file content,
+            # serialized rows are written to spool files (rows are not kept in memory)
             output_response = []
             count_line = 1
-            for row in output_dict_arr:
-                count_line += 1
-                try:
-                    validate(row, get_default_parser, format_checker=FormatChecker())
-                except jsonschema.exceptions.ValidationError as e:
-                    output_error = return_errors_from_json_schema(
-                        row, e, get_default_parser, self.language, count_line)
-                    for list_item in output_error:
-                        output_response.append(list_item)
+            row_validator = get_row_validator(import_type_name, get_default_parser)
+            serialized_data = self.helper_methods_validations.iter_serialized_data(
+                headers, content_rows, get_default_parser)
+            with ImportDataSink(WORKING_DIR, working_validation_filename) as import_data:
+                for row, cloud_row in serialized_data:
+                    # add missing rows
+                    for field in excluded_fields:
+                        cloud_row[field] = '<null>'
+                    import_data.write(row, cloud_row)
+
+                    count_line += 1
+                    validation_error = row_validator.first_error(row)
+                    if validation_error:
+                        output_error = return_errors_from_json_schema(
+                            row, validation_error, get_default_parser, self.language, count_line,
+                            validator=row_validator.error_validator)
+                        for list_item in output_error:
+                            output_response.append(list_item)
+                import_data.close()
 
-            logger_api.info(self.process_logger.update_system_log_flow(
-                output_response,
-                key_enum=enum_msg.VALIDATION_SYSTEM_LOG_INFO.value)
-            )
+                if missing_header:
+                    if missing_mandatory_fields and missing_header:
+                        self.process_logger.update_process_and_cloud_flow(
+                            working_validation_filename, self.import_type,
+                            error=EnumErrorType.FAIL.name,
+                            language=self.language,
+                            key_enum=enum_msg.FILE_WITHOUT_MANDATORY_FIELDS.value,
+                        )
+                        output_string = ' '.join((str(x) for x in missing_header))
+                        wrong_headers_args='<br>' + re.sub('[^a-zA-Z0-9 _]', '<br>', output_string)
+                        self.process_logger.create_process_and_cloud_flow_and_main(
+                            wrong_headers_args,
+                            error=EnumErrorType.FAIL,
+                            file_path=self.filename_path,
+                            email=self.email,
+                            language=self.language,
+                            key_enum=error_header_message,
+                        )
+                        return None
+                    elif missing_header and not missing_mandatory_fields:
+                        output_string = ' '.join((str(x) for x in missing_header))
+                        missing_header_args='<br>' + re.sub('[^a-zA-Z0-9 _]', '<br>', output_string)
+                        self.process_logger.create_process_and_cloud_flow_and_main(
+                            missing_header_args, self.import_type,
+                            error=EnumErrorType.FAIL,
+                            file_path=self.filename_path,
+                            email=self.email,
+                            language=self.language,
+                            key_enum=enum_msg.FAIL_MISSING_HEADER.value,
+                        )
 
-            if len(output_response) > 0:
-                unique_len = sorted(output_response, key=itemgetter('record'))
-                new_d = pd.DataFrame(unique_len).drop_duplicates().to_dict('records')
-                total_error_message = len(new_d)
-                if total_error_message:
-                    self.process_logger.set_data_hash(json_hash)
-                    messages = []
-
-                    # translate json schema error message
-                    for item in new_d:
-                        messages.append({
-                            'record': item['record'],
-                            'message': enum_message_on_specific_language(
-                                enum_msg.VALUE_INCORRECT_FORMAT.value, self.language, item['message'])
-                        })
+                        return None
 
-                    logger_api.info(self.process_logger.update_system_log_flow(
-                        'csv_validator', total_error_message,
-                        key_enum=enum_msg.VALIDATION_ELASTIC_INSERT_START_TIME.value)
-                    )
-                    self.process_logger.update_process_and_cloud_flow(
-                        self.import_type,
-                        error=EnumErrorType.ERROR.name,
+                json_hash = import_data.data_hash
+                self.process_logger.set_data_hash(json_hash)
+                success_history, history = CompanyHistory.exists_in_history(self.company_id, json_hash)
+                fail_history = CompanyHistory.return_local_fail_history(self.company_id, json_hash)
+                if success_history:
+                    self.process_logger.create_process_and_cloud_flow_and_main(
+                        history.updated_at.strftime('%d-%m-%Y'),
+                        error=EnumErrorType.FAIL,
+                        file_path=self.filename_path,
+                        email=self.email,
                         language=self.language,
-                        key_enum=enum_msg.CSV_VALIDATOR_ERROR.value,
+                        key_enum=enum_msg.ALREADY_SUCCESS_PROCESSED_FILE.value
                     )
 
-                    self.process_logger.update_process_and_cloud_flow(
-                        message=json.dumps(messages),
-                        error=EnumErrorType.ERROR.name,
-                        language=self.language,
-                        key_enum=enum_msg.VALUE_INCORRECT_FORMAT.value,
-                    )
+                    return {'file': working_validation_filename, "success": False}
 
-                    logger_api.info(self.process_logger.update_system_log_flow(
-                        'csv_validator', total_error_message,
-                        key_enum=enum_msg.VALIDATION_ELASTIC_INSERT_END_TIME.value)
-                    )
+                if fail_history['success']:
                     self.process_logger.create_process_and_cloud_flow_and_main(
-                        self.import_type,
-                        error=EnumErrorType.ERROR,
+                        fail_history['res'].strftime('%d-%m-%Y %H:%M:%S'),
+                        error=EnumErrorType.FAIL,
                         file_path=self.filename_path,
                         email=self.email,
                         language=self.language,
-                        key_enum=enum_msg.FAIL_FILE_VALIDATION.value
+                        key_enum=enum_msg.ALREADY_FAIL_PROCESSED_FILE.value
                     )
-                    return {'file': working_validation_filename, "success": False}
 
-            input_file_no_ext = os.path.splitext(working_validation_filename)[0]
-            hash_success_file = '{}_{}${}.{}'.format(self.company_id, json_hash,
-                                                     input_file_no_ext, 'json')
-            success_history_file = os.path.join(HISTORY_SUCCESS_DIR, hash_success_file)
-            with open(success_history_file, 'w') as success_file:
-                json.dump(output_dict_arr, success_file)
+                    return {'file': working_validation_filename, "success": False}
 
-            cloud_success_csv_file_path = os.path.join(
-                HISTORY_SUCCESS_DIR, '{}_{}${}'.format(
-                    self.company_id, json_hash, working_validation_filename))
-            try:
-                my_extension = os.path.splitext(self.filename_path)[1]
-                shutil.copy2(self.filename_path, HISTORY_SUCCESS_DIR)
-                os.rename(os.path.join(HISTORY_SUCCESS_DIR, working_validation_filename),
-                          cloud_success_csv_file_path)
-                if os.path.isfile(os.path.join(STORE_DIR, working_validation_filename)):
-                    os.remove(os.path.join(STORE_DIR, working_validation_filename))
-                if os.path.isfile(self.filename_path):
-                    os.remove(self.filename_path)
-                if my_extension != '.csv':
-                    file_path_remove = str(os.path.splitext(self.filename_path)[0]) + '.csv'
-                    full_path_to_file = os.path.join(WORKING_DIR, file_path_remove)
-                    if os.path.isfile(full_path_to_file):
-                        os.remove(os.path.join(WORKING_DIR, file_path_remove))
-            except Exception:
-                logger_api.exception(self.process_logger.update_system_log_flow(
-                    traceback.print_exc(),
-                    key_enum=enum_msg.RENAME_LOCAL_FILE_ERROR.value)
+                logger_api.info(self.process_logger.update_system_log_flow(
+                    output_response,
+                    key_enum=enum_msg.VALIDATION_SYSTEM_LOG_INFO.value)
                 )
-            self.process_logger.update_process_flow(
-                cloud_success_csv_file_path,
-                error=EnumErrorType.IN_PROGRESS.name,
-                language=self.language,
-                key_enum=enum_msg.SUCCESS_FILE_VALIDATION.value)
 
-            self.process_logger.update_process_flow(
-                os.path.basename(self.filename_path),
-                error=EnumErrorType.IN_PROGRESS.name,
-                language=self.language,
-                key_enum=enum_msg.FILE_IN_QUEUE_FOR_DATABASE_VALIDATION.value,
-            )
+                if len(output_response) > 0:
+                    unique_len = sorted(output_response, key=itemgetter('record'))
+                    new_d = unique_dict_list(unique_len)
+                    total_error_message = len(new_d)
+                    if total_error_message:
+                        self.process_logger.set_data_hash(json_hash)
+                        messages = []
+
+                        # translate json schema error message
+                        for item in new_d:
+                            messages.append({
+                                'record': item['record'],
+                                'message': enum_message_on_specific_language(
+                                    enum_msg.VALUE_INCORRECT_FORMAT.value, self.language, item['message'])
+                            })
 
-            CompanyHistory.insert_history(
-                self.company_id, 'csv_validator', return_import_type_id_custom_validation(self.import_type),
-                self.elastic_hash, json_hash, self.filename_path, self.token
-            )
+                        logger_api.info(self.process_logger.update_system_log_flow(
+                            'csv_validator', total_error_message,
+                            key_enum=enum_msg.VALIDATION_ELASTIC_INSERT_START_TIME.value)
+                        )
+                        self.process_logger.update_process_and_cloud_flow(
+                            self.import_type,
+                            error=EnumErrorType.ERROR.name,
+                            language=self.language,
+                            key_enum=enum_msg.CSV_VALIDATOR_ERROR.value,
+                        )
 
-            # Initialize import process handler (allowed only one import process per company, in same time)!
-            import_process_handler = ImportProcessHandler(
-                company_id=self.company_id, elastic_hash=self.elastic_hash,
-                file_path=self.filename_path, import_type=self.import_type)
+                        self.process_logger.update_process_and_cloud_flow(
+                            message=json.dumps(messages),
+                            error=EnumErrorType.ERROR.name,
+                            language=self.language,
+                            key_enum=enum_msg.VALUE_INCORRECT_FORMAT.value,
+                        )
 
-            # Check if import process can be started (if not check every n sec, until previous process is finished)
-            run_next_import_process, elastic_hash = import_process_handler.check_run_next_import_process()
+                        logger_api.info(self.process_logger.update_system_log_flow(
+                            'csv_validator', total_error_message,
+                            key_enum=enum_msg.VALIDATION_ELASTIC_INSERT_END_TIME.value)
+                        )
+                        self.process_logger.create_process_and_cloud_flow_and_main(
+                            self.import_type,
+                            error=EnumErrorType.ERROR,
+                            file_path=self.filename_path,
+                            email=self.email,
+                            language=self.language,
+                            key_enum=enum_msg.FAIL_FILE_VALIDATION.value
+                        )
+                        return {'file': working_validation_filename, "success": False}
+
+                input_file_no_ext = os.path.splitext(working_validation_filename)[0]
+                hash_success_file = '{}_{}${}.{}'.format(self.company_id, json_hash,
+                                                         input_file_no_ext, 'json')
+                success_history_file = os.path.join(HISTORY_SUCCESS_DIR, hash_success_file)
+                import_data.save_importer_data(success_history_file)
+
+                cloud_success_csv_file_path = os.path.join(
+                    HISTORY_SUCCESS_DIR, '{}_{}${}'.format(
+                        self.company_id, json_hash, working_validation_filename))
+                try:
+                    my_extension = os.path.splitext(self.filename_path)[1]
+                    shutil.copy2(self.filename_path, HISTORY_SUCCESS_DIR)
+                    os.rename(os.path.join(HISTORY_SUCCESS_DIR, working_validation_filename),
+                              cloud_success_csv_file_path)
+                    if os.path.isfile(os.path.join(STORE_DIR, working_validation_filename)):
+                        os.remove(os.path.join(STORE_DIR, working_validation_filename))
+                    if os.path.isfile(self.filename_path):
+                        os.remove(self.filename_path)
+                    if my_extension != '.csv':
+                        file_path_remove = str(os.path.splitext(self.filename_path)[0]) + '.csv'
+                        full_path_to_file = os.path.join(WORKING_DIR, file_path_remove)
+                        if os.path.isfile(full_path_to_file):
+                            os.remove(os.path.join(WORKING_DIR, file_path_remove))
+                except Exception:
+                    logger_api.exception(self.process_logger.update_system_log_flow(
+                        traceback.print_exc(),
+                        key_enum=enum_msg.RENAME_LOCAL_FILE_ERROR.value)
+                    )
+                self.process_logger.update_process_flow(
+                    cloud_success_csv_file_path,
+                    error=EnumErrorType.IN_PROGRESS.name,
+                    language=self.language,
+                    key_enum=enum_msg.SUCCESS_FILE_VALIDATION.value)
+
+                self.process_logger.update_process_flow(
+                    os.path.basename(self.filename_path),
+                    error=EnumErrorType.IN_PROGRESS.name,
+                    language=self.language,
+                    key_enum=enum_msg.FILE_IN_QUEUE_FOR_DATABASE_VALIDATION.value,
+                )
 
-            if not run_next_import_process:
-                while not run_next_import_process:
-                    time.sleep(60)
-                    run_next_import_process, elastic_hash = import_process_handler.check_run_next_import_process()
+                CompanyHistory.insert_history(
+                    self.company_id, 'csv_validator', return_import_type_id_custom_validation(self.import_type),
+                    self.elastic_hash, json_hash, self.filename_path, self.token
+                )
 
+                # Cloud validator data is loaded only for publish (one message per import file)
+                cloud_data = import_data.load_cloud_data()
+
+                # Initialize import process handler (allowed only one import process per company, in same time)!
+                import_process_handler = ImportProcessHandler(
+                    company_id=self.company_id, elastic_hash=self.elastic_hash,
+                    file_path=self.filename_path, import_type=self.import_type)
+
+                # Start import process, or park it in company FIFO queue if previous process is not finished (parked
+                # import is published to cloud validator when previous process is finished, worker is not blocked)!
+                run_next_import_process, elastic_hash = import_process_handler.start_or_park_import_process({
+                    'company_id': self.company_id,
+                    'elastic_hash': self.elastic_hash,
+                    'type_of_process': import_type_name,
+                    'emails': self.email,
+                    'input_file': cloud_success_csv_file_path,
+                    'filename': working_validation_filename,
+                    'language': self.language,
+                    'import_type': self.import_type,
+                    'set_running_process': import_type_name not in [
+                        ImportType.PLANOGRAMS.name, ImportType.MACHINE_TYPES.name],
+                }, cloud_data, self.token)
+
+                if not run_next_import_process:
                     logger_api.info(self.process_logger.update_system_log_flow(
                         self.elastic_hash,
                         elastic_hash,
                         self.company_id,
                         key_enum=enum_msg.IMPORT_PROCEDURE_PER_COMPANY.value))
 
-                logger_api.info(self.process_logger.update_system_log_flow(
-                    elastic_hash,
-                    self.elastic_hash,
-                    self.company_id,
-                    key_enum=enum_msg.IMPORT_PROCEDURE_RUN_NEXT_PROCESS.value))
+                    return {'file': working_validation_filename, "success": True}
 
-            else:
                 # Import process can be published into cloud_validator queue, because there is no running import
                 # process for current import company!
                 logger_api.info(self.process_logger.update_system_log_flow(
@@ -1248,12 +1221,9 @@ class FieldValidation(object):
                     self.elastic_hash,
                     key_enum=enum_msg.IMPORT_PROCEDURE_NO_ACTIVE_PROCESS.value))
 
-            if import_type_name not in [ImportType.PLANOGRAMS.name, ImportType.MACHINE_TYPES.name]:
-                import_process_handler.redis_set_running_import_process()
-
-            publish_status = self.publish_to_cloud_validator(
-                output_values_for_cloud,
-                cloud_success_csv_file_path,
-                working_validation_filename)
+                publish_status = self.publish_to_cloud_validator(
+                    cloud_data,
+                    cloud_success_csv_file_path,
+                    working_validation_filename)
 
-            return publish_status
+                return publish_status
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import shutil
+
+"""
+
+    Serialized import file content, written row by row while file content is validated.
+
+    Importer rows (success history file) and cloud rows (cloud validator data) are written to spool files as JSON
+    arrays, data hash of cloud rows is updated with every row (same hash as generate_hash_for_json of cloud rows
+    list), so serialized content is not kept in memory during validation.
+
+"""
+
+JSON_ITEM_SEPARATOR = ', '
+
+
+class ImportDataSink(object):
+    """
+    Spool files of importer and cloud rows of one import file.
+    """
+
+    def __init__(self, directory, name):
+        """
+
+        :param directory: spool directory
+        :param name: import file name
+        """
+        self.importer_path = os.path.join(directory, '{}.importer.json'.format(name))
+        self.cloud_path = os.path.join(directory, '{}.cloud.json'.format(name))
+        self.importer_file = self.open_spool_file(self.importer_path)
+        self.cloud_file = self.open_spool_file(self.cloud_path)
+        self.cloud_hash = hashlib.sha256()
+        self.rows = 0
+        self.write_json('[')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.remove()
+
+    @staticmethod
+    def open_spool_file(file_path):
+        file_descriptor = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        return os.fdopen(file_descriptor, 'w', encoding='utf-8')
+
+    def write_json(self, importer_json, cloud_json=None):
+        cloud_json = importer_json if cloud_json is None else cloud_json
+        self.importer_file.write(importer_json)
+        self.cloud_file.write(cloud_json)
+        self.cloud_hash.update(cloud_json.encode('utf-8'))
+
+    def write(self, importer_row, cloud_row):
+        """
+
+        :param importer_row: serialized row for importer
+        :param cloud_row: serialized row for cloud validator
+        """
+        separator = JSON_ITEM_SEPARATOR if self.rows else ''
+        # cloud row is serialized same as generate_json (data hash of import file)
+        self.write_json(separator + json.dumps(importer_row), separator + json.dumps(cloud_row, sort_keys=True))
+        self.rows += 1
+
+    def close(self):
+        """
+        Finish JSON arrays of spool files.
+        """
+        if not self.cloud_file.closed:
+            self.write_json(']')
+            self.importer_file.close()
+            self.cloud_file.close()
+
+    @property
+    def data_hash(self):
+        return self.cloud_hash.hexdigest()
+
+    def save_importer_data(self, file_path):
+        """
+
+        :param file_path: success history file of importer rows
+        """
+        shutil.move(self.importer_path, file_path)
+
+    def load_cloud_data(self):
+        """
+
+        :return: cloud rows
+        """
+        with open(self.cloud_path, encoding='utf-8') as in_file:
+            return json.load(in_file)
+
+    def remove(self):
+        """
+        Remove spool files which are left.
+        """
+        self.close()
+        for file_path in (self.importer_path, self.cloud_path):
+            if os.path.isfile(file_path):
+                os.remove(file_path)
@@ -0,0 +1,179 @@
+import json
+import numbers
+import re
+
+from jsonschema import Draft4Validator, FormatChecker
+
+"""
+
+    Compiled json schema row validator for csv import.
+
+    Parser definitions from common/mixin/validation_const.py are compiled once per import type into
+    plain python check functions. Valid rows (almost all of them) are checked only with these functions,
+    json schema validator is used only for invalid rows, so error output stays the same as with
+    jsonschema.validate.
+
+"""
+
+# Draft 4 keywords which are not compiled, schema with any of them is validated with json schema validator
+DRAFT4_KEYWORDS = set(Draft4Validator.VALIDATORS)
+
+SCHEMA_TYPES = {
+    'array': list,
+    'boolean': bool,
+    'integer': int,
+    'null': type(None),
+    'number': numbers.Number,
+    'object': dict,
+    'string': str,
+}
+
+row_validators = {}
+
+
+def compile_type(types):
+    types = types if isinstance(types, list) else [types]
+    if any(t not in SCHEMA_TYPES for t in types):
+        return None
+    python_types = tuple(SCHEMA_TYPES[t] for t in types)
+    bool_allowed = 'boolean' in types
+
+    def check(instance):
+        if isinstance(instance, bool):
+            return bool_allowed
+        return isinstance(instance, python_types)
+    return check
+
+
+def compile_max_length(max_length):
+    return lambda instance: not isinstance(instance, str) or len(instance) <= max_length
+
+
+def compile_min_length(min_length):
+    return lambda instance: not isinstance(instance, str) or len(instance) >= min_length
+
+
+def compile_pattern(pattern):
+    search = re.compile(pattern).search
+    return lambda instance: not isinstance(instance, str) or search(instance) is not None
+
+
+def compile_enum(enums):
+    return lambda instance: instance in enums
+
+
+def compile_required(required):
+    def check(instance):
+        if not isinstance(instance, dict):
+            return True
+        return all(field in instance for field in required)
+    return check
+
+
+def compile_properties(properties):
+    property_checks = []
+    for field, field_schema in properties.items():
+        field_check = compile_schema(field_schema)
+        if field_check is None:
+            return None
+        property_checks.append((field, field_check))
+
+    def check(instance):
+        if not isinstance(instance, dict):
+            return True
+        for field, field_check in property_checks:
+            if field in instance and not field_check(instance[field]):
+                return False
+        return True
+    return check
+
+
+def compile_any_of(schemas):
+    schema_checks = [compile_schema(schema) for schema in schemas]
+    if any(schema_check is None for schema_check in schema_checks):
+        return None
+    return lambda instance: any(schema_check(instance) for schema_check in schema_checks)
+
+
+KEYWORD_COMPILERS = {
+    'type': compile_type,
+    'maxLength': compile_max_length,
+    'minLength': compile_min_length,
+    'pattern': compile_pattern,
+    'enum': compile_enum,
+    'required': compile_required,
+    'properties': compile_properties,
+    'anyOf': compile_any_of,
+}
+
+
+def compile_schema(schema):
+    """
+    Compile json schema into plain python check function.
+
+    :param schema: json schema (parser definition)
+    :return: function which return True if instance is valid, None if schema can't be compiled
+    """
+    if not isinstance(schema, dict) or '$ref' in schema:
+        return None
+
+    checks = []
+    for keyword, value in schema.items():
+        # keywords unknown to json schema (custom_message, all_fields ...) are ignored as in json schema validator
+        if keyword not in DRAFT4_KEYWORDS:
+            continue
+        compiler = KEYWORD_COMPILERS.get(keyword)
+        check = compiler(value) if compiler else None
+        if check is None:
+            return None
+        checks.append(check)
+
+    return lambda instance: all(check(instance) for check in checks)
+
+
+def schema_key(parser):
+    """
+    :return: key of json schema part of parser definition, parsers differ between requests (planogram prices)
+    """
+    return json.dumps(
+        {keyword: value for keyword, value in parser.items() if keyword in DRAFT4_KEYWORDS},
+        sort_keys=True, default=str
+    )
+
+
+class RowValidator(object):
+    """
+    Json schema validator of one import type, compiled once and used for all rows.
+    """
+
+    def __init__(self, parser):
+        Draft4Validator.check_schema(parser)
+        self.parser = parser
+        self.key = schema_key(parser)
+        self.validator = Draft4Validator(parser, format_checker=FormatChecker())
+        self.error_validator = Draft4Validator(parser)
+        self.check_row = compile_schema(parser) or self.validator.is_valid
+
+    def first_error(self, row):
+        """
+
+        :param row: import row
+        :return: None if row is valid, else first json schema error (same error jsonschema.validate raises)
+        """
+        if self.check_row(row):
+            return None
+        return next(self.validator.iter_errors(row), None)
+
+
+def get_row_validator(import_type, parser):
+    """
+
+    :param import_type: import type name
+    :param parser: json schema validation type
+    :return: cached compiled row validator for import type
+    """
+    row_validator = row_validators.get(import_type)
+    if row_validator is None or row_validator.key != schema_key(parser):
+        row_validator = RowValidator(parser)
+        row_validators[import_type] = row_validator
+    return row_validator
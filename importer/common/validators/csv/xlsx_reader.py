@@ -0,0 +1,60 @@
+import datetime
+
+from openpyxl import load_workbook
+
+"""
+
+    Streaming xlsx reader for csv import.
+
+    First sheet of workbook is read in read-only mode, row by row, and every cell is converted to string
+    (same values as in csv converted with pandas), so xlsx file goes to csv validation pipeline without
+    writing intermediate csv file.
+
+"""
+
+XLSX_EXTENSION = '.xlsx'
+
+
+def xlsx_cell_to_str(value):
+    """
+
+    :param value: xlsx cell value
+    :return: cell value as in csv file
+    """
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time(0):
+            return value.date().isoformat()
+        return str(value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx_rows(file_path):
+    """
+    Generator of first sheet rows, workbook is not loaded in memory.
+
+    :param file_path: path to the xlsx file
+    :return: generator of rows (list of strings)
+    """
+    work_book = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for row in work_book.worksheets[0].iter_rows():
+            yield [xlsx_cell_to_str(cell.value) for cell in row]
+    finally:
+        work_book.close()
+
+
+def check_xlsx_file(file_path):
+    """
+
+    :param file_path: path to the xlsx file
+    :return: True if file can be read as xlsx file, else raise exception
+    """
+    work_book = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return bool(work_book.worksheets)
+    finally:
+        work_book.close()
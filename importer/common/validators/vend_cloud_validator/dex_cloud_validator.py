@@ -169,20 +169,6 @@ class DEXCloudValidator(object):
                                                 elastic_hash=self.elastic_hash)
 
                                             total_vends = 0
-                                            old_eva_pa_fields = old_pid['data']['data']['eva_content']["pa_field"]
-                                            new_eva_pa_fields = new_eva["pa_field"]
-                                            new_eva_id_fields = new_eva["id_field"]
-                                            new_eva_decimal_points = [x for x in new_eva_id_fields if x.startswith('ID4*')]
-                                            pa7_handler = False
-                                            pa1pa2 = False
-
-                                            for pa_fields in new_eva_pa_fields:
-                                                if pa_fields.startswith('PA7'):
-                                                    pa7_handler = True
-                                                elif pa_fields.startswith('PA1') or pa_fields.startswith('PA1') and \
-                                                        not pa_fields.startswith('PA7'):
-                                                    pa1pa2 = True
-
                                             eva_handler = EvaHandler(
                                                 company_id=self.company_id,
                                                 import_type=self.import_type,
@@ -193,52 +179,16 @@ class DEXCloudValidator(object):
                                                 cpi_payment_type=cpi_payment_type
                                             )
 
-                                            # Two types of calculating EVA vend: a) PA1 and PA2 EVA fields,
-                                            # b) PA7 EVA fields
-                                            if pa7_handler:
-                                                pa7_result = eva_handler.eva_pa7_fields_handler(
-                                                    old_eva_pa_fields, new_eva_pa_fields, eva_file, machine_id,
-                                                    machine_external_id, new_eva_decimal_points, file_timestamp)
-                                                if len(pa7_result['vends_array']):
-                                                    for vends_data_pa7 in pa7_result['vends_array']:
-                                                        vends_array.append(vends_data_pa7)
-                                                total_vends = pa7_result['total_vends'] + total_vends
-                                                wrong_counter_file = pa7_result['wrong_counter_file'] + wrong_counter_file
-                                                fail_processing_eva_file = pa7_result['fail_processing_eva_file'] + fail_processing_eva_file
-                                                file_with_wrong_counter_details = pa7_result['file_with_wrong_counter_details'] + file_with_wrong_counter_details
-
-                                            elif pa1pa2:
-                                                pa1_pa2_old = []
-                                                pa1_pa2_new = []
-                                                for old_eva_pa in old_eva_pa_fields:
-                                                    if old_eva_pa.startswith('PA1') or old_eva_pa.startswith('PA2'):
-                                                        pa1_pa2_old.append(old_eva_pa)
-
-                                                for new_eva_pa in new_eva_pa_fields:
-                                                    if new_eva_pa.startswith('PA1') or new_eva_pa.startswith('PA2'):
-                                                        pa1_pa2_new.append(new_eva_pa)
-
-                                                eva_position = eva_handler.eva_pa_fields_handler(
-                                                    pa_fields=pa1_pa2_old, eva_type='old_eva_pa'
-                                                ) + eva_handler.eva_pa_fields_handler(
-                                                    pa_fields=pa1_pa2_new, eva_type='new_eva_pa')
-
-                                                new_pa_fields, old_pa_fields = eva_handler.group_eva_pa_fields(
-                                                    eva_position)
-
-                                                pa1_pa2_result = eva_handler.eva_pa_vend_calculation(
-                                                    new_pa_fields=new_pa_fields, old_pa_fields=old_pa_fields,
-                                                    eva_file=eva_file, new_eva_decimal_points=new_eva_decimal_points,
-                                                    file_timestamp=file_timestamp, machine_id=machine_id,
-                                                    machine_external_id=machine_external_id)
-
-                                                if len(pa1_pa2_result['vends_array']):
-                                                    for vends_data_pa1_pa2 in pa1_pa2_result['vends_array']:
-                                                        vends_array.append(vends_data_pa1_pa2)
-                                                total_vends = pa1_pa2_result['total_vends'] + total_vends
-                                                wrong_counter_file = pa1_pa2_result['wrong_counter_file'] + wrong_counter_file
-                                                fail_processing_eva_file = pa1_pa2_result['fail_processing_eva_file'] + fail_processing_eva_file
-                                                file_with_wrong_counter_details = pa1_pa2_result['file_with_wrong_counter_details'] + file_with_wrong_counter_details
+                                            vend_result = eva_handler.calculate_vends(
+                                                old_pid['data']['data']['eva_content'], new_eva, eva_file, machine_id,
+                                                machine_external_id, file_timestamp, old_pid['file_timestamp'])
+                                            if vend_result:
+                                                vends_array.extend(vend_result['vends_array'])
+                                                total_vends = vend_result['total_vends'] + total_vends
+                                                wrong_counter_file = vend_result['wrong_counter_file'] + wrong_counter_file
+                                                fail_processing_eva_file = vend_result['fail_processing_eva_file'] + fail_processing_eva_file
+                                                file_with_wrong_counter_details = (
+                                                    vend_result['file_with_wrong_counter_details'] + file_with_wrong_counter_details)
 
                                             if total_vends > 0 and zip_filename not in wrong_counter_file:
                                                 total_vends_per_machine_id.setdefault('vends', [])
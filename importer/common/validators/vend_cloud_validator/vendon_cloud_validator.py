@@ -15,6 +15,9 @@ class VendonCloudValidator(object):
         - check if transaction is unique
     All vends that pass checks are passed on for cloud insertion
 
+    Vends of one job can come in many batches (batch_no, is_last), job is failed only by its only batch, last batch
+    of many batches is always passed on for cloud insertion (with is_last), so job is finished once.
+
     """
 
     def __init__(self, data):
@@ -28,6 +31,9 @@ class VendonCloudValidator(object):
         self.import_type = self.data.get('import_type')
         self.language = self.data.get('language')
         self.skipped_vends = self.data.get('skipped_vends')
+        # Messages without batch info are whole job
+        self.batch_no = self.data.get('batch_no', 1)
+        self.is_last = self.data.get('is_last', True)
         self.import_file_path = ""
         self.general_process_logger = MainVendProcessLogger(
             company_id=self.company_id, import_type=self.import_type, process_request_type=self.request_type,
@@ -51,7 +57,7 @@ class VendonCloudValidator(object):
                 key_enum=EnumValidationMessage.VENDON_CLOUD_SKIPPED.value,
                 elastic_hash=self.elastic_hash
             )
-            self._fail_job(EnumValidationMessage.VENDON_CLOUD_ALL_SKIPPED, "")
+            self._finish_skipped_batch()
             return
 
         transformation_errors_skippable = []
@@ -83,7 +89,7 @@ class VendonCloudValidator(object):
             )
 
         if len(valid_vends) == 0:
-            self._fail_job(EnumValidationMessage.VENDON_CLOUD_ALL_SKIPPED, "")
+            self._finish_skipped_batch()
             return
 
         is_partial = len(self.main_content) > len(valid_vends)
@@ -92,6 +98,18 @@ class VendonCloudValidator(object):
         vend_logger.info("Published to cloud queue {}".format(self.elastic_hash))
         return
 
+    def _finish_skipped_batch(self):
+        """
+        All vends of batch are skipped: job with one batch fails, last batch of many batches is passed on without
+        vends to finish job, other batches are dropped.
+        """
+        if self.batch_no == 1 and self.is_last:
+            self._fail_job(EnumValidationMessage.VENDON_CLOUD_ALL_SKIPPED, "")
+        elif self.is_last:
+            self._publish_to_cloud([], True)
+        else:
+            vend_logger.info("All vends of batch {} skipped for {}".format(self.batch_no, self.elastic_hash))
+
     def _publish_to_cloud(self, vends, is_partial):
 
         publish_vend_message = {
@@ -103,7 +121,9 @@ class VendonCloudValidator(object):
             'import_type': self.import_type,
             'elastic_hash': self.elastic_hash,
             'type_of_process': self.request_type,
-            'skipped_vends': self.skipped_vends
+            'skipped_vends': self.skipped_vends,
+            'batch_no': self.batch_no,
+            'is_last': self.is_last
         }
 
         self.general_process_logger.update_general_process_flow(
@@ -0,0 +1,48 @@
+from database.company_database.connection.connection import create_importer_tables
+from elasticsearch_component.models.models import create_company_process_index
+
+"""
+
+    Explicit startup of importer services.
+
+    Import of importer modules doesn't create tables, elastic indices, RabbitMQ queues or reflect cloud tables.
+    Service entry points (flask app, consumers, schedulers) call bootstrap() once before they start, cloud tables are
+    reflected (or loaded from schema snapshot) on first use of cloud models.
+
+"""
+
+
+def declare_publisher_queues():
+    """
+    Declare queues of importer publishers (with their exchanges and bindings), publishing to a non-existing exchange
+    is forbidden.
+    """
+    from common.apis.vendon.vendon_api_handler import vend_queue
+    from common.rabbit_mq.connection.connection import conn
+    from common.rabbit_mq.database_interaction_q.db_publisher import queue as database_queue
+    from common.rabbit_mq.database_interaction_q.vend_db_publisher import vend_database_queue
+    from common.rabbit_mq.export_publisher.export_publisher import queue as export_queue
+    from common.rabbit_mq.validator_api_q.pubisher import queue as validation_file_api_queue
+    from common.rabbit_mq.validator_file_q.validator_publisher import queue as validation_queue
+    from common.rabbit_mq.validator_file_q.vend_processing_publisher import cpi_vend_queue, dex_vend_queue
+    from common.rabbit_mq.vend_downloader_q.vend_file_download_publisher import file_vend_download_queue
+
+    for queue in (vend_queue, database_queue, vend_database_queue, export_queue, validation_file_api_queue,
+                  validation_queue, cpi_vend_queue, dex_vend_queue, file_vend_download_queue):
+        queue.maybe_bind(conn)
+        queue.declare()
+
+
+def bootstrap(importer_tables=True, elastic_indices=True, rabbit_queues=True):
+    """
+
+    :param importer_tables: create missing importer database tables
+    :param elastic_indices: create company process index if it doesn't exist
+    :param rabbit_queues: declare queues of importer publishers
+    """
+    if importer_tables:
+        create_importer_tables()
+    if elastic_indices:
+        create_company_process_index()
+    if rabbit_queues:
+        declare_publisher_queues()
@@ -2,7 +2,6 @@ import json
 import os
 
 from operator import itemgetter
-import jsonschema
 
 from common.mixin.elastic_login import ElasticCloudLoginFunctions
 from common.mixin.handle_file import ImportProcessHandler
@@ -15,14 +14,13 @@ from database.company_database.core.query_company import GetCompanyFromDatabase
 from database.company_database.core.query_export import ExportHistory
 from database.company_database.core.query_history import CloudRequestHistory, CompanyHistory, CloudVendRequestHistory
 from elasticsearch_component.core.query_vends import VendImportProcessLogger
-from jsonschema import validate
 from flask import request
 from werkzeug.utils import secure_filename
 from common.logging.setup import save_flask_files, vend_logger
 
 from common.mixin.mixin import (server_response, validate_file_extensions,
                                 function_check_elastic_status, generate_elastic_process,
-                                return_errors_from_json_schema, HandleValidationOfAPI)
+                                return_errors_from_json_schema, HandleValidationOfAPI, unique_dict_list)
 
 from core.flask.sessions.session import AuthorizeUser
 
@@ -37,6 +35,7 @@ from common.mixin.validation_const import (ImportType,
 from common.mixin.enum_errors import (elastic_not_allowed_status, EnumProcessType, EnumErrorType,
                                       EnumValidationMessage, EnumAPIType)
 from common.rabbit_mq.validator_file_q.validator_publisher import publish_file_validation
+from common.validators.csv.row_validator import get_row_validator
 
 from . import app, limiter
 from common.mixin.enum_errors import EnumValidationMessage as Const
@@ -223,14 +222,15 @@ def api_rest_import(import_type, company_id):
     output_response = []
     count = 0
     language = validate_token['response']['language']
+    row_validator = get_row_validator(import_type.upper(), get_default_parser)
 
     for row in body:
         count += 1
-        try:
-            validate(row, get_default_parser)
-        except jsonschema.exceptions.ValidationError as e:
+        validation_error = row_validator.first_error(row)
+        if validation_error:
             output_error = return_errors_from_json_schema(
-                row, e, get_default_parser, language, count
+                row, validation_error, get_default_parser, language, count,
+                validator=row_validator.error_validator
             )
             for list_item in output_error:
                 output_response.append(list_item)
@@ -238,10 +238,7 @@ def api_rest_import(import_type, company_id):
     # If errors return response to API
     if len(output_response) > 0:
         unique_len = sorted(output_response, key=itemgetter('record'))
-        new_d = []
-        for x in unique_len:
-            if x not in new_d:
-                new_d.append(x)
+        new_d = unique_dict_list(unique_len)
         if len(new_d):
             return server_response(
                 new_d, 403, 'Please fix your data.', False
@@ -1,5 +1,6 @@
 from flask import request
-from common.mixin.mixin import server_response, validate_date_format_flask
+from common.mixin.mixin import server_response, server_page_response, validate_date_format_flask
+from common.mixin.pagination import get_page_request
 from core.flask.decorators.decorators import check_token
 from database.company_database.core.query_company import GetCompanyFromDatabase
 from elasticsearch_component.core.query_vends import GetVendImportProcessLog
@@ -20,13 +21,18 @@ def get_vend_import_logs_by_company(company_id):
     if not cmp['success']:
         return server_response([], 404, 'Company does not exist.', False)
 
-    logs = GetVendImportProcessLog.get_process_by_company_id(company_id)
+    try:
+        logs = GetVendImportProcessLog.get_process_by_company_id(company_id, get_page_request(request.args))
+    except ValueError as e:
+        return server_response([], 400, str(e), False)
     if not logs['status']:
         return server_response(
             [], 404, logs['message'], logs['status']
         )
 
-    return server_response(logs['results'], 200, 'All vend import data for company : %s' % company_id, True)
+    return server_page_response(
+        logs['results'], logs['next_cursor'], 200, 'All vend import data for company : %s' % company_id, True
+    )
 
 @check_token()
 @app.route('/vend_import/log/type/<company_id>/<type>', methods=['GET'])
@@ -1,17 +1,16 @@
-import json
 import time
 
 from common.mixin.enum_errors import return_enum_error
 from common.rabbit_mq.export_publisher.export_publisher import PublishExportQ
-from core.flask.redis_store.redis_managment import RedisManagement
+from core.flask.redis_store.history_cache import HistoryCache
 from core.flask.sessions.session import AuthorizeUser
 from database.company_database.core.query_export import ExportHistoryQuery
 from database.company_database.core.query_history import (
     CompanyFailHistory, CompanyHistory,
-    CloudRequestHistory,
-    CloudVendRequestHistory)
+    CloudRequestHistory)
 from flask import request, send_file
-from common.mixin.mixin import server_response, validate_date_format_flask, custom_hash, custom_hash_vends
+from common.mixin.mixin import server_response, server_page_response, validate_date_format_flask, custom_hash
+from common.mixin.pagination import get_page_request, is_page_requested
 from common.mixin.validation_const import (return_import_type_status_and_import,
                                            return_import_type_id, return_active_type,
                                            return_file_example)
@@ -78,13 +77,19 @@ def api_get_all_logs_all(company_id):
     if not cmp['success']:
         return server_response([], 404, 'Company not exists.', False)
 
-    logs = GetCompanyProcessLog.get_all_logs_based_on_company_id(company_id)
+    try:
+        page = get_page_request(request.args)
+        logs = GetCompanyProcessLog.get_all_logs_based_on_company_id(company_id, page)
+    except ValueError as e:
+        return server_response([], 400, str(e), False)
     if not logs['status']:
         return server_response(
             [], 404, logs['message'], logs['status']
         )
 
-    return server_response(logs['results'], 200, 'All data for company : %s' % company_id, True)
+    return server_page_response(
+        logs['results'], logs['next_cursor'], 200, 'All data for company : %s' % company_id, True
+    )
 
 
 @app.route('/import/log/query/<company_id>', methods=['GET', ])
@@ -182,6 +187,21 @@ def api_history_fail_log(company_id):
 
     # Lets make some API request's
 
+    if is_page_requested(request.args):
+        try:
+            company_fail_history = CompanyFailHistory.get_fail_history_page(
+                company_id, get_page_request(request.args),
+                import_type=return_import_type_id(type_import) if type_import else None,
+                from_datetime=date_from
+            )
+        except ValueError as e:
+            return server_response([], 400, str(e), False)
+
+        return server_page_response(
+            company_fail_history['results'], company_fail_history['next_cursor'], 200,
+            'All data for company : %s' % company_id, True
+        )
+
     if not date_from and not type_import:
         # Get all fail history only with company ID
         company_fail_history = CompanyFailHistory.get_fail_history_by_company(company_id)
@@ -229,6 +249,16 @@ def company_dashboard_history_all(company_id):
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
     type_import = request.args.get('type')
+    # Elastic process flow of every history row only if requested
+    include_process = request.args.get('include_process') in ('1', 'true', 'True')
+
+    # Page of masterdata and vend history, all history if limit or cursor is not set
+    page = None
+    if is_page_requested(request.args):
+        try:
+            page = get_page_request(request.args)
+        except ValueError as e:
+            return server_response([], 400, str(e), False)
 
     # Date from
     if date_from or date_to:
@@ -250,41 +280,33 @@ def company_dashboard_history_all(company_id):
 
     if not type_import:
 
-        redis_key_masterdata = custom_hash(company_id+str(date_from)+str(date_to))
-        redis_key_vends = custom_hash_vends(company_id+str(date_from)+str(date_to))
-        # Check redis for key
-        query_data_masterdata = RedisManagement.get_data_from_redis(redis_key_masterdata)
-        query_data_vends = RedisManagement.get_data_from_redis(redis_key_vends)
-
-        if not query_data_masterdata:
-            # Get all fail history only with company ID
-            company_process_history = CloudRequestHistory.retrieve_all_history_fail_and_success(company_id, date_from=date_from, date_to=date_to)
-
-            if not company_process_history['status']:
-                return server_response([], 404, company_process_history['message'], False)
+        redis_key_history = CloudRequestHistory.history_cache_key(
+            company_id, date_from, date_to, page, include_process)
 
-            # Redis data
-            query_data_masterdata = RedisManagement.get_data_from_redis(redis_key_masterdata)
-
-        if not query_data_vends:
-            # Get all fail history only with company ID
-            vend_process_history = CloudVendRequestHistory.retrieve_all_vends_history_fail_and_success(company_id, date_from=date_from, date_to=date_to)
-
-            if not vend_process_history['status']:
-                return server_response([], 404, vend_process_history['message'], False)
+        # Cached history, computed by one request if cache is empty, refreshed in background if it's stale
+        try:
+            history = HistoryCache.get_or_compute(
+                company_id, redis_key_history,
+                lambda: {key: value for key, value in CloudRequestHistory.retrieve_all_history_fail_and_success(
+                    company_id, date_from=date_from, date_to=date_to, page=page, include_process=include_process
+                ).items() if key in ('results', 'next_cursor')}
+            )
+        except ValueError as e:
+            return server_response([], 400, str(e), False)
 
-            # Redis data
-            query_data_vends = RedisManagement.get_data_from_redis(redis_key_vends)
+        if page is None:
+            return server_response(
+                history['results'], 200, 'All data for company : %s' % company_id, True
+            )
+        return server_page_response(
+            history['results'], history['next_cursor'], 200, 'All data for company : %s' % company_id, True
+        )
 
-        query_data_all = []
 
-        if query_data_masterdata:
-            query_data_all.extend(json.loads(query_data_masterdata))
-        if query_data_vends:
-            query_data_all.extend(json.loads(query_data_vends))
-        return server_response(
-            query_data_all, 200, 'All data for company : %s' % company_id, True
-        )
+@app.route('/import/history/cache/stats', methods=['GET', ])
+@check_token()
+def history_cache_stats():
+    return server_response(HistoryCache.stats(), 200, 'History cache hits and misses.', True)
 
 
 @app.route('/import/history/dashboard/<company_id>', methods=['GET', ])
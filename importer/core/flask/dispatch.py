@@ -6,6 +6,9 @@ import core.flask.cloud_history
 import core.flask.cloud
 import core.flask.vend_history
 import core.flask.integration
+from core.bootstrap import bootstrap
+
+bootstrap()
 
 app = DispatcherMiddleware(
     NotFound(),
@@ -0,0 +1,176 @@
+import json
+import random
+import threading
+import time
+
+from common.logging.setup import logger
+from common.redis_setup.connection.connection import conn
+from common.urls.urls import history_cache_config
+
+"""
+
+    Redis cache of company history (dashboard) queries.
+
+    Every cached value has fresh TTL (with random jitter, so keys of many companies don't expire at same time) and
+    stale window after it. Fresh value is returned from cache, stale value is returned immediately and recomputed in
+    background, missing value is computed by one request only (single-flight behind company lock key), other
+    requests wait for it and read it from cache. History insert/update invalidates all cached values of company
+    (company cache version is increased), invalidated values are never returned.
+
+    Configuration (envdir REDIS_URI "history_cache"):
+    {"ttl": 20, "ttl_jitter": 5, "stale_ttl": 120, "lock_timeout": 120, "wait_timeout": 60}
+
+"""
+
+logger_api = logger
+
+DEFAULT_CACHE_CONFIG = {
+    'ttl': 20,
+    'ttl_jitter': 5,
+    'stale_ttl': 120,
+    'lock_timeout': 120,
+    'wait_timeout': 60,
+}
+
+HIT = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+
+
+class HistoryCache(object):
+    config = dict(DEFAULT_CACHE_CONFIG, **history_cache_config)
+    client = conn
+
+    @staticmethod
+    def value_key(company_id, key):
+        return 'history_cache:{}:{}'.format(company_id, key)
+
+    @staticmethod
+    def version_key(company_id):
+        return 'history_cache_version:{}'.format(company_id)
+
+    @staticmethod
+    def lock_key(company_id, key):
+        return 'history_cache_lock:{}:{}'.format(company_id, key)
+
+    @staticmethod
+    def stats_key(event):
+        return 'history_cache_stats:{}'.format(event)
+
+    @classmethod
+    def company_version(cls, company_id):
+        return int(cls.client.get(cls.version_key(company_id)) or 0)
+
+    @classmethod
+    def read(cls, company_id, key):
+        """
+
+        :return: (cached value, state HIT/STALE/MISS)
+        """
+        entry = cls.client.get(cls.value_key(company_id, key))
+        if entry is None:
+            return None, MISS
+
+        entry = json.loads(entry)
+        if entry['version'] != cls.company_version(company_id):
+            return None, MISS
+        if entry['fresh_until'] > time.time():
+            return entry['data'], HIT
+        return entry['data'], STALE
+
+    @classmethod
+    def write(cls, company_id, key, data, version):
+        ttl = cls.config['ttl'] + random.uniform(0, cls.config['ttl_jitter'])
+        entry = {
+            'data': data,
+            'version': version,
+            'fresh_until': time.time() + ttl,
+        }
+        cls.client.set(cls.value_key(company_id, key), json.dumps(entry), int(ttl + cls.config['stale_ttl']) + 1)
+
+    @classmethod
+    def compute(cls, company_id, key, function):
+        # Version before computation, value is invalid if history is changed while it's computed
+        version = cls.company_version(company_id)
+        data = function()
+        cls.write(company_id, key, data, version)
+        return data
+
+    @classmethod
+    def refresh(cls, company_id, key, function):
+        """
+        Recompute stale value if nobody else is recomputing it.
+        """
+        lock = cls.client.lock(cls.lock_key(company_id, key), timeout=cls.config['lock_timeout'])
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            cls.compute(company_id, key, function)
+        except Exception as e:
+            logger_api.error('History cache refresh error: {}'.format(e))
+        finally:
+            cls.release(lock)
+
+    @staticmethod
+    def release(lock):
+        try:
+            lock.release()
+        except Exception as e:
+            # Lock expired (computation took longer than lock timeout)
+            logger_api.error('History cache lock release error: {}'.format(e))
+
+    @classmethod
+    def get_or_compute(cls, company_id, key, function):
+        """
+
+        :param company_id: company of cached history
+        :param key: cache key of query (query parameters hash)
+        :param function: function without arguments which computes value (json serializable)
+        :return: cached or computed value
+        """
+        data, state = cls.read(company_id, key)
+        cls.count(state)
+
+        if state == HIT:
+            return data
+        if state == STALE:
+            threading.Thread(target=cls.refresh, args=(company_id, key, function), daemon=True).start()
+            return data
+
+        lock = cls.client.lock(cls.lock_key(company_id, key), timeout=cls.config['lock_timeout'])
+        if not lock.acquire(blocking=True, blocking_timeout=cls.config['wait_timeout']):
+            # Computation of other request takes too long, compute without lock
+            return cls.compute(company_id, key, function)
+        try:
+            # Other request could compute value while this one waited for lock
+            data, state = cls.read(company_id, key)
+            if state == HIT:
+                return data
+            return cls.compute(company_id, key, function)
+        finally:
+            cls.release(lock)
+
+    @classmethod
+    def invalidate_company(cls, company_id):
+        """
+        Invalidate all cached history of company, called when company history is inserted or updated.
+        """
+        try:
+            cls.client.incr(cls.version_key(company_id))
+        except Exception as e:
+            logger_api.error('History cache invalidation error for company {}: {}'.format(company_id, e))
+
+    @classmethod
+    def count(cls, state):
+        try:
+            cls.client.incr(cls.stats_key(state))
+        except Exception as e:
+            logger_api.error('History cache stats error: {}'.format(e))
+
+    @classmethod
+    def stats(cls):
+        """
+
+        :return: number of cache hits, stale hits and misses
+        """
+        return {state: int(cls.client.get(cls.stats_key(state)) or 0) for state in (HIT, STALE, MISS)}
@@ -48,6 +48,36 @@ class RedisManagement(object):
     def redis_key_exist_check(cls, key):
         return conn.exists(key)
 
+    @classmethod
+    def push_to_redis_list(cls, key, data):
+        conn.rpush(key, json.dumps(data))
+
+    @classmethod
+    def pop_from_redis_list(cls, key):
+        data = conn.lpop(key)
+        return json.loads(data) if data is not None else None
+
+    @classmethod
+    def peek_redis_list(cls, key):
+        data = conn.lindex(key, 0)
+        return json.loads(data) if data is not None else None
+
+    @classmethod
+    def delete_redis_key(cls, key):
+        conn.delete(key)
+
+    @classmethod
+    def redis_list_length(cls, key):
+        return conn.llen(key)
+
+    @classmethod
+    def redis_lock(cls, key, timeout=60):
+        return conn.lock(key, timeout=timeout)
+
+    @classmethod
+    def scan_redis_keys(cls, pattern):
+        return conn.scan_iter(match=pattern)
+
     @classmethod
     def set_or_get_redis_data(cls, key, data):
         status = cls.compare_data(key, data)
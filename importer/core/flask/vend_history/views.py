@@ -1,6 +1,7 @@
 from flask import request
 
-from common.mixin.mixin import server_response
+from common.mixin.mixin import server_response, server_page_response
+from common.mixin.pagination import get_page_request
 from core.flask.decorators.decorators import check_token
 from core.flask.sessions.session import AuthorizeUser
 from database.company_database.core.query_company import GetCompanyFromDatabase
@@ -46,13 +47,16 @@ def vend_import_history_by_company_all():
     if not cmp['success']:
         return server_response([], 404, 'Company does not exist.', False)
 
-    elastic_query = CloudVendImportQuery.get_process_company_id(company_id)
+    try:
+        elastic_query = CloudVendImportQuery.get_process_company_id(company_id, get_page_request(request.args))
+    except ValueError as e:
+        return server_response([], 400, str(e), False)
 
     if not elastic_query['status']:
         return server_response([], 404, elastic_query['message'], elastic_query['status'])
 
-    return server_response(
-        elastic_query['results'], 200, 'Data found',
+    return server_page_response(
+        elastic_query['results'], elastic_query['next_cursor'], 200, 'Data found',
         elastic_query['status']
     )
 
@@ -1,12 +1,118 @@
-from sqlalchemy import exc
+import threading
+
+from sqlalchemy import exc, text
 
 from database.company_database.connection.connection import engine as local_engine
 from database.cloud_database.connection.connection import cloud_database_engine
 from contextlib import contextmanager
 from common.logging.setup import logger
 
+# Cloud connection of unit of work in current thread
+cloud_unit_of_work_scope = threading.local()
+
+
+def begin_read_only_snapshot(connection, snapshot_id=None):
+    """
+    Start transaction in which all queries see same snapshot of cloud database.
+
+    :param snapshot_id: snapshot exported by other unit of work (export_unit_of_work_snapshot), new snapshot if None
+    """
+    transaction = connection.begin()
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY'))
+        if snapshot_id is not None:
+            connection.execute(text('SET TRANSACTION SNAPSHOT :snapshot_id'), snapshot_id=snapshot_id)
+    return transaction
+
+
+@contextmanager
+def cloud_unit_of_work(read_only=True, snapshot_id=None):
+    """
+    One cloud connection for all cloud queries of validation or import job in current thread, get_cloud_connection_safe
+    reuses it instead of checking out new connection for every query. Read only unit of work runs in one read only
+    snapshot transaction. Nested unit of work uses connection of outer one.
+
+    :param read_only: run queries in read only snapshot transaction
+    :param snapshot_id: read only transaction uses snapshot exported by unit of work in other thread
+    """
+    if getattr(cloud_unit_of_work_scope, 'connection', None) is not None:
+        yield cloud_unit_of_work_scope.connection
+        return
+
+    connection = cloud_database_engine.connect()
+    try:
+        cloud_unit_of_work_scope.transaction = begin_read_only_snapshot(
+            connection, snapshot_id) if read_only else None
+        cloud_unit_of_work_scope.read_only = read_only
+        cloud_unit_of_work_scope.snapshot_id = snapshot_id
+        cloud_unit_of_work_scope.connection = connection
+        yield connection
+    finally:
+        cloud_unit_of_work_scope.connection = None
+        transaction = cloud_unit_of_work_scope.transaction
+        cloud_unit_of_work_scope.transaction = None
+        try:
+            if transaction is not None and transaction.is_active:
+                transaction.rollback()
+        finally:
+            connection.close()
+
+
+def restart_unit_of_work_transaction():
+    """
+    Failed query aborts transaction, next queries of unit of work run in new snapshot transaction.
+    """
+    transaction = cloud_unit_of_work_scope.transaction
+    if transaction is None:
+        return
+    try:
+        transaction.rollback()
+        cloud_unit_of_work_scope.transaction = begin_read_only_snapshot(
+            cloud_unit_of_work_scope.connection, cloud_unit_of_work_scope.snapshot_id)
+    except exc.SQLAlchemyError as e:
+        cloud_unit_of_work_scope.transaction = None
+        logger.error("Cloud unit of work transaction restart exception -> {}".format(str(e)))
+
+
+def export_unit_of_work_snapshot():
+    """
+    Export snapshot of read only unit of work in current thread, queries in other threads import it
+    (cloud_unit_of_work snapshot_id) and see same data on their own connections. Exported snapshot is valid until
+    transaction of unit of work ends.
+
+    :return: snapshot id, None if there is no read only unit of work on postgresql in current thread
+    """
+    transaction = getattr(cloud_unit_of_work_scope, 'transaction', None)
+    if transaction is None or not transaction.is_active:
+        return None
+    connection = cloud_unit_of_work_scope.connection
+    if connection.dialect.name != 'postgresql':
+        return None
+    try:
+        return connection.execute(text('SELECT pg_export_snapshot()')).scalar()
+    except exc.SQLAlchemyError as e:
+        logger.error("Cloud unit of work snapshot export exception -> {}".format(str(e)))
+        restart_unit_of_work_transaction()
+        return None
+
+
 @contextmanager
-def get_cloud_connection_safe(*args, **kwds):
+def get_cloud_connection_safe(*args, read_only=True, **kwds):
+    """
+
+    :param read_only: queries don't write, connection of read only unit of work can be used
+    :return: connection of unit of work in current thread, or new connection which is closed at the end
+    """
+    scope_connection = getattr(cloud_unit_of_work_scope, 'connection', None)
+    if scope_connection is not None and (read_only or not cloud_unit_of_work_scope.read_only):
+        try:
+            yield scope_connection
+        except exc.SQLAlchemyError as e:
+            print(e)
+            logger.error("Cloud connection context manager exception -> {}".format(str(e)))
+            restart_unit_of_work_transaction()
+        return
+
     session_cloud = None
     try:
         session_cloud = cloud_database_engine.connect()
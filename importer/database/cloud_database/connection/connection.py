@@ -1,5 +1,14 @@
-from sqlalchemy import create_engine, MetaData
-from common.urls.urls import cloud_database_connection
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import threading
+
+from sqlalchemy import create_engine, MetaData, text
+from common.logging.setup import logger
+from common.urls.urls import cloud_database_connection, cloud_schema_cache_config, cloud_pool_config
+from database.pool import engine_pool_options, watch_connection_leaks
 from sqlalchemy.ext.automap import generate_relationship, automap_base
 from sqlalchemy.orm import interfaces
 
@@ -8,8 +17,33 @@ from sqlalchemy.orm import interfaces
     This is main include to importer and by this setup importer works with CLOUD tables.
     Relationships generate, and reflect data included.
 
+    Cloud tables are reflected on first get_cloud_base() call (import of cloud models), not on import of this module.
+    Reflected schema is saved on disk as snapshot keyed by cloud migration revision (DATABASE_CONNECTION
+    "cloud_schema_cache"), so next process start loads snapshot with one revision query instead of reflecting
+    every table. If revision can't be read, tables are reflected without snapshot.
+
+    Snapshot is pickle, it's used only from "directory" configured for importer service, and only if directory and
+    snapshot are owned by importer user and not writable by group or others. Without directory tables are reflected.
+
 """
 
+DEFAULT_REVISION_QUERY = 'SELECT max(id) FROM django_migrations'
+
+CLOUD_TABLES = [
+    'custom_users', 'auth_user', 'vending_companies', 'machines', 'machine_locations', 'layout_columns', 'regions',
+    'machine_types', 'machine_columns', 'machineclusters', 'machineclusters_assigned_machines',
+    'machine_categories', 'products', 'product_templates', 'tax_rates', 'administration_vendingcompanyimporter',
+    'administration_importtype', 'administration_importerftpconfiguration',
+    'administration_importerftpconfigurationmasterdata', 'administration_warehouse', 'clients', 'client_types',
+    'user_role_template', 'machine_data', 'administration_machineoperation', 'tags', 'machines_tags',
+    'machine_locations_working_time', 'time_interval', 'custom_users_assigned_companies', 'product_categories',
+    'vends', 'administration_device', 'administration_device_machines', 'layout_components', 'recipes',
+    'combo_recipes', 'layout_columns_tags', 'meter_types', 'product_rotation_groups', 'packing_name',
+    'product_packing_size', 'product_rotation_assignments', 'machine_recipes', 'product_components',
+    'product_component_items',
+]
+
+
 def _gen_relationship(base, direction, return_fn,
                                 attrname, local_cls, referred_cls, **kw):
     if direction is interfaces.ONETOMANY:
@@ -18,40 +52,116 @@ def _gen_relationship(base, direction, return_fn,
     return generate_relationship(base, direction, return_fn,
                                  attrname, local_cls, referred_cls, **kw)
 
-metadata = MetaData()
 
 cloud_database_engine = create_engine(
-    '{}'.format(cloud_database_connection), convert_unicode=True, echo=False
+    '{}'.format(cloud_database_connection), convert_unicode=True, echo=False,
+    **engine_pool_options(cloud_pool_config)
 )
+cloud_connection_leaks = watch_connection_leaks(cloud_database_engine, 'Cloud', cloud_pool_config)
+
+_cloud_base = None
+_cloud_base_lock = threading.Lock()
+
+
+def reflect_cloud_metadata():
+    metadata = MetaData()
+    metadata.reflect(cloud_database_engine, only=CLOUD_TABLES)
+    return metadata
+
+
+def get_schema_revision():
+    query = cloud_schema_cache_config.get('revision_query', DEFAULT_REVISION_QUERY)
+    with cloud_database_engine.connect() as connection:
+        return connection.execute(text(query)).scalar()
+
+
+def get_schema_snapshot_path(directory, revision):
+    """
+    :param directory: snapshot directory owned by importer service
+    :param revision: cloud migration revision
+    :return: snapshot file path, unique for cloud database, revision and reflected tables
+    """
+    snapshot_key = hashlib.sha1('{}|{}|{}'.format(
+        cloud_database_connection, revision, ','.join(sorted(CLOUD_TABLES))).encode('utf-8')).hexdigest()
+    return os.path.join(directory, 'importer_cloud_schema_{}.pickle'.format(snapshot_key))
+
+
+def is_owned_by_service(path_stat):
+    """
+    :param path_stat: os.stat result of snapshot directory or file
+    :return: True if path is owned by current user and not writable by group or others
+    """
+    return path_stat.st_uid == os.getuid() and not path_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def read_schema_snapshot(snapshot_path):
+    # snapshot is checked on opened file, so it can't be replaced between check and load
+    fd = os.open(snapshot_path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+    with os.fdopen(fd, 'rb') as snapshot_file:
+        if not is_owned_by_service(os.fstat(fd)):
+            raise ValueError('snapshot is not owned by importer user or is writable by other users')
+        return pickle.load(snapshot_file)
+
+
+def save_schema_snapshot(metadata, snapshot_path):
+    # write to temporary file and rename, other processes never read half written snapshot
+    fd, temporary_path = tempfile.mkstemp(dir=os.path.dirname(snapshot_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as snapshot_file:
+            pickle.dump(metadata, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, snapshot_path)
+    except Exception:
+        os.remove(temporary_path)
+        raise
+
+
+def load_cloud_metadata():
+    """
+    :return: MetaData of cloud tables, from snapshot on disk if cloud schema revision is not changed
+    """
+    directory = cloud_schema_cache_config.get('directory')
+    if not cloud_schema_cache_config.get('enabled', True) or not directory:
+        return reflect_cloud_metadata()
+
+    try:
+        directory_owned = is_owned_by_service(os.stat(directory))
+    except OSError as e:
+        logger.warning('Cloud schema snapshot directory {} is not valid: {}'.format(directory, e))
+        return reflect_cloud_metadata()
+    if not directory_owned:
+        logger.warning('Cloud schema snapshot directory {} is not owned by importer user or is writable by other '
+                       'users, reflect cloud tables without snapshot'.format(directory))
+        return reflect_cloud_metadata()
+
+    try:
+        revision = get_schema_revision()
+    except Exception as e:
+        logger.warning('Cloud schema revision not found, reflect cloud tables without snapshot: {}'.format(e))
+        return reflect_cloud_metadata()
+
+    snapshot_path = get_schema_snapshot_path(directory, revision)
+    if os.path.lexists(snapshot_path):
+        try:
+            return read_schema_snapshot(snapshot_path)
+        except Exception as e:
+            logger.warning('Cloud schema snapshot {} is not valid: {}'.format(snapshot_path, e))
+
+    metadata = reflect_cloud_metadata()
+    try:
+        save_schema_snapshot(metadata, snapshot_path)
+    except Exception as e:
+        logger.warning('Cloud schema snapshot {} is not saved: {}'.format(snapshot_path, e))
+    return metadata
+
 
-metadata.reflect(cloud_database_engine,
-                 only=['custom_users', 'auth_user', 'vending_companies',
-                       'machines',
-                       'machine_locations',
-                       'layout_columns',
-                       'regions',
-                       'machine_types',
-                       'machine_columns',
-                       'machineclusters',
-                       'machineclusters_assigned_machines',
-                       'machine_categories',
-                       'products',
-                       'product_templates',
-                       'tax_rates',
-                       'administration_vendingcompanyimporter',
-                       'administration_importtype',
-                       'administration_importerftpconfiguration',
-                       'administration_importerftpconfigurationmasterdata',
-                       'administration_warehouse',
-                       'clients', 'client_types',
-                       'user_role_template', 'machine_data', 'administration_machineoperation',
-                       'tags', 'machines_tags', 'machine_locations_working_time', 'time_interval',
-                       'custom_users_assigned_companies', 'product_categories', 'vends', 'administration_device',
-                       'administration_device_machines', 'product_templates', 'layout_columns', 'layout_components',
-                       'recipes', 'combo_recipes', 'layout_columns_tags', 'meter_types', 'product_rotation_groups',
-                       'packing_name', "product_packing_size", "product_rotation_assignments", "machine_recipes",
-                       'product_components', 'product_component_items', 'layout_columns_tags'
-                       ]
-                 )
-Base = automap_base(metadata=metadata)
-Base.prepare(generate_relationship=_gen_relationship)
+def get_cloud_base():
+    """
+    :return: automap Base of cloud tables, tables are reflected (or loaded from snapshot) on first call
+    """
+    global _cloud_base
+    with _cloud_base_lock:
+        if _cloud_base is None:
+            base = automap_base(metadata=load_cloud_metadata())
+            base.prepare(generate_relationship=_gen_relationship)
+            _cloud_base = base
+    return _cloud_base
@@ -283,7 +283,7 @@ class CloudLocalDatabaseSync(object):
     @classmethod
     def update_main_importer_status_on_cloud(cls):
 
-        with get_cloud_connection_safe() as conn_cloud:
+        with get_cloud_connection_safe(read_only=False) as conn_cloud:
 
             for x in ImportType:
                 values_dict = {
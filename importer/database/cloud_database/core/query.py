@@ -269,7 +269,7 @@ class MachineQueryOnCloud(object):
 
     @classmethod
     def delete_machine_on_cloud(cls, company_id, external_id):
-        with get_cloud_connection_safe() as conn_cloud:
+        with get_cloud_connection_safe(read_only=False) as conn_cloud:
 
             machines_query = update(machine).where(
                 (machine.owner_id == company_id) &
@@ -525,6 +525,42 @@ class LocationQueryOnCloud(object):
 
         return None
 
+    @classmethod
+    def get_machine_cluster_ids(cls, company_id, mc_external_ids):
+        """
+        Batched version of machine_cluster_id, check all machine clusters from import file with one query.
+
+        :param company_id: company id
+        :param mc_external_ids: machine cluster external ids
+        :return: response with set of machine cluster external ids which exist on cloud
+        """
+        search_ids = list(set(mc_external_ids))
+        if not search_ids:
+            return make_response(True, set(), 'Found machine clusters: 0')
+
+        found_clusters = None
+        with get_cloud_connection_safe() as conn_cloud:
+
+            mc_query = select(
+                [
+                    machine_cluster.external_id.label('machine_cluster_id'),
+                ]
+            ).where(
+                and_(
+                    machine_cluster.external_id.in_(search_ids),
+                    machine_cluster.company_id == company_id
+                )
+            )
+
+            found_clusters = conn_cloud.execute(mc_query).fetchall()
+
+        if found_clusters is None:
+            return make_response(False, set(), 'Machine clusters not found')
+
+        data = set(mc.machine_cluster_id for mc in found_clusters)
+
+        return make_response(True, data, 'Found machine clusters: {}'.format(len(data)))
+
 
     @classmethod
     def export_locations(cls, company_id):
@@ -1560,7 +1596,7 @@ class PlanogramQueryOnCloud(object):
         return data
 
     @classmethod
-    def get_layout_column_tags(cls):
+    def get_layout_column_tags(cls, company_id):
         with get_cloud_connection_safe() as conn_cloud:
             client_query = select([
                 tags.caption.label('caption'),
@@ -1569,8 +1605,15 @@ class PlanogramQueryOnCloud(object):
                 layout_columns_tags.layoutcolumn_id.label('layoutcolumn_id'),
                 layout_columns_tags.id.label('layout_columns_tags_id'),
             ]).select_from(
-                outerjoin(layout_columns_tags, tags, layout_columns_tags.tags_id == tags.id)
-            ).where(tags.alive.is_(True))
+                join(
+                    join(
+                        outerjoin(layout_columns_tags, tags, layout_columns_tags.tags_id == tags.id),
+                        layout_columns, layout_columns_tags.layoutcolumn_id == layout_columns.id),
+                    product_templates, layout_columns.layout_id == product_templates.id)
+            ).where(and_(
+                tags.alive.is_(True),
+                product_templates.owner_id == int(company_id),
+            ))
 
             run_query = conn_cloud.execute(client_query)
             data = [dict(
@@ -2003,6 +2046,55 @@ class ProductRotationGroupQueryOnCloud(object):
 
         return make_response(True, data, 'Found product rotation groups: {}'.format(len(data)))
 
+    @classmethod
+    def get_products_for_product_rotation_groups(cls, prg_ids):
+        """
+        Batched version of get_products_for_specific_product_rotation_group, fetch products of all
+        requested product rotation groups with one query.
+
+        :param prg_ids: product rotation group ids
+        :return: response with dict, product rotation group id -> list of assigned products
+        """
+        search_ids = list(set(int(prg_id) for prg_id in prg_ids))
+        if not search_ids:
+            return make_response(True, {}, 'Found product rotation groups: 0')
+
+        query_results = None
+        with get_cloud_connection_safe() as conn_cloud:
+
+            prg_query = select([
+                product_rotation_assignments.rotation_group_id.label('prg_id'),
+                product_rotation_groups.name.label('prg_name'),
+                product_rotation_groups.external_id.label('prg_ext_id'),
+                product.caption.label('product_name'),
+                product.external_id.label('product_ext_id'),
+                product.code.label('product_code'),
+            ]).where(and_(
+                product_rotation_assignments.rotation_group_id.in_(search_ids),
+                product_rotation_assignments.alive.is_(True),
+            )).select_from(
+                outerjoin(product_rotation_assignments, product_rotation_groups,
+                          product_rotation_assignments.rotation_group_id == product_rotation_groups.id)
+                    .outerjoin(product, product.id == product_rotation_assignments.product_id)
+            )
+
+            query_results = conn_cloud.execute(prg_query).fetchall()
+
+        if query_results is None:
+            return make_response(False, {}, 'product rotation groups not found')
+
+        data = {}
+        for prg in query_results:
+            data.setdefault(prg.prg_id, []).append(dict(
+                prg_name=prg.prg_name,
+                prg_ext_id=prg.prg_ext_id,
+                product_name=prg.product_name,
+                product_ext_id=prg.product_ext_id,
+                product_code=prg.product_code,
+            ))
+
+        return make_response(True, data, 'Found product rotation groups: {}'.format(len(data)))
+
 
 class MachineCategoryQueryOnCloud(object):
 
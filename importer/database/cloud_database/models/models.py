@@ -1,62 +1,98 @@
-from database.cloud_database.connection.connection import Base
+from sqlalchemy import inspection
+
+from database.cloud_database.connection.connection import get_cloud_base
 
 """
 
     Cloud models referent by normalize name.
 
+    Cloud models are resolved to automap classes on first use, so import of cloud models (and query modules) doesn't
+    reflect cloud tables (or load schema snapshot).
+
 """
 
-client = Base.classes.clients
-client_type = Base.classes.client_types
-company = Base.classes.vending_companies
-company_access = Base.classes.administration_companyaccess
-custom_user = Base.classes.custom_users
-layout_column = Base.classes.layout_columns
-location = Base.classes.machine_locations
-machine = Base.classes.machines
-machine_operation = Base.classes.administration_machineoperation
-meter_type = Base.classes.meter_types
-machine_type = Base.classes.machine_types
-machine_column = Base.classes.machine_columns
-machine_cluster = Base.classes.machineclusters
-machine_assigned_cluster = Base.classes.machineclusters_assigned_machines
-machine_category = Base.classes.machine_categories
-region = Base.classes.regions
-region_parent = Base.classes.regions
-product = Base.classes.products
-product_rotation_group = Base.classes.product_rotation_groups
-product_template = Base.classes.product_templates
-product_category = Base.classes.product_categories
-tax_rate = Base.classes.tax_rates
-user = Base.classes.auth_user
-user_role = Base.classes.user_role_template
-machine_data = Base.classes.machine_data
-operation = Base.classes.administration_machineoperation
-tags = Base.classes.tags
-machines_tags = Base.classes.machines_tags
-locations_working_time = Base.classes.machine_locations_working_time
-time_interval = Base.classes.time_interval
-users_assigned_companies = Base.classes.custom_users_assigned_companies
-vends = Base.classes.vends
-device_machine = Base.classes.administration_device_machines
-device_type = Base.classes.administration_devicetype
-device = Base.classes.administration_device
-importer_company = Base.classes.administration_vendingcompanyimporter
-importer_type = Base.classes.administration_importtype
-importer_company_ftp = Base.classes.administration_importerftpconfiguration
-importer_company_ftp_details = Base.classes.administration_importerftpconfigurationmasterdata
-product_templates = Base.classes.product_templates
-layout_columns = Base.classes.layout_columns
-machine_recipes = Base.classes.machine_recipes
-layout_components = Base.classes.layout_components
-recipe = Base.classes.recipes
-combo_recipe = Base.classes.combo_recipes
-layout_columns_tags = Base.classes.layout_columns_tags
-packing_name = Base.classes.packing_name
-product_packing_size = Base.classes.product_packing_size
-product_rotation_groups = Base.classes.product_rotation_groups
-warehouse = Base.classes.administration_warehouse
-product_rotation_assignments = Base.classes.product_rotation_assignments
-product_components = Base.classes.product_components
-product_component_items = Base.classes.product_component_items
 
+class CloudModel(object):
+    """
+    Automap class of cloud table, resolved on first use. Attributes are automap class attributes and model can be
+    used in queries (select, join, aliased, update) same as automap class.
+    """
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.automap_class = None
+
+    @property
+    def model(self):
+        if self.automap_class is None:
+            self.automap_class = getattr(get_cloud_base().classes, self.table_name)
+        return self.automap_class
+
+    def __getattr__(self, name):
+        if name in ('table_name', 'automap_class'):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def __repr__(self):
+        return '<CloudModel {}>'.format(self.table_name)
+
+
+@inspection._inspects(CloudModel)
+def inspect_cloud_model(cloud_model):
+    # SQLAlchemy inspects mapper of automap class (select, join, aliased)
+    return inspection.inspect(cloud_model.model)
+
+
+client = CloudModel('clients')
+client_type = CloudModel('client_types')
+company = CloudModel('vending_companies')
+company_access = CloudModel('administration_companyaccess')
+custom_user = CloudModel('custom_users')
+layout_column = CloudModel('layout_columns')
+location = CloudModel('machine_locations')
+machine = CloudModel('machines')
+machine_operation = CloudModel('administration_machineoperation')
+meter_type = CloudModel('meter_types')
+machine_type = CloudModel('machine_types')
+machine_column = CloudModel('machine_columns')
+machine_cluster = CloudModel('machineclusters')
+machine_assigned_cluster = CloudModel('machineclusters_assigned_machines')
+machine_category = CloudModel('machine_categories')
+region = CloudModel('regions')
+region_parent = CloudModel('regions')
+product = CloudModel('products')
+product_rotation_group = CloudModel('product_rotation_groups')
+product_template = CloudModel('product_templates')
+product_category = CloudModel('product_categories')
+tax_rate = CloudModel('tax_rates')
+user = CloudModel('auth_user')
+user_role = CloudModel('user_role_template')
+machine_data = CloudModel('machine_data')
+operation = CloudModel('administration_machineoperation')
+tags = CloudModel('tags')
+machines_tags = CloudModel('machines_tags')
+locations_working_time = CloudModel('machine_locations_working_time')
+time_interval = CloudModel('time_interval')
+users_assigned_companies = CloudModel('custom_users_assigned_companies')
+vends = CloudModel('vends')
+device_machine = CloudModel('administration_device_machines')
+device_type = CloudModel('administration_devicetype')
+device = CloudModel('administration_device')
+importer_company = CloudModel('administration_vendingcompanyimporter')
+importer_type = CloudModel('administration_importtype')
+importer_company_ftp = CloudModel('administration_importerftpconfiguration')
+importer_company_ftp_details = CloudModel('administration_importerftpconfigurationmasterdata')
+product_templates = CloudModel('product_templates')
+layout_columns = CloudModel('layout_columns')
+machine_recipes = CloudModel('machine_recipes')
+layout_components = CloudModel('layout_components')
+recipe = CloudModel('recipes')
+combo_recipe = CloudModel('combo_recipes')
+layout_columns_tags = CloudModel('layout_columns_tags')
+packing_name = CloudModel('packing_name')
+product_packing_size = CloudModel('product_packing_size')
+product_rotation_groups = CloudModel('product_rotation_groups')
+warehouse = CloudModel('administration_warehouse')
+product_rotation_assignments = CloudModel('product_rotation_assignments')
+product_components = CloudModel('product_components')
+product_component_items = CloudModel('product_component_items')
@@ -1,10 +1,17 @@
-from common.urls.urls import importer_database_connection
+from common.urls.urls import importer_database_connection, importer_pool_config
 from sqlalchemy import create_engine
 
 from database.company_database.models.models import metadata
+from database.pool import engine_pool_options, watch_connection_leaks
 
 engine = create_engine(importer_database_connection, convert_unicode=True, echo=False,
-                       pool_size=20, max_overflow=100)
+                       **engine_pool_options(importer_pool_config, pool_size=20, max_overflow=100))
+importer_connection_leaks = watch_connection_leaks(engine, 'Importer', importer_pool_config)
 
 
-metadata.create_all(engine)
\ No newline at end of file
+def create_importer_tables():
+    """
+    Create missing importer tables (tables are managed by alembic migrations, this is only for fresh database).
+    Called from service entry points (bootstrap), not on import.
+    """
+    metadata.create_all(engine)
@@ -49,116 +49,116 @@ class CloudHistory(object):
 
     @classmethod
     def retrieve_all_history_fail_and_success(cls, company_id, type=None):
-        conn_local = ConnectionForDatabases.get_local_connection().connect()
+        with ConnectionForDatabases.get_local_connection().connect() as conn_local:
 
-        result_array = []
+            result_array = []
 
-        # Retrieve fail history
+            # Retrieve fail history
 
-        out_fail = (
-            conn_local.execute(cls.return_fail_history(company_id, type)) if type
-            else conn_local.execute(cls.return_fail_history(company_id, type))
-        )
-
-        if out_fail.rowcount:
-            out_fail_results = out_fail.fetchall()
-            for x in out_fail_results:
-
-                elastic = (
-                    CloudElasticQuery
-                        .get_process_hash_full_object(company_id, x['elastic_hash'])['results']
-                )
-                if elastic[0]['process_request_type'] == 'FILE':
-                    username = '-'
-
-                    result_array.append(
-                        {
-                            'id': str(x['id']),
-                            'import_type': return_import_type_name(x['import_type']),
-                            'hash': x['elastic_hash'],
-                            'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
-                            'error_type': return_enum_error_name(x['import_error_type']),
-                            'full_name': username,
-                            'elastic': (
-                                elastic
-
-                            )
-                        }
-                    )
-                else:
-                    username = x['full_name']
-                    result_array.append(
-                        {
-                            'id': str(x['id']),
-                            'import_type': return_import_type_name(x['import_type']),
-                            'hash': x['elastic_hash'],
-                            'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
-                            'error_type': return_enum_error_name(x['import_error_type']),
-                            'full_name': username,
-                            'elastic': (
-                                elastic
-
-                            )
-                        }
-                    )
-
-        out_fail.close()
-
-        # Retrieve success history
-        out_success_data = (
-            conn_local.execute(cls.return_success_history(company_id, type)) if type
-            else conn_local.execute(cls.return_success_history(company_id, type))
-        )
+            out_fail = (
+                conn_local.execute(cls.return_fail_history(company_id, type)) if type
+                else conn_local.execute(cls.return_fail_history(company_id, type))
+            )
 
-        if out_success_data.rowcount:
-            out_success_results = out_success_data.fetchall()
-            for x in out_success_results:
-                elastic = (
-                    CloudElasticQuery
-                        .get_process_hash_full_object(company_id, x['elastic_hash'])['results']
-                )
-                if elastic[0]['process_request_type'] == 'FILE':
-                    username = '-'
-                    result_array.append(
-                        {
-                            'id': str(x['id']),
-                            'error_type': 'SUCCESS',
-                            'import_type': return_import_type_name(x['import_type']),
-                            'hash': x['elastic_hash'],
-                            'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
-                            'full_name': username,
-                            'elastic': (
-                                elastic
-                            )
-
-                        }
+            if out_fail.rowcount:
+                out_fail_results = out_fail.fetchall()
+                for x in out_fail_results:
 
+                    elastic = (
+                        CloudElasticQuery
+                            .get_process_hash_full_object(company_id, x['elastic_hash'])['results']
                     )
-                else:
-                    username = x['full_name']
-                    result_array.append(
-                        {
-                            'id': str(x['id']),
-                            'error_type': 'SUCCESS',
-                            'import_type': return_import_type_name(x['import_type']),
-                            'hash': x['elastic_hash'],
-                            'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
-                            'full_name': username,
-                            'elastic': (
-                                elastic
-                            )
-
-                        }
+                    if elastic[0]['process_request_type'] == 'FILE':
+                        username = '-'
+
+                        result_array.append(
+                            {
+                                'id': str(x['id']),
+                                'import_type': return_import_type_name(x['import_type']),
+                                'hash': x['elastic_hash'],
+                                'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
+                                'error_type': return_enum_error_name(x['import_error_type']),
+                                'full_name': username,
+                                'elastic': (
+                                    elastic
+
+                                )
+                            }
+                        )
+                    else:
+                        username = x['full_name']
+                        result_array.append(
+                            {
+                                'id': str(x['id']),
+                                'import_type': return_import_type_name(x['import_type']),
+                                'hash': x['elastic_hash'],
+                                'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
+                                'error_type': return_enum_error_name(x['import_error_type']),
+                                'full_name': username,
+                                'elastic': (
+                                    elastic
+
+                                )
+                            }
+                        )
+
+            out_fail.close()
+
+            # Retrieve success history
+            out_success_data = (
+                conn_local.execute(cls.return_success_history(company_id, type)) if type
+                else conn_local.execute(cls.return_success_history(company_id, type))
+            )
 
+            if out_success_data.rowcount:
+                out_success_results = out_success_data.fetchall()
+                for x in out_success_results:
+                    elastic = (
+                        CloudElasticQuery
+                            .get_process_hash_full_object(company_id, x['elastic_hash'])['results']
                     )
+                    if elastic[0]['process_request_type'] == 'FILE':
+                        username = '-'
+                        result_array.append(
+                            {
+                                'id': str(x['id']),
+                                'error_type': 'SUCCESS',
+                                'import_type': return_import_type_name(x['import_type']),
+                                'hash': x['elastic_hash'],
+                                'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
+                                'full_name': username,
+                                'elastic': (
+                                    elastic
+                                )
+
+                            }
+
+                        )
+                    else:
+                        username = x['full_name']
+                        result_array.append(
+                            {
+                                'id': str(x['id']),
+                                'error_type': 'SUCCESS',
+                                'import_type': return_import_type_name(x['import_type']),
+                                'hash': x['elastic_hash'],
+                                'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
+                                'full_name': username,
+                                'elastic': (
+                                    elastic
+                                )
+
+                            }
+
+                        )
+
+            out_success_data.close()
+
+            if len(result_array):
+                return make_response(
+                    True, result_array, 'Found history.'
+                )
 
-        out_success_data.close()
-
-        if len(result_array):
             return make_response(
-                True, result_array, 'Found history.'
+                False, [], 'History not found.'
             )
-
-        return make_response(
-            False, [], 'History not found.'
-        )
@@ -1,7 +1,7 @@
 from database.cloud_database.common.common import  get_local_connection_safe
 from database.company_database.models.models import company_parameters
 
-from sqlalchemy import select, and_, insert,  update
+from sqlalchemy import select, and_, insert,  update, delete
 
 
 class CompanyParameters(object):
@@ -46,6 +46,16 @@ class CompanyParameters(object):
             conn_local.close()
             return
 
+    @staticmethod
+    def delete_parameter(company_id, key):
+        with get_local_connection_safe() as conn_local:
+
+            query = delete(company_parameters).\
+                where(and_(company_parameters.c.key==key, company_parameters.c.company_id==company_id))
+
+            conn_local.execute(query)
+            return
+
     @staticmethod
     def get_all_parameters():
         with get_local_connection_safe() as conn_local:
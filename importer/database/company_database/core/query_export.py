@@ -164,64 +164,62 @@ class ExportEmailHistory(object):
 
 
         def generate_query(file_path, company_id, category_import, email):
-            conn_local = ConnectionForDatabases.get_local_connection().connect()
-
-            history_success = select([cloud_company_history]).where(
-                and_(cloud_company_history.c.company_id == company_id,
-                     func.date(cloud_company_history.c.created_at) == date,
-                     cloud_company_history.c.import_type == category_import
-                     )
-            ).order_by(desc(cloud_company_history.c.created_at))
-
-            out_success_data = conn_local.execute(history_success)
-
-
-            # Success history
-            import_type = return_import_type_name(category_import)
-
-            if out_success_data.rowcount:
-                out_fail_results = out_success_data.fetchall()
-                open_file = open(file_path, 'a+')
-                writer = csv.writer(open_file, quoting=csv.QUOTE_ALL, delimiter=';')
-                writer.writerow(('id', 'import_type', 'status', 'created_at'))
-                try:
-                    for x in out_fail_results:
-                        id = x['elastic_hash']
-                        type_resp = 'SUCCESS'
-                        created_at =x['created_at'].strftime("%Y-%m-%d %H:%M")
-                        writer.writerow((id, type_resp, import_type, created_at))
-                finally:
-                    open_file.close()
-
-
-            # Fail history
-            history_fail = select([cloud_company_process_fail_history]).where(
-                and_(cloud_company_process_fail_history.c.company_id == company_id,
-                     func.date(cloud_company_process_fail_history.c.created_at) == date,
-                     cloud_company_process_fail_history.c.import_type == category_import)
-            ).order_by(desc(cloud_company_process_fail_history.c.created_at))
-
-            out_fail = conn_local.execute(history_fail)
-
-            if out_fail.rowcount:
-                out_fail_results = out_fail.fetchall()
-                open_file = open(file_path, 'a+')
-                writer = csv.writer(open_file, quoting=csv.QUOTE_ALL, delimiter=';')
-                try:
-                    for x in out_fail_results:
-                        id = x['elastic_hash']
-                        type_resp = return_enum_error_name(x['import_error_type'])
-                        created_at = x['created_at'].strftime("%Y-%m-%d %H:%M")
-                        import_type = return_import_type_name(x['import_type'])
-                        writer.writerow((id, type_resp, import_type, created_at))
-                finally:
-                    open_file.close()
+            with ConnectionForDatabases.get_local_connection().connect() as conn_local:
+
+                history_success = select([cloud_company_history]).where(
+                    and_(cloud_company_history.c.company_id == company_id,
+                         func.date(cloud_company_history.c.created_at) == date,
+                         cloud_company_history.c.import_type == category_import
+                         )
+                ).order_by(desc(cloud_company_history.c.created_at))
+
+                out_success_data = conn_local.execute(history_success)
+
+
+                # Success history
+                import_type = return_import_type_name(category_import)
+
+                if out_success_data.rowcount:
+                    out_fail_results = out_success_data.fetchall()
+                    open_file = open(file_path, 'a+')
+                    writer = csv.writer(open_file, quoting=csv.QUOTE_ALL, delimiter=';')
+                    writer.writerow(('id', 'import_type', 'status', 'created_at'))
+                    try:
+                        for x in out_fail_results:
+                            id = x['elastic_hash']
+                            type_resp = 'SUCCESS'
+                            created_at =x['created_at'].strftime("%Y-%m-%d %H:%M")
+                            writer.writerow((id, type_resp, import_type, created_at))
+                    finally:
+                        open_file.close()
+
+
+                # Fail history
+                history_fail = select([cloud_company_process_fail_history]).where(
+                    and_(cloud_company_process_fail_history.c.company_id == company_id,
+                         func.date(cloud_company_process_fail_history.c.created_at) == date,
+                         cloud_company_process_fail_history.c.import_type == category_import)
+                ).order_by(desc(cloud_company_process_fail_history.c.created_at))
+
+                out_fail = conn_local.execute(history_fail)
+
+                if out_fail.rowcount:
+                    out_fail_results = out_fail.fetchall()
+                    open_file = open(file_path, 'a+')
+                    writer = csv.writer(open_file, quoting=csv.QUOTE_ALL, delimiter=';')
+                    try:
+                        for x in out_fail_results:
+                            id = x['elastic_hash']
+                            type_resp = return_enum_error_name(x['import_error_type'])
+                            created_at = x['created_at'].strftime("%Y-%m-%d %H:%M")
+                            import_type = return_import_type_name(x['import_type'])
+                            writer.writerow((id, type_resp, import_type, created_at))
+                    finally:
+                        open_file.close()
 
             # Send email
             send_email_after_generated_request(file_path, email, import_type, date)
 
-            conn_local.close()
-
         for x in data:
             company_id = x['company']
             category_import = x['category_import']
@@ -656,52 +654,49 @@ class ExportHistory(object):
         from datetime import datetime, timedelta
         import itertools
 
-        conn_local = ConnectionForDatabases.get_local_connection().connect()
+        with ConnectionForDatabases.get_local_connection().connect() as conn_local:
 
-        date_start = (datetime.now() + timedelta(days=-1)).strftime("%Y-%m-%d")
-        date_end = time.strftime("%Y-%m-%d")
+            date_start = (datetime.now() + timedelta(days=-1)).strftime("%Y-%m-%d")
+            date_end = time.strftime("%Y-%m-%d")
 
-        query_start = select([company_export_history]).where(
-            and_(
-                company_export_history.c.company_id == company_id,
-                company_export_history.c.export_type == export_type,
-                func.date(company_export_history.c.created_at) == date_start
+            query_start = select([company_export_history]).where(
+                and_(
+                    company_export_history.c.company_id == company_id,
+                    company_export_history.c.export_type == export_type,
+                    func.date(company_export_history.c.created_at) == date_start
 
+                )
             )
-        )
 
-        query_end = select([company_export_history]).where(
-            and_(
-                company_export_history.c.company_id == company_id,
-                company_export_history.c.export_type == export_type,
-                func.date(company_export_history.c.created_at) == date_end
+            query_end = select([company_export_history]).where(
+                and_(
+                    company_export_history.c.company_id == company_id,
+                    company_export_history.c.export_type == export_type,
+                    func.date(company_export_history.c.created_at) == date_end
 
+                )
             )
-        )
 
-        # Execute both query
-        query_results_start = conn_local.execute(query_start)
-        query_results_end = conn_local.execute(query_end)
+            # Execute both query
+            query_results_start = conn_local.execute(query_start)
+            query_results_end = conn_local.execute(query_end)
 
-        if query_results_start.rowcount and query_results_end.rowcount:
+            if query_results_start.rowcount and query_results_end.rowcount:
 
-            sort_dict_start = generate_json(query_results_start.fetchone().export_data)
-            sort_dict_end =   generate_json(query_results_end.fetchone().export_data)
+                sort_dict_start = generate_json(query_results_start.fetchone().export_data)
+                sort_dict_end =   generate_json(query_results_end.fetchone().export_data)
 
-            output_data = (
-                list(itertools.filterfalse(lambda x: x in sort_dict_start, sort_dict_end))+
-                list(itertools.filterfalse(lambda x: x in sort_dict_end, sort_dict_start))
-            )
-            if len(output_data):
-                conn_local.close()
-                return {'success': True, 'data': output_data, 'sheet_name': 'DIFF'}
-            else:
-                conn_local.close()
-                return {'success': False, 'data': []}
+                output_data = (
+                    list(itertools.filterfalse(lambda x: x in sort_dict_start, sort_dict_end))+
+                    list(itertools.filterfalse(lambda x: x in sort_dict_end, sort_dict_start))
+                )
+                if len(output_data):
+                    return {'success': True, 'data': output_data, 'sheet_name': 'DIFF'}
+                else:
+                    return {'success': False, 'data': []}
 
-        else:
-            conn_local.close()
-            return {'success': False, 'data':[]}
+            else:
+                return {'success': False, 'data':[]}
 
     @classmethod
     def export_specific_history(cls, data):
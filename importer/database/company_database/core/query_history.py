@@ -1,8 +1,9 @@
 from common.mixin.enum_errors import return_enum_error_name
-from common.mixin.mixin import make_response, custom_hash, custom_hash_vends
+from common.mixin.mixin import make_response, custom_hash
+from common.mixin.pagination import iter_filtered_rows, next_cursor
 from common.mixin.validation_const import (return_import_type_id, return_import_type_name,
     return_import_type_id_custom_validation)
-from core.flask.redis_store.redis_managment import RedisManagement
+from core.flask.redis_store.history_cache import HistoryCache
 from core.flask.sessions.session import AuthorizeUser
 from database.cloud_database.common.common import ConnectionForDatabases, get_local_connection_safe
 from database.company_database.models.models import (
@@ -11,66 +12,84 @@ from database.company_database.models.models import (
 )
 from elasticsearch_component.core.query_company import GetCompanyProcessLog
 from elasticsearch_component.core.query_vends import GetVendImportProcessLog
-from sqlalchemy import desc, and_, func, true, delete, asc
+from sqlalchemy import desc, and_, func, true, false, null, cast, delete, asc, union_all, tuple_, Integer, JSON
 from sqlalchemy.sql import insert, select, update
 from sqlalchemy.ext.serializer import dumps
+from dateutil import parser
 from datetime import datetime, timedelta
+from itertools import islice
 import os
+import uuid
+
+
+def history_after_values(after):
+    """
+
+    :param after: sort values of last history row of previous page (decoded cursor)
+    :return: created_at, id of keyset condition, ValueError if cursor values are not valid
+    """
+    if len(after) != 2 or not all(isinstance(x, str) for x in after):
+        raise ValueError('Cursor is not valid.')
+    try:
+        return parser.parse(after[0]), uuid.UUID(after[1])
+    except (ValueError, OverflowError):
+        raise ValueError('Cursor is not valid.')
+
 
 class CompanyHistory(object):
 
     @classmethod
     def get_all_users(cls, company_id):
-        conn_local = ConnectionForDatabases.get_local_connection().connect()
+        with ConnectionForDatabases.get_local_connection().connect() as conn_local:
 
-        users_init_array = []
+            users_init_array = []
 
-        history_success_query = select([cloud_company_history]).where(
-            cloud_company_history.c.company_id == company_id
-        ).distinct(cloud_company_history.c.full_name)
+            history_success_query = select([cloud_company_history]).where(
+                cloud_company_history.c.company_id == company_id
+            ).distinct(cloud_company_history.c.full_name)
 
-        result_success = conn_local.execute(history_success_query)
+            result_success = conn_local.execute(history_success_query)
 
-        if result_success.rowcount:
-            out = result_success.fetchall()
-            for x in out:
-                users_init_array.append( {
-                   'id': x['user_id'],
-                   'full_name': x['full_name']
-                    }
-                )
+            if result_success.rowcount:
+                out = result_success.fetchall()
+                for x in out:
+                    users_init_array.append( {
+                       'id': x['user_id'],
+                       'full_name': x['full_name']
+                        }
+                    )
 
-        result_success.close()
+            result_success.close()
 
-        history_fail_query = select([cloud_company_process_fail_history]).where(
-            cloud_company_process_fail_history.c.company_id == company_id
-        ).distinct(cloud_company_process_fail_history.c.full_name)
-
-        result_fail = conn_local.execute(history_fail_query)
-
-        if result_fail.rowcount:
-            out = result_fail.fetchall()
-            for x in out:
-                users_init_array.append(
-                    {
-                   'id': x['user_id'],
-                   'full_name': x['full_name']
-                    }
-                )
+            history_fail_query = select([cloud_company_process_fail_history]).where(
+                cloud_company_process_fail_history.c.company_id == company_id
+            ).distinct(cloud_company_process_fail_history.c.full_name)
+
+            result_fail = conn_local.execute(history_fail_query)
+
+            if result_fail.rowcount:
+                out = result_fail.fetchall()
+                for x in out:
+                    users_init_array.append(
+                        {
+                       'id': x['user_id'],
+                       'full_name': x['full_name']
+                        }
+                    )
 
-        result_fail.close()
+            result_fail.close()
 
 
-        user_array = []
+            user_array = []
 
-        for item in users_init_array:
-            if item not in user_array:
-                user_array.append(item)
+            for item in users_init_array:
+                if item not in user_array:
+                    user_array.append(item)
 
-        return make_response(
-            True, user_array,
-            'Found users length'
-        )
+            return make_response(
+                True, user_array,
+                'Found users length'
+            )
 
 
     @classmethod
@@ -87,6 +106,8 @@ class CompanyHistory(object):
             return make_response(False, [], 'No data found')
 
         out = result.fetchall()
+        processes = GetCompanyProcessLog.get_processes_by_hashes(
+            company_id, [x['elastic_hash'] for x in out])['results']
 
         user_data = [
             {
@@ -97,9 +118,7 @@ class CompanyHistory(object):
                 'data_hash': x['data_hash'],
                 'file_path': x['file_path'],
                 'elastic': (
-                    GetCompanyProcessLog
-                        .get_process_by_hash_only_main_peace(company_id, x['elastic_hash'])[
-                        'results']
+                    [processes[x['elastic_hash']]] if x['elastic_hash'] in processes else []
                 )
 
             } for x in out
@@ -193,6 +212,7 @@ class CompanyHistory(object):
                     ).returning(cloud_company_history.c.id)
                 )
                 conn_local.execute(query)
+                HistoryCache.invalidate_company(company_id)
 
             return make_response(
                 False, [],
@@ -217,6 +237,7 @@ class CompanyHistory(object):
 
         result = conn_local.execute(insert_query)
         all_results = result.fetchone()
+        HistoryCache.invalidate_company(company_id)
 
         if result.is_insert and all_results.id:
             return make_response(
@@ -248,6 +269,7 @@ class CompanyHistory(object):
 
         conn_local = ConnectionForDatabases.get_local_connection()
         result = conn_local.execute(update_queue).fetchone()
+        HistoryCache.invalidate_company(company_id)
 
         if result:
             return make_response(
@@ -302,11 +324,13 @@ class CompanyHistory(object):
                     'partial': partial
                 }
             )
-            .returning(cloud_company_history.c.id)
+            .returning(cloud_company_history.c.id, cloud_company_history.c.company_id)
         )
         result = conn_local.execute(query)
+        updated = result.fetchone()
 
-        if result.fetchone():
+        if updated:
+            HistoryCache.invalidate_company(updated.company_id)
             return True
         return False
 
@@ -324,41 +348,43 @@ class CompanyHistory(object):
                     'partial': partial
                 }
             )
-            .returning(vend_success_history.c.id)
+            .returning(vend_success_history.c.id, vend_success_history.c.company_id)
         )
         result = conn_local.execute(query)
+        updated = result.fetchone()
 
-        if result.fetchone():
+        if updated:
+            HistoryCache.invalidate_company(updated.company_id)
             return True
         return False
 
     @classmethod
     def return_local_fail_history(cls, company_id, data_hash):
-        conn_local = ConnectionForDatabases.get_local_connection().connect()
-        query = (
-            select([cloud_company_process_fail_history])
-            .where(
-                cloud_company_process_fail_history.c.company_id == company_id
-            ).order_by(desc(cloud_company_process_fail_history.c.created_at)).limit(3)
-        )
-        result = conn_local.execute(query)
+        with ConnectionForDatabases.get_local_connection().connect() as conn_local:
+            query = (
+                select([cloud_company_process_fail_history])
+                .where(
+                    cloud_company_process_fail_history.c.company_id == company_id
+                ).order_by(desc(cloud_company_process_fail_history.c.created_at)).limit(3)
+            )
+            result = conn_local.execute(query)
 
-        total = 0
+            total = 0
 
-        ret = {'success': False}
+            ret = {'success': False}
 
-        if result.rowcount:
-            out = result.fetchall()
-            for x in out:
-                if x.data_hash == data_hash:
-                    total += 1
-            if total >= 3:
-                ret['success'] = True
-                ret['res'] = out[-1].created_at
+            if result.rowcount:
+                out = result.fetchall()
+                for x in out:
+                    if x.data_hash == data_hash:
+                        total += 1
+                if total >= 3:
+                    ret['success'] = True
+                    ret['res'] = out[-1].created_at
 
-        result.close()
+            result.close()
 
-        return ret
+            return ret
 
     @classmethod
     def return_local_vend_fail_history(cls, company_id, data_hash, file_path):
@@ -369,44 +395,44 @@ class CompanyHistory(object):
         :param file_path: fail file_path
         :return: True if exists in local history, False if not.
         """
-        conn_local = ConnectionForDatabases.get_local_connection().connect()
-        query = (
-            select([vend_fail_history])
-            .where(and_(vend_fail_history.c.company_id == company_id,
-                        vend_fail_history.c.file_path == file_path))
-        )
-        result = conn_local.execute(query)
+        with ConnectionForDatabases.get_local_connection().connect() as conn_local:
+            query = (
+                select([vend_fail_history])
+                .where(and_(vend_fail_history.c.company_id == company_id,
+                            vend_fail_history.c.file_path == file_path))
+            )
+            result = conn_local.execute(query)
 
-        if result.rowcount:
-            out = result.fetchall()
-            for x in out:
-                if x.data_hash == data_hash and x.file_path == file_path:
-                    return True
-                else:
-                    return False
+            if result.rowcount:
+                out = result.fetchall()
+                for x in out:
+                    if x.data_hash == data_hash and x.file_path == file_path:
+                        return True
+                    else:
+                        return False
 
-        result.close()
+            result.close()
 
     @classmethod
     def return_local_vend_fail_history_machine_paired(cls, company_id, data_hash, file_path, device_pid):
-        conn_local = ConnectionForDatabases.get_local_connection().connect()
-        query = (
-            select([vend_fail_history])
-            .where(and_(vend_fail_history.c.company_id == company_id,
-                        vend_fail_history.c.machine_paired is not True))
-        )
-        result = conn_local.execute(query)
-
-        if result.rowcount:
-            out = result.fetchall()
-            for x in out:
-                base_pid = os.path.basename(x.file_path).split('_')[0]
-                if base_pid == device_pid:
-                    return True
-                else:
-                    return False
+        with ConnectionForDatabases.get_local_connection().connect() as conn_local:
+            query = (
+                select([vend_fail_history])
+                .where(and_(vend_fail_history.c.company_id == company_id,
+                            vend_fail_history.c.machine_paired is not True))
+            )
+            result = conn_local.execute(query)
+
+            if result.rowcount:
+                out = result.fetchall()
+                for x in out:
+                    base_pid = os.path.basename(x.file_path).split('_')[0]
+                    if base_pid == device_pid:
+                        return True
+                    else:
+                        return False
 
-        result.close()
+            result.close()
 
     @classmethod
     def get_vend_history_by_hash(cls, company_id, elastic_hash):
@@ -471,6 +497,7 @@ class CompanyHistory(object):
 
         result = importer_conn.execute(vend_insert_query)
         all_results = result.fetchone()
+        HistoryCache.invalidate_company(company_id)
 
         if result.is_insert and all_results.id:
             return make_response(
@@ -520,6 +547,56 @@ class CompanyFailHistory(object):
             'Found process fail history length: {}'.format(result.rowcount)
         )
 
+    @classmethod
+    def get_fail_history_page(cls, company_id, page, import_type=None, from_datetime=None):
+        """
+        Page of fail history newest first, keyset pagination on (created_at, id).
+
+        :param page: PageRequest, after values are created_at and id of last row of previous page
+        :param import_type: import type id filter
+        :param from_datetime: rows updated from date
+        :return: fail history rows with elastic process and next_cursor
+        """
+        history = cloud_company_process_fail_history
+        conditions = [history.c.company_id == company_id]
+        if import_type is not None:
+            conditions.append(history.c.import_type == import_type)
+        if from_datetime:
+            conditions.append(func.date(history.c.updated_at) >= from_datetime)
+        if page.after:
+            conditions.append(tuple_(history.c.created_at, history.c.id) < tuple_(*history_after_values(page.after)))
+
+        history_query = select([history]).where(and_(*conditions)).order_by(
+            desc(history.c.created_at), desc(history.c.id)).limit(page.limit)
+
+        with get_local_connection_safe() as conn_local:
+            out = conn_local.execute(history_query).fetchall()
+
+        processes = {}
+        if page.include_field('elastic'):
+            processes = GetCompanyProcessLog.get_processes_by_hashes(
+                company_id, [x['elastic_hash'] for x in out], include_process=True)['results']
+
+        user_data = [
+            page.project({
+                'id': str(x['id']),
+                'import_type': return_import_type_name(x['import_type']),
+                'hash': x['elastic_hash'],
+                'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M"),
+                'data_hash': x['data_hash'],
+                'file_path': x['file_path'],
+                'error_type': return_enum_error_name(x['import_error_type']),
+                'elastic': [processes[x['elastic_hash']]] if x['elastic_hash'] in processes else []
+            }) for x in out
+        ]
+
+        response = make_response(
+            bool(user_data), user_data,
+            'Found process fail history data length: {}'.format(len(user_data)) if user_data else 'No data found'
+        )
+        response['next_cursor'] = next_cursor(page, [[x['created_at'].isoformat(), str(x['id'])] for x in out])
+        return response
+
     @classmethod
     def get_fail_history_company_id_and_date_from(cls, company_id, from_datetime):
 
@@ -782,43 +859,44 @@ class CompanyFailHistory(object):
     def insert_fail_history(cls, company_id, import_type, elastic_hash, data_hash, file_path,
                             import_error_type, token):
         old_entry = cls.get_fail_history_by_process_hash(int(company_id), elastic_hash)
-        conn_local = ConnectionForDatabases.get_local_connection().connect()
-        if old_entry['status']:
-            return make_response(
-                False, [],
-                'Fail history by this hash already exists in table {}'.format(
-                    elastic_hash
+        with ConnectionForDatabases.get_local_connection().connect() as conn_local:
+            if old_entry['status']:
+                return make_response(
+                    False, [],
+                    'Fail history by this hash already exists in table {}'.format(
+                        elastic_hash
+                    )
                 )
-            )
-
-        # Same elastic hash can be present only in one table (CLOUD-6588 for details)!
-        success_db_record = cls.get_history_by_hash_success_db(company_id, elastic_hash)
-        if success_db_record:
-            query = delete(cloud_company_history).where(cloud_company_history.c.elastic_hash == elastic_hash)
-            conn_local.execute(query)
 
-        extract_token = AuthorizeUser.verify_user_token(token.replace('JWT ', ''))
-
-        insert_query = insert(cloud_company_process_fail_history).values(
-            company_id=company_id,
-            import_type=return_import_type_id(import_type),
-            elastic_hash=elastic_hash,
-            data_hash=data_hash,
-            file_path=file_path,
-            import_error_type=import_error_type,
-            full_name=extract_token['response']['full_name'],
-            user_id=int(extract_token['response']['user_id'])
-        )
-        result = conn_local.execute(insert_query)
+            # Same elastic hash can be present only in one table (CLOUD-6588 for details)!
+            success_db_record = cls.get_history_by_hash_success_db(company_id, elastic_hash)
+            if success_db_record:
+                query = delete(cloud_company_history).where(cloud_company_history.c.elastic_hash == elastic_hash)
+                conn_local.execute(query)
 
-        if result.is_insert and result.inserted_primary_key:
-            return make_response(
-                True,
-                [dumps(result.inserted_primary_key)],
-                'Inserted new fail history with primary key {}'.format(result.inserted_primary_key)
+            extract_token = AuthorizeUser.verify_user_token(token.replace('JWT ', ''))
+
+            insert_query = insert(cloud_company_process_fail_history).values(
+                company_id=company_id,
+                import_type=return_import_type_id(import_type),
+                elastic_hash=elastic_hash,
+                data_hash=data_hash,
+                file_path=file_path,
+                import_error_type=import_error_type,
+                full_name=extract_token['response']['full_name'],
+                user_id=int(extract_token['response']['user_id'])
             )
-        result.close()
-        return make_response(False, [], "Failed to insert new fail history!")
+            result = conn_local.execute(insert_query)
+            HistoryCache.invalidate_company(company_id)
+
+            if result.is_insert and result.inserted_primary_key:
+                return make_response(
+                    True,
+                    [dumps(result.inserted_primary_key)],
+                    'Inserted new fail history with primary key {}'.format(result.inserted_primary_key)
+                )
+            result.close()
+            return make_response(False, [], "Failed to insert new fail history!")
 
     @classmethod
     def insert_vend_fail_history(cls, company_id, import_type, elastic_hash, data_hash,
@@ -831,29 +909,30 @@ class CompanyFailHistory(object):
                     elastic_hash
                 )
             )
-        importer_conn = ConnectionForDatabases.get_local_connection().connect()
-        extract_token = AuthorizeUser.verify_user_token(token.replace('JWT ', ''))
-        insert_vend_fail_query = insert(vend_fail_history).values(
-            company_id=int(company_id),
-            import_type=int(return_import_type_id(import_type)),
-            elastic_hash=str(elastic_hash),
-            data_hash=str(data_hash),
-            file_path=file_path,
-            main_elastic_hash=main_elastic_hash,
-            import_error_type=int(import_error_type),
-            full_name=str(extract_token['response']['full_name']),
-            user_id=int(extract_token['response']['user_id'])
-        )
-        result = importer_conn.execute(insert_vend_fail_query)
+        with ConnectionForDatabases.get_local_connection().connect() as importer_conn:
+            extract_token = AuthorizeUser.verify_user_token(token.replace('JWT ', ''))
+            insert_vend_fail_query = insert(vend_fail_history).values(
+                company_id=int(company_id),
+                import_type=int(return_import_type_id(import_type)),
+                elastic_hash=str(elastic_hash),
+                data_hash=str(data_hash),
+                file_path=file_path,
+                main_elastic_hash=main_elastic_hash,
+                import_error_type=int(import_error_type),
+                full_name=str(extract_token['response']['full_name']),
+                user_id=int(extract_token['response']['user_id'])
+            )
+            result = importer_conn.execute(insert_vend_fail_query)
+            HistoryCache.invalidate_company(company_id)
 
-        if result.is_insert and result.inserted_primary_key:
-            return make_response(True, [dumps(result.inserted_primary_key)],
-                                 'Inserted new fail history with primary key {}'.format(
-                                     result.inserted_primary_key
-                                 ))
-        result.close()
+            if result.is_insert and result.inserted_primary_key:
+                return make_response(True, [dumps(result.inserted_primary_key)],
+                                     'Inserted new fail history with primary key {}'.format(
+                                         result.inserted_primary_key
+                                     ))
+            result.close()
 
-        return make_response(False, [], "Failed to insert new fail history")
+            return make_response(False, [], "Failed to insert new fail history")
 
     @classmethod
     def get_if_last(cls, company_id, data_hash):
@@ -870,123 +949,167 @@ class CompanyFailHistory(object):
 
 class CloudRequestHistory(object):
 
-    @classmethod
-    def retrieve_all_history_fail_and_success(cls, company_id, date_from=None, date_to=None):
+    @staticmethod
+    def history_cache_key(company_id, date_from=None, date_to=None, page=None, include_process=False):
+        """
 
-        hsh = custom_hash(str(company_id) + str(date_from) + str(date_to))
+        :param page: PageRequest or None
+        :return: redis key of dashboard history (company_dashboard_history_all)
+        """
+        key = str(company_id) + str(date_from) + str(date_to)
+        if page is not None:
+            key += 'page{}-{}-{}'.format(
+                page.limit, page.after, ','.join(sorted(page.fields)) if page.fields is not None else None)
+        if include_process:
+            key += 'process'
+        return custom_hash(key)
 
-        with get_local_connection_safe() as conn_local:
+    @staticmethod
+    def history_fail_and_success_query(company_id, date_from=None, date_to=None):
+        """
+        Fail and success history of company, masterdata and vend history, in one query newest first.
+        """
+        def fail_history_select(table, vend):
+            return select([
+                table.c.id,
+                table.c.import_type,
+                table.c.elastic_hash,
+                table.c.created_at,
+                table.c.data_hash,
+                table.c.file_path,
+                table.c.full_name,
+                table.c.import_error_type,
+                cast(null(), JSON).label('cloud_results'),
+                false().label('partial'),
+                true().label('fail'),
+                (true() if vend else false()).label('vend'),
+            ]).where(table.c.company_id == company_id)
+
+        def success_history_select(table, vend):
+            return select([
+                table.c.id,
+                table.c.import_type,
+                table.c.elastic_hash,
+                table.c.created_at,
+                table.c.data_hash,
+                table.c.file_path,
+                table.c.full_name,
+                cast(null(), Integer).label('import_error_type'),
+                table.c.cloud_results,
+                table.c.partial,
+                false().label('fail'),
+                (true() if vend else false()).label('vend'),
+            ]).where(table.c.company_id == company_id)
+
+        history_selects = [
+            (cloud_company_process_fail_history, fail_history_select(cloud_company_process_fail_history, False)),
+            (cloud_company_history, success_history_select(cloud_company_history, False)),
+            (vend_fail_history, fail_history_select(vend_fail_history, True)),
+            (vend_success_history, success_history_select(vend_success_history, True)),
+        ]
 
-            result_array = []
+        if date_from:
+            date_from_query = datetime.strptime(date_from, "%Y-%m-%d").date()
+            date_to_query = datetime.strptime(date_to, "%Y-%m-%d").date()
+            history_selects = [(table, history_select.where(and_(
+                func.date(table.c.created_at) >= func.date(date_from_query),
+                func.date(table.c.created_at) <= func.date(date_to_query)
+            ))) for table, history_select in history_selects]
 
-            date_from_query = None
-            date_to_query = None
+        history = union_all(*[history_select for _, history_select in history_selects]).alias('history')
+        return select([history]).order_by(desc(history.c.created_at), desc(history.c.id))
 
-            if not date_from:
-                history_fail = select([cloud_company_process_fail_history]).where(
-                    cloud_company_process_fail_history.c.company_id == company_id
-                ).order_by(desc(cloud_company_process_fail_history.c.created_at))
+    @staticmethod
+    def history_sort_values(row):
+        return [row['created_at'].isoformat(), str(row['id'])]
 
+    @classmethod
+    def history_with_process(cls, company_id, history_rows, include_process):
+        """
+
+        :return: dashboard history row for every history row, None if history row has no elastic process
+        """
+        processes = GetCompanyProcessLog.get_processes_by_hashes(
+            company_id, [x['elastic_hash'] for x in history_rows if not x['vend']], include_process)['results']
+        vend_processes = GetVendImportProcessLog.get_processes_by_hashes(
+            company_id, [x['elastic_hash'] for x in history_rows if x['vend']], include_process)['results']
+
+        result_array = []
+        for x in history_rows:
+            process = (vend_processes if x['vend'] else processes).get(x['elastic_hash'])
+            if not process:
+                result_array.append(None)
+                continue
+
+            if process['process_request_type'] in ['FILE', 'API', 'VENDON_API']:
+                username = '-'
             else:
-                date_from_query = datetime.strptime(date_from, "%Y-%m-%d").date()
-                date_to_query = datetime.strptime(date_to, "%Y-%m-%d").date()
-                history_fail = select([cloud_company_process_fail_history]).where(and_(
-                    cloud_company_process_fail_history.c.company_id == company_id,
-                    func.date(cloud_company_process_fail_history.c.created_at) >= func.date(date_from_query),
-                    func.date(cloud_company_process_fail_history.c.created_at) <= func.date(date_to_query)
-                )
-                ).order_by(desc(cloud_company_process_fail_history.c.created_at))
+                username = x['full_name']
 
-            out_fail = conn_local.execute(history_fail)
+            if x['fail']:
+                status = return_enum_error_name(x['import_error_type'])
+            elif x['partial']:
+                status = 'WARNING'
+            else:
+                status = 'SUCCESS'
 
-            if out_fail.rowcount:
-                out_fail_results = out_fail.fetchall()
-                for x in out_fail_results:
+            result_array.append(
+                {
+                    'id': str(x['id']),
+                    'error_type': status,
+                    'import_type': return_import_type_name(x['import_type']),
+                    'hash': x['elastic_hash'],
+                    'file_path': x['file_path'],
+                    'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M:%S"),
+                    'data_hash': x['data_hash'],
+                    'full_name': username,
+                    'elastic': [process],
+                    'cloud_results': x['cloud_results']
+                }
+            )
+        return result_array
 
-                    elastic = (
-                        GetCompanyProcessLog
-                        .get_process_by_hash(company_id, x['elastic_hash'])['results']
-                    )
-                    if elastic:
-                        if elastic[0]['process_request_type'] in ['FILE', 'API', 'VENDON_API']:
-                            username = '-'
-                        else:
-                            username = x['full_name']
-                        result_array.append(
-                            {
-                                'id': str(x['id']),
-                                'import_type': return_import_type_name(x['import_type']),
-                                'hash': x['elastic_hash'],
-                                'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M:%S"),
-                                'data_hash': x['data_hash'],
-                                'file_path': x['file_path'],
-                                'error_type': return_enum_error_name(x['import_error_type']),
-                                'full_name': username,
-                                'elastic': (
-                                    elastic
-
-                                ),
-                                'cloud_results': None
-                            }
-                            )
-
-
-            if not date_from:
-                # Retrieve success history
-                history_success = select([cloud_company_history]).where(
-                    cloud_company_history.c.company_id == company_id
-                ).order_by(desc(cloud_company_history.c.created_at))
-            else:
-                history_success = select([cloud_company_history]).where(and_(
-                    cloud_company_history.c.company_id == company_id,
-                    func.date(cloud_company_history.c.created_at) >= func.date(date_from_query),
-                    func.date(cloud_company_history.c.created_at) <= func.date(date_to_query)
-                )
-                ).order_by(desc(cloud_company_history.c.created_at))
+    @classmethod
+    def retrieve_all_history_fail_and_success(cls, company_id, date_from=None, date_to=None, page=None,
+                                              include_process=False):
+        """
+        History of company (masterdata and vend, fail and success) with elastic process, cached under
+        history_cache_key (HistoryCache).
+        Elastic processes of history rows are fetched with one query (per PROCESS_HASHES_BATCH_SIZE rows).
+        Page is keyset on (created_at, id), history rows without elastic process are skipped before page is cut,
+        history is read in batches of page limit until page is full.
+
+        :param page: PageRequest, all history if page is not set
+        :param include_process: add process flow (process_history, process_cloud) to elastic data
+        :return: history rows, next_cursor if page is requested
+        """
 
-            out_success_data = conn_local.execute(history_success)
+        with get_local_connection_safe() as conn_local:
 
-            if out_success_data.rowcount:
-                out_success_results = out_success_data.fetchall()
-                for x in out_success_results:
-                    elastic = (
-                        GetCompanyProcessLog
-                        .get_process_by_hash(company_id, x['elastic_hash'])['results']
-                    )
-                    if elastic:
-                        if elastic[0]['process_request_type'] in ['FILE', 'API', 'VENDON_API']:
-                            username = '-'
-                        else:
-                            username = x['full_name']
-
-                        if x.partial:
-                            status = 'WARNING'
-                        else:
-                            status = 'SUCCESS'
-
-                        result_array.append(
-                            {
-                                'id': str(x['id']),
-                                'error_type': status,
-                                'import_type': return_import_type_name(x['import_type']),
-                                'hash': x['elastic_hash'],
-                                'file_path': x['file_path'],
-                                'created_at': x['created_at'].strftime("%Y-%m-%d %H:%M:%S"),
-                                'data_hash': x['data_hash'],
-                                'full_name': username,
-                                'elastic': (
-                                    elastic
-                                ),
-                                'cloud_results': x['cloud_results']
-
-                            }
-
-                        )
-
-            RedisManagement.set_or_get_redis_data(hsh, result_array)
-            return make_response(
-                True, [], 'Found history.'
-            )
+            history_query = cls.history_fail_and_success_query(company_id, date_from, date_to)
+
+            if page is None:
+                history_results = conn_local.execute(history_query).fetchall()
+                result_array = [x for x in cls.history_with_process(company_id, history_results, include_process) if x]
+                return make_response(True, result_array, 'Found history.')
+
+            history = history_query.froms[0]
+
+            def fetch_rows(after, limit):
+                query = history_query
+                if after:
+                    query = query.where(
+                        tuple_(history.c.created_at, history.c.id) < tuple_(*history_after_values(after)))
+                return conn_local.execute(query.limit(limit)).fetchall()
+
+            history_rows = list(islice(iter_filtered_rows(
+                fetch_rows, lambda rows: cls.history_with_process(company_id, rows, include_process),
+                cls.history_sort_values, after=page.after, batch_size=page.limit
+            ), page.limit))
+
+            response = make_response(True, [page.project(x) for _, x in history_rows], 'Found history.')
+            response['next_cursor'] = next_cursor(page, [sort_values for sort_values, _ in history_rows])
+            return response
 
 
 class CloudVendRequestHistory(object):
@@ -1004,7 +1127,6 @@ class CloudVendRequestHistory(object):
         :return: elastic logging data
         """
 
-        vends_hash_key = custom_hash_vends(company_id+str(date_from)+str(date_to))
         if not date_from:
             date_from = "1970-01-01"
         if not date_to:
@@ -1096,127 +1218,152 @@ class CloudVendRequestHistory(object):
                             'cloud_results': x['cloud_results']
                         })
 
-            RedisManagement.set_or_get_redis_data(vends_hash_key, result_array)
             return make_response(
-                True, [], 'Found history.'
+                True, result_array, 'Found history.'
             )
 
 
 class OldDevicePidHistory(object):
     @classmethod
     def get_old_device_pid(cls, device_pid, company_id, file_timestamp, import_type):
-        importer_local = ConnectionForDatabases.get_local_connection().connect()
-        # Get old device pid
-        history_fail = select([vend_device_history]).where(and_(
-            vend_device_history.c.company_id == company_id,
-            vend_device_history.c.device_pid == device_pid,
-            vend_device_history.c.import_type == import_type,
-            vend_device_history.c.file_timestamp < file_timestamp)
-        ).order_by(desc(vend_device_history.c.file_timestamp)).limit(1)
-
-        # Get first bigger device
-        first_bigger_timestamp = select([vend_device_history]).where(and_(
-            vend_device_history.c.company_id == company_id,
-            vend_device_history.c.device_pid == device_pid,
-            vend_device_history.c.import_type == import_type,
-            vend_device_history.c.file_timestamp > file_timestamp)
-        ).order_by(asc(vend_device_history.c.file_timestamp)).limit(1)
-
-        history_first_bigger_timestamp = []
-        history_first_lower_timestamp = []
-
-        result_query_first_bigger = importer_local.execute(first_bigger_timestamp)
-
-        if result_query_first_bigger.rowcount:
-            first_bigger_response = result_query_first_bigger.fetchone()
-
-            if first_bigger_response.actual_machine:
-                first_bigger_timestamp_results = [{
-                    'owner_id': first_bigger_response.company_id,
-                    'device_pid': first_bigger_response.device_pid,
-                    'company_id': first_bigger_response.company_id,
-                    'import_filename': first_bigger_response.import_filename,
-                    'file_timestamp': first_bigger_response.file_timestamp,
-                    'zip_filename': first_bigger_response.zip_filename,
-                    'import_type': first_bigger_response.import_type,
-                    'data': first_bigger_response.data,
-                    'machine_id': first_bigger_response.machine_id
-                }]
+        with ConnectionForDatabases.get_local_connection().connect() as importer_local:
+            # Get old device pid
+            history_fail = select([vend_device_history]).where(and_(
+                vend_device_history.c.company_id == company_id,
+                vend_device_history.c.device_pid == device_pid,
+                vend_device_history.c.import_type == import_type,
+                vend_device_history.c.file_timestamp < file_timestamp)
+            ).order_by(desc(vend_device_history.c.file_timestamp)).limit(1)
+
+            # Get first bigger device
+            first_bigger_timestamp = select([vend_device_history]).where(and_(
+                vend_device_history.c.company_id == company_id,
+                vend_device_history.c.device_pid == device_pid,
+                vend_device_history.c.import_type == import_type,
+                vend_device_history.c.file_timestamp > file_timestamp)
+            ).order_by(asc(vend_device_history.c.file_timestamp)).limit(1)
+
+            history_first_bigger_timestamp = []
+            history_first_lower_timestamp = []
+
+            result_query_first_bigger = importer_local.execute(first_bigger_timestamp)
+
+            if result_query_first_bigger.rowcount:
+                first_bigger_response = result_query_first_bigger.fetchone()
+
+                if first_bigger_response.actual_machine:
+                    first_bigger_timestamp_results = [{
+                        'owner_id': first_bigger_response.company_id,
+                        'device_pid': first_bigger_response.device_pid,
+                        'company_id': first_bigger_response.company_id,
+                        'import_filename': first_bigger_response.import_filename,
+                        'file_timestamp': first_bigger_response.file_timestamp,
+                        'zip_filename': first_bigger_response.zip_filename,
+                        'import_type': first_bigger_response.import_type,
+                        'data': first_bigger_response.data,
+                        'machine_id': first_bigger_response.machine_id
+                    }]
 
-            else:
-                first_bigger_timestamp_results = None
-
-            history_first_bigger_timestamp.append(first_bigger_timestamp_results)
-
-        result = importer_local.execute(history_fail)
-
-        if result.rowcount:
-
-            response = result.fetchone()
-            if response.actual_machine:
-                result_data = [{
-                    'owner_id': response.company_id,
-                    'device_pid': response.device_pid,
-                    'company_id': response.company_id,
-                    'import_filename': response.import_filename,
-                    'file_timestamp': response.file_timestamp,
-                    'zip_filename': response.zip_filename,
-                    'import_type': response.import_type,
-                    'data': response.data,
-                    'machine_id': response.machine_id
-                }]
-            else:
-                result_data = None
-            history_first_lower_timestamp.append(result_data)
-        result.close()
-        return history_first_lower_timestamp, history_first_bigger_timestamp
+                else:
+                    first_bigger_timestamp_results = None
+
+                history_first_bigger_timestamp.append(first_bigger_timestamp_results)
+
+            result = importer_local.execute(history_fail)
+
+            if result.rowcount:
+
+                response = result.fetchone()
+                if response.actual_machine:
+                    result_data = [{
+                        'owner_id': response.company_id,
+                        'device_pid': response.device_pid,
+                        'company_id': response.company_id,
+                        'import_filename': response.import_filename,
+                        'file_timestamp': response.file_timestamp,
+                        'zip_filename': response.zip_filename,
+                        'import_type': response.import_type,
+                        'data': response.data,
+                        'machine_id': response.machine_id
+                    }]
+                else:
+                    result_data = None
+                history_first_lower_timestamp.append(result_data)
+            result.close()
+            return history_first_lower_timestamp, history_first_bigger_timestamp
 
     @classmethod
     def check_is_file_already_processing(cls, filename, company_id, import_type):
-        importer_local = ConnectionForDatabases.get_local_connection().connect()
-        # Get old device pid
-        history_fail = select([vend_device_history]).where(and_(
-            vend_device_history.c.company_id == company_id,
-            vend_device_history.c.zip_filename == filename,
-            vend_device_history.c.import_type == import_type)
-        )
+        with ConnectionForDatabases.get_local_connection().connect() as importer_local:
+            # Get old device pid
+            history_fail = select([vend_device_history]).where(and_(
+                vend_device_history.c.company_id == company_id,
+                vend_device_history.c.zip_filename == filename,
+                vend_device_history.c.import_type == import_type)
+            )
 
-        result = importer_local.execute(history_fail)
-        if result.rowcount:
-            response = result.fetchone()
+            result = importer_local.execute(history_fail)
+            if result.rowcount:
+                response = result.fetchone()
 
-            if response.zip_filename:
-                if response.actual_machine:
-                    return response.zip_filename
+                if response.zip_filename:
+                    if response.actual_machine:
+                        return response.zip_filename
+                else:
+                    return None
             else:
                 return None
-        else:
-            return None
 
-        result.close()
+            result.close()
+
+    @classmethod
+    def get_processed_filenames(cls, company_id, import_type, filenames):
+        """
+        Batch version of check_is_file_already_processing, one query for all remote files.
+
+        :param company_id: company_id
+        :param import_type: vend import type
+        :param filenames: list of remote (zip) file names
+        :return: set of file names which are already processed
+        """
+        processed_filenames = set()
+        if not filenames:
+            return processed_filenames
+
+        with get_local_connection_safe() as importer_local:
+            query = select([vend_device_history.c.zip_filename]).where(and_(
+                vend_device_history.c.company_id == company_id,
+                vend_device_history.c.import_type == import_type,
+                vend_device_history.c.actual_machine == true(),
+                vend_device_history.c.zip_filename.in_(set(filenames)))
+            ).distinct()
+
+            processed_filenames = {row.zip_filename for row in importer_local.execute(query)}
+
+        return processed_filenames
 
     @classmethod
     def check_archive_machine_id(cls, cloud_machine_id, device_pid, company_id, import_type):
-        importer_local = ConnectionForDatabases.get_local_connection().connect()
-        history_fail = select([vend_device_history]).where(and_(
-            vend_device_history.c.device_pid == device_pid,
-            vend_device_history.c.company_id == company_id,
-            vend_device_history.c.import_type == import_type,
-        )).order_by(desc(vend_device_history.c.file_timestamp)).limit(1)
-        result = importer_local.execute(history_fail)
-
-        if result.rowcount:
-            response = result.fetchone()
-            if int(response.machine_id) == int(cloud_machine_id):
-                return {'status': True, 'old_machine_id': response.machine_id}
-            else:
-                update_local_history = (
-                    update(vend_device_history).where(and_(
-                        vend_device_history.c.company_id == company_id,
-                        vend_device_history.c.device_pid == device_pid)
-                    ).values(actual_machine=False)
-                )
-                importer_local.execute(update_local_history)
+        with ConnectionForDatabases.get_local_connection().connect() as importer_local:
+            history_fail = select([vend_device_history]).where(and_(
+                vend_device_history.c.device_pid == device_pid,
+                vend_device_history.c.company_id == company_id,
+                vend_device_history.c.import_type == import_type,
+            )).order_by(desc(vend_device_history.c.file_timestamp)).limit(1)
+            result = importer_local.execute(history_fail)
+
+            if result.rowcount:
+                response = result.fetchone()
+                if int(response.machine_id) == int(cloud_machine_id):
+                    return {'status': True, 'old_machine_id': response.machine_id}
+                else:
+                    update_local_history = (
+                        update(vend_device_history).where(and_(
+                            vend_device_history.c.company_id == company_id,
+                            vend_device_history.c.device_pid == device_pid)
+                        ).values(actual_machine=False)
+                    )
+                    importer_local.execute(update_local_history)
 
-                return {'status': False, 'old_machine_id': response.machine_id}
-        result.close()
+                    return {'status': False, 'old_machine_id': response.machine_id}
+            result.close()
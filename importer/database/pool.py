@@ -0,0 +1,95 @@
+import threading
+import time
+import traceback
+
+from sqlalchemy import event
+
+from common.logging.setup import logger
+
+"""
+
+    Connection pool settings and leak detection of importer and cloud database engines.
+
+    Pool settings are read from DATABASE_CONNECTION envdir ("importer_pool", "cloud_pool"), missing settings are
+    engine defaults. Connection which is checked out longer than leak_timeout seconds is logged (once) with the stack
+    of code which checked it out, check runs on every checkout.
+
+    {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": 1800, "pool_pre_ping": true,
+     "leak_timeout": 300}
+
+"""
+
+logger_api = logger
+
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+
+def engine_pool_options(config, **defaults):
+    """
+
+    :param config: pool config from envdir
+    :param defaults: default pool options of engine
+    :return: create_engine pool keyword arguments
+    """
+    options = dict(defaults)
+    options.update({key: value for key, value in config.items() if key in POOL_OPTIONS})
+    return options
+
+
+class ConnectionLeakDetector(object):
+    def __init__(self, name, leak_timeout):
+        self.name = name
+        self.leak_timeout = leak_timeout
+        self.checked_out = {}
+        self.lock = threading.Lock()
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        now = time.time()
+        with self.lock:
+            self.checked_out[id(connection_record)] = {
+                'checkout_at': now,
+                'stack': ''.join(traceback.format_stack(limit=12)[:-1]),
+                'reported': False,
+            }
+            leaked = [
+                checkout for checkout in self.checked_out.values()
+                if not checkout['reported'] and now - checkout['checkout_at'] > self.leak_timeout
+            ]
+            for checkout in leaked:
+                checkout['reported'] = True
+
+        for checkout in leaked:
+            logger_api.warning('{} database connection checked out for {:.0f} sec, possible leak, checked out at:\n{}'
+                               .format(self.name, now - checkout['checkout_at'], checkout['stack']))
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.checked_out.pop(id(connection_record), None)
+
+    def leaked_connections(self):
+        """
+
+        :return: number of connections checked out longer than leak timeout
+        """
+        now = time.time()
+        with self.lock:
+            return sum(1 for checkout in self.checked_out.values()
+                       if now - checkout['checkout_at'] > self.leak_timeout)
+
+
+def watch_connection_leaks(engine, name, config):
+    """
+
+    :param engine: sqlalchemy engine
+    :param name: engine name in log
+    :param config: pool config from envdir, detection is disabled if leak_timeout is not set
+    :return: ConnectionLeakDetector or None
+    """
+    leak_timeout = config.get('leak_timeout')
+    if not leak_timeout:
+        return None
+
+    detector = ConnectionLeakDetector(name, leak_timeout)
+    event.listen(engine, 'checkout', detector.on_checkout)
+    event.listen(engine, 'checkin', detector.on_checkin)
+    return detector
@@ -0,0 +1,325 @@
+import atexit
+import signal
+import threading
+import time
+from datetime import datetime
+
+from elasticsearch.helpers import bulk
+
+from common.logging.setup import logger
+from common.urls.urls import elasticsearch_connection_url
+from elasticsearch_component.connection.connection import elastic_conn
+
+logger_api = logger
+
+"""
+
+    Buffered process flow logging.
+    Flow entries are collected in memory per elastic hash and written with one scripted
+    "_bulk" update per hash, instead of GET + full document reindex for every entry.
+
+    Enabled with "buffered_logger" key in ELASTIC_SEARCH envdir config, example:
+    "buffered_logger": {"enabled": true, "max_entries": 500, "flush_interval": 5}
+
+    Buffers are flushed on exit, on SIGTERM (if process has no own SIGTERM handler) and by consumer worker pool when
+    consumer is stopped (flush_process_flow_buffers).
+
+"""
+
+buffered_logger_config = elasticsearch_connection_url.get('buffered_logger', {})
+
+MAX_CACHED_INDEXES = 10000
+
+# Buffers created in this process (flush_process_flow_buffers)
+process_flow_buffers = []
+
+# Failed bulk update of process is re-queued, after last attempt it's written with single document update
+MAX_FLUSH_ATTEMPTS = 3
+
+# Append all buffered entries (in original order) on their nested fields and update document status.
+# Final status (set_status, end of process) is never overwritten by status of flow entry, flow entries
+# could be flushed later by other service (validator, importer).
+APPEND_FLOW_SCRIPT = (
+    "for (entry in params.entries) {"
+    " if (ctx._source[entry.field] == null) { ctx._source[entry.field] = []; }"
+    " ctx._source[entry.field].add(entry.value); "
+    "}"
+    " if (params.status != null && (params.final || ctx._source.status_final != true)) {"
+    " ctx._source.status = params.status; }"
+    " if (params.final) { ctx._source.status_final = true; }"
+    " ctx._source.updated_at = params.updated_at;"
+)
+
+
+def elastic_date_now():
+    return datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def new_pending_process(index):
+    return {'index': index, 'entries': [], 'status': None, 'final': False, 'attempts': 0}
+
+
+class ProcessFlowBuffer(object):
+    """
+    Collect process flow entries per elastic hash and flush them with elastic bulk API,
+    when size threshold (max_entries) or time threshold (flush_interval) is reached,
+    or explicitly when process is finished.
+    """
+
+    def __init__(self, doc_type, resolve_index, max_entries=500, flush_interval=5, client=elastic_conn):
+        """
+
+        :param doc_type: elastic doc type name
+        :param resolve_index: callable which return elastic index for process hash (None if process not exists)
+        :param max_entries: flush all buffered entries when this number of entries is buffered
+        :param flush_interval: max number of seconds entry stays in buffer
+        :param client: elastic connection
+        """
+        self.doc_type = doc_type
+        self.resolve_index = resolve_index
+        self.max_entries = int(max_entries)
+        self.flush_interval = float(flush_interval)
+        self.client = client
+        self.pending = {}
+        self.indexes = {}
+        self.pending_count = 0
+        self.last_flush = time.time()
+        self.lock = threading.RLock()
+        self.flush_thread = None
+
+    def cache_index(self, process_hash, index):
+        # Called under lock, indexes of buffered processes are never evicted
+        if process_hash not in self.indexes and len(self.indexes) >= MAX_CACHED_INDEXES:
+            self.indexes = {k: v for k, v in self.indexes.items() if k in self.pending}
+        self.indexes[process_hash] = index
+
+    def get_index(self, process_hash):
+        with self.lock:
+            index = self.indexes.get(process_hash)
+        if index:
+            return index
+
+        # Elastic request is not made under lock
+        return self.resolve_index(process_hash)
+
+    def pending_process(self, process_hash, index):
+        """
+        Called under lock, buffered process keeps its index, so it doesn't depend on index cache.
+
+        :return: buffered process of hash
+        """
+        self.cache_index(process_hash, index)
+        process = self.pending.get(process_hash)
+        if process is None:
+            process = self.pending[process_hash] = new_pending_process(index)
+        return process
+
+    def add(self, process_hash, field, value, status=None):
+        """
+
+        :param process_hash: uuid main process hash
+        :param field: nested document field (process, process_cloud ...)
+        :param value: nested entry
+        :param status: new main process status, if entry changes it
+        :return: True if entry is buffered, False if process not exists
+        """
+        index = self.get_index(process_hash)
+        if not index:
+            return False
+
+        with self.lock:
+            process = self.pending_process(process_hash, index)
+            process['entries'].append({'field': field, 'value': value})
+            if status is not None and not process['final']:
+                process['status'] = status
+            self.pending_count += 1
+            flush_all = (self.pending_count >= self.max_entries or
+                         time.time() - self.last_flush >= self.flush_interval)
+
+        self.start_flush_thread()
+        if flush_all:
+            self.flush()
+        return True
+
+    def set_status(self, process_hash, status):
+        """
+        Set main process status and flush all entries for this process (end of process).
+        """
+        index = self.get_index(process_hash)
+        if not index:
+            return False
+
+        with self.lock:
+            process = self.pending_process(process_hash, index)
+            process['status'] = status
+            process['final'] = True
+        self.flush(process_hash)
+        return True
+
+    def pop_pending(self, process_hash=None):
+        """
+
+        :return: dict of elastic hash -> (index, buffered process), removed from buffer
+        """
+        with self.lock:
+            if process_hash is None:
+                processes = self.pending
+                self.pending = {}
+                self.last_flush = time.time()
+            else:
+                processes = {}
+                if process_hash in self.pending:
+                    processes[process_hash] = self.pending.pop(process_hash)
+            self.pending_count -= sum(len(x['entries']) for x in processes.values())
+
+            return {elastic_hash: (process['index'], process) for elastic_hash, process in processes.items()}
+
+    def requeue(self, processes):
+        """
+        Put processes back to buffer (before entries buffered while they were sent).
+        """
+        with self.lock:
+            for elastic_hash, (index, process) in processes.items():
+                self.cache_index(elastic_hash, index)
+                newer = self.pending.get(elastic_hash)
+                if newer is not None:
+                    process['entries'].extend(newer['entries'])
+                    if newer['final'] or (newer['status'] is not None and not process['final']):
+                        process['status'] = newer['status']
+                    process['final'] = process['final'] or newer['final']
+                    self.pending_count -= len(newer['entries'])
+                self.pending[elastic_hash] = process
+                self.pending_count += len(process['entries'])
+
+        if processes:
+            self.start_flush_thread()
+
+    def update_action(self, elastic_hash, index, process):
+        return {
+            '_op_type': 'update',
+            '_index': index,
+            '_type': self.doc_type,
+            '_id': elastic_hash,
+            '_retry_on_conflict': 3,
+            'script': {
+                'lang': 'painless',
+                'inline': APPEND_FLOW_SCRIPT,
+                'params': {
+                    'entries': process['entries'],
+                    'status': process['status'],
+                    'final': process['final'],
+                    'updated_at': elastic_date_now()
+                }
+            }
+        }
+
+    def update_document(self, elastic_hash, index, process):
+        """
+        Single document update of process which failed in all bulk attempts.
+        """
+        action = self.update_action(elastic_hash, index, process)
+        try:
+            self.client.update(index=index, doc_type=self.doc_type, id=elastic_hash, body={'script': action['script']},
+                               retry_on_conflict=3)
+        except Exception as e:
+            logger_api.error("Elastic error update process {}, {} flow entries are not written: {}"
+                             .format(elastic_hash, len(process['entries']), e))
+
+    def flush(self, process_hash=None):
+        """
+
+        :param process_hash: flush only specific process, if not defined flush all buffered processes
+        :return: number of flushed entries
+        """
+        processes = self.pop_pending(process_hash)
+        if not processes:
+            return 0
+
+        actions = [self.update_action(elastic_hash, index, process)
+                   for elastic_hash, (index, process) in processes.items()]
+
+        # Bulk request is sent without lock, other threads can buffer entries meanwhile
+        try:
+            success, errors = bulk(self.client, actions, raise_on_error=False, raise_on_exception=False)
+        except Exception as e:
+            logger_api.error("Elastic error bulk update process: {}".format(e))
+            errors = [{'update': {'_id': elastic_hash}} for elastic_hash in processes]
+
+        if errors:
+            logger_api.error("Elastic error bulk update process: {}".format(errors))
+
+        failed = {}
+        for error in errors:
+            elastic_hash = list(error.values())[0].get('_id')
+            if elastic_hash not in processes:
+                continue
+            index, process = processes[elastic_hash]
+            process['attempts'] += 1
+            if process['attempts'] < MAX_FLUSH_ATTEMPTS:
+                failed[elastic_hash] = (index, process)
+            else:
+                self.update_document(elastic_hash, index, process)
+        self.requeue(failed)
+
+        return sum(len(process['entries']) for elastic_hash, (index, process) in processes.items()
+                   if elastic_hash not in failed)
+
+    def start_flush_thread(self):
+        if self.flush_thread is not None:
+            return
+        with self.lock:
+            if self.flush_thread is None:
+                self.flush_thread = threading.Thread(target=self.periodic_flush, daemon=True)
+                self.flush_thread.start()
+
+    def periodic_flush(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self.pending_count:
+                self.flush()
+
+
+def create_process_flow_buffer(doc_type, resolve_index):
+    """
+
+    :return: ProcessFlowBuffer if buffered logger is enabled in config, else None
+    """
+    if not buffered_logger_config.get('enabled'):
+        return None
+
+    process_flow_buffer = ProcessFlowBuffer(
+        doc_type=doc_type,
+        resolve_index=resolve_index,
+        max_entries=buffered_logger_config.get('max_entries', 500),
+        flush_interval=buffered_logger_config.get('flush_interval', 5)
+    )
+    atexit.register(process_flow_buffer.flush)
+    process_flow_buffers.append(process_flow_buffer)
+    flush_on_sigterm()
+    return process_flow_buffer
+
+
+def flush_process_flow_buffers():
+    """
+    Flush all process flow buffers of process (consumer shutdown).
+    """
+    for process_flow_buffer in process_flow_buffers:
+        try:
+            process_flow_buffer.flush()
+        except Exception as e:
+            logger_api.error("Elastic error flush process flow buffer: {}".format(e))
+
+
+def exit_on_sigterm(signum, frame):
+    flush_process_flow_buffers()
+    raise SystemExit(128 + signum)
+
+
+def flush_on_sigterm():
+    """
+    Flush buffers on SIGTERM if process doesn't handle it (default SIGTERM ends process without atexit).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, exit_on_sigterm)
@@ -1,6 +1,7 @@
 from elasticsearch_dsl.exceptions import ElasticsearchDslException
 from elasticsearch_component.connection.connection import elastic_conn
-from elasticsearch_component.core.mixin import convert_string_to_json
+from common.mixin.pagination import PageRequest, next_cursor
+from elasticsearch_component.core.mixin import convert_string_to_json, paginate_search, page_sort_values
 from elasticsearch_dsl import Search
 from common.mixin.enum_errors import UserEnum
 
@@ -61,10 +62,19 @@ class CloudVendImportQuery(object):
                     'message': 'Data returned successfully!'}
 
     @classmethod
-    def get_process_company_id(cls, company_id):
+    def get_process_company_id(cls, company_id, page=None):
+        """
+
+        :param company_id: id of company
+        :param page: PageRequest, first page with default size if not set
+        :return: array of JSON objects with results if results exist, next_cursor of next page
+        """
+        page = page or PageRequest()
         try:
-            search = Search(using=cls.client, index=cls.vend_index) \
-                .query('match', company_id=company_id)
+            search = paginate_search(
+                Search(using=cls.client, index=cls.vend_index).query('match', company_id=company_id),
+                page, nested_fields={'process_cloud_insert': 'import_data_process'}
+            )
         except ElasticsearchDslException as e:
             return {'status': False, 'results': [], 'message': 'Error: %s' % e}
         else:
@@ -72,15 +82,16 @@ class CloudVendImportQuery(object):
 
             response = search.execute()
 
-            if not response.hits.total:
+            if not len(response.hits):
                 return {'status': False,
                         'results': output,
+                        'next_cursor': None,
                         'message': 'No vend import data for company: %s' %
                                    (str(company_id))
                         }
 
             for hit in response:
-                output.append({
+                output.append(page.project({
                     'import_type': hit.import_type,
                     'status': hit.status,
                     'company_name': hit.company_name,
@@ -94,12 +105,14 @@ class CloudVendImportQuery(object):
                             'status': x['data_process_status'],
                             'date': x['data_process_created_at'].strftime("%Y-%m-%d %H:%M:%S")
 
-                        } for x in hit.import_data_process if x.data_process_type == UserEnum.USER.value
+                        } for x in getattr(hit, 'import_data_process', [])
+                        if x.data_process_type == UserEnum.USER.value
                     ]
-                })
+                }))
 
             return {'status': True,
                     'results': output,
+                    'next_cursor': next_cursor(page, page_sort_values(response)),
                     'message': 'Data returned successfully!'}
 
     @classmethod
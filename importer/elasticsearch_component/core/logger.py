@@ -7,18 +7,54 @@ from datetime import datetime
 from database.cloud_database.core.company_query import CloudLocalDatabaseSync
 from elasticsearch_component.models.models import CompanyProcess
 from elasticsearch_dsl import ValidationException
+from elasticsearch_component.core.buffer import create_process_flow_buffer, elastic_date_now
 from elasticsearch_component.core.mixin import convert_string_to_json
 
 logger_api = logger
 
 
+def return_company_process_index(process_hash):
+    if CompanyProcess.get(id=process_hash, ignore=404):
+        return CompanyProcess._doc_type.index
+    return None
+
+
 class CompanyProcessLogger(object):
     """
 
         This class represent multi class function.
         Functions for creating new process and update a process follow log.
+        If buffered logger is enabled, process flow is collected in memory and written with elastic bulk API.
 
     """
+    process_flow_buffer = create_process_flow_buffer(CompanyProcess._doc_type.name, return_company_process_index)
+
+    @classmethod
+    def process_not_exists(cls, process_hash):
+        return {
+            'process_updated': False,
+            'message': 'Process not exists for hash: %s' % process_hash
+        }
+
+    @classmethod
+    def buffer_process_flow(cls, process_hash, field, entry):
+        if not cls.process_flow_buffer.add(process_hash, field, entry):
+            return cls.process_not_exists(process_hash)
+
+        return {'process_updated': True,
+                'message': 'Process update buffered with hash: %s' % process_hash
+                }
+
+    @classmethod
+    def flush_process_flow(cls, process_hash=None):
+        """
+
+        :param process_hash: uuid main process hash, if not defined flush all buffered processes
+        :return: write buffered process flow into elastic
+        """
+        if cls.process_flow_buffer:
+            cls.process_flow_buffer.flush(process_hash)
+
     @classmethod
     def create_new_process(cls, company_id, process_type, process_request_type):
         """
@@ -59,6 +95,13 @@ class CompanyProcessLogger(object):
         :return: JSON with results True or False of create process flow
 
         """
+        if cls.process_flow_buffer:
+            return cls.buffer_process_flow(process_hash, 'process', {
+                'message': message,
+                'status': status,
+                'process_created_at': elastic_date_now()
+            })
+
         try:
             if CompanyProcess.get(id=process_hash, ignore=404):
 
@@ -88,6 +131,13 @@ class CompanyProcessLogger(object):
             :return: JSON with results True or False of create process flow
 
         """
+        if cls.process_flow_buffer:
+            return cls.buffer_process_flow(process_hash, 'process_cloud', {
+                'cloud_message': message,
+                'cloud_status': status,
+                'cloud_process_created_at': elastic_date_now()
+            })
+
         if CompanyProcess.get(id=process_hash, ignore=404):
             try:
                 company_process_log = CompanyProcess.get(id=process_hash, ignore=404)
@@ -114,6 +164,14 @@ class CompanyProcessLogger(object):
         :return: JSON with results True or False of closing process
 
         """
+        if cls.process_flow_buffer:
+            if not cls.process_flow_buffer.set_status(process_hash, str(status)):
+                return cls.process_not_exists(process_hash)
+
+            return {'process_updated': True,
+                    'message': 'Process status updated with: %s' % process_hash
+                    }
+
         if CompanyProcess.get(id=process_hash, ignore=404):
             try:
                 company_process_log = CompanyProcess.get(id=process_hash, ignore=404)
@@ -137,6 +195,7 @@ class CompanyProcessLogger(object):
         :param process_hash: uuid of main process hash
         :return: JSON with results of query request
         """
+        cls.flush_process_flow(process_hash)
         company_process = (CompanyProcess()
                            .search()
                            .query('match', _id=process_hash)
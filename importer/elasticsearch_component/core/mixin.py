@@ -6,3 +6,33 @@ def convert_string_to_json(string):
         return json.loads(string)
     except Exception as ex1:
         return string
+
+
+def paginate_search(search, page, nested_fields=None):
+    """
+
+    :param search: elastic search (query of history or log API)
+    :param page: PageRequest (common.mixin.pagination)
+    :param nested_fields: output field: elastic nested field, nested field is not fetched if output field is not
+    requested
+    :return: search of one page, newest first, next page continues after sort values of last hit (search_after)
+    """
+    search = search.sort({'created_at': {'order': 'desc'}}, {'_uid': {'order': 'asc'}})
+    if page.after:
+        if len(page.after) != 2:
+            raise ValueError('Cursor is not valid.')
+        search = search.extra(search_after=page.after)
+
+    excluded_fields = [source for field, source in (nested_fields or {}).items() if not page.include_field(field)]
+    if excluded_fields:
+        search = search.source(exclude=excluded_fields)
+    return search[0:page.limit]
+
+
+def page_sort_values(response):
+    """
+
+    :param response: response of search from paginate_search
+    :return: sort values of hits, for next page cursor
+    """
+    return [list(hit.meta.sort) for hit in response]
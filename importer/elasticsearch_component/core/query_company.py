@@ -1,9 +1,52 @@
-from elasticsearch_component.core.mixin import convert_string_to_json
+from common.mixin.pagination import PageRequest, next_cursor
+from elasticsearch_component.core.mixin import convert_string_to_json, paginate_search, page_sort_values
 from elasticsearch_component.models.models import CompanyProcess
 from elasticsearch_component.models.vend_models import VendImportProcess
 from elasticsearch_dsl import ValidationException
 from dateutil import parser
 
+# Max number of process hashes in one elastic ids query
+PROCESS_HASHES_BATCH_SIZE = 500
+
+# Nested process flow fields, excluded from history listing if not requested
+PROCESS_FLOW_FIELDS = ['process', 'process_cloud']
+
+# Process log output fields built from nested process flow fields
+PROCESS_LOG_NESTED_FIELDS = {'process_history': 'process', 'process_cloud': 'process_cloud'}
+
+
+def process_hit_to_dict(hit, include_process=True):
+    """
+
+    :param hit: CompanyProcess search hit
+    :param include_process: add process flow (process_history, process_cloud) of process
+    :return: JSON object of process
+    """
+    process = {
+        'process_type': hit.process_type,
+        'status': hit.status,
+        'process_request_type': hit.process_request_type,
+        'created_at': hit.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if include_process:
+        process['process_history'] = [
+            {
+                'message': convert_string_to_json(x['message']),
+                'status': x['status'],
+                'date': x['process_created_at'].strftime("%Y-%m-%d %H:%M:%S")
+
+            } for x in hit.process
+        ]
+        process['process_cloud'] = [
+            {
+                'message': convert_string_to_json(x['cloud_message']),
+                'status': x['cloud_status'],
+                'date': x['cloud_process_created_at'].strftime("%Y-%m-%d %H:%M:%S")
+
+            } for x in hit.process_cloud
+        ]
+    return process
+
 
 class GetCompanyProcessLog(object):
     """
@@ -11,61 +54,45 @@ class GetCompanyProcessLog(object):
         Logic is the same but it depends on parameters witch is passed to specific function.
     """
     @classmethod
-    def get_all_logs_based_on_company_id(cls, company_id):
+    def get_all_logs_based_on_company_id(cls, company_id, page=None):
         """
 
         :param company_id: company_id is company_id from cloud
-        :return: array of JSON object with results if exists on query
+        :param page: PageRequest, first page with default size if not set
+        :return: array of JSON object with results if exists on query, next_cursor of next page
 
         """
+        page = page or PageRequest()
         try:
-            company_process = (CompanyProcess()
-                               .search()
-                               .query('match', company_id=int(company_id))
-                               )
+            company_process = paginate_search(
+                CompanyProcess().search().query('match', company_id=int(company_id)),
+                page, nested_fields=PROCESS_LOG_NESTED_FIELDS
+            )
             response = company_process.execute()
         except ValidationException as e:
             return {'status': False, 'results': [], 'message': 'Error: %s' % e}
         else:
             output_query = []
-            if response.hits.total > 0:
+            if len(response.hits) > 0:
+                include_process = page.include_field('process_history') or page.include_field('process_cloud')
 
                 for hit in response:
-                    output_query.append(
-                        {
-                            'id': hit._id,
-                            'company_id': hit.company_id,
-                            'process_type': hit.process_type,
-                            'status': hit.status,
-                            'process_request_type': hit.process_request_type,
-                            'created_at': hit.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                            'process_history': [
-                                {
-                                    'message': convert_string_to_json(x['message']),
-                                    'status': x['status'],
-                                    'date': x['process_created_at'].strftime("%Y-%m-%d %H:%M:%S")
-
-                                } for x in hit.process
-                            ],
-                            'process_cloud': [
-                                {
-                                    'message': convert_string_to_json(x['cloud_message']),
-                                    'status': x['cloud_status'],
-                                    'date': x['cloud_process_created_at'].strftime(
-                                        "%Y-%m-%d %H:%M:%S")
-
-                                } for x in hit.process_cloud
-                            ]
-                        }
-                    )
+                    process = {
+                        'id': hit.meta.id,
+                        'company_id': hit.company_id,
+                    }
+                    process.update(process_hit_to_dict(hit, include_process))
+                    output_query.append(page.project(process))
 
                 return {'status': True,
                         'results': output_query,
+                        'next_cursor': next_cursor(page, page_sort_values(response)),
                         'message': 'Data success collected.'
                         }
             else:
                 return {'status': False,
                         'results': output_query,
+                        'next_cursor': None,
                         'message': 'No data for company: %s' % str(company_id)
                         }
 
@@ -306,30 +333,7 @@ class GetCompanyProcessLog(object):
         response = company_process.execute()
         if response.hits.total > 0:
             for hit in response:
-                output_query.append(
-                    {
-                        'process_type': hit.process_type,
-                        'status': hit.status,
-                        'process_request_type': hit.process_request_type,
-                        'created_at': hit.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                        'process_history': [
-                            {
-                                'message': convert_string_to_json(x['message']),
-                                'status': x['status'],
-                                'date': x['process_created_at'].strftime("%Y-%m-%d %H:%M:%S")
-
-                            } for x in hit.process
-                        ],
-                        'process_cloud': [
-                            {
-                                'message': convert_string_to_json(x['cloud_message']),
-                                'status': x['cloud_status'],
-                                'date': x['cloud_process_created_at'].strftime("%Y-%m-%d %H:%M:%S")
-
-                            } for x in hit.process_cloud
-                        ]
-                    }
-                )
+                output_query.append(process_hit_to_dict(hit))
 
             return {'status': True,
                     'results': output_query,
@@ -342,6 +346,38 @@ class GetCompanyProcessLog(object):
                         str(company_id), process_hash)
                     }
 
+    @classmethod
+    def get_processes_by_hashes(cls, company_id, process_hashes, include_process=False):
+        """
+        Processes of history page, one elastic query per PROCESS_HASHES_BATCH_SIZE hashes instead of query per hash.
+
+        :param company_id: company_id is company_id from cloud
+        :param process_hashes: uuids of imports
+        :param include_process: return process flow (process_history, process_cloud), by default only main process
+        :return: JSON object with results, process hash: process
+        """
+        process_hashes = list(dict.fromkeys(process_hashes))
+        output_query = {}
+
+        for start in range(0, len(process_hashes), PROCESS_HASHES_BATCH_SIZE):
+            batch = process_hashes[start:start + PROCESS_HASHES_BATCH_SIZE]
+            company_process = (
+                CompanyProcess()
+                    .search()
+                    .query('match', company_id=int(company_id))
+                    .query('ids', values=batch)
+            )
+            if not include_process:
+                company_process = company_process.source(exclude=PROCESS_FLOW_FIELDS)
+
+            for hit in company_process[0:len(batch)].execute():
+                output_query[hit.meta.id] = process_hit_to_dict(hit, include_process)
+
+        return {'status': bool(output_query),
+                'results': output_query,
+                'message': 'Found processes: {}'.format(len(output_query))
+                }
+
     @classmethod
     def get_process_by_type(cls, company_id, process_type, process_request):
         """
@@ -1,5 +1,7 @@
 from database.cloud_database.core.company_query import CloudLocalDatabaseSync
-from elasticsearch_component.core.mixin import convert_string_to_json
+from common.mixin.pagination import PageRequest, next_cursor
+from elasticsearch_component.core.query_company import PROCESS_HASHES_BATCH_SIZE
+from elasticsearch_component.core.mixin import convert_string_to_json, paginate_search, page_sort_values
 from datetime import datetime
 from common.mixin.enum_errors import EnumErrorType
 from common.urls.urls import elasticsearch_connection_url
@@ -8,20 +10,57 @@ from elasticsearch_dsl import Search
 from elasticsearch_component.connection.connection import elastic_conn
 import uuid
 from elasticsearch_dsl import ValidationException
+from dateutil import parser
 from common.logging.setup import vend_logger
+from elasticsearch_component.core.buffer import create_process_flow_buffer, elastic_date_now
+from common.mixin.enum_errors import ProcessEnum, UserEnum
 from elasticsearch_component.models.vend_models import (VendImportProcess, VendImportIndex)
 
 
 logger_api = vend_logger
 
+# Nested process flow fields of vend process, excluded from history listing if not requested
+VEND_PROCESS_FLOW_FIELDS = ['import_data_process', 'import_data_cloud']
+
+
+def return_vend_process_index(process_hash):
+    process_list = VendImportProcessLogger.search_all_processes(process_hash)
+    if len(process_list):
+        return process_list[0]['index']
+    return None
+
 
 class VendImportProcessLogger(object):
     """
     Container class for holding methods pertaining to logging vend imports.
+    If buffered logger is enabled, process flow is collected in memory and written with elastic bulk API.
     """
     # Use a vend index prefix and * wildcard to encompass all vend indices
     vend_index = elasticsearch_connection_url.get('index_vend', '') + '*'
     client = elastic_conn
+    process_flow_buffer = create_process_flow_buffer(VendImportProcess._doc_type.name, return_vend_process_index)
+
+    @classmethod
+    def buffer_process_flow(cls, process_hash, field, entry, status):
+        if not cls.process_flow_buffer.add(process_hash, field, entry, status=status):
+            return {
+                'process_updated': False,
+                'message': 'Process does not exist for hash: %s' % process_hash
+            }
+
+        return {'process_updated': True,
+                'message': 'Process update buffered with hash: %s' % process_hash
+                }
+
+    @classmethod
+    def flush_process_flow(cls, process_hash=None):
+        """
+
+        :param process_hash: uuid main process hash, if not defined flush all buffered processes
+        :return: write buffered process flow into elastic
+        """
+        if cls.process_flow_buffer:
+            cls.process_flow_buffer.flush(process_hash)
 
     @classmethod
     def create_new_process(cls, company_id, import_type, import_request_type):
@@ -69,6 +108,15 @@ class VendImportProcessLogger(object):
         :return: JSON with results True or False of create process flow
 
         """
+        if cls.process_flow_buffer:
+            return cls.buffer_process_flow(process_hash, 'import_data_process', {
+                'data_process': ProcessEnum.PROCESS_FILE_VALIDATION.value,
+                'data_process_type': UserEnum.ADMIN.value,
+                'data_process_message': message,
+                'data_process_status': status,
+                'data_process_created_at': elastic_date_now()
+            }, status)
+
         process_list = cls.search_all_processes(process_hash)
 
         if len(process_list):
@@ -106,6 +154,15 @@ class VendImportProcessLogger(object):
             :return: JSON with results True or False of create process flow
 
         """
+        if cls.process_flow_buffer:
+            return cls.buffer_process_flow(process_hash, 'import_data_cloud', {
+                'cloud_process': ProcessEnum.PROCESS_CLOUD_VALIDATION.value,
+                'cloud_process_type': UserEnum.ADMIN.value,
+                'cloud_process_message': message,
+                'cloud_process_status': status,
+                'cloud_process_created_at': elastic_date_now()
+            }, status)
+
         process = cls.search_all_processes(process_hash)
         if len(process):
             process = process[0]
@@ -137,6 +194,17 @@ class VendImportProcessLogger(object):
         :return: JSON with results True or False of closing process
 
         """
+        if cls.process_flow_buffer:
+            if not cls.process_flow_buffer.set_status(process_hash, str(status)):
+                return {
+                    'process_updated': False,
+                    'message': 'Process does not exist for hash: %s' % process_hash
+                }
+
+            return {'process_updated': True,
+                    'message': 'Process updated with hash: %s' % process_hash
+                    }
+
         process_list = cls.search_all_processes(process_hash)
 
         if len(process_list):
@@ -181,6 +249,38 @@ class VendImportProcessLogger(object):
         return output
 
 
+def vend_process_hit_to_dict(hit, include_process=True):
+    """
+
+    :param hit: vend import process search hit
+    :param include_process: add process flow (process_history, process_cloud) of process
+    :return: JSON object of process
+    """
+    process = {
+        'process_type': hit.import_type,
+        'status': hit.status,
+        'process_request_type': hit.import_request_type,
+        'created_at': parser.parse(hit.created_at).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if include_process:
+        process['process_history'] = [
+            {
+                'message': convert_string_to_json(x['data_process_message']),
+                'status': x['data_process_status'],
+                'date': parser.parse(x['data_process_created_at']).strftime("%Y-%m-%d %H:%M:%S")
+            } for x in hit.import_data_process
+        ]
+        process['process_cloud'] = [
+            {
+                'message': convert_string_to_json(x['cloud_process_message']),
+                'status': x['cloud_process_status'],
+                'date': parser.parse(x['cloud_process_created_at']).strftime("%Y-%m-%d %H:%M:%S")
+
+            } for x in hit.import_data_cloud
+        ]
+    return process
+
+
 class GetVendImportProcessLog(object):
     vend_index = elasticsearch_connection_url.get('index_vend', '') + '*'
     client = elastic_conn
@@ -192,6 +292,7 @@ class GetVendImportProcessLog(object):
         :param process_hash: uuid of specific import
         :return: array of JSON objects with results if results exist
         """
+        VendImportProcessLogger.flush_process_flow(process_hash)
         vend_import_process = (Search(using=cls.client, index=cls.vend_index).query(
             'match', company_id=int(company_id)).query('match', _id=process_hash)
         )
@@ -199,35 +300,11 @@ class GetVendImportProcessLog(object):
         output = []
 
         response = vend_import_process.execute()
-        from dateutil import parser
         if response.hits.total > 0:
             for hit in response:
 
                 try:
-                    output.append(
-                        {
-                            'process_type': hit.import_type,
-                            'status': hit.status,
-                            'process_request_type': hit.import_request_type,
-                            'created_at':  parser.parse(hit.created_at).strftime("%Y-%m-%d %H:%M:%S"),
-                            'process_history': [
-                                {
-                                    'message': convert_string_to_json(x['data_process_message']),
-                                    'status': x['data_process_status'],
-                                    'date': parser.parse(x['data_process_created_at']).strftime("%Y-%m-%d %H:%M:%S")
-                                } for x in hit.import_data_process
-                            ],
-
-                            'process_cloud': [
-                                {
-                                    'message': convert_string_to_json(x['cloud_process_message']),
-                                    'status': x['cloud_process_status'],
-                                    'date': parser.parse(x['cloud_process_created_at']).strftime("%Y-%m-%d %H:%M:%S")
-
-                                } for x in hit.import_data_cloud
-                            ]
-                        }
-                    )
+                    output.append(vend_process_hit_to_dict(hit))
                 except Exception as e:
                     logger_api.error('Elastic search could not find specific process: ' +str(e))
 
@@ -246,25 +323,65 @@ class GetVendImportProcessLog(object):
             }
 
     @classmethod
-    def get_process_by_company_id(cls, company_id):
+    def get_processes_by_hashes(cls, company_id, process_hashes, include_process=False):
         """
+        Processes of history page, one elastic query per PROCESS_HASHES_BATCH_SIZE hashes instead of query per hash.
+
         :param company_id: id of company for which processes are queried
-        :return: array of JSON objects with results if results exist
+        :param process_hashes: uuids of imports
+        :param include_process: return process flow (process_history, process_cloud), by default only main process
+        :return: JSON object with results, process hash: process
+        """
+        process_hashes = list(dict.fromkeys(process_hashes))
+        output = {}
+
+        for start in range(0, len(process_hashes), PROCESS_HASHES_BATCH_SIZE):
+            batch = process_hashes[start:start + PROCESS_HASHES_BATCH_SIZE]
+            for process_hash in batch:
+                VendImportProcessLogger.flush_process_flow(process_hash)
+            vend_import_process = (Search(using=cls.client, index=cls.vend_index).query(
+                'match', company_id=int(company_id)).query('ids', values=batch)
+            )
+            if not include_process:
+                vend_import_process = vend_import_process.source(exclude=VEND_PROCESS_FLOW_FIELDS)
+
+            for hit in vend_import_process[0:len(batch)].execute():
+                try:
+                    output[hit.meta.id] = vend_process_hit_to_dict(hit, include_process)
+                except Exception as e:
+                    logger_api.error('Elastic search could not find specific process: ' + str(e))
+
+        return {'status': bool(output),
+                'results': output,
+                'message': 'Found processes: {}'.format(len(output))
+                }
+
+    @classmethod
+    def get_process_by_company_id(cls, company_id, page=None):
         """
-        vend_import_process = Search(using=cls.client, index=cls.vend_index).query('match', company_id=company_id)
+        :param company_id: id of company for which processes are queried
+        :param page: PageRequest, first page with default size if not set
+        :return: array of JSON objects with results if results exist, next_cursor of next page
+        """
+        page = page or PageRequest()
+        vend_import_process = paginate_search(
+            Search(using=cls.client, index=cls.vend_index).query('match', company_id=company_id),
+            page, nested_fields={'import_data_process': 'import_data_process'}
+        )
 
         output = []
 
         response = vend_import_process.execute()
-        if not response.hits.total:
+        if not len(response.hits):
             return {'status': False,
                     'results': output,
-                    'message': 'No data for company with id: %d' % (
+                    'next_cursor': None,
+                    'message': 'No data for company with id: %s' % (
                         company_id)
                     }
         else:
             for hit in response:
-                output.append({
+                output.append(page.project({
                     'import_type': hit.import_type,
                     'import_request_type': hit.import_request_type,
                     'status': hit.status,
@@ -279,11 +396,12 @@ class GetVendImportProcessLog(object):
                             'status': x['data_process_status'],
                             'date': x['data_process_created_at'].strftime("%Y-%m-%d %H:%M:%S")
 
-                        } for x in hit.import_data_process
-                    ]})
+                        } for x in getattr(hit, 'import_data_process', [])
+                    ]}))
 
         return {'status': True,
                 'results': output,
+                'next_cursor': next_cursor(page, page_sort_values(response)),
                 'message': 'Data returned successfully!'}
 
     @classmethod
@@ -82,30 +82,34 @@ class CompanyProcess(DocType):
         return self.status
 
 
-try:
-    # Create new index if requested index does not exist
-    es = elastic_conn
-    full_index = '{}{}'.format(import_index_prefix, INDEX_SUFFIX)
-    if not es.indices.exists(full_index):
-        index = Index(full_index)
-        index.settings(number_of_shards=1,
-                       number_of_replicas=0)
-        try:
-            # just try to create valid index
-            index.create()
-            process_id = uuid.uuid4().hex
-            company_process = CompanyProcess(meta={'id': process_id})
-            company_process.company_id = 0
-            company_process.company_name = 'TEST'
-            company_process.process_type = 'API'
-            company_process.status = 'STARTED'
-            company_process.process_request_type = 'EVENTS'
-            company_process.created_at = datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-            company_process.save()
-        except RequestError:
-            pass
-except Exception as e:
-    print(e)
+def create_company_process_index():
+    """
+    Create company process index if index does not exist, called from service entry points (bootstrap).
+    """
+    try:
+        # Create new index if requested index does not exist
+        es = elastic_conn
+        full_index = '{}{}'.format(import_index_prefix, INDEX_SUFFIX)
+        if not es.indices.exists(full_index):
+            index = Index(full_index)
+            index.settings(number_of_shards=1,
+                           number_of_replicas=0)
+            try:
+                # just try to create valid index
+                index.create()
+                process_id = uuid.uuid4().hex
+                company_process = CompanyProcess(meta={'id': process_id})
+                company_process.company_id = 0
+                company_process.company_name = 'TEST'
+                company_process.process_type = 'API'
+                company_process.status = 'STARTED'
+                company_process.process_request_type = 'EVENTS'
+                company_process.created_at = datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                company_process.save()
+            except RequestError:
+                pass
+    except Exception as e:
+        print(e)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+"""
+
+    Benchmark of cloud entity lookups used in cloud validators and import handlers.
+    Compare list scans (old way) with CloudEntityIndex on growing number of rows and cloud entities.
+
+    Usage (from importer directory):
+    PYTHONPATH=. python ../tests/benchmarks/benchmark_cloud_entity_index.py
+
+"""
+import timeit
+
+from common.importers.cloud_db.entity_index import CloudEntityIndex
+
+
+def generate_data(size):
+    entities = [{'ext_id': str(i), 'name': 'name_%d' % i, 'alive': i % 10 != 0} for i in range(size)]
+    rows = [{'machine_id': str(i * 2)} for i in range(size)]
+    return entities, rows
+
+
+def list_scan(entities, rows):
+    alive_ids = [e['ext_id'] for e in entities if e['alive'] is True]
+    for row in rows:
+        row['machine_id'] in alive_ids
+
+
+def entity_index(entities, rows):
+    index = CloudEntityIndex(entities)
+    for row in rows:
+        row['machine_id'] in index.alive_ids
+
+
+def run_benchmark(sizes=(1000, 2000, 4000, 8000), number=3):
+    print('{:>8} {:>14} {:>14}'.format('size', 'list scan (s)', 'index (s)'))
+    for size in sizes:
+        entities, rows = generate_data(size)
+        list_time = timeit.timeit(lambda: list_scan(entities, rows), number=number) / number
+        index_time = timeit.timeit(lambda: entity_index(entities, rows), number=number) / number
+        print('{:>8} {:>14.4f} {:>14.4f}'.format(size, list_time, index_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,62 @@
+"""
+
+    Micro benchmark of EVA vend counter diff.
+    Compare substring search of old PA7 line for every new PA7 line (old way) with diff_pa7 keyed index,
+    on synthetic machines with growing number of columns (4 payment types per column).
+
+    Usage (from importer directory):
+    PYTHONPATH=. python ../tests/benchmarks/benchmark_eva_diff.py
+
+"""
+import random
+import timeit
+
+from common.mixin.eva_diff import PA7_PAYMENT_TYPES, diff_pa7
+from common.mixin.eva_parser import eva_records
+
+
+def generate_machine(columns):
+    old_lines = []
+    new_lines = []
+    for column in range(1, columns + 1):
+        for payment_type in PA7_PAYMENT_TYPES:
+            counter = random.randint(0, 1000)
+            vends = random.randint(0, 5)
+            old_lines.append('PA7*%d*%s*0*150*%d*%d*0*0' % (column, payment_type, counter, counter * 150))
+            new_lines.append('PA7*%d*%s*0*150*%d*%d*0*0' % (
+                column, payment_type, counter + vends, (counter + vends) * 150))
+    return old_lines, new_lines
+
+
+def substring_diff(old_lines, new_lines):
+    total_vends = 0
+    for payment_type in PA7_PAYMENT_TYPES:
+        old_fields = [x for x in old_lines if x.split('*')[2] == payment_type]
+        new_fields = [x for x in new_lines if x.split('*')[2] == payment_type]
+        for new_line in new_fields:
+            key = '*'.join(new_line.split('*')[:4])
+            final_processing = list(filter(lambda y: key in y, old_fields))
+            if final_processing:
+                total_vends += int(new_line.split('*')[5]) - int(final_processing[0].split('*')[5])
+    return total_vends
+
+
+def keyed_diff(old_lines, new_lines):
+    deltas = diff_pa7(eva_records(old_lines, ('PA7',)), eva_records(new_lines, ('PA7',)))
+    return sum(delta.vends for delta in deltas)
+
+
+def run_benchmark(sizes=(50, 200, 500), number=20):
+    random.seed(0)
+    print('{:>8} {:>16} {:>12} {:>10}'.format('columns', 'substring (ms)', 'keyed (ms)', 'speedup'))
+    for size in sizes:
+        old_lines, new_lines = generate_machine(size)
+        assert substring_diff(old_lines, new_lines) == keyed_diff(old_lines, new_lines)
+        substring_time = timeit.timeit(lambda: substring_diff(old_lines, new_lines), number=number) / number
+        keyed_time = timeit.timeit(lambda: keyed_diff(old_lines, new_lines), number=number) / number
+        print('{:>8} {:>16.3f} {:>12.3f} {:>10.1f}'.format(
+            size, substring_time * 1000, keyed_time * 1000, substring_time / keyed_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
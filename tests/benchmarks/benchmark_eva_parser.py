@@ -0,0 +1,68 @@
+"""
+
+    Benchmark of EVA file parsing in vend import.
+    Compare scan of all EVA lines per prefix with repeated '*' splitting of PA lines (old way) with single pass
+    parse_eva_lines and records split once, time and peak memory (tracemalloc) on growing number of EVA files.
+
+    Usage (from importer directory):
+    PYTHONPATH=. python ../tests/benchmarks/benchmark_eva_parser.py
+
+"""
+import timeit
+import tracemalloc
+
+from common.mixin.eva_parser import eva_records, parse_eva_lines
+
+PREFIXES = ['LA1*', 'PA', 'EA', 'CA', 'DA', 'ID', 'VA', 'SE']
+
+
+def generate_eva(products=60):
+    lines = ['DXS*9252131001*VA*V0/6*1\n', 'ID1*12345*VM1**0\n', 'ID4*2*978\n']
+    for product in range(1, products + 1):
+        lines.append('PA1*%d*150\n' % product)
+        lines.append('PA2*%d*%d\n' % (product * 3, product * 450))
+        for payment_type in ('CA', 'DB', 'DC', 'DD'):
+            lines.append('PA7*%d*%s*0*150*%d*%d*0*0\n' % (product, payment_type, product, product * 150))
+        lines.append('LA1*0*%d*150\n' % product)
+    lines.extend(['CA2*100*15000\n', 'VA1*4550*29\n', 'DA2*10*1500\n', 'EA2*EGS*1\n', 'SE*10*0001\n'])
+    return lines
+
+
+def prefix_scans(files):
+    for lines in files:
+        eva_content = {prefix: [x.rstrip('\n') for x in lines if x.startswith(prefix)] for prefix in PREFIXES}
+        pa7 = [x for x in eva_content['PA'] if x.startswith('PA7')]
+        for payment_type in ('CA', 'DB', 'DC', 'DD'):
+            for line in [x for x in pa7 if x.split('*')[2] == payment_type]:
+                '*'.join(line.split('*')[:4])
+
+
+def single_pass(files):
+    for lines in files:
+        eva_content = parse_eva_lines(lines)
+        for record in eva_records(eva_content['pa_field'], ('PA7',)):
+            record[1:4]
+
+
+def peak_memory(function, *args):
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024.0 / 1024.0
+
+
+def run_benchmark(sizes=(100, 1000, 3000), number=3):
+    print('{:>8} {:>14} {:>14} {:>16} {:>16}'.format(
+        'files', 'scans (s)', 'single (s)', 'scans (MiB)', 'single (MiB)'))
+    eva = generate_eva()
+    for size in sizes:
+        files = [eva] * size
+        scans_time = timeit.timeit(lambda: prefix_scans(files), number=number) / number
+        single_time = timeit.timeit(lambda: single_pass(files), number=number) / number
+        print('{:>8} {:>14.4f} {:>14.4f} {:>16.2f} {:>16.2f}'.format(
+            size, scans_time, single_time, peak_memory(prefix_scans, files), peak_memory(single_pass, files)))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,77 @@
+"""
+
+    Benchmark of cloud product data preparation in planogram validation.
+    Compare pandas DataFrame filtering (old way) with CloudEntityIndex columns and indexes,
+    time and peak memory (tracemalloc) on growing product catalogue.
+
+    Usage (from importer directory):
+    PYTHONPATH=. python ../tests/benchmarks/benchmark_planogram_cloud_data.py
+
+"""
+import timeit
+import tracemalloc
+
+import pandas as pd
+
+from common.importers.cloud_db.entity_index import CloudEntityIndex
+
+
+def generate_data(size):
+    products = [{
+        'id': i,
+        'ext_id': str(i),
+        'name': 'product_%d' % i,
+        'alive': i % 10 != 0,
+        'barcode': 'barcode_%d' % i,
+        'is_composite': i % 7 == 0,
+        'is_combo': i % 11 == 0,
+        'use_packing': False,
+    } for i in range(size)]
+    rows = [str(i * 3 % size) for i in range(size)]
+    return products, rows
+
+
+def data_frame_filter(products, rows):
+    products_data_frame = pd.DataFrame(products)
+    alive_company_products_data_frame = products_data_frame.loc[products_data_frame['alive']]
+    alive_products = alive_company_products_data_frame.to_dict('records')
+    alive_ext_ids = alive_company_products_data_frame['ext_id'].tolist()
+    products_specific_field_data_frame = products_data_frame[['ext_id', 'is_composite', 'is_combo']]
+    for product_ext_id in rows[:200]:
+        if product_ext_id in alive_ext_ids:
+            products_specific_field_data_frame.loc[
+                products_specific_field_data_frame['ext_id'] == product_ext_id].to_dict('records')
+    return alive_products
+
+
+def entity_index(products, rows):
+    products_index = CloudEntityIndex(products)
+    alive_products = products_index.alive
+    for product_ext_id in rows[:200]:
+        if product_ext_id in products_index.alive_ids:
+            products_index.index_by('ext_id', alive=False).get(product_ext_id, [])
+    return alive_products
+
+
+def peak_memory(function, *args):
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024.0 / 1024.0
+
+
+def run_benchmark(sizes=(1000, 5000, 20000), number=3):
+    print('{:>8} {:>16} {:>12} {:>18} {:>14}'.format(
+        'size', 'data frame (s)', 'index (s)', 'data frame (MiB)', 'index (MiB)'))
+    for size in sizes:
+        products, rows = generate_data(size)
+        data_frame_time = timeit.timeit(lambda: data_frame_filter(products, rows), number=number) / number
+        index_time = timeit.timeit(lambda: entity_index(products, rows), number=number) / number
+        print('{:>8} {:>16.4f} {:>12.4f} {:>18.2f} {:>14.2f}'.format(
+            size, data_frame_time, index_time,
+            peak_memory(data_frame_filter, products, rows), peak_memory(entity_index, products, rows)))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,85 @@
+"""
+
+    Benchmark of planogram entity builder (planogram_processor) on growing number of planograms.
+    Every planogram has 60 columns in import file and already exists in cloud database (update of all columns),
+    time per planogram should stay the same when number of planograms grows.
+
+    Usage (from importer directory):
+    PYTHONPATH=. envdir ../envdir_example python ../tests/benchmarks/benchmark_planogram_processor.py
+
+"""
+import timeit
+
+from common.importers.cloud_db.planogram_helpers import planogram_processor
+
+COLUMNS = 60
+
+
+def generate_data(size):
+    import_data = []
+    planograms_columns = []
+    layout_columns_tags = []
+    for planogram in range(size):
+        planogram_name = 'Planogram_%d' % planogram
+        for index in range(1, COLUMNS + 1):
+            column_id = planogram * COLUMNS + index
+            import_data.append({
+                'product_rotation_group_id': '',
+                'minimum_route_pickup': 0,
+                'recipe_id': '',
+                'prg_id': '',
+                'is_composite': False,
+                'is_combo': False,
+                'product_id': 'product',
+                'company_product_id': 1,
+                'planogram_id': planogram_name,
+                'planogram_name': planogram_name,
+                'planogram_action': 1,
+                'multiple_pricelists': 2,
+                'fill_rate': 2,
+                'capacity': 4,
+                'tags': 'tags',
+                'warning': 1,
+                'product_warning_percentage': 10,
+                'component_warning_percentage': 10,
+                'column_number': index,
+                'price_1': '1.5',
+                'price_2': '2',
+                'mail_notification': '',
+                'combo_recipe_id': '',
+            })
+            planograms_columns.append({
+                'planogram_id': planogram + 1,
+                'external_id': planogram_name,
+                'caption': planogram_name,
+                'index': index,
+                'alive': True,
+                'column_id': column_id,
+            })
+            layout_columns_tags.append({
+                'id': column_id,
+                'column_id': column_id,
+                'columns_tags_id': column_id,
+                'caption': 'tags',
+                'alive': True,
+            })
+    return import_data, planograms_columns, layout_columns_tags
+
+
+def run_benchmark(sizes=(50, 100, 200, 400), number=1):
+    print('{:>10} {:>10} {:>14} {:>18}'.format('planograms', 'rows', 'total (s)', 'per planogram (ms)'))
+    for size in sizes:
+        import_data, planograms_columns, layout_columns_tags = generate_data(size)
+        total_time = timeit.timeit(lambda: planogram_processor(
+            data=import_data,
+            planograms_columns=planograms_columns,
+            product_components=[],
+            layout_components=[],
+            layout_columns_tags=layout_columns_tags
+        ), number=number) / number
+        print('{:>10} {:>10} {:>14.4f} {:>18.4f}'.format(
+            size, len(import_data), total_time, total_time / size * 1000))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,47 @@
+"""
+
+    Benchmark of csv import row validation.
+    Compare jsonschema.validate per row (old way) with compiled RowValidator.
+
+    Usage (from importer directory):
+    PYTHONPATH=. python ../tests/benchmarks/benchmark_row_validator.py
+
+"""
+import timeit
+
+from jsonschema import validate, FormatChecker, ValidationError
+
+from common.mixin.validation_const import ImportType, return_import_type_based_on_parser
+from common.validators.csv.row_validator import RowValidator
+
+
+def generate_rows(parser, size):
+    return [{field: str(i % 2) for field in parser['required']} for i in range(size)]
+
+
+def jsonschema_validate(parser, rows):
+    for row in rows:
+        try:
+            validate(row, parser, format_checker=FormatChecker())
+        except ValidationError:
+            pass
+
+
+def row_validator(parser, rows):
+    validator = RowValidator(parser)
+    for row in rows:
+        validator.first_error(row)
+
+
+def run_benchmark(size=2000, number=1):
+    print('{:>14} {:>18} {:>18}'.format('import type', 'jsonschema (s)', 'compiled (s)'))
+    for import_type in [ImportType.MACHINES, ImportType.LOCATIONS, ImportType.PRODUCTS]:
+        parser = return_import_type_based_on_parser(import_type.name)
+        rows = generate_rows(parser, size)
+        old_time = timeit.timeit(lambda: jsonschema_validate(parser, rows), number=number) / number
+        new_time = timeit.timeit(lambda: row_validator(parser, rows), number=number) / number
+        print('{:>14} {:>18.4f} {:>18.4f}'.format(import_type.name, old_time, new_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,85 @@
+import threading
+from unittest import TestCase
+
+from common.apis.vendon.paging import RateLimiter, fetch_pages, page_offsets
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+class FakeVendonApi(object):
+    def __init__(self, total, limit):
+        self.total = total
+        self.limit = limit
+        self.offsets = []
+        self.lock = threading.Lock()
+
+    def fetch_page(self, offset):
+        with self.lock:
+            self.offsets.append(offset)
+        return {
+            'result': list(range(offset, min(offset + self.limit, self.total))),
+            'paging': {'total': self.total, 'limit': self.limit},
+        }
+
+
+class TestPaging(TestCase):
+    def test_page_offsets(self):
+        self.assertEqual(page_offsets({'total': 1200, 'limit': 500}), [500, 1000])
+        self.assertEqual(page_offsets({'total': 1000, 'limit': 500}), [500])
+        self.assertEqual(page_offsets({'total': 500, 'limit': 500}), [])
+        self.assertEqual(page_offsets({'total': 1200, 'limit': 500}, 500), [1000])
+
+    def test_fetch_pages_in_order(self):
+        for workers in [1, 4]:
+            api = FakeVendonApi(2350, 100)
+            pages = list(fetch_pages(api.fetch_page, workers=workers))
+            self.assertEqual([record for _, records in pages for record in records], list(range(2350)))
+            self.assertEqual([next_offset for next_offset, _ in pages], list(range(100, 2350, 100)) + [2350])
+            self.assertEqual(sorted(api.offsets), list(range(0, 2350, 100)))
+
+    def test_resume_from_offset(self):
+        api = FakeVendonApi(1000, 300)
+        pages = list(fetch_pages(api.fetch_page, offset=600, workers=2))
+        self.assertEqual([record for _, records in pages for record in records], list(range(600, 1000)))
+        self.assertEqual(pages[-1][0], 1000)
+
+        api = FakeVendonApi(0, 300)
+        self.assertEqual(list(fetch_pages(api.fetch_page, workers=2)), [(0, [])])
+
+    def test_page_error(self):
+        api = FakeVendonApi(1000, 100)
+
+        def fetch_page(offset):
+            if offset == 500:
+                raise ValueError('Vendon API communication error')
+            return api.fetch_page(offset)
+
+        pages = fetch_pages(fetch_page, workers=3)
+        with self.assertRaises(ValueError):
+            list(pages)
+
+    def test_rate_limiter(self):
+        fake = FakeClock()
+        limiter = RateLimiter(4, clock=fake.clock, sleep=fake.sleep)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual(fake.sleeps, [0.25, 0.5])
+
+        fake.now += 10
+        limiter.acquire()
+        self.assertEqual(len(fake.sleeps), 2)
+
+        unlimited = RateLimiter(0, clock=fake.clock, sleep=fake.sleep)
+        unlimited.acquire()
+        unlimited.acquire()
+        self.assertEqual(len(fake.sleeps), 2)
@@ -0,0 +1,110 @@
+import json
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from common.apis.vendon.vendon_api_handler import VENDS_CHECKPOINT_KEY, VendonApiException, VendonVendsApiJob
+
+
+class FakeCompanyParameters(object):
+    def __init__(self):
+        self.parameters = {}
+
+    def get_parameter(self, company_id, key, default=None):
+        return self.parameters.get(key, default)
+
+    def set_parameter(self, company_id, key, value):
+        self.parameters[key] = value
+
+    def delete_parameter(self, company_id, key):
+        self.parameters.pop(key, None)
+
+
+class FakeVendsFetcher(object):
+    url = 'https://vendon/stats/vends'
+    publish_batch_vends = 1
+
+    def __init__(self, pages, fail_at=None):
+        self.pages = pages
+        self.fail_at = fail_at
+        self.offsets = []
+
+    def fetch_pages(self, query_params, offset=0):
+        self.offsets.append(offset)
+        for page_offset in range(offset, len(self.pages)):
+            if page_offset == self.fail_at:
+                raise VendonApiException('Network error')
+            yield page_offset + 1, self.pages[page_offset]
+
+
+class TestResumableFetchVends(TestCase):
+    def setUp(self):
+        self.parameters = FakeCompanyParameters()
+        self.published = []
+        self.hashes = iter(['hash1', 'hash2'])
+        patches = [
+            patch('common.apis.vendon.vendon_api_handler.CompanyParameters', self.parameters),
+            patch('common.apis.vendon.vendon_api_handler.CompanyFailHistory'),
+            patch('common.apis.vendon.vendon_api_handler.MainVendProcessLogger'),
+            patch('common.apis.vendon.vendon_api_handler.create_elastic_hash',
+                  side_effect=lambda **kwargs: next(self.hashes)),
+            patch('common.apis.vendon.vendon_api_handler.vend_producer.publish',
+                  side_effect=lambda message, retry: self.published.append(message)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def job(self, vends_fetcher):
+        job = VendonVendsApiJob.__new__(VendonVendsApiJob)
+        job.company_id = 1
+        job.token = 'token'
+        job.language = 'en'
+        job.email = None
+        job.import_type = 'VENDON_VENDS'
+        job.request_type = 'VENDON_API'
+        job.skipped_vends = 0
+        job.vends_fetcher = vends_fetcher
+        job._fetch_machines = MagicMock()
+        job._transform_vends = lambda vends: list(vends)
+        return job
+
+    def checkpoint(self):
+        return json.loads(self.parameters.parameters[VENDS_CHECKPOINT_KEY])
+
+    def batches(self):
+        return [(x['elastic_hash'], x['batch_no'], x['is_last'], x['data']) for x in self.published]
+
+    def test_resumed_fetch_continues_elastic_process(self):
+        pages = [['a'], ['b'], ['c']]
+        self.assertFalse(self.job(FakeVendsFetcher(pages, fail_at=2)).fetch_vends(10, 20, resumable=True))
+        # job failed, its process isn't continued
+        self.assertEqual(self.checkpoint()['elastic_hash'], None)
+        self.assertEqual(self.checkpoint()['offset'], 2)
+
+        self.parameters.set_parameter(1, VENDS_CHECKPOINT_KEY, json.dumps({
+            'from_timestamp': 10, 'to_timestamp': 20, 'offset': 2, 'elastic_hash': 'hash1', 'published_batches': 2,
+            'last_published': False
+        }))
+        vends_fetcher = FakeVendsFetcher(pages)
+        self.assertTrue(self.job(vends_fetcher).fetch_vends(10, 20, resumable=True))
+
+        self.assertEqual(vends_fetcher.offsets, [2])
+        self.assertEqual(self.batches()[2:], [('hash1', 3, False, ['c']), ('hash1', 4, True, [])])
+        self.assertTrue(self.checkpoint()['last_published'])
+
+    def test_fetch_interrupted_after_last_batch_is_finished(self):
+        self.parameters.set_parameter(1, VENDS_CHECKPOINT_KEY, json.dumps({
+            'from_timestamp': 10, 'to_timestamp': 20, 'offset': 1, 'elastic_hash': 'hash1', 'published_batches': 2,
+            'last_published': True
+        }))
+        self.assertTrue(self.job(FakeVendsFetcher([['a']])).fetch_vends(10, 20, resumable=True))
+        self.assertEqual(self.published, [])
+
+    def test_checkpoint_of_other_window_starts_new_process(self):
+        self.parameters.set_parameter(1, VENDS_CHECKPOINT_KEY, json.dumps({
+            'from_timestamp': 0, 'to_timestamp': 10, 'offset': 1, 'elastic_hash': 'old', 'published_batches': 1,
+            'last_published': False
+        }))
+        self.assertTrue(self.job(FakeVendsFetcher([['a']])).fetch_vends(10, 20, resumable=True))
+        self.assertEqual(self.batches(), [('hash1', 1, False, ['a']), ('hash1', 2, True, [])])
+        self.assertEqual(self.checkpoint()['elastic_hash'], 'hash1')
@@ -0,0 +1,43 @@
+import threading
+from contextlib import contextmanager
+from unittest import TestCase
+from unittest.mock import patch
+
+from common.importers.cloud_db import common
+
+
+class TestPrefetchCloudData(TestCase):
+    def setUp(self):
+        self.snapshots = []
+        self.query_threads = set()
+
+    @contextmanager
+    def cloud_unit_of_work(self, snapshot_id=None):
+        self.snapshots.append(snapshot_id)
+        yield
+
+    def query(self, company_id):
+        self.query_threads.add(threading.current_thread().name)
+        return [company_id]
+
+    def prefetch(self):
+        return common.prefetch_cloud_data({
+            'products': (self.query, (1,)),
+            'recipes': (self.query, (2,)),
+        })
+
+    @patch('common.importers.cloud_db.common.export_unit_of_work_snapshot', return_value='00000003-0000001B-1')
+    def test_queries_import_unit_of_work_snapshot(self, export_unit_of_work_snapshot):
+        with patch('common.importers.cloud_db.common.cloud_unit_of_work', self.cloud_unit_of_work):
+            results, timings = self.prefetch()
+        self.assertEqual(results, {'products': [1], 'recipes': [2]})
+        self.assertEqual(sorted(timings), ['products', 'recipes'])
+        self.assertEqual(self.snapshots, ['00000003-0000001B-1'] * 2)
+        self.assertNotIn(threading.current_thread().name, self.query_threads)
+
+    @patch('common.importers.cloud_db.common.export_unit_of_work_snapshot', return_value=None)
+    def test_queries_without_unit_of_work(self, export_unit_of_work_snapshot):
+        with patch('common.importers.cloud_db.common.cloud_unit_of_work', self.cloud_unit_of_work):
+            results, timings = self.prefetch()
+        self.assertEqual(results, {'products': [1], 'recipes': [2]})
+        self.assertEqual(self.snapshots, [])
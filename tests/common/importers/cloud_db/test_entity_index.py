@@ -0,0 +1,117 @@
+from unittest import TestCase
+
+from common.importers.cloud_db.entity_index import CloudEntityIndex, FieldValueIndex, check_field_uniqueness
+
+
+class TestCloudEntityIndex(TestCase):
+    def setUp(self):
+        self.entities = [
+            {'ext_id': '1', 'name': 'first', 'alive': True},
+            {'ext_id': '2', 'name': 'second', 'alive': False},
+            {'ext_id': '3', 'name': 'third', 'alive': False},
+            {'ext_id': '3', 'name': 'third', 'alive': True},
+            {'ext_id': '4', 'name': 'fourth', 'alive': True},
+        ]
+        self.index = CloudEntityIndex(self.entities)
+
+    def test_alive(self):
+        self.assertEqual(self.index.alive, [self.entities[0], self.entities[3], self.entities[4]])
+        self.assertEqual(self.index.alive_ids, {'1', '3', '4'})
+        self.assertEqual(self.index.alive_names, {'first', 'third', 'fourth'})
+
+    def test_entity_alive_and_dead_is_alive(self):
+        self.assertEqual(self.index.dead_ids, {'2'})
+
+    def test_get_alive(self):
+        self.assertIs(self.index.get_alive('3'), self.entities[3])
+        self.assertIsNone(self.index.get_alive('2'))
+        self.assertIsNone(self.index.get_alive('5'))
+
+    def test_get_alive_and_dead(self):
+        alive_ids, dead_ids = self.index.get_alive_and_dead(['1', '2', '5'])
+        self.assertEqual(alive_ids, {'1'})
+        self.assertEqual(dead_ids, {'2'})
+
+    def test_column(self):
+        self.assertEqual(self.index.column('ext_id'), ['1', '3', '4'])
+        self.assertEqual(self.index.column('name', alive=False), ['first', 'second', 'third', 'third', 'fourth'])
+        self.assertIs(self.index.column('ext_id'), self.index.column('ext_id'))
+
+    def test_index_by(self):
+        self.assertEqual(self.index.index_by('name')['third'], [self.entities[3]])
+        self.assertEqual(self.index.index_by('name', alive=False)['third'], [self.entities[2], self.entities[3]])
+        self.assertNotIn('second', self.index.index_by('name'))
+        self.assertIs(self.index.index_by('ext_id', 'name')[('4', 'fourth')][0], self.entities[4])
+
+    def test_custom_id_field(self):
+        index = CloudEntityIndex([{'code': 'a', 'alive': True}], id_field='code')
+        self.assertEqual(index.get_alive('a'), {'code': 'a', 'alive': True})
+
+
+class TestFieldValueIndex(TestCase):
+    def setUp(self):
+        self.index = FieldValueIndex([
+            ['1', 'barcode_a'],
+            ['2', 'barcode_b'],
+            ['3', 'barcode_b'],
+        ])
+
+    def test_exists(self):
+        self.assertTrue(self.index.exists('barcode_a'))
+        self.assertFalse(self.index.exists('barcode_c'))
+
+    def test_exists_exclude_updated_entity(self):
+        self.assertFalse(self.index.exists('barcode_a', exclude_ext_id='1'))
+        self.assertTrue(self.index.exists('barcode_b', exclude_ext_id='2'))
+        self.assertTrue(self.index.exists('barcode_a', exclude_ext_id='2'))
+
+    def test_get_ext_id(self):
+        self.assertEqual(self.index.get_ext_id('barcode_b'), '2')
+        self.assertIsNone(self.index.get_ext_id('barcode_c'))
+
+
+CREATE, UPDATE, DELETE = 0, 1, 2
+
+
+class TestCheckFieldUniqueness(TestCase):
+    def setUp(self):
+        # [ext_id, barcode] of products in cloud
+        self.data_from_db = [['1', 'barcode_a'], ['2', 'barcode_b'], ['3', 'barcode_b']]
+
+    def test_unique_values(self):
+        data_from_file = [['10', 'barcode_x', CREATE], ['11', 'barcode_y', CREATE], ['1', 'barcode_z', UPDATE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), ([], []))
+
+    def test_duplicated_in_file(self):
+        data_from_file = [['10', 'barcode_x', CREATE], ['11', 'barcode_x', CREATE], ['12', 'barcode_y', CREATE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), (['barcode_x'], []))
+
+    def test_create_with_value_in_db(self):
+        data_from_file = [['10', 'barcode_a', CREATE], ['11', 'barcode_c', CREATE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), ([], ['barcode_a']))
+
+    def test_update_keeps_own_value(self):
+        # Updated product may keep its own value
+        data_from_file = [['1', 'barcode_a', UPDATE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), ([], []))
+
+    def test_update_with_value_of_other_product(self):
+        data_from_file = [['1', 'barcode_b', UPDATE], ['2', 'barcode_b', UPDATE]]
+        # barcode_b of product 2 is also used by product 3
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), (['barcode_b'], ['barcode_b']))
+
+        data_from_file = [['2', 'barcode_a', UPDATE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), ([], ['barcode_a']))
+
+    def test_duplicate_reported_once(self):
+        data_from_file = [['10', 'barcode_a', CREATE], ['2', 'barcode_a', UPDATE], ['11', 'barcode_a', CREATE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), (['barcode_a'], ['barcode_a']))
+
+    def test_empty_values_and_delete_are_ignored(self):
+        data_from_file = [['10', None, CREATE], ['11', None, CREATE], ['12', '', CREATE], ['13', '<null>', UPDATE],
+                          ['2', 'barcode_a', DELETE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, self.data_from_db), ([], []))
+
+    def test_index_argument(self):
+        data_from_file = [['10', 'barcode_b', CREATE]]
+        self.assertEqual(check_field_uniqueness(data_from_file, FieldValueIndex(self.data_from_db)), ([], ['barcode_b']))
@@ -0,0 +1,176 @@
+from unittest import TestCase
+
+from common.importers.cloud_db.planogram_helpers import PlanogramColumnUpdate, PlanogramEntityIndex, PlanogramHandler, \
+    PlanogramValidation
+
+
+def cloud_planogram_columns():
+    columns = []
+    for planogram_id, caption, external_id in [(1, 'Coffee', 'PL1'), (2, 'Snacks', 'PL2'), (3, 'Coffee', 'PL3')]:
+        for index in range(1, 4):
+            columns.append({
+                'planogram_id': planogram_id,
+                'caption': caption,
+                'external_id': external_id,
+                'index': index,
+                'alive': index != 2 or planogram_id != 2,
+                'column_id': planogram_id * 10 + index,
+            })
+    # Columns of planogram are not adjacent in cloud database
+    columns.append(dict(columns[0], index=4, column_id=14))
+    return columns
+
+
+class TestPlanogramEntityIndex(TestCase):
+    """
+    Indexed lookups return same entities as list filters used before index.
+    """
+
+    def setUp(self):
+        self.planograms_columns = cloud_planogram_columns()
+        self.layout_columns_tags = [
+            {'id': 1, 'column_id': 11, 'columns_tags_id': 1, 'caption': 'old', 'alive': False},
+            {'id': 2, 'column_id': 11, 'columns_tags_id': 2, 'caption': 'hot', 'alive': True},
+            {'id': 3, 'column_id': 11, 'columns_tags_id': 3, 'caption': 'new', 'alive': True},
+            {'id': 4, 'column_id': 21, 'columns_tags_id': 4, 'caption': 'cold', 'alive': True},
+        ]
+        self.layout_components = [
+            {'id': 1, 'layout_id': 1, 'alive': True},
+            {'id': 2, 'layout_id': 2, 'alive': True},
+            {'id': 3, 'layout_id': 1, 'alive': False},
+            {'id': 4, 'layout_id': 1, 'alive': True},
+        ]
+        self.product_components = [
+            {'product_component_id': 1, 'product_component_recipe_id': 5, 'product_component_alive': True},
+            {'product_component_id': 2, 'product_component_recipe_id': 6, 'product_component_alive': True},
+            {'product_component_id': 3, 'product_component_recipe_id': 5, 'product_component_alive': False},
+            {'product_component_id': 4, 'product_component_recipe_id': 5, 'product_component_alive': True},
+        ]
+        self.entity_index = PlanogramEntityIndex(
+            self.planograms_columns, self.product_components, self.layout_components, self.layout_columns_tags)
+
+    def test_planogram_columns(self):
+        for planogram_ext_id, planogram_name in [
+            ('PL1', 'Coffee'), ('PL2', 'Snacks'), ('PL2', 'Coffee'), ('PL4', 'Coffee'), ('PL3', 'Tea'),
+            ('PL4', 'Tea'),
+        ]:
+            expected = list(filter(
+                lambda c: (c['external_id'] == planogram_ext_id or c['caption'] == planogram_name) and c['alive'],
+                self.planograms_columns))
+            self.assertEqual(self.entity_index.get_planogram_columns(planogram_ext_id, planogram_name), expected)
+
+        self.assertEqual(
+            [x['column_id'] for x in self.entity_index.get_planogram_columns('PL2', 'Snacks')], [21, 23])
+        self.assertEqual(
+            [x['column_id'] for x in self.entity_index.get_planogram_columns('PL1', 'Coffee')],
+            [11, 12, 13, 31, 32, 33, 14])
+
+    def test_column_tags(self):
+        for column_id in [11, 12, 21, 99]:
+            expected = list(filter(lambda c: c['column_id'] == column_id and c['alive'], self.layout_columns_tags))
+            self.assertEqual(self.entity_index.get_column_tags(column_id), expected[0] if expected else None)
+        self.assertEqual(self.entity_index.get_column_tags(11)['caption'], 'hot')
+
+    def test_layout_components(self):
+        for planogram_id in [1, 2, 3, None]:
+            expected = list(filter(
+                lambda c: c['layout_id'] == planogram_id and c['alive'], self.layout_components))
+            self.assertEqual(self.entity_index.get_layout_components(planogram_id), expected)
+        self.assertEqual([x['id'] for x in self.entity_index.get_layout_components(1)], [1, 4])
+
+    def test_product_components(self):
+        for recipe_id in [5, 6, 7]:
+            expected = list(filter(
+                lambda c: c['product_component_recipe_id'] == recipe_id and c['product_component_alive'],
+                self.product_components))
+            self.assertEqual(self.entity_index.get_product_components(recipe_id), expected)
+        self.assertEqual([x['product_component_id'] for x in self.entity_index.get_product_components(5)], [1, 4])
+
+
+class TestPlanogramColumnUpdate(TestCase):
+    """
+    Column updates are unique by caption, index & external_id and indexed lookups return same columns as list
+    filters used before index.
+    """
+
+    def setUp(self):
+        self.columns = cloud_planogram_columns()
+        # Same column is matched by external id and by caption of other planogram
+        self.columns.append(dict(self.columns[0], column_id=99))
+        self.column_update = PlanogramColumnUpdate()
+        for column in self.columns:
+            self.column_update.add(column)
+
+        self.old_column_update = []
+        old_column_check = []
+        for column in self.columns:
+            column_test_string = str(column['caption']) + str(column['index']) + str(column['external_id'])
+            if column_test_string not in old_column_check:
+                old_column_check.append(column_test_string)
+                self.old_column_update.append(column)
+
+    def test_unique_columns(self):
+        self.assertEqual(self.column_update.columns, self.old_column_update)
+        self.assertEqual(len(self.column_update.columns), len(self.columns) - 1)
+        self.assertNotIn(99, [x['column_id'] for x in self.column_update.columns])
+
+    def test_get_column(self):
+        for index in range(6):
+            for caption in ['Coffee', 'Snacks', 'Tea']:
+                expected = list(filter(
+                    lambda p: p['index'] == index and p['caption'] == caption, self.old_column_update))
+                self.assertEqual(self.column_update.get(index, caption), expected[0] if expected else None)
+        self.assertEqual(self.column_update.get(2, 'Coffee')['column_id'], 12)
+
+    def test_has_alive_column(self):
+        for index in range(6):
+            expected = list(filter(lambda c: c['index'] == index and c['alive'], self.old_column_update))
+            self.assertEqual(self.column_update.has_alive_column(index), bool(expected))
+
+        column_update = PlanogramColumnUpdate()
+        column_update.add(dict(self.columns[4]))
+        self.assertFalse(column_update.has_alive_column(2))
+
+
+class TestPlanogramHandler(TestCase):
+    def setUp(self):
+        self.import_data = [
+            {'planogram_id': 'PL1', 'planogram_name': 'Coffee'},
+            {'planogram_id': 'PL1', 'planogram_name': 'Coffee'},
+            {'planogram_id': 'PL2', 'planogram_name': 'Coffee'},
+            {'planogram_id': None, 'planogram_name': 'Snacks'},
+            {'planogram_id': 'PL3', 'planogram_name': None},
+        ]
+
+    def test_group_unique_values_without_empty_groups(self):
+        self.assertEqual(
+            {k: sorted(v) for k, v in PlanogramHandler.group_unique_values(
+                self.import_data, 'planogram_name', 'planogram_id').items()},
+            {'Coffee': ['PL1', 'PL2'], 'Snacks': [None]})
+        self.assertEqual(
+            PlanogramHandler.group_unique_values(self.import_data, 'planogram_id', 'planogram_name'),
+            {'PL1': ['Coffee'], 'PL2': ['Coffee'], 'PL3': [None]})
+
+    def test_duplicate_checks_with_empty_values(self):
+        self.assertEqual(PlanogramHandler.check_planogram_name_per_external_id(self.import_data), {'PL2': 'Coffee'})
+        errors = PlanogramHandler.check_planogram_external_id_per_planogram_name(self.import_data)
+        self.assertEqual(sorted(errors['Coffee']), ['PL1', 'PL2'])
+
+
+class TestPlanogramValidationRecipeCodes(TestCase):
+    def test_recipe_code_is_compared_as_string(self):
+        recipe_data_code = [
+            {'recipe_code': 100, 'product_ext_id': 'P1', 'alive': True},
+            {'recipe_code': '100', 'product_ext_id': 'P1', 'alive': True},
+            {'recipe_code': 100, 'product_ext_id': 'P2', 'alive': False},
+        ]
+        validation = PlanogramValidation('planograms', '<null>', 'en', [], 1, [], [])
+        recipe_code_index, recipe_product_index = validation.get_recipe_code_index(recipe_data_code, 'recipe_code')
+
+        for recipe_ext_id, product_ext_id in [('100', 'P1'), ('100', 'P2'), (100, 'P1')]:
+            expected = list(filter(
+                lambda recipe: str(recipe['recipe_code']) == recipe_ext_id and
+                recipe['product_ext_id'] == product_ext_id and recipe['alive'], recipe_data_code))
+            self.assertEqual(recipe_product_index.get((recipe_ext_id, product_ext_id), []), expected)
+        self.assertEqual(len(recipe_product_index[('100', 'P1')]), 2)
+        self.assertIs(validation.get_recipe_code_index(recipe_data_code, 'recipe_code')[1], recipe_product_index)
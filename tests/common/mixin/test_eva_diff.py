@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from common.mixin.eva_diff import diff_pa7, diff_pa_positions
+from common.mixin.eva_parser import eva_pa_positions, eva_records
+
+
+class TestEvaDiff(TestCase):
+    def test_pa7_deltas(self):
+        old = eva_records(['PA7*1*CA*0*150*10*1500', 'PA7*1*DB*0*150*4*600', 'PA7*12*CA*0*200*7*1400'], ('PA7',))
+        new = eva_records(['PA7*1*DB*0*150*5*750', 'PA7*12*CA*0*200*9*1800', 'PA7*1*CA*0*150*12*1800',
+                           'PA7*2*CA*0*100*3*300', 'PA7*3*XX*0*100*3*300'], ('PA7',))
+
+        deltas = diff_pa7(old, new)
+
+        # grouped by payment type, unknown payment type is skipped
+        self.assertEqual([(d.product_number, d.payment_type, d.vends) for d in deltas],
+                         [('12', 'CA', 2), ('1', 'CA', 2), ('2', 'CA', 0), ('1', 'DB', 1)])
+        self.assertEqual(deltas[1].value(), 300)
+        self.assertEqual(deltas[1].old_lines(), ['PA7*1*CA*0*150*10*1500'])
+
+    def test_pa7_price_list_is_part_of_key(self):
+        old = eva_records(['PA7*1*CA*01*150*10*1500', 'PA7*1*CA*0*150*20*3000'], ('PA7',))
+        new = eva_records(['PA7*1*CA*0*150*21*3150'], ('PA7',))
+
+        self.assertEqual([(d.vends, d.value()) for d in diff_pa7(old, new)], [(1, 150)])
+
+    def test_pa_positions_match_whole_product_number(self):
+        old = eva_pa_positions(eva_records(['PA1*12*150', 'PA2*30*4500', 'PA1*1*100', 'PA2*5*500'], ('PA1', 'PA2')))
+        new = eva_pa_positions(eva_records(['PA1*1*100', 'PA2*7*700', 'PA1*12*150', 'PA2*29*4350'], ('PA1', 'PA2')))
+
+        deltas = diff_pa_positions(old, new)
+
+        self.assertEqual([(d.product_number, d.vends) for d in deltas], [('1', 2), ('12', -1)])
+        self.assertEqual(deltas[0].value(), 200)
+        self.assertEqual(deltas[1].new_line(), 'PA*12*29*4350')
@@ -0,0 +1,54 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from common.mixin.eva_parser import (eva_field, eva_line, eva_pa_position_line, eva_pa_positions, eva_records,
+                                     parse_eva_lines, read_eva_file)
+
+EVA = (
+    'DXS*9252131001*VA*V0/6*1\r\n'
+    'ID1*12345*VM1**0\r\n'
+    'ID4*2*978\r\n'
+    'LA1*0*10*150\r\n'
+    'LA2*0*10*150\r\n'
+    'PA1*10*150\r\n'
+    'PA2*25*3750\r\n'
+    'PA1*11*200\r\n'
+    'PA2*4*800\r\n'
+    'PA7*10*CA*0*150*25*3750\r\n'
+    'CA2*100*15000\r\n'
+    'VA1*4550*29\r\n'
+    'SE*10*0001\r\n'
+)
+
+
+class TestEvaParser(TestCase):
+    def test_read_eva_file(self):
+        with tempfile.NamedTemporaryFile('wb', suffix='.eva', delete=False) as eva_file:
+            eva_file.write(EVA.encode('utf-8'))
+        try:
+            eva_content = read_eva_file(eva_file.name)
+        finally:
+            os.remove(eva_file.name)
+
+        # same lines as filtering of all file lines by every prefix
+        lines = EVA.splitlines(True)
+        for key, prefix in [('la_field', 'LA1*'), ('pa_field', 'PA'), ('ea_field', 'EA'), ('ca_field', 'CA'),
+                            ('da_field', 'DA'), ('id_field', 'ID'), ('va_field', 'VA'), ('se_field', 'SE')]:
+            self.assertEqual(eva_content[key], [x.rstrip('\n') for x in lines if x.startswith(prefix)])
+        self.assertEqual(eva_content['la_field'], ['LA1*0*10*150\r'])
+
+    def test_records(self):
+        eva_content = parse_eva_lines(EVA.replace('\r', '').splitlines(True))
+        records = eva_records(eva_content['pa_field'], ('PA7',))
+        self.assertEqual(records, [('PA7', '10', 'CA', '0', '150', '25', '3750')])
+        self.assertEqual(eva_line(records[0]), eva_content['pa_field'][-1])
+        self.assertEqual(eva_field(records[0], 6), '3750')
+        self.assertIsNone(eva_field(records[0], 7))
+
+    def test_pa_positions(self):
+        eva_content = parse_eva_lines(EVA.replace('\r', '').splitlines(True))
+        positions = eva_pa_positions(eva_records(eva_content['pa_field'], ('PA1', 'PA2')))
+        self.assertEqual(positions, [('10', '25', '3750'), ('11', '4', '800')])
+        self.assertEqual(eva_pa_position_line(positions[0]), 'PA*10*25*3750')
+        self.assertEqual(eva_pa_positions(eva_records(['PA1*10*150'], ('PA1', 'PA2'))), [])
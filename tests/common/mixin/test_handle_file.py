@@ -8,7 +8,7 @@ from unittest.mock import patch
 
 from common.logging.setup import logger
 from common.mixin.enum_errors import EnumValidationMessage as enum_msg
-from common.mixin.handle_file import CsvValidatorHandleFIle
+from common.mixin.handle_file import CsvValidatorHandleFIle, content_rows_to_dict
 from common.mixin.validation_const import return_import_type_based_on_parser, \
     machineParser
 from common.mixin.validator_import import (
@@ -236,6 +236,44 @@ class TestHandleFile(TestCase):
         for header in required_headers:
             self.assertTrue(result[0][header])
 
+    def test_serializer_data__importer_and_cloud_rows_in_one_pass(self):
+        import_type = 'machines'
+        parser = return_import_type_based_on_parser(import_type.upper())
+
+        file_path = create_file(
+            base_path=STORE_DIR,
+            file_name='test_file',
+            extension='.csv',
+            import_type=import_type,
+            delimiter=';',
+            validity='valid',
+            fields='all_fields'
+        )[1]
+
+        headers, content_rows = self.csv_validator_handle_file.read_file_content(file_path)
+        result = list(self.csv_validator_handle_file.iter_serialized_data(headers, content_rows, parser))
+
+        # one pass over file content returns same rows as serializing file for importer and cloud separately
+        self.assertEqual(
+            [importer_row for importer_row, cloud_row in result],
+            self.csv_validator_handle_file.serializer_data(file_path, parser, 'csv_validator')
+        )
+        self.assertEqual(
+            [cloud_row for importer_row, cloud_row in result],
+            self.csv_validator_handle_file.serializer_data(file_path, parser, 'cloud_validator')
+        )
+
+    def test_content_rows_to_dict(self):
+        headers = ['machine_id', 'machine_name', 'machine_action']
+        content_rows = [['1', 'first'], ['2', 'second', '1', 'extra']]
+
+        result = list(content_rows_to_dict(headers, content_rows))
+
+        # same output as csv.DictReader
+        self.assertEqual(result[0], {'machine_id': '1', 'machine_name': 'first', 'machine_action': None})
+        self.assertEqual(
+            result[1], {'machine_id': '2', 'machine_name': 'second', 'machine_action': '1', None: ['extra']})
+
     def test_handle_zip_file__zipped_files(self):
         """Test handle_zip_file method with a zip archive."""
         # create several files
@@ -0,0 +1,181 @@
+import fnmatch
+import json
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from common.mixin.handle_file import ImportProcessHandler
+from common.mixin.validation_const import ImportType
+
+
+class FakeRedisManagement(object):
+    """
+    In memory redis keys and lists used by ImportProcessHandler
+    """
+    hashes = {}
+    lists = {}
+    values = {}
+
+    @classmethod
+    def reset(cls):
+        cls.hashes = {}
+        cls.lists = {}
+        cls.values = {}
+
+    @classmethod
+    def redis_lock(cls, key, timeout=60):
+        return threading.Lock()
+
+    @classmethod
+    def redis_key_exist_check(cls, key):
+        return key in cls.hashes
+
+    @classmethod
+    def get_data_from_redis_hgetall(cls, key):
+        return cls.hashes[key]
+
+    @classmethod
+    def hmset_to_redis(cls, key, data):
+        cls.hashes.setdefault(key, {}).update({k: str(v) for k, v in data.items()})
+
+    @classmethod
+    def set_to_redis_expire(cls, key, time_in_seconds):
+        pass
+
+    @classmethod
+    def push_to_redis_list(cls, key, data):
+        cls.lists.setdefault(key, []).append(json.dumps(data))
+
+    @classmethod
+    def pop_from_redis_list(cls, key):
+        data = cls.lists.get(key)
+        return json.loads(data.pop(0)) if data else None
+
+    @classmethod
+    def peek_redis_list(cls, key):
+        data = cls.lists.get(key)
+        return json.loads(data[0]) if data else None
+
+    @classmethod
+    def get_data_from_redis(cls, key):
+        return cls.values.get(key)
+
+    @classmethod
+    def set_data_to_redis_permanent(cls, key, data):
+        cls.values[key] = json.dumps(data)
+
+    @classmethod
+    def delete_redis_key(cls, key):
+        cls.values.pop(key, None)
+
+    @classmethod
+    def redis_list_length(cls, key):
+        return len(cls.lists.get(key, []))
+
+    @classmethod
+    def scan_redis_keys(cls, pattern):
+        return fnmatch.filter(list(cls.lists), pattern)
+
+
+@patch('common.mixin.handle_file.RedisManagement', FakeRedisManagement)
+@patch('common.email.send_email.send_email_on_import_error')
+@patch('common.mixin.elastic_login.ElasticCloudLoginFunctions.update_main_process')
+@patch('common.mixin.elastic_login.ElasticCloudLoginFunctions.create_cloud_process_flow')
+@patch('common.mixin.elastic_login.ElasticCloudLoginFunctions.create_process_flow')
+@patch('common.rabbit_mq.validator_file_q.validator_publisher.publish_file_validation',
+       return_value={'success': True, 'message': 'Published to Q.'})
+class TestImportProcessHandler(TestCase):
+    def setUp(self):
+        FakeRedisManagement.reset()
+
+    def start_or_park(self, elastic_hash, import_type=ImportType.MACHINES.name):
+        input_file = '/history/1_{}$machines.csv'.format(elastic_hash)
+        handler = ImportProcessHandler(
+            company_id=1, elastic_hash=elastic_hash, file_path=input_file, import_type=import_type)
+        return handler.start_or_park_import_process({
+            'company_id': 1,
+            'elastic_hash': elastic_hash,
+            'type_of_process': import_type,
+            'emails': ['user@example.com'],
+            'input_file': input_file,
+            'filename': 'machines.csv',
+            'language': 'en',
+            'import_type': import_type,
+            'set_running_process': import_type != ImportType.PLANOGRAMS.name,
+        }, [{'external_id': elastic_hash}], 'JWT token')
+
+    def finish(self, elastic_hash):
+        ImportProcessHandler(
+            company_id=1, elastic_hash=elastic_hash, file_path='', import_type=ImportType.MACHINES.name
+        ).finish_import_process_redis('cloud', 'finished')
+
+    def test_park_reference_and_dispatch_in_order(self, publish, create_process_flow, *args):
+        self.assertEqual(self.start_or_park('first'), (True, None))
+        self.assertEqual(self.start_or_park('second'), (False, 'first'))
+        self.assertEqual(self.start_or_park('third'), (False, 'first'))
+
+        # Redis queue holds reference to parked import data, without data and token
+        parked_imports = [json.loads(x) for x in FakeRedisManagement.lists['1_import_fifo_queue']]
+        self.assertEqual([x['elastic_hash'] for x in parked_imports], ['second', 'third'])
+        for parked_import in parked_imports:
+            self.assertNotIn('data', parked_import)
+            self.assertNotIn('token', parked_import)
+            self.assertIn(parked_import['parked_key'], FakeRedisManagement.values)
+        publish.assert_not_called()
+
+        self.finish('first')
+        publish.assert_called_once()
+        self.assertEqual(publish.call_args[0][1], 'second')
+        self.assertEqual(publish.call_args[0][2], [{'external_id': 'second'}])
+        self.assertEqual(publish.call_args[0][5], 'JWT token')
+        self.assertNotIn(parked_imports[0]['parked_key'], FakeRedisManagement.values)
+        self.assertEqual(create_process_flow.call_args[1]['hash'], 'second')
+        self.assertIn('machines.csv', create_process_flow.call_args[1]['message'])
+        self.assertEqual(FakeRedisManagement.hashes['1_import_fifo_procedure']['elastic_hash'], 'second')
+
+        self.finish('second')
+        self.assertEqual([x[0][1] for x in publish.call_args_list], ['second', 'third'])
+        self.assertEqual(FakeRedisManagement.lists['1_import_fifo_queue'], [])
+
+    def test_import_without_running_process_is_dispatched_with_next(self, publish, create_process_flow, *args):
+        self.start_or_park('first')
+        self.start_or_park('planograms', import_type=ImportType.PLANOGRAMS.name)
+        self.start_or_park('second')
+
+        self.finish('first')
+        self.assertEqual([x[0][1] for x in publish.call_args_list], ['planograms', 'second'])
+        self.assertEqual(FakeRedisManagement.hashes['1_import_fifo_procedure']['elastic_hash'], 'second')
+
+    def test_unreadable_parked_import_is_failed(
+            self, publish, create_process_flow, create_cloud_process_flow, update_main_process, send_email):
+        self.start_or_park('first')
+        self.start_or_park('second')
+        self.start_or_park('third')
+        del FakeRedisManagement.values[json.loads(FakeRedisManagement.lists['1_import_fifo_queue'][0])['parked_key']]
+
+        self.finish('first')
+        self.assertEqual([x[0][1] for x in publish.call_args_list], ['third'])
+        self.assertEqual(update_main_process.call_args[1], {'hash': 'second', 'error': 'FAIL'})
+        self.assertEqual(create_cloud_process_flow.call_args[1]['hash'], 'second')
+        self.assertIn('machines.csv', send_email.call_args[0][2])
+        self.assertEqual(FakeRedisManagement.hashes['1_import_fifo_procedure']['elastic_hash'], 'third')
+
+    def test_parked_import_stays_in_queue_when_publish_fails(self, publish, create_process_flow, *args):
+        self.start_or_park('first')
+        self.start_or_park('second')
+        publish.side_effect = ConnectionError('RabbitMQ is down')
+
+        self.finish('first')
+        # parked import is not lost and company import procedure is not held by it
+        self.assertEqual(len(FakeRedisManagement.lists['1_import_fifo_queue']), 1)
+        self.assertEqual(len(FakeRedisManagement.values), 1)
+        self.assertEqual(FakeRedisManagement.hashes['1_import_fifo_procedure']['finished_process'], 'True')
+        create_process_flow.assert_not_called()
+
+        publish.side_effect = None
+        ImportProcessHandler.dispatch_parked_import_processes()
+        self.assertEqual([x[0][1] for x in publish.call_args_list], ['second', 'second'])
+        self.assertEqual(FakeRedisManagement.lists['1_import_fifo_queue'], [])
+        self.assertEqual(FakeRedisManagement.values, {})
+        self.assertEqual(FakeRedisManagement.hashes['1_import_fifo_procedure']['elastic_hash'], 'second')
+        self.assertEqual(FakeRedisManagement.hashes['1_import_fifo_procedure']['finished_process'], 'False')
@@ -0,0 +1,72 @@
+from itertools import islice
+from unittest import TestCase
+
+from common.mixin.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PageRequest, decode_cursor, encode_cursor,
+                                     get_page_request, is_page_requested, iter_filtered_rows, next_cursor)
+
+
+class TestPagination(TestCase):
+    def test_cursor_round_trip(self):
+        values = ['2019-05-01T10:00:00.123456', 'e0a1b2c3-0000-4000-8000-000000000001']
+        cursor = encode_cursor(values)
+        self.assertNotIn('/', cursor)
+        self.assertEqual(decode_cursor(cursor), values)
+
+    def test_invalid_cursor(self):
+        for cursor in ['not cursor', encode_cursor({'a': 1}), 'e30', encode_cursor([]), encode_cursor([{'a': 1}, 'b']),
+                       encode_cursor([['2019-05-01'], 'b']), encode_cursor([None, 'b']), encode_cursor([True, 'b'])]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_page_request_defaults(self):
+        page = get_page_request({})
+        self.assertEqual(page.limit, DEFAULT_PAGE_SIZE)
+        self.assertIsNone(page.after)
+        self.assertIsNone(page.fields)
+        self.assertTrue(page.include_field('elastic'))
+        self.assertFalse(is_page_requested({}))
+
+    def test_page_request_args(self):
+        cursor = encode_cursor([1556704800000, 'company_process#abc'])
+        page = get_page_request({'limit': '20', 'cursor': cursor, 'fields': 'id, status,,created_at'})
+        self.assertEqual(page.limit, 20)
+        self.assertEqual(page.after, [1556704800000, 'company_process#abc'])
+        self.assertEqual(page.fields, {'id', 'status', 'created_at'})
+        self.assertFalse(page.include_field('process_history'))
+        self.assertTrue(is_page_requested({'cursor': cursor}))
+
+    def test_invalid_limit(self):
+        for limit in ['0', '-1', str(MAX_PAGE_SIZE + 1), 'ten']:
+            with self.assertRaises(ValueError):
+                get_page_request({'limit': limit})
+
+    def test_project(self):
+        row = {'id': '1', 'status': 'SUCCESS', 'elastic': []}
+        self.assertEqual(PageRequest(fields={'id', 'missing'}).project(row), {'id': '1'})
+        self.assertEqual(PageRequest().project(row), row)
+
+    def test_next_cursor(self):
+        page = PageRequest(limit=2)
+        self.assertIsNone(next_cursor(page, [[3, 'c']]))
+        self.assertIsNone(next_cursor(page, []))
+        self.assertEqual(decode_cursor(next_cursor(page, [[3, 'c'], [2, 'b']])), [2, 'b'])
+
+    def test_filtered_rows_fill_page(self):
+        # newest first, rows with odd id are filtered out after query
+        rows = list(range(20, 0, -1))
+        queries = []
+
+        def fetch_rows(after, limit):
+            queries.append((after, limit))
+            return [x for x in rows if after is None or x < after[0]][:limit]
+
+        def convert_rows(fetched_rows):
+            return [{'id': x} if x % 2 == 0 else None for x in fetched_rows]
+
+        filtered_rows = iter_filtered_rows(fetch_rows, convert_rows, lambda x: [x], batch_size=4)
+        self.assertEqual([x['id'] for _, x in islice(filtered_rows, 4)], [20, 18, 16, 14])
+        self.assertEqual(queries, [(None, 4), ([17], 4)])
+
+        filtered_rows = list(iter_filtered_rows(fetch_rows, convert_rows, lambda x: [x], after=[7], batch_size=4))
+        self.assertEqual(filtered_rows, [([6], {'id': 6}), ([4], {'id': 4}), ([2], {'id': 2})])
+        self.assertEqual(list(iter_filtered_rows(fetch_rows, convert_rows, lambda x: [x], after=[1])), [])
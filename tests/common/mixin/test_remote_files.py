@@ -0,0 +1,228 @@
+import calendar
+import ftplib
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from common.mixin.remote_files import (
+    FTP, FtpSession, RemoteEntry, RemoteFilePool, format_remote_time, local_time_to_utc, parse_mlsd_time)
+
+
+class FakeSession(object):
+    """
+    Remote session which records open sessions and downloads
+    """
+    lock = threading.Lock()
+    open_sessions = 0
+    max_open_sessions = 0
+    downloads = []
+
+    def __init__(self, host, port, username, password):
+        if password == 'wrong':
+            raise Exception('Login incorrect')
+        with FakeSession.lock:
+            FakeSession.open_sessions += 1
+            FakeSession.max_open_sessions = max(FakeSession.max_open_sessions, FakeSession.open_sessions)
+        self.alive = True
+        self.path = None
+
+    def chdir(self, path):
+        self.path = path
+
+    def is_alive(self):
+        return self.alive
+
+    def list_entries(self):
+        return [RemoteEntry('file.csv', True, 0)]
+
+    def download(self, remote_name, local_path):
+        time.sleep(0.01)
+        if remote_name.startswith('broken'):
+            raise IOError('Download failed')
+        FakeSession.downloads.append((id(self), remote_name, local_path))
+
+    def close(self):
+        with FakeSession.lock:
+            FakeSession.open_sessions -= 1
+
+
+class FakeFtp(object):
+    """
+    ftplib session with one directory, MLSD is supported only if mlsd_entries are given
+    """
+    instances = []
+
+    def __init__(self, host, username, password, port, files=None, mlsd_entries=None):
+        FakeFtp.instances.append(self)
+        self.files = files or {}
+        self.mlsd_entries = mlsd_entries
+        self.commands = []
+
+    def pwd(self):
+        return '/'
+
+    def cwd(self, path):
+        self.commands.append('CWD {}'.format(path))
+
+    def mlsd(self, path='', facts=()):
+        if self.mlsd_entries is None:
+            raise ftplib.error_perm('500 Unknown command')
+        return iter(self.mlsd_entries)
+
+    def dir(self, *args):
+        callback = args[-1]
+        for name in self.files:
+            callback('-rw-r--r--   1 user  group  {} Mar 01  2019 {}'.format(len(self.files[name]), name))
+
+    def retrbinary(self, command, callback):
+        self.commands.append(command)
+        callback(self.files[command.split(' ', 1)[1]])
+
+    def close(self):
+        pass
+
+
+class TestFtpSession(TestCase):
+    def setUp(self):
+        FakeFtp.instances = []
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def ftp_session(self, **kwargs):
+        return FtpSession('localhost', 21, 'user', 'pass', session_factory=functools.partial(FakeFtp, **kwargs))
+
+    def test_list_entries_with_mlsd(self):
+        session = self.ftp_session(mlsd_entries=[
+            ('.', {'type': 'cdir', 'modify': '20190301000000'}),
+            ('vends.csv', {'type': 'file', 'modify': '20190301101500'}),
+            ('archive', {'type': 'dir', 'modify': '20190201000000'}),
+        ])
+        self.assertEqual(session.list_entries(), [
+            RemoteEntry('vends.csv', True, calendar.timegm((2019, 3, 1, 10, 15, 0))),
+            RemoteEntry('archive', False, calendar.timegm((2019, 2, 1, 0, 0, 0))),
+        ])
+
+    def test_list_entries_without_mlsd_are_utc(self):
+        session = self.ftp_session(files={'vends.csv': b'data'})
+        self.assertEqual(session.list_entries(), [
+            RemoteEntry('vends.csv', True, calendar.timegm((2019, 3, 1, 0, 0, 0)))])
+
+    def test_local_time_to_utc(self):
+        timestamp = time.mktime((2019, 3, 1, 10, 15, 0, 0, 0, -1))
+        self.assertEqual(local_time_to_utc(timestamp), calendar.timegm((2019, 3, 1, 10, 15, 0)))
+
+    def test_format_remote_time_is_utc(self):
+        # LIST fallback time converted to UTC is rendered as same wall clock time
+        timestamp = local_time_to_utc(time.mktime((2019, 3, 1, 10, 15, 0, 0, 0, -1)))
+        self.assertEqual(format_remote_time(timestamp), '2019-03-01 10:15:00')
+
+    def test_download_on_main_session(self):
+        session = self.ftp_session(files={'vends.csv': b'data'})
+        local_path = os.path.join(self.test_dir, 'vends.csv')
+        session.download('vends.csv', local_path)
+
+        with open(local_path, 'rb') as local_file:
+            self.assertEqual(local_file.read(), b'data')
+        self.assertEqual(len(FakeFtp.instances), 1)
+        self.assertEqual(FakeFtp.instances[0].commands, ['RETR vends.csv'])
+
+    def test_child_sessions_are_not_opened(self):
+        session = self.ftp_session(files={'vends.csv': b'data'})
+        with self.assertRaises(Exception):
+            session.ftp_host.open('vends.csv', 'rb')
+        self.assertEqual(len(FakeFtp.instances), 1)
+
+
+class TestRemoteFilePool(TestCase):
+    def setUp(self):
+        FakeSession.open_sessions = 0
+        FakeSession.max_open_sessions = 0
+        FakeSession.downloads = []
+        self.pool = RemoteFilePool(
+            max_connections_per_host=3, download_workers=3, idle_timeout=60, session_types={FTP: FakeSession})
+
+    def acquire(self, username='user', password='pass', blocking=True):
+        return self.pool.acquire(FTP, 'localhost', 21, username, password, blocking=blocking)
+
+    def test_session_closed_on_release_without_reuse(self):
+        session = self.acquire()
+        self.pool.release(session)
+        self.assertEqual(0, FakeSession.open_sessions)
+        self.assertIsNot(session, self.acquire())
+
+    def test_session_reused_when_reuse_enabled(self):
+        self.pool.enable_reuse()
+        session = self.acquire()
+        self.pool.release(session)
+        self.assertIs(session, self.acquire())
+        self.assertEqual(1, FakeSession.open_sessions)
+
+    def test_dead_and_expired_sessions_are_not_reused(self):
+        self.pool.enable_reuse()
+        session = self.acquire()
+        session.session.alive = False
+        self.pool.release(session)
+        self.assertIsNot(session, self.acquire())
+
+        self.pool.idle_timeout = 0
+        other_session = self.acquire(username='other')
+        self.pool.release(other_session)
+        self.assertIsNot(other_session, self.acquire(username='other'))
+        self.assertEqual(2, FakeSession.open_sessions)
+
+    def test_host_limit(self):
+        sessions = [self.acquire(username='user_%d' % i) for i in range(3)]
+        self.assertIsNone(self.acquire(blocking=False))
+        self.pool.release(sessions[0])
+        self.assertIsNotNone(self.acquire(blocking=False))
+
+    def test_idle_session_of_other_user_is_evicted_at_host_limit(self):
+        self.pool.enable_reuse()
+        sessions = [self.acquire(username='user_%d' % i) for i in range(3)]
+        self.pool.release(sessions[0])
+        self.assertEqual(3, FakeSession.open_sessions)
+
+        session = self.acquire(username='other', blocking=False)
+        self.assertIsNotNone(session)
+        self.assertEqual(3, FakeSession.open_sessions)
+
+    def test_connection_error_free_host_slot(self):
+        for _ in range(4):
+            with self.assertRaises(Exception):
+                self.acquire(password='wrong')
+        self.assertIsNotNone(self.acquire(blocking=False))
+
+    def test_download_files(self):
+        session = self.acquire()
+        session.chdir('/upload')
+        files = [('file_%d.csv' % i, '/tmp/file_%d.csv' % i) for i in range(10)] + [('broken.csv', '/tmp/b.csv')]
+
+        result = self.pool.download_files(session, files)
+
+        self.assertEqual(11, len(result))
+        self.assertIsInstance(result['broken.csv'], IOError)
+        self.assertTrue(all(result['file_%d.csv' % i] is None for i in range(10)))
+        self.assertEqual(sorted(files[:10]), sorted((name, path) for _, name, path in FakeSession.downloads))
+        self.assertGreater(len(set(session_id for session_id, _, _ in FakeSession.downloads)), 1)
+        self.assertEqual(3, FakeSession.max_open_sessions)
+        # only session of caller is still open
+        self.assertEqual(1, FakeSession.open_sessions)
+
+    def test_download_files_with_host_limit_reached(self):
+        sessions = [self.acquire(username='user_%d' % i) for i in range(3)]
+        files = [('file_%d.csv' % i, '/tmp/file_%d.csv' % i) for i in range(5)]
+
+        result = self.pool.download_files(sessions[0], files)
+
+        self.assertTrue(all(error is None for error in result.values()))
+        self.assertEqual(1, len(set(session_id for session_id, _, _ in FakeSession.downloads)))
+
+    def test_parse_mlsd_time(self):
+        self.assertEqual(0, parse_mlsd_time('19700101000000'))
+        self.assertEqual(86400, parse_mlsd_time('19700102000000.123'))
@@ -1,5 +1,6 @@
 from unittest import TestCase
-from common.mixin.validation_const import machineParser, productParser
+from common.mixin.validation_const import ImportType, machineParser, productParser, \
+    return_import_type_based_on_parser, collect_planogram_lookups
 
 
 class TestMachineParser(TestCase):
@@ -33,3 +34,32 @@ class TestProductParser(TestCase):
         total = len(all_fields)
         expected = 16
         self.assertEqual(total, expected)
+
+
+class TestPlanogramParser(TestCase):
+    def test_price_fields_dont_change_import_type(self):
+        all_fields = list(ImportType.PLANOGRAMS.value['def']['all_fields'])
+
+        parser = return_import_type_based_on_parser(ImportType.PLANOGRAMS.name, [{'multiple_pricelists': '3'}])
+        self.assertEqual([x for x in parser['all_fields'] if x.startswith('price_')], ['price_1', 'price_2', 'price_3'])
+        self.assertEqual(parser['custom_valid_fields']['price_3'], float)
+
+        parser = return_import_type_based_on_parser(ImportType.PLANOGRAMS.name, [{'multiple_pricelists': ''}])
+        self.assertEqual([x for x in parser['all_fields'] if x.startswith('price_')], ['price_1'])
+        self.assertEqual(ImportType.PLANOGRAMS.value['def']['all_fields'], all_fields)
+
+    def test_collect_planogram_lookups(self):
+        lookups = collect_planogram_lookups([
+            {'multiple_pricelists': '2', 'price_1': '1.0', 'Price_2': '2.0', None: ['x']},
+            {'multiple_pricelists': '3.0', 'price_1': '1.5', 'price_4': '4.0'},
+        ])
+        self.assertEqual(lookups, {
+            'multiple_pricelists': True, 'price_lists': 3, 'price_columns': ['price_1', 'Price_2', 'price_4']})
+
+        parser = return_import_type_based_on_parser(ImportType.PLANOGRAMS.name, price_lists=lookups['price_lists'])
+        self.assertEqual([x for x in parser['all_fields'] if x.startswith('price_')], ['price_1', 'price_2', 'price_3'])
+
+        lookups = collect_planogram_lookups([{'multiple_pricelists': 'two'}, {'multiple_pricelists': ''}])
+        self.assertFalse(lookups['multiple_pricelists'])
+        self.assertIs(lookups['price_lists'], False)
+        self.assertFalse(return_import_type_based_on_parser(ImportType.PLANOGRAMS.name, price_lists=False))
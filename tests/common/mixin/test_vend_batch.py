@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from common.mixin.vend_batch import VEND_FORMAT_BATCH, VEND_FORMAT_UNIT, count_vends, expand_vend_batch, \
+    get_vend_format
+
+
+class TestVendBatch(TestCase):
+    def setUp(self):
+        self.batch = {
+            'operator_identifier': 'M1',
+            'seTimeFrom': '01012020_100000',
+            'seTime': '01012020_120000',
+            'product_code_in_map': 12,
+            'seValue': 1.5,
+            'count': 3,
+            'total_value': 4.5,
+            'payment_method_id': 1,
+            'transaction_id_prefix': u'CA-12',
+            'device_pid': 'PID1',
+            'zip_filename': 'PID1_01012020_120000.zip',
+        }
+
+    def test_vend_format_defaults_to_unit(self):
+        self.assertEqual(get_vend_format({}), VEND_FORMAT_UNIT)
+        self.assertEqual(get_vend_format({'vend_format': 'unit'}), VEND_FORMAT_UNIT)
+        self.assertEqual(get_vend_format({'vend_format': 'Batch'}), VEND_FORMAT_UNIT)
+        self.assertEqual(get_vend_format({'vend_format': 'batch'}), VEND_FORMAT_BATCH)
+
+    def test_expand_vend_batch(self):
+        vends = expand_vend_batch(self.batch)
+        self.assertEqual([x['transaction_id'] for x in vends], ['CA-12-1', 'CA-12-2', 'CA-12-3'])
+        # per unit vend has same fields as vend before batches (no batch fields)
+        self.assertEqual(vends[0], {
+            'operator_identifier': 'M1',
+            'seTime': '01012020_120000',
+            'product_code_in_map': 12,
+            'seValue': 1.5,
+            'payment_method_id': 1,
+            'transaction_id': 'CA-12-1',
+            'device_pid': 'PID1',
+            'zip_filename': 'PID1_01012020_120000.zip',
+        })
+        self.assertEqual(expand_vend_batch(dict(self.batch, count=0)), [])
+
+    def test_count_vends(self):
+        batches = [self.batch, dict(self.batch, count=2)]
+        self.assertEqual(count_vends(batches, VEND_FORMAT_BATCH), 5)
+        self.assertEqual(count_vends(expand_vend_batch(self.batch), VEND_FORMAT_UNIT), 3)
+        self.assertEqual(count_vends([], VEND_FORMAT_BATCH), 0)
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from common.mixin.remote_files import RemoteEntry
+from common.mixin.vend_sweep import files_after_watermark, next_watermark, split_processed_files
+
+
+class TestVendSweep(TestCase):
+    def setUp(self):
+        self.remote_files = [
+            RemoteEntry('PID1_20190301.zip', True, 100.0),
+            RemoteEntry('PID1_20190302.zip', True, 200.0),
+            RemoteEntry('PID2_20190302.zip', True, 200.0),
+            RemoteEntry('PID1_20190303.zip', True, 300.0),
+        ]
+
+    def test_files_after_watermark(self):
+        self.assertEqual(files_after_watermark(self.remote_files, None), self.remote_files)
+        self.assertEqual(files_after_watermark(self.remote_files, 0.0), self.remote_files)
+        # Files with watermark time are checked again (more files can have same modification time)
+        self.assertEqual(files_after_watermark(self.remote_files, 200.0), self.remote_files[1:])
+        self.assertEqual(files_after_watermark(self.remote_files, 301.0), [])
+
+    def test_split_processed_files(self):
+        new_files, processed_files = split_processed_files(
+            self.remote_files, {'PID1_20190301.zip', 'PID2_20190302.zip'})
+        self.assertEqual([x.name for x in new_files], ['PID1_20190302.zip', 'PID1_20190303.zip'])
+        self.assertEqual([x.name for x in processed_files], ['PID1_20190301.zip', 'PID2_20190302.zip'])
+
+    def test_watermark_moves_over_processed_files_only(self):
+        self.assertEqual(next_watermark(0.0, [], self.remote_files), 300.0)
+        # Downloaded files are not imported yet, watermark stops at oldest of them
+        self.assertEqual(next_watermark(0.0, self.remote_files[1:], self.remote_files[:1]), 200.0)
+        self.assertIsNone(next_watermark(200.0, self.remote_files[1:], []))
+        self.assertIsNone(next_watermark(0.0, [], []))
+        self.assertIsNone(next_watermark(None, [], self.remote_files))
+
+    def test_failed_import_is_retried(self):
+        imported = set()
+        watermark = 0.0
+        downloads = []
+        for sweep in range(3):
+            new_files, processed_files = split_processed_files(
+                files_after_watermark(self.remote_files, watermark), imported)
+            downloads.append([x.name for x in new_files])
+            watermark = next_watermark(watermark, new_files, processed_files) or watermark
+            # Import of PID1_20190302.zip fails in first sweep
+            imported.update(x.name for x in new_files if sweep or x.name != 'PID1_20190302.zip')
+
+        self.assertEqual(downloads, [
+            [x.name for x in self.remote_files],
+            ['PID1_20190302.zip'],
+            [],
+        ])
+        self.assertEqual(watermark, 300.0)
@@ -0,0 +1,137 @@
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from common.rabbit_mq.consumers.worker_pool import (PooledConsumerMixin, company_id_key, company_lock,
+                                                   validation_data_company_key)
+
+
+class FakeLock(object):
+    """
+    Redis lock of one key, records extends
+    """
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.extends = []
+
+    def acquire(self):
+        self.lock.acquire()
+
+    def release(self):
+        self.lock.release()
+
+    def extend(self, additional_time):
+        self.extends.append(additional_time)
+
+
+class FakeRedisManagement(object):
+    locks = {}
+
+    @classmethod
+    def redis_lock(cls, key, timeout=60):
+        return cls.locks.setdefault(key, FakeLock(key))
+
+
+@patch('common.rabbit_mq.consumers.worker_pool.RedisManagement', FakeRedisManagement)
+class TestPooledConsumer(TestCase):
+    def setUp(self):
+        FakeRedisManagement.locks = {}
+        self.consumer = PooledConsumerMixin(None, worker_threads=4, prefetch_count=4)
+        self.handled = []
+        self.running = {}
+        self.max_running = {}
+        self.lock = threading.Lock()
+
+    def on_message_validate_file(self, body, message):
+        company_id = validation_data_company_key(body)
+        with self.lock:
+            self.running[company_id] = self.running.get(company_id, 0) + 1
+            self.max_running[company_id] = max(self.max_running.get(company_id, 0), self.running[company_id])
+        time.sleep(0.01)
+        with self.lock:
+            self.running[company_id] -= 1
+            self.handled.append((company_id, body['elastic_hash']))
+
+    def consume(self, bodies, ordering_key):
+        on_message = self.consumer.handle_in_pool(self.on_message_validate_file, ordering_key)
+        messages = []
+        for body in bodies:
+            message = MagicMock()
+            messages.append(message)
+            on_message(body, message)
+        self.consumer.executor.shutdown(wait=True)
+        self.consumer.ack_finished_messages()
+        return messages
+
+    def test_messages_of_company_are_ordered(self):
+        bodies = [
+            {'data': {'company': company_id}, 'elastic_hash': '{}_{}'.format(company_id, i), 'filename': 'f.csv'}
+            for i in range(5) for company_id in [1, 2, 3]
+        ]
+        messages = self.consume(bodies, validation_data_company_key)
+
+        for company_id in [1, 2, 3]:
+            self.assertEqual(
+                [elastic_hash for key, elastic_hash in self.handled if key == company_id],
+                ['{}_{}'.format(company_id, i) for i in range(5)])
+            self.assertEqual(self.max_running[company_id], 1)
+        self.assertEqual(set(FakeRedisManagement.locks), {
+            '{}_on_message_validate_file_consumer_lock'.format(company_id) for company_id in [1, 2, 3]})
+        self.assertTrue(all(message.ack.call_count == 1 for message in messages))
+        self.assertEqual(self.consumer.company_messages, {})
+
+    def test_messages_without_key_are_not_ordered(self):
+        bodies = [{'data': {'company': 1}, 'elastic_hash': str(i)} for i in range(8)]
+        messages = self.consume(bodies, None)
+
+        self.assertEqual(len(self.handled), 8)
+        self.assertGreater(self.max_running[1], 1)
+        self.assertEqual(FakeRedisManagement.locks, {})
+        self.assertTrue(all(message.ack.call_count == 1 for message in messages))
+
+    def test_failed_message_is_acked(self):
+        def on_message_file(body, message):
+            raise ValueError('validation error')
+
+        message = MagicMock()
+        self.consumer.handle_in_pool(on_message_file, company_id_key)({'company_id': 1}, message)
+        self.consumer.executor.shutdown(wait=True)
+        self.consumer.ack_finished_messages()
+        message.ack.assert_called_once_with()
+
+
+class TestOrderingKeys(TestCase):
+    def test_company_id_key(self):
+        self.assertEqual(company_id_key({'company_id': 7, 'data': []}), 7)
+        self.assertIsNone(company_id_key({'data': []}))
+        self.assertIsNone(company_id_key('message'))
+
+    def test_validation_data_company_key(self):
+        body = {'data': {'company': 7, 'import_type': 'MACHINES'}, 'elastic_hash': 'hash', 'filename': 'f.csv',
+                'token': 'token'}
+        self.assertEqual(validation_data_company_key(body), 7)
+        self.assertIsNone(validation_data_company_key({'company_id': 7}))
+        self.assertIsNone(validation_data_company_key({'data': None}))
+
+
+@patch('common.rabbit_mq.consumers.worker_pool.RedisManagement', FakeRedisManagement)
+class TestCompanyLock(TestCase):
+    def setUp(self):
+        FakeRedisManagement.locks = {}
+
+    def test_company_lock_is_extended_while_message_is_handled(self):
+        with company_lock('1_consumer_lock', 0.03):
+            time.sleep(0.05)
+        lock = FakeRedisManagement.locks['1_consumer_lock']
+        self.assertEqual(lock.extends[:2], [0.01, 0.01])
+        self.assertFalse(lock.lock.locked())
+
+    def test_company_lock_is_released_when_message_fails(self):
+        with self.assertRaises(ValueError):
+            with company_lock('1_consumer_lock', 60):
+                raise ValueError('message failed')
+        lock = FakeRedisManagement.locks['1_consumer_lock']
+        self.assertEqual(lock.extends, [])
+        self.assertFalse(lock.lock.locked())
@@ -0,0 +1,112 @@
+import datetime
+from unittest import TestCase
+
+from common.rabbit_mq.common.chunked import ChunkAssembler, publish_chunked, split_message
+
+
+class FakeProducer(object):
+    def __init__(self):
+        self.published = []
+
+    def publish(self, body, **kwargs):
+        self.published.append(body)
+
+
+def import_message(rows):
+    return {
+        'company_id': 1,
+        'elastic_hash': 'e0a1b2c3',
+        'data': [{'external_id': str(x), 'name': 'Automāts {}'.format(x), 'price': x * 10} for x in range(rows)],
+        'type': 'MACHINES',
+        'token': 'token',
+        'email': None,
+    }
+
+
+class TestChunked(TestCase):
+    def test_round_trip(self):
+        message = import_message(500)
+        for compression in ['zlib', 'none']:
+            chunks = list(split_message(message, 'data', message['elastic_hash'], 1000, compression))
+            self.assertGreater(len(chunks), 1)
+            self.assertEqual({x['chunk']['count'] for x in chunks}, {len(chunks)})
+            self.assertNotIn('data', chunks[0]['message'])
+
+            assembler = ChunkAssembler()
+            results = [assembler.add(x) for x in reversed(chunks)]
+            self.assertEqual(results[:-1], [None] * (len(chunks) - 1))
+            self.assertEqual(results[-1], message)
+            self.assertEqual(assembler.pending(), {})
+
+    def test_compressed_chunks_are_smaller(self):
+        message = import_message(500)
+        plain = list(split_message(message, 'data', 'hash', 4096, 'none'))
+        compressed = list(split_message(message, 'data', 'hash', 4096, 'zlib'))
+        self.assertEqual(len(plain), len(compressed))
+        self.assertLess(sum(len(x['payload']) for x in compressed), sum(len(x['payload']) for x in plain) / 2)
+
+    def test_interleaved_and_redelivered_chunks(self):
+        first, second = import_message(100), import_message(200)
+        second['elastic_hash'] = 'f0a1b2c3'
+        first_chunks = list(split_message(first, 'data', first['elastic_hash'], 500))
+        second_chunks = list(split_message(second, 'data', second['elastic_hash'], 500))
+        first_transfer_id = first_chunks[0]['chunk']['transfer_id']
+        self.assertEqual({x['chunk']['transfer_id'] for x in first_chunks}, {first_transfer_id})
+
+        assembler = ChunkAssembler()
+        assembler.add(first_chunks[0])
+        self.assertIsNone(assembler.add(first_chunks[0]))
+        for chunk in second_chunks:
+            result = assembler.add(chunk)
+        self.assertEqual(result, second)
+        self.assertEqual(assembler.pending(), {first_transfer_id: (1, len(first_chunks))})
+
+        assembler.discard(first_transfer_id)
+        self.assertEqual(assembler.pending(), {})
+
+    def test_interleaved_chunks_with_same_elastic_hash(self):
+        # vend messages can have same (or no) elastic hash
+        first, second = import_message(100), import_message(200)
+        first['elastic_hash'] = second['elastic_hash'] = None
+        first_chunks = list(split_message(first, 'data', None, 500))
+        second_chunks = list(split_message(second, 'data', None, 500))
+        self.assertNotEqual(first_chunks[0]['chunk']['transfer_id'], second_chunks[0]['chunk']['transfer_id'])
+
+        assembler = ChunkAssembler()
+        results = []
+        for first_chunk, second_chunk in zip(first_chunks, second_chunks):
+            results.extend([assembler.add(first_chunk), assembler.add(second_chunk)])
+        for chunk in second_chunks[len(first_chunks):]:
+            results.append(assembler.add(chunk))
+        self.assertEqual([x for x in results if x is not None], [first, second])
+        self.assertEqual(assembler.pending(), {})
+
+    def test_not_chunked_message(self):
+        message = import_message(1)
+        self.assertIs(ChunkAssembler().add(message), message)
+
+    def test_empty_data_and_dates(self):
+        message = {'elastic_hash': 'hash', 'vend_data': [], 'date': datetime.date(2019, 5, 1)}
+        chunks = list(split_message(message, 'vend_data', 'hash', 100))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(ChunkAssembler().add(chunks[0])['vend_data'], [])
+
+        chunks = list(split_message({'vend_data': [datetime.datetime(2019, 5, 1, 10)]}, 'vend_data', 'hash', 100))
+        self.assertEqual(ChunkAssembler().add(chunks[0])['vend_data'], ['2019-05-01T10:00:00'])
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            list(split_message(import_message(1), 'data', 'hash', 100, 'rar'))
+        with self.assertRaises(ValueError):
+            list(split_message(import_message(1), 'data', 'hash', 0))
+
+    def test_publish_chunked(self):
+        message = import_message(100)
+        producer = FakeProducer()
+        self.assertEqual(publish_chunked(producer, message, 'data', 'hash', {}), 1)
+        self.assertIs(producer.published[0], message)
+
+        producer = FakeProducer()
+        published = publish_chunked(producer, message, 'data', 'hash', {'chunk_size': 1000, 'compression': 'zlib'})
+        self.assertEqual(published, len(producer.published))
+        self.assertGreater(published, 1)
@@ -1100,7 +1100,7 @@ class TestFileOnCloudValidator(TestCase):
         self.assertFalse(mock_write_errors.called)
         self.assertTrue(result)
 
-    @patch.object(ProductRotationGroupQueryOnCloud, 'get_products_for_specific_product_rotation_group')
+    @patch.object(ProductRotationGroupQueryOnCloud, 'get_products_for_product_rotation_groups')
     @patch.object(ProductRotationGroupQueryOnCloud, 'get_product_rotation_groups_for_company')
     @patch.object(ProductQueryOnCloud, 'get_products_for_company')
     @patch.object(FileOnCloudValidator, 'write_warnings')
@@ -1204,13 +1204,15 @@ class TestFileOnCloudValidator(TestCase):
 
         mock_assigned_product_on_rotation_group.return_value = {
             'status': True,
-            'results': [{
-                'prg_name': 'product_rotation_group_1',
-                'prg_ext_id': 'asd45asd74',
-                'product_name': 'Milka 100g x10',
-                'product_ext_id': 'B999',
-                'product_code': '',
-            }]
+            'results': {
+                1: [{
+                    'prg_name': 'product_rotation_group_1',
+                    'prg_ext_id': 'asd45asd74',
+                    'product_name': 'Milka 100g x10',
+                    'product_ext_id': 'B999',
+                    'product_code': '',
+                }]
+            }
         }
 
         result = focv.validate_product()
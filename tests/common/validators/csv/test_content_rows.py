@@ -0,0 +1,65 @@
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from openpyxl import Workbook
+
+from common.validators.csv.content_rows import FileContentRows, read_file_content
+
+
+class TestContentRows(TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_csv(self, content):
+        file_path = os.path.join(self.test_dir, 'test_file.csv')
+        with open(file_path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write(content)
+        return file_path
+
+    def test_read_csv_file_content(self):
+        file_path = self.write_csv('machine_id;machine_name\n1;first\n\n2;"sec;ond"\n;\n')
+        headers, content_rows = read_file_content(file_path, ';')
+        self.assertEqual(headers, ['machine_id', 'machine_name'])
+        # empty line is skipped, line with empty cells is content row (same as csv reader)
+        self.assertEqual(list(content_rows), [['1', 'first'], ['2', 'sec;ond'], ['', '']])
+
+    def test_read_xlsx_file_content(self):
+        file_path = os.path.join(self.test_dir, 'test_excel_file.xlsx')
+        work_book = Workbook()
+        work_sheet = work_book.active
+        work_sheet.append(['machine_id', 'machine_name', 'installation_date'])
+        work_sheet.append([1, 'first', datetime.datetime(2020, 1, 2)])
+        work_sheet.append([None, None, None])
+        work_sheet.append(['A2', 2.5, None])
+        work_book.save(file_path)
+
+        headers, content_rows = read_file_content(file_path, ';')
+        self.assertEqual(headers, ['machine_id', 'machine_name', 'installation_date'])
+        # empty row is skipped
+        self.assertEqual(list(content_rows), [['1', 'first', '2020-01-02'], ['A2', '2.5', '']])
+
+    def test_rows_are_streamed_on_every_iteration(self):
+        file_path = self.write_csv('machine_id\n1\n2\n')
+        content_rows = FileContentRows(file_path, ';')
+        self.assertFalse(isinstance(content_rows, list))
+        self.assertEqual(list(content_rows), [['1'], ['2']])
+        self.assertEqual(list(content_rows), [['1'], ['2']])
+
+        with open(file_path, 'a') as csv_file:
+            csv_file.write('3\n')
+        self.assertEqual(list(content_rows), [['1'], ['2'], ['3']])
+
+    def test_empty_content(self):
+        headers, content_rows = read_file_content(self.write_csv('machine_id;machine_name\n\n'), ';')
+        self.assertEqual(headers, ['machine_id', 'machine_name'])
+        self.assertFalse(content_rows)
+        self.assertTrue(FileContentRows(self.write_csv('machine_id\n1\n'), ';'))
+
+        with self.assertRaises(StopIteration):
+            read_file_content(self.write_csv(''), ';')
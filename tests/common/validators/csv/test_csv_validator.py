@@ -20,7 +20,6 @@ from common.mixin.enum_errors import EnumErrorType, \
     enum_message_on_specific_language
 from common.mixin.enum_errors import EnumValidationMessage as enum_msg
 from common.mixin.handle_file import CsvValidatorHandleFIle as handle_file
-from common.mixin.validation_const import return_import_type_based_on_parser
 from common.mixin.validator_import import (
     escape_list, WORKING_DIR, HISTORY_FAIL_DIR, STORE_DIR, ZIP_WORKING_DIR, \
     HISTORY_SUCCESS_DIR, HISTORY_FILES_DIR
@@ -283,7 +282,8 @@ class TestParseFileBasedOnExtension(TestCase):
             mocked_open_xlsx_file_and_convert_to_csv
     ):
         """
-        Test start_checking_file with normal excel file.
+        Test start_checking_file with normal excel file, file is not converted to csv
+        (it's read row by row in validation).
         """
         file_parse = self.xlsx_filepath
         delimiter = ';'
@@ -293,18 +293,13 @@ class TestParseFileBasedOnExtension(TestCase):
             self.process_logger
         )
 
-        mocked_open_xlsx_file_and_convert_to_csv.return_value = {
-            'success': True,
-            'file_path': os.path.splitext(file_parse)[0]
-        }
-
         result = parse_file_based_on_ext.start_checking_file()
         expected = {
             'success': True,
-            'file_path': os.path.splitext(file_parse)[0]
+            'file_path': file_parse
         }
 
-        self.assertTrue(mocked_open_xlsx_file_and_convert_to_csv.called)
+        self.assertFalse(mocked_open_xlsx_file_and_convert_to_csv.called)
         self.assertEqual(expected, result)
 
     @patch.object(ParseFileBasedOnExtension, 'open_xlsx_file_and_convert_to_csv')
@@ -1440,32 +1435,6 @@ class TestFieldValidation(TestCase):
             self.zip_elastic_hash)
         self.assertEqual(self.field_validation.language, self.language)
 
-    def test_parse_dictionary_for_cloud(self):
-        file_path = create_file(
-            base_path=WORKING_DIR,
-            file_name='test_file',
-            extension='.csv',
-            import_type='machines',
-            delimiter=';',
-            validity='valid'
-        )[1]
-        parser = return_import_type_based_on_parser(self.import_type)
-        result = self.field_validation.parse_dictionary_for_cloud(
-            file_path, parser)
-
-    def test_get_ouput_response(self):
-        file_path = create_file(
-            base_path=WORKING_DIR,
-            file_name='test_file',
-            extension='.csv',
-            import_type='machines',
-            delimiter=';',
-            validity='valid'
-        )[1]
-        parser = return_import_type_based_on_parser(self.import_type)
-        result = self.field_validation.get_output_response(
-            file_path, parser)
-
     def test_get_validation_fields__different_delimiters(self):
         delimiters = [',', '|', ';']
         for delimiter in delimiters:
@@ -0,0 +1,46 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from common.validators.csv.import_data import ImportDataSink
+
+
+class TestImportDataSink(TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_rows_are_written_to_spool_files(self):
+        importer_rows = [{'machine_id': 1, 'machine_name': 'first'}, {'machine_id': 2, 'machine_name': 'šđč'}]
+        cloud_rows = [{'machine_name': 'first', 'machine_id': '1'}, {'machine_name': 'šđč', 'machine_id': '2'}]
+        success_history_file = os.path.join(self.test_dir, 'history.json')
+
+        with ImportDataSink(self.test_dir, 'machines.csv') as import_data:
+            for importer_row, cloud_row in zip(importer_rows, cloud_rows):
+                import_data.write(importer_row, cloud_row)
+            import_data.close()
+
+            # data hash is same as generate_hash_for_json of cloud rows list
+            expected_hash = hashlib.sha256(json.dumps(cloud_rows, sort_keys=True).encode('utf-8')).hexdigest()
+            self.assertEqual(import_data.data_hash, expected_hash)
+            self.assertEqual(import_data.load_cloud_data(), cloud_rows)
+            self.assertEqual(os.stat(import_data.cloud_path).st_mode & 0o777, 0o600)
+
+            import_data.save_importer_data(success_history_file)
+
+        with open(success_history_file, encoding='utf-8') as in_file:
+            self.assertEqual(json.load(in_file), importer_rows)
+        # spool files are removed
+        self.assertEqual(os.listdir(self.test_dir), ['history.json'])
+
+    def test_empty_content(self):
+        with ImportDataSink(self.test_dir, 'machines.csv') as import_data:
+            import_data.close()
+            self.assertEqual(import_data.data_hash, hashlib.sha256(b'[]').hexdigest())
+            self.assertEqual(import_data.load_cloud_data(), [])
+        self.assertEqual(os.listdir(self.test_dir), [])
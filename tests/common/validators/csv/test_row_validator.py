@@ -0,0 +1,90 @@
+from copy import deepcopy
+from unittest import TestCase
+
+import jsonschema
+from jsonschema import validate, FormatChecker
+
+from common.mixin.validation_const import (
+    ImportType, return_import_type_based_on_parser, machineParser, PlanogramParser)
+from common.validators.csv.row_validator import RowValidator, get_row_validator, compile_schema
+
+INVALID_VALUES = [None, '', 'x' * 300, '3', '50', '-1', 'abc', '12:30', '2020-01-01', True, 1, 1.5, '<null>']
+
+
+def jsonschema_first_error(row, parser):
+    try:
+        validate(row, parser, format_checker=FormatChecker())
+    except jsonschema.exceptions.ValidationError as e:
+        return e
+    return None
+
+
+def generate_rows(parser):
+    """
+    Valid row from parser fields and rows with every field replaced with possibly invalid values
+    """
+    fields = parser['all_fields']
+    valid_row = {field: '1' for field in fields}
+    yield valid_row
+    yield {}
+    for field in fields:
+        for value in INVALID_VALUES:
+            row = dict(valid_row)
+            row[field] = value
+            yield row
+        row = dict(valid_row)
+        row.pop(field)
+        yield row
+
+
+class TestRowValidator(TestCase):
+    def test_same_errors_as_jsonschema_validate(self):
+        for import_type in [ImportType.LOCATIONS, ImportType.MACHINES, ImportType.REGIONS,
+                            ImportType.MACHINE_TYPES, ImportType.PRODUCTS, ImportType.CLIENTS]:
+            parser = return_import_type_based_on_parser(import_type.name)
+            row_validator = RowValidator(parser)
+            for row in generate_rows(parser):
+                expected = jsonschema_first_error(row, parser)
+                result = row_validator.first_error(row)
+                if expected is None:
+                    self.assertIsNone(result, (import_type.name, row))
+                else:
+                    self.assertEqual(expected.message, result.message)
+                    self.assertEqual(list(expected.schema_path), list(result.schema_path))
+
+    def test_planogram_any_of_same_errors_as_jsonschema_validate(self):
+        parser = deepcopy(PlanogramParser)
+        row_validator = RowValidator(parser)
+        for row in generate_rows(parser):
+            row = dict(row)
+            row.pop('product_id', None)
+            for rotation_group in [None, '1', 'x' * 40]:
+                if rotation_group is not None:
+                    row['product_rotation_group_id'] = rotation_group
+                expected = jsonschema_first_error(row, parser)
+                result = row_validator.first_error(row)
+                if expected is None:
+                    self.assertIsNone(result)
+                else:
+                    self.assertEqual(expected.message, result.message)
+                    self.assertEqual(len(expected.context), len(result.context))
+
+    def test_schema_is_compiled(self):
+        self.assertIsNotNone(compile_schema(machineParser))
+        self.assertIsNotNone(compile_schema(PlanogramParser))
+
+    def test_not_compiled_schema_use_json_schema_validator(self):
+        parser = {'type': 'object', 'properties': {'value': {'type': 'string', 'format': 'email'}}}
+        self.assertIsNone(compile_schema(parser))
+        row_validator = RowValidator(parser)
+        self.assertIsNone(row_validator.first_error({'value': 'test@example.com'}))
+        self.assertIsNotNone(row_validator.first_error({'value': 1}))
+
+    def test_get_row_validator_cached_per_import_type(self):
+        parser = return_import_type_based_on_parser(ImportType.REGIONS.name)
+        row_validator = get_row_validator(ImportType.REGIONS.name, parser)
+        self.assertIs(row_validator, get_row_validator(ImportType.REGIONS.name, parser))
+
+        changed_parser = deepcopy(parser)
+        changed_parser['properties']['region_name']['maxLength'] = 10
+        self.assertIsNot(row_validator, get_row_validator(ImportType.REGIONS.name, changed_parser))
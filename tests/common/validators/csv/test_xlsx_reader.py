@@ -0,0 +1,46 @@
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from openpyxl import Workbook
+
+from common.validators.csv.xlsx_reader import xlsx_cell_to_str, iter_xlsx_rows, check_xlsx_file
+
+
+class TestXlsxReader(TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.xlsx_filepath = os.path.join(self.test_dir, 'test_excel_file.xlsx')
+        work_book = Workbook()
+        work_sheet = work_book.active
+        work_sheet.append(['machine_id', 'machine_name', 'installation_date'])
+        work_sheet.append([1, 'first', datetime.datetime(2020, 1, 2)])
+        work_sheet.append([None, None, None])
+        work_sheet.append(['A2', 2.5, None])
+        work_book.save(self.xlsx_filepath)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_xlsx_cell_to_str(self):
+        self.assertEqual(xlsx_cell_to_str(None), '')
+        self.assertEqual(xlsx_cell_to_str(3.0), '3')
+        self.assertEqual(xlsx_cell_to_str(3.25), '3.25')
+        self.assertEqual(xlsx_cell_to_str(datetime.datetime(2020, 1, 2)), '2020-01-02')
+        self.assertEqual(xlsx_cell_to_str(datetime.datetime(2020, 1, 2, 10, 30)), '2020-01-02 10:30:00')
+
+    def test_iter_xlsx_rows(self):
+        rows = list(iter_xlsx_rows(self.xlsx_filepath))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1], ['1', 'first', '2020-01-02'])
+
+    def test_check_xlsx_file(self):
+        self.assertTrue(check_xlsx_file(self.xlsx_filepath))
+
+        not_xlsx_filepath = os.path.join(self.test_dir, 'empty_file.xlsx')
+        with open(not_xlsx_filepath, 'w') as file_open:
+            file_open.write('Some text here\n')
+        with self.assertRaises(Exception):
+            check_xlsx_file(not_xlsx_filepath)
@@ -0,0 +1,53 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from common.validators.vend_cloud_validator.vendon_cloud_validator import VendonCloudValidator
+
+VALIDATOR_MODULE = 'common.validators.vend_cloud_validator.vendon_cloud_validator'
+
+
+def vendon_message(machine_ext_ids, **batch):
+    message = {
+        'company_id': 1,
+        'language': 'en',
+        'token': 'token',
+        'elastic_hash': 'e0a1b2c3',
+        'import_type': 'VENDON_VENDS',
+        'data': [{'machine_ext_id': x, 'machine_vendon_id': 10} for x in machine_ext_ids],
+        'skipped_vends': 0,
+        'email': None,
+    }
+    message.update(batch)
+    return message
+
+
+@patch(VALIDATOR_MODULE + '.MainVendProcessLogger')
+@patch(VALIDATOR_MODULE + '.CompanyFailHistory')
+@patch(VALIDATOR_MODULE + '.vend_publish_to_database')
+@patch(VALIDATOR_MODULE + '.MachineQueryOnCloud.get_machines_by_external_ids', return_value={
+    'status': True, 'results': [{'ext_id': 'M1', 'device_type': 'VO', 'device_active': True}]})
+class TestVendonCloudValidator(TestCase):
+    def test_message_without_batch_info_is_whole_job(self, machines, publish, fail_history, process_logger):
+        VendonCloudValidator(vendon_message(['M2'])).validate()
+        publish.assert_not_called()
+        fail_history.insert_vend_fail_history.assert_called_once()
+
+        VendonCloudValidator(vendon_message(['M1', 'M2'])).validate()
+        self.assertEqual(publish.call_args[0][0]['vend_data'], [{'machine_ext_id': 'M1', 'machine_vendon_id': 10}])
+        self.assertEqual((publish.call_args[0][0]['batch_no'], publish.call_args[0][0]['is_last']), (1, True))
+
+    def test_skipped_batch_doesnt_finish_job(self, machines, publish, fail_history, process_logger):
+        VendonCloudValidator(vendon_message(['M2'], batch_no=1, is_last=False)).validate()
+        VendonCloudValidator(vendon_message(['M2'], batch_no=2, is_last=False)).validate()
+        publish.assert_not_called()
+        fail_history.insert_vend_fail_history.assert_not_called()
+
+    def test_last_batch_finishes_job(self, machines, publish, fail_history, process_logger):
+        VendonCloudValidator(vendon_message(['M1'], batch_no=1, is_last=False)).validate()
+        self.assertEqual(publish.call_args[0][0]['is_last'], False)
+
+        VendonCloudValidator(vendon_message(['M2'], batch_no=2, is_last=True)).validate()
+        self.assertEqual(publish.call_count, 2)
+        self.assertEqual(publish.call_args[0][0]['vend_data'], [])
+        self.assertEqual((publish.call_args[0][0]['batch_no'], publish.call_args[0][0]['is_last']), (2, True))
+        fail_history.insert_vend_fail_history.assert_not_called()
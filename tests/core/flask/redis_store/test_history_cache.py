@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from unittest import TestCase
+
+from core.flask.redis_store.history_cache import HistoryCache, HIT, MISS, STALE
+
+
+class FakeLock(object):
+    locks = {}
+    guard = threading.Lock()
+
+    def __init__(self, name):
+        with FakeLock.guard:
+            self.lock = FakeLock.locks.setdefault(name, threading.Lock())
+
+    def acquire(self, blocking=True, blocking_timeout=None):
+        if not blocking:
+            return self.lock.acquire(False)
+        return self.lock.acquire(timeout=blocking_timeout if blocking_timeout is not None else -1)
+
+    def release(self):
+        self.lock.release()
+
+
+class FakeRedis(object):
+    """
+    In memory redis with commands used by HistoryCache
+    """
+    def __init__(self):
+        self.data = {}
+        self.guard = threading.Lock()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        with self.guard:
+            self.data[key] = str(int(self.data.get(key, 0)) + 1)
+            return int(self.data[key])
+
+    def lock(self, name, timeout=None):
+        return FakeLock(name)
+
+
+class TestHistoryCache(TestCase):
+    def setUp(self):
+        HistoryCache.client = FakeRedis()
+        HistoryCache.config = dict(HistoryCache.config, ttl=20, ttl_jitter=5, wait_timeout=5)
+        FakeLock.locks = {}
+
+    def test_hit_after_miss(self):
+        calls = []
+        compute = lambda: calls.append(1) or ['history']
+        self.assertEqual(HistoryCache.get_or_compute(1, 'key', compute), ['history'])
+        self.assertEqual(HistoryCache.get_or_compute(1, 'key', compute), ['history'])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(HistoryCache.stats(), {HIT: 1, STALE: 0, MISS: 1})
+
+    def test_single_flight(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return ['history']
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(HistoryCache.get_or_compute(1, 'key', compute)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['history']] * 8)
+
+    def test_stale_while_revalidate(self):
+        HistoryCache.get_or_compute(1, 'key', lambda: ['old'])
+        # Fresh TTL is over
+        HistoryCache.config = dict(HistoryCache.config, ttl=-100, ttl_jitter=0)
+        HistoryCache.write(1, 'key', ['old'], HistoryCache.company_version(1))
+
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return ['new']
+
+        self.assertEqual(HistoryCache.get_or_compute(1, 'key', compute), ['old'])
+        self.assertTrue(refreshed.wait(1))
+        time.sleep(0.05)
+        self.assertEqual(HistoryCache.read(1, 'key')[0], ['new'])
+
+    def test_invalidate_company(self):
+        HistoryCache.get_or_compute(1, 'key', lambda: ['old'])
+        HistoryCache.get_or_compute(2, 'key', lambda: ['other company'])
+        HistoryCache.invalidate_company(1)
+        self.assertEqual(HistoryCache.get_or_compute(1, 'key', lambda: ['new']), ['new'])
+        self.assertEqual(HistoryCache.get_or_compute(2, 'key', lambda: ['new']), ['other company'])
+
+    def test_value_computed_before_invalidation_is_not_used(self):
+        def compute():
+            # History is inserted while value is computed
+            HistoryCache.invalidate_company(1)
+            return ['old']
+
+        HistoryCache.get_or_compute(1, 'key', compute)
+        self.assertEqual(HistoryCache.read(1, 'key'), (None, MISS))
+
+    def test_ttl_jitter(self):
+        HistoryCache.config = dict(HistoryCache.config, ttl=20, ttl_jitter=10)
+        fresh_until = set()
+        for key in range(20):
+            HistoryCache.write(1, key, [], 0)
+            entry = json.loads(HistoryCache.client.get(HistoryCache.value_key(1, key)))
+            fresh_until.add(round(entry['fresh_until'] - time.time()))
+        self.assertTrue(all(19 <= ttl <= 30 for ttl in fresh_until))
+        self.assertGreater(len(fresh_until), 1)
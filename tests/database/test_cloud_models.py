@@ -0,0 +1,46 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, join, select, update
+from sqlalchemy.ext.automap import automap_base
+from sqlalchemy.orm import aliased
+
+from database.cloud_database.models.models import CloudModel
+
+
+def cloud_base():
+    metadata = MetaData()
+    Table('regions', metadata, Column('id', Integer, primary_key=True), Column('name', String),
+          Column('parent_id', Integer, ForeignKey('regions.id')))
+    Table('machines', metadata, Column('id', Integer, primary_key=True), Column('region_id', Integer))
+    base = automap_base(metadata=metadata)
+    base.prepare()
+    return base
+
+
+class TestCloudModel(TestCase):
+    def setUp(self):
+        self.base = cloud_base()
+        patcher = patch('database.cloud_database.models.models.get_cloud_base', return_value=self.base)
+        self.get_cloud_base = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_model_is_resolved_on_first_use(self):
+        machine = CloudModel('machines')
+        self.get_cloud_base.assert_not_called()
+        self.assertIs(machine.id, self.base.classes.machines.id)
+        self.assertIs(machine.__table__, self.base.classes.machines.__table__)
+        machine.region_id
+        self.get_cloud_base.assert_called_once_with()
+
+    def test_model_in_queries(self):
+        machine, region = CloudModel('machines'), CloudModel('regions')
+        parent = aliased(region)
+        query = select([machine.id, parent.name]).select_from(
+            join(machine, region, machine.region_id == region.id).outerjoin(parent, region.parent_id == parent.id))
+        self.assertEqual(
+            ' '.join(str(query).split()),
+            'SELECT machines.id, regions_1.name FROM machines JOIN regions ON machines.region_id = regions.id '
+            'LEFT OUTER JOIN regions AS regions_1 ON regions.parent_id = regions_1.id')
+        self.assertEqual(str(select([region]).where(region.id == 1)).split('\n')[1], 'FROM regions ')
+        self.assertEqual(str(update(machine).values(region_id=2)), 'UPDATE machines SET region_id=:region_id')
@@ -0,0 +1,47 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from database.pool import ConnectionLeakDetector, engine_pool_options, watch_connection_leaks
+
+
+class TestPoolOptions(TestCase):
+    def test_config_overrides_defaults(self):
+        options = engine_pool_options({'pool_size': 5, 'pool_pre_ping': True, 'leak_timeout': 300},
+                                      pool_size=20, max_overflow=100)
+        self.assertEqual(options, {'pool_size': 5, 'max_overflow': 100, 'pool_pre_ping': True})
+
+    def test_empty_config(self):
+        self.assertEqual(engine_pool_options({}), {})
+
+
+class TestConnectionLeakDetector(TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite://', poolclass=QueuePool, pool_size=2, max_overflow=0)
+
+    def test_disabled_without_leak_timeout(self):
+        self.assertIsNone(watch_connection_leaks(self.engine, 'Test', {}))
+
+    def test_returned_connection_is_not_leak(self):
+        detector = watch_connection_leaks(self.engine, 'Test', {'leak_timeout': 60})
+        with self.engine.connect():
+            self.assertEqual(len(detector.checked_out), 1)
+        self.assertEqual(detector.checked_out, {})
+
+    def test_leak_is_reported_once(self):
+        detector = watch_connection_leaks(self.engine, 'Test', {'leak_timeout': 60})
+        with patch('database.pool.time.time', return_value=1000):
+            leaked = self.engine.connect()
+        with patch('database.pool.time.time', return_value=1100), \
+                patch('database.pool.logger_api') as logger_api:
+            self.assertEqual(detector.leaked_connections(), 1)
+            with self.engine.connect():
+                pass
+            with self.engine.connect():
+                pass
+        self.assertEqual(logger_api.warning.call_count, 1)
+        self.assertIn('test_leak_is_reported_once', logger_api.warning.call_args[0][0])
+        leaked.close()
+        self.assertIsInstance(detector, ConnectionLeakDetector)
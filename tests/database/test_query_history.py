@@ -0,0 +1,53 @@
+import uuid
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy.dialects import postgresql
+
+from database.company_database.core.query_history import CloudRequestHistory, history_after_values
+
+
+class TestHistoryAfterValues(TestCase):
+    def test_cursor_values(self):
+        history_id = uuid.uuid4()
+        self.assertEqual(history_after_values(['2019-05-01T10:00:00.123456', str(history_id)]),
+                         (datetime(2019, 5, 1, 10, 0, 0, 123456), history_id))
+
+    def test_invalid_cursor_values(self):
+        for after in [['2019-05-01T10:00:00'], [1556704800000, 'company_process#abc'],
+                      ['2019-05-01T10:00:00', 'not uuid'], ['not date', str(uuid.uuid4())]]:
+            with self.assertRaises(ValueError):
+                history_after_values(after)
+
+
+class TestHistoryQuery(TestCase):
+    def test_masterdata_and_vend_history_in_one_query(self):
+        query = str(CloudRequestHistory.history_fail_and_success_query(1, '2019-05-01', '2019-05-31').compile(
+            dialect=postgresql.dialect()))
+        for table in ['cloud_company_process_fail_history', 'cloud_company_history', 'vend_fail_history',
+                      'vend_success_history']:
+            self.assertIn('FROM {} '.format(table), query)
+        self.assertEqual(query.count('UNION ALL'), 3)
+        self.assertIn('ORDER BY history.created_at DESC, history.id DESC', query)
+
+    def test_vend_rows_use_vend_processes(self):
+        rows = [
+            {'id': uuid.uuid4(), 'elastic_hash': 'masterdata', 'vend': False, 'fail': False, 'partial': False,
+             'import_type': 1, 'import_error_type': None, 'file_path': 'a.csv', 'created_at': datetime(2019, 5, 2),
+             'data_hash': 'a', 'full_name': 'User', 'cloud_results': None},
+            {'id': uuid.uuid4(), 'elastic_hash': 'vend', 'vend': True, 'fail': False, 'partial': True,
+             'import_type': 1, 'import_error_type': None, 'file_path': 'b.zip', 'created_at': datetime(2019, 5, 1),
+             'data_hash': 'b', 'full_name': 'User', 'cloud_results': None},
+        ]
+        process = {'process_request_type': 'FILE'}
+        with patch('database.company_database.core.query_history.GetCompanyProcessLog') as company_log, \
+                patch('database.company_database.core.query_history.GetVendImportProcessLog') as vend_log:
+            company_log.get_processes_by_hashes.return_value = {'results': {'masterdata': process}}
+            vend_log.get_processes_by_hashes.return_value = {'results': {'vend': process}}
+            result = CloudRequestHistory.history_with_process(1, rows, False)
+
+        company_log.get_processes_by_hashes.assert_called_once_with(1, ['masterdata'], False)
+        vend_log.get_processes_by_hashes.assert_called_once_with(1, ['vend'], False)
+        self.assertEqual([x['hash'] for x in result], ['masterdata', 'vend'])
+        self.assertEqual(result[1]['error_type'], 'WARNING')
@@ -0,0 +1,159 @@
+import threading
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from elasticsearch_component.core.buffer import MAX_FLUSH_ATTEMPTS, ProcessFlowBuffer, flush_process_flow_buffers
+
+
+def bulk_ok(client, actions, **kwargs):
+    return len(actions), []
+
+
+def process_buffer(**kwargs):
+    options = dict(max_entries=1000, flush_interval=1000, client=MagicMock())
+    options.update(kwargs)
+    flow_buffer = ProcessFlowBuffer('company_process', lambda process_hash: 'company_process_index', **options)
+    # Periodic flush is not started in tests
+    flow_buffer.flush_thread = threading.Thread()
+    return flow_buffer
+
+
+class TestProcessFlowBuffer(TestCase):
+    @patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_ok)
+    def test_flush_entries_in_order(self, bulk):
+        flow_buffer = process_buffer()
+        flow_buffer.add('a', 'process', {'message': 1})
+        flow_buffer.add('b', 'process', {'message': 2}, status='IN_PROGRESS')
+        flow_buffer.add('a', 'process_cloud', {'message': 3})
+        self.assertEqual(flow_buffer.pending_count, 3)
+        bulk.assert_not_called()
+
+        self.assertEqual(flow_buffer.flush(), 3)
+        actions = {x['_id']: x for x in bulk.call_args[0][1]}
+        self.assertEqual(actions['a']['_index'], 'company_process_index')
+        self.assertEqual([x['value']['message'] for x in actions['a']['script']['params']['entries']], [1, 3])
+        self.assertEqual(actions['b']['script']['params']['status'], 'IN_PROGRESS')
+        self.assertFalse(actions['b']['script']['params']['final'])
+        self.assertEqual(flow_buffer.pending_count, 0)
+
+    @patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_ok)
+    def test_flush_on_max_entries(self, bulk):
+        flow_buffer = process_buffer(max_entries=2)
+        flow_buffer.add('a', 'process', {'message': 1})
+        bulk.assert_not_called()
+        flow_buffer.add('a', 'process', {'message': 2})
+        bulk.assert_called_once()
+        self.assertEqual(flow_buffer.pending, {})
+
+    @patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_ok)
+    def test_final_status(self, bulk):
+        flow_buffer = process_buffer()
+        flow_buffer.add('a', 'process', {'message': 1}, status='IN_PROGRESS')
+        flow_buffer.add('b', 'process', {'message': 2})
+        flow_buffer.set_status('a', 'SUCCESS')
+
+        action = bulk.call_args[0][1][0]
+        self.assertEqual(action['_id'], 'a')
+        self.assertEqual(action['script']['params']['status'], 'SUCCESS')
+        self.assertTrue(action['script']['params']['final'])
+        self.assertIn('b', flow_buffer.pending)
+
+        # Flow entry buffered after final status doesn't change status
+        with patch.object(flow_buffer, 'flush'):
+            flow_buffer.set_status('c', 'ERROR')
+        flow_buffer.add('c', 'process', {'message': 3}, status='IN_PROGRESS')
+        self.assertEqual(flow_buffer.pending['c']['status'], 'ERROR')
+        self.assertTrue(flow_buffer.pending['c']['final'])
+
+    def test_unknown_process(self):
+        flow_buffer = ProcessFlowBuffer('company_process', lambda process_hash: None, client=MagicMock())
+        self.assertFalse(flow_buffer.add('a', 'process', {}))
+        self.assertFalse(flow_buffer.set_status('a', 'SUCCESS'))
+
+    def test_failed_actions_are_requeued(self):
+        flow_buffer = process_buffer()
+        flow_buffer.add('a', 'process', {'message': 1}, status='IN_PROGRESS')
+        flow_buffer.add('b', 'process', {'message': 2})
+
+        def bulk_fail_a(client, actions, **kwargs):
+            # Entry buffered while bulk request is sent
+            flow_buffer.add('a', 'process', {'message': 3})
+            return 1, [{'update': {'_id': 'a', 'status': 503, 'error': 'unavailable'}}]
+
+        with patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_fail_a):
+            self.assertEqual(flow_buffer.flush(), 1)
+
+        self.assertEqual(list(flow_buffer.pending), ['a'])
+        self.assertEqual([x['value']['message'] for x in flow_buffer.pending['a']['entries']], [1, 3])
+        self.assertEqual(flow_buffer.pending['a']['status'], 'IN_PROGRESS')
+        self.assertEqual(flow_buffer.pending_count, 2)
+
+    def test_exception_requeues_all_and_falls_back_to_document_update(self):
+        client = MagicMock()
+        flow_buffer = process_buffer(client=client)
+        flow_buffer.add('a', 'process', {'message': 1})
+
+        with patch('elasticsearch_component.core.buffer.bulk', side_effect=ConnectionError('elastic down')):
+            for _ in range(MAX_FLUSH_ATTEMPTS - 1):
+                self.assertEqual(flow_buffer.flush(), 0)
+                self.assertEqual(flow_buffer.pending_count, 1)
+            client.update.assert_not_called()
+
+            self.assertEqual(flow_buffer.flush(), 1)
+
+        self.assertEqual(flow_buffer.pending, {})
+        self.assertEqual(client.update.call_args[1]['id'], 'a')
+        self.assertEqual(client.update.call_args[1]['body']['script']['params']['entries'],
+                         [{'field': 'process', 'value': {'message': 1}}])
+
+    def test_bulk_is_sent_without_lock(self):
+        flow_buffer = process_buffer()
+        flow_buffer.add('a', 'process', {'message': 1})
+        lock_free = []
+
+        def try_lock():
+            acquired = flow_buffer.lock.acquire(timeout=1)
+            if acquired:
+                flow_buffer.lock.release()
+            lock_free.append(acquired)
+
+        def bulk_check_lock(client, actions, **kwargs):
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return len(actions), []
+
+        with patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_check_lock):
+            flow_buffer.flush()
+        self.assertEqual(lock_free, [True])
+
+    def test_index_cache_eviction_keeps_pending(self):
+        with patch('elasticsearch_component.core.buffer.MAX_CACHED_INDEXES', 2):
+            flow_buffer = process_buffer()
+            flow_buffer.add('a', 'process', {'message': 1})
+            flow_buffer.add('b', 'process', {'message': 2})
+            with patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_ok):
+                flow_buffer.flush('b')
+            flow_buffer.add('c', 'process', {'message': 3})
+            self.assertEqual(sorted(flow_buffer.indexes), ['a', 'c'])
+
+            with patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_ok):
+                self.assertEqual(flow_buffer.flush(), 2)
+
+    @patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_ok)
+    def test_pending_process_keeps_index(self, bulk):
+        flow_buffer = process_buffer()
+        flow_buffer.add('a', 'process', {'message': 1})
+        # Index cache is evicted by other thread after entry is buffered
+        flow_buffer.indexes = {}
+        self.assertEqual(flow_buffer.flush(), 1)
+        self.assertEqual(bulk.call_args[0][1][0]['_index'], 'company_process_index')
+
+    @patch('elasticsearch_component.core.buffer.bulk', side_effect=bulk_ok)
+    def test_flush_process_flow_buffers(self, bulk):
+        flow_buffer = process_buffer()
+        flow_buffer.add('a', 'process', {'message': 1})
+        with patch('elasticsearch_component.core.buffer.process_flow_buffers', [flow_buffer]):
+            flush_process_flow_buffers()
+        self.assertEqual(flow_buffer.pending, {})
+        bulk.assert_called_once()
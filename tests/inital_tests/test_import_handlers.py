@@ -4,6 +4,7 @@ from unittest import TestCase
 
 from common.importers.cloud_db.common import (
     BaseImportObject,
+    CopyRowStream,
     BaseImportHandler,
     IdField,
     Field,
@@ -187,6 +188,93 @@ class ImportHandlerTest(TestCase):
         except:
             self.assertTrue(False)
 
+    def test_populate_ref_fields_from_handler(self):
+        import_data1 = [
+            {"test_name": "Test A", "test_id": "TEST_A", "test_action": "0"},
+            {"test_name": "Test B", "test_id": "TEST_B", "test_action": "0"},
+        ]
+
+        import_data2 = [
+            {
+                "test_with_ref_name": "Test with ref {}".format(name),
+                "test_with_ref_id": "TEST_REF_{}".format(name),
+                "owner_caption": "Test {}".format(name),
+                "owner_external_id": "TEST_{}".format(name),
+                "test_with_ref_action": "0",
+            }
+            for name in ("B", "A")
+        ]
+
+        TestImportHandler.get_available_ids = mock_get_available_ids
+        TestObjectWithReferenceImportHandler.get_available_ids = mock_get_available_ids
+
+        import_handler1 = TestImportHandler(import_data1, 0)
+        import_handler1.populate_insert_objs_ids()
+
+        import_handler2 = TestObjectWithReferenceImportHandler(import_data2, 0)
+        import_handler2.populate_insert_objs_ids()
+        import_handler2.populate_ref_fields("owner", import_handler1)
+
+        self.assertEqual([r.get_str() for r in import_handler2.objs_to_insert], ["1;2", "2;1"])
+        self.assertEqual(list(import_handler1.insert_indexes), [("caption", "external_id")])
+
+    def test_action_50_deletes_missing_objects(self):
+        db_objects = [
+            {"id": 1, "ext_id": "TEST_A", "alive": True},
+            {"id": 2, "ext_id": "TEST_B", "alive": True},
+            {"id": 3, "ext_id": "TEST_C", "alive": False},
+        ]
+
+        class TestDatabaseObject(BaseImportObject):
+            def __init__(self, obj, company_id, alive, db_obj=None):
+                self.fields = OrderedDict([("external_id", Field(value=obj["test_id"] if obj else db_obj["ext_id"]))])
+                self.db_obj = db_obj
+
+        class TestDatabaseImportHandler(TestImportHandler):
+            IMPORT_TYPE = TestDatabaseObject
+            DB_ID = "ext_id"
+
+            def get_all_objs_from_database(self, company_id, external_ids=None):
+                return db_objects
+
+        import_data = [
+            {"test_name": "Test A", "test_id": "TEST_A", "test_action": "50"},
+            {"test_name": "Test C", "test_id": "TEST_C", "test_action": "50"},
+        ]
+
+        import_handler = TestDatabaseImportHandler(import_data, 0)
+
+        self.assertEqual([r.db_obj["id"] for r in import_handler.objs_to_update], [1])
+        self.assertEqual([r.fields["external_id"].value for r in import_handler.objs_to_insert], ["TEST_C"])
+        self.assertEqual([r.db_obj["id"] for r in import_handler.objs_to_delete], [2])
+
+    def test_copy_line_escaping(self):
+        row = TestObject({"test_name": 'Test "A";\nnew line', "test_id": "/N"}, 0, True)
+        row.fields["id"].set_id(1)
+
+        self.assertEqual(
+            row.get_copy_line(["id", "caption", "external_id"]),
+            '"1";"Test ""A"";\nnew line";/N\n'.encode("utf-8"),
+        )
+
+    def test_copy_row_stream(self):
+        rows = []
+        for index in range(100):
+            row = TestObject({"test_name": "Test {}".format(index), "test_id": "TEST_{}".format(index)}, 0, True)
+            row.fields["id"].set_id(index + 1)
+            rows.append(row)
+
+        stream = CopyRowStream(rows, ["id", "caption"])
+        chunks = []
+        chunk = stream.read(64)
+        while chunk:
+            self.assertLessEqual(len(chunk), 64)
+            chunks.append(chunk)
+            chunk = stream.read(64)
+
+        self.assertEqual(b"".join(chunks), b"".join(r.get_copy_line(["id", "caption"]) for r in rows))
+        self.assertEqual(CopyRowStream(rows[:2], ["id"]).read(), b'"1"\n"2"\n')
+
 
 if __name__ == "__main__":
     unittest.main()